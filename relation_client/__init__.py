@@ -7,6 +7,8 @@ Re:lationのAPIを簡単に利用するためのPythonライブラリです。
 __version__ = '0.1.0'
 
 from .client import RelationClient  # noqa
+from .async_client import AsyncRelationClient  # noqa
+from .pool import RelationClientPool  # noqa
 from .models import (
     Customer, CustomerGroup, Email, Tel,
     Ticket, Message, Comment, Attachment,
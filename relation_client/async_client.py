@@ -0,0 +1,521 @@
+"""
+Re:lation API非同期クライアント
+
+このモジュールは、asyncio上で動作する非同期版のAPIクライアントクラスを提供します。
+HTTP通信には httpx のノンブロッキングなコネクションプールを利用するため、
+1プロセスで数百件のリクエストを同時に処理できます。
+"""
+
+import asyncio
+import inspect
+import time
+from typing import Awaitable, Dict, Any, Optional, List, Tuple, TypeVar, Union
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - httpx はオプション依存
+    httpx = None
+
+from .constants import API_VERSION, HTTP_TOO_MANY_REQUESTS
+from .exceptions import APIConnectionError, DeadlineExceededError, OperationCancelledError
+from .client import build_base_url, default_retry_policy
+from .codec import JSONCodec, decode_response, default_codec
+from .middleware import RETRYABLE_STATUS_CODES, error_from_response
+from .rate_limit import RateLimitGovernor, RateLimitStatus, SharedRateLimiter
+from .circuit_breaker import CircuitBreaker
+from .concurrency import AdaptiveConcurrencyLimiter, ConcurrencyStatus
+from .deadline import (
+    CancellationToken, Deadline, current_deadline, current_token, deadline_scope, earliest, to_deadline
+)
+from .retry import RetryPolicy, parse_retry_after
+from .resources.customers import CustomerResource
+from .resources.customer_groups import CustomerGroupResource
+from .resources.tickets import TicketResource
+from .resources.chats import ChatResource
+from .resources.message_boxes import MessageBoxResource
+from .resources.pending_reasons import PendingReasonResource
+from .resources.users import UserResource
+from .resources.case_categories import CaseCategoryResource
+from .resources.labels import LabelResource
+from .resources.badges import BadgeResource
+from .resources.mail_accounts import MailAccountResource
+from .resources.mails import MailResource
+from .resources.templates import TemplateResource
+from .resources.attachments import AttachmentResource
+
+# 同時実行数の実行枠が空くのを待つ間に再確認する間隔 (秒)
+CONCURRENCY_POLL_INTERVAL = 0.05
+
+T = TypeVar('T')
+
+
+class _RequestCaptured(BaseException):
+    """リソースメソッドが発行しようとしたリクエストを捕捉するためのシグナル
+
+    リソース側の ``except Exception`` に捕まらないよう BaseException を継承しています。
+    """
+
+    def __init__(self, call: Tuple[str, str, Optional[Dict[str, Any]], Optional[Dict[str, Any]]]):
+        super().__init__()
+        self.call = call
+
+
+class _ReplayClient:
+    """リソースメソッドを同期的に再実行するためのスタブクライアント
+
+    既に取得済みのレスポンスは順番に返し、未取得のリクエストに到達した時点で
+    ``_RequestCaptured`` を送出してリクエスト内容を呼び出し元に伝えます。
+    """
+
+    def __init__(self, responses: List[Any]):
+        self._responses = responses
+        self._index = 0
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        json_data: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        if self._index < len(self._responses):
+            response = self._responses[self._index]
+            self._index += 1
+            return response
+        raise _RequestCaptured((method, path, params, json_data))
+
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        return self.request('GET', path, params=params)
+
+    def post(self, path: str, data: Optional[Dict[str, Any]] = None) -> Any:
+        return self.request('POST', path, json_data=data)
+
+    def put(self, path: str, data: Optional[Dict[str, Any]] = None) -> Any:
+        return self.request('PUT', path, json_data=data)
+
+    def delete(self, path: str) -> Any:
+        return self.request('DELETE', path)
+
+
+class AsyncResource:
+    """同期リソースクラスを非同期メソッドとして公開するラッパー
+
+    リソースクラスのメソッドは「パラメータの組み立て → APIリクエスト → モデルへの変換」
+    という構成になっています。このラッパーはメソッドをスタブクライアント上で実行して
+    リクエスト内容を取得し、非同期クライアントで送信したあと、取得したレスポンスを
+    与えて再実行することで、同期版と全く同じ結果を返します。
+    """
+
+    def __init__(self, resource_class: type, client: 'AsyncRelationClient'):
+        """初期化
+
+        Args:
+            resource_class: ラップするリソースクラス (例: TicketResource)
+            client: AsyncRelationClientインスタンス
+        """
+        self._resource_class = resource_class
+        self.client = client
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._resource_class, name)
+        if name.startswith('_') or not callable(attr):
+            raise AttributeError(name)
+        if inspect.isgeneratorfunction(attr):
+            # stream_search() などのストリーミングのメソッドは同期クライアントのみ
+            raise AttributeError(f"{name} は AsyncRelationClient では利用できません")
+
+        async def method(*args, **kwargs):
+            responses: List[Any] = []
+            while True:
+                resource = self._resource_class(_ReplayClient(responses))
+                try:
+                    return getattr(resource, name)(*args, **kwargs)
+                except _RequestCaptured as captured:
+                    method_, path, params, json_data = captured.call
+                    responses.append(
+                        await self.client.request(method_, path, params=params, json_data=json_data)
+                    )
+
+        method.__name__ = name
+        method.__doc__ = attr.__doc__
+        return method
+
+
+class AsyncRelationClient:
+    """Re:lation API非同期クライアント
+
+    RelationClientと同じリソース構成・例外・リトライ動作を持つ asyncio 版のクライアントです。
+    各リソースのメソッドはコルーチンになります。
+
+    Example:
+        async with AsyncRelationClient(access_token, subdomain) as client:
+            tickets = await client.tickets.search(message_box_id=1)
+    """
+
+    def __init__(
+        self,
+        access_token: str,
+        subdomain: str,
+        api_version: str = API_VERSION,
+        timeout: int = 30,
+        max_retries: int = 3,
+        retry_delay: int = 1,
+        base_url: Optional[str] = None,
+        max_connections: int = 100,
+        rate_limit_margin: int = 0,
+        rate_limiter: Union[RateLimitGovernor, SharedRateLimiter, None] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        http2: bool = False,
+        http1: bool = True,
+        json_codec: Optional[JSONCodec] = None
+    ):
+        """AsyncRelationClientを初期化します
+
+        Args:
+            access_token: APIアクセストークン
+            subdomain: ご利用のサブドメイン
+            api_version: APIバージョン (デフォルト: v2)
+            timeout: リクエストタイムアウト秒数
+            max_retries: リトライ最大回数
+            retry_delay: リトライ間の待機秒数 (指数バックオフの基準値)
+            base_url: APIのベースURL (省略時はサブドメインから生成)
+            max_connections: コネクションプールの最大接続数
+            rate_limit_margin: レートリミットの残りリクエスト数のうち、使い切らずに残しておく件数
+            rate_limiter: 利用するレートリミッター (複数プロセスで予算を共有する場合は
+                SharedRateLimiterを指定。省略時はRateLimitGovernorを生成)
+            retry_policy: リトライポリシー (省略時は max_retries と retry_delay から
+                指数バックオフのポリシーを生成)
+            circuit_breaker: サーキットブレーカー (省略時は無効)
+            concurrency_limiter: 同時実行数を自動調整するリミッター (省略時は無効)
+            http2: HTTP/2で1本の接続にリクエストを多重化するかどうか (h2 が必要)
+            http1: HTTP/1.1を有効にするかどうか (False にすると平文でもHTTP/2を使う)
+            json_codec: リクエストボディのエンコードとレスポンスのデコードに使うJSONコーデック
+                (省略時は orjson がインストールされていれば OrjsonCodec、なければ StdlibJSONCodec)
+
+        Raises:
+            ImportError: httpx がインストールされていない場合
+        """
+        if httpx is None:
+            raise ImportError(
+                "AsyncRelationClientを利用するには httpx が必要です: "
+                "pip install 'relation-client[async]'"
+            )
+
+        self.access_token = access_token
+        self.subdomain = subdomain
+        self.api_version = api_version
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_connections = max_connections
+        self.http2 = http2
+        self.http1 = http1
+        self.json_codec = json_codec or default_codec()
+
+        self._base_url = build_base_url(self.subdomain, self.api_version, base_url)
+        if rate_limiter is None:
+            rate_limiter = RateLimitGovernor(safety_margin=rate_limit_margin)
+        self.rate_limiter = rate_limiter
+        if retry_policy is None:
+            retry_policy = default_retry_policy(max_retries, retry_delay)
+        self.retry_policy = retry_policy
+        self.max_retries = retry_policy.max_retries
+        self.circuit_breaker = circuit_breaker
+        self.concurrency_limiter = concurrency_limiter
+        self._concurrency_released: Optional[asyncio.Event] = None
+        self._headers = {
+            'Authorization': f'Bearer {self.access_token}',
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+        }
+        self._client: Optional['httpx.AsyncClient'] = None
+
+        # リソースの初期化
+        self.customers = AsyncResource(CustomerResource, self)
+        self.customer_groups = AsyncResource(CustomerGroupResource, self)
+        self.tickets = AsyncResource(TicketResource, self)
+        self.chats = AsyncResource(ChatResource, self)
+        self.message_boxes = AsyncResource(MessageBoxResource, self)
+        self.pending_reasons = AsyncResource(PendingReasonResource, self)
+        self.users = AsyncResource(UserResource, self)
+        self.case_categories = AsyncResource(CaseCategoryResource, self)
+        self.labels = AsyncResource(LabelResource, self)
+        self.badges = AsyncResource(BadgeResource, self)
+        self.mail_accounts = AsyncResource(MailAccountResource, self)
+        self.mails = AsyncResource(MailResource, self)
+        self.templates = AsyncResource(TemplateResource, self)
+        self.attachments = AsyncResource(AttachmentResource, self)
+
+    def _get_http_client(self) -> 'httpx.AsyncClient':
+        """httpx.AsyncClientを取得します (初回呼び出し時に生成)"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=self._headers,
+                timeout=self.timeout,
+                http1=self.http1,
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """コネクションプールを閉じます"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self) -> 'AsyncRelationClient':
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.aclose()
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        json_data: Optional[Dict[str, Any]] = None,
+        deadline: Union[Deadline, float, None] = None,
+    ) -> Dict[str, Any]:
+        """APIリクエストを実行します
+
+        デッドラインとキャンセルトークンの扱いは RelationClient.request() と同じです。
+        送信中にデッドラインを過ぎた場合やキャンセルされた場合は、送信中のリクエストも中断します。
+
+        Args:
+            method: HTTPメソッド (GET, POST, PUT, DELETE)
+            path: APIパス (先頭の / は不要)
+            params: クエリパラメータ
+            data: リクエストボディ (form-data)
+            json_data: リクエストボディ (JSON)
+            deadline: この呼び出しのデッドライン (秒数または Deadline)
+
+        Returns:
+            レスポンスの辞書表現
+
+        Raises:
+            RelationClient.request() と同じ例外を送出します。
+        """
+        url = f"{self._base_url}/{path.lstrip('/')}"
+        http_client = self._get_http_client()
+        deadline = earliest(current_deadline(), to_deadline(deadline))
+        token = current_token()
+
+        self.retry_policy.record_request()
+        retry_count = 0
+        while True:
+            if token is not None:
+                token.check()
+            if deadline is not None:
+                deadline.check()
+            try:
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.before_request()
+                wait = self.rate_limiter.reserve()
+                if wait > 0:
+                    await self._sleep(wait, deadline, token)
+                response = await self._guard(
+                    self._send(http_client, method, url, params, data, json_data), deadline, token
+                )
+                self.rate_limiter.update(response.headers, response.status_code)
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.record_response(
+                        response.status_code, parse_retry_after(response.headers.get('Retry-After'))
+                    )
+
+                # レスポンスを処理
+                if response.status_code < 400:
+                    # 成功レスポンス
+                    if not response.content:
+                        return {}
+                    try:
+                        return decode_response(response, self.json_codec)
+                    except ValueError:
+                        return {"data": response.text}
+
+                # エラーレスポンスの処理
+                if response.status_code in RETRYABLE_STATUS_CODES and self._can_retry(retry_count):
+                    # レートリミット・メンテナンス時はリトライ
+                    await self._sleep(self._retry_wait(response, retry_count), deadline, token)
+                    retry_count += 1
+                    continue
+                raise error_from_response(response)
+
+            except httpx.TransportError as e:
+                # 接続エラーやタイムアウトのリトライ
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.record_failure()
+                if self._can_retry(retry_count):
+                    await self._sleep(self.retry_policy.wait_time(retry_count), deadline, token)
+                    retry_count += 1
+                    continue
+                raise APIConnectionError(f"接続エラー: {str(e)}")
+
+    async def _sleep(self, seconds: float, deadline: Optional[Deadline], token: Optional[CancellationToken]) -> None:
+        """デッドラインとキャンセルトークンを考慮して待機します"""
+        if deadline is not None and seconds > 0 and seconds >= deadline.remaining():
+            raise DeadlineExceededError(
+                f"待機時間 ({seconds:.3f}秒) がデッドラインまでの残り時間を超えるため処理を中止しました"
+            )
+        await self._guard(asyncio.sleep(seconds), deadline, token)
+
+    async def _guard(
+        self,
+        awaitable: Awaitable[T],
+        deadline: Optional[Deadline],
+        token: Optional[CancellationToken]
+    ) -> T:
+        """デッドラインとキャンセルトークンを監視しながら awaitable を実行します
+
+        デッドラインを過ぎるかキャンセルされた時点で awaitable を中断し、
+        DeadlineExceededError または OperationCancelledError を送出します。
+        """
+        if deadline is None and token is None:
+            return await awaitable
+
+        loop = asyncio.get_running_loop()
+        task = asyncio.ensure_future(awaitable)
+        waiters = {task}
+        cancelled = None
+        if token is not None:
+            cancelled = loop.create_future()
+
+            def notify() -> None:
+                # cancel() は別スレッドから呼ばれることがあるため、ループのスレッドで完了させる
+                loop.call_soon_threadsafe(lambda: cancelled.done() or cancelled.set_result(None))
+
+            token.add_callback(notify)
+            waiters.add(cancelled)
+        try:
+            done, _ = await asyncio.wait(
+                waiters,
+                timeout=None if deadline is None else deadline.remaining(),
+                return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            if cancelled is not None:
+                token.remove_callback(notify)
+                cancelled.cancel()
+        if task in done:
+            return task.result()
+
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        if token is not None and token.cancelled:
+            raise OperationCancelledError("キャンセルが要求されたため処理を中止しました")
+        raise DeadlineExceededError("デッドラインを過ぎたため処理を中止しました")
+
+    def deadline(
+        self,
+        seconds: Union[Deadline, float, None] = None,
+        token: Optional[CancellationToken] = None
+    ):
+        """ブロック内の全ての呼び出しにデッドラインとキャンセルトークンを適用します
+
+        RelationClient.deadline() と同じです。
+
+        Example:
+            with client.deadline(10):
+                tickets = await client.tickets.search(message_box_id=1)
+        """
+        return deadline_scope(seconds, token)
+
+    async def _send(
+        self,
+        http_client: 'httpx.AsyncClient',
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]],
+        data: Optional[Dict[str, Any]],
+        json_data: Optional[Dict[str, Any]]
+    ) -> 'httpx.Response':
+        """リクエストを送信します (同時実行数のリミッターが設定されている場合は実行枠を確保)"""
+        limiter = self.concurrency_limiter
+        content = None if json_data is None else self.json_codec.dumps(json_data)
+        if limiter is None:
+            return await http_client.request(method, url, params=params, data=data, content=content)
+
+        permit = await self._acquire_concurrency()
+        started = time.monotonic()
+        try:
+            response = await http_client.request(method, url, params=params, data=data, content=content)
+        except BaseException:
+            limiter.release(permit, failed=True)
+            self._concurrency_released.set()
+            raise
+        limiter.release(permit, time.monotonic() - started, response.status_code)
+        self._concurrency_released.set()
+        return response
+
+    async def _acquire_concurrency(self) -> int:
+        """イベントループをブロックせずに同時実行数の実行枠を確保します"""
+        if self._concurrency_released is None:
+            self._concurrency_released = asyncio.Event()
+        while True:
+            permit = self.concurrency_limiter.try_acquire()
+            if permit is not None:
+                return permit
+            self._concurrency_released.clear()
+            # 他のスレッドと共有している場合に備え、通知がなくても定期的に再確認する
+            try:
+                await asyncio.wait_for(self._concurrency_released.wait(), CONCURRENCY_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    @property
+    def concurrency_status(self) -> Optional[ConcurrencyStatus]:
+        """同時実行数のリミッターの状態 (リミッターが未設定の場合は None)"""
+        if self.concurrency_limiter is None:
+            return None
+        return self.concurrency_limiter.status
+
+    @property
+    def rate_limit_status(self) -> RateLimitStatus:
+        """X-RateLimit-* ヘッダーから取得した最新のレートリミットの状態"""
+        return self.rate_limiter.status
+
+    def _can_retry(self, retry_count: int) -> bool:
+        """リトライしてよいかどうかを判定します (ブレーカーが開いた場合は即座に失敗させる)"""
+        if self.circuit_breaker is not None and self.circuit_breaker.is_open:
+            return False
+        return self.retry_policy.allow_retry(retry_count)
+
+    def _retry_wait(self, response: 'httpx.Response', retry_count: int) -> float:
+        """リトライ前の待機秒数を返します"""
+        retry_after = None
+        if response.status_code == HTTP_TOO_MANY_REQUESTS:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        return self.retry_policy.wait_time(retry_count, retry_after)
+
+    async def get(
+        self, path: str, params: Optional[Dict[str, Any]] = None, deadline: Union[Deadline, float, None] = None
+    ) -> Dict[str, Any]:
+        """GETリクエストを実行"""
+        return await self.request('GET', path, params=params, deadline=deadline)
+
+    async def post(
+        self, path: str, data: Optional[Dict[str, Any]] = None, deadline: Union[Deadline, float, None] = None
+    ) -> Dict[str, Any]:
+        """POSTリクエストを実行"""
+        return await self.request('POST', path, json_data=data, deadline=deadline)
+
+    async def put(
+        self, path: str, data: Optional[Dict[str, Any]] = None, deadline: Union[Deadline, float, None] = None
+    ) -> Dict[str, Any]:
+        """PUTリクエストを実行"""
+        return await self.request('PUT', path, json_data=data, deadline=deadline)
+
+    async def delete(self, path: str, deadline: Union[Deadline, float, None] = None) -> Dict[str, Any]:
+        """DELETEリクエストを実行"""
+        return await self.request('DELETE', path, deadline=deadline)
@@ -0,0 +1,122 @@
+"""
+バッチ実行モジュール
+
+このモジュールは、複数のAPI呼び出しをスレッドプールで並列に実行し、
+投入順に結果を返すためのクラスを提供します。
+"""
+
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+
+@dataclass
+class BatchResult:
+    """バッチ実行の1件分の結果
+
+    呼び出しが例外を送出した場合は ``exception`` に格納され、
+    他の呼び出しの実行は継続されます。
+    """
+    item: Any = None
+    value: Any = None
+    exception: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        """呼び出しが成功したかどうか"""
+        return self.exception is None
+
+    def get(self) -> Any:
+        """結果を返します (呼び出しが失敗していた場合はその例外を送出)"""
+        if self.exception is not None:
+            raise self.exception
+        return self.value
+
+
+class BatchExecutor:
+    """API呼び出しをスレッドプールで並列実行するエグゼキューター
+
+    RelationClientはスレッドセーフなため、1つのクライアントのコネクションプールと
+    レートリミッターを全スレッドで共有したまま呼び出しを並列化できます。
+    呼び出し元のコンテキスト変数は各呼び出しに引き継がれます。
+
+    Example:
+        with client.batch(max_workers=8) as batch:
+            for ticket_id in ticket_ids:
+                batch.submit(client.tickets.get, message_box_id, ticket_id)
+        results = batch.results()
+    """
+
+    def __init__(self, max_workers: int = 10):
+        """初期化
+
+        Args:
+            max_workers: 同時に実行する呼び出しの最大数
+        """
+        if max_workers <= 0:
+            raise ValueError("max_workers は1以上を指定してください")
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='relation-batch')
+        self._submitted: List[Tuple[Any, Future]] = []
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """呼び出しを投入します
+
+        Args:
+            fn: 呼び出す関数 (例: client.tickets.get)
+            *args: 関数に渡す位置引数
+            **kwargs: 関数に渡すキーワード引数
+
+        Returns:
+            呼び出しのFuture
+        """
+        context = contextvars.copy_context()
+        future = self._executor.submit(context.run, fn, *args, **kwargs)
+        self._submitted.append((args[0] if len(args) == 1 else args, future))
+        return future
+
+    def results(self) -> List[BatchResult]:
+        """全ての呼び出しの完了を待ち、投入順に結果を返します
+
+        Returns:
+            BatchResultのリスト
+        """
+        results = []
+        for item, future in self._submitted:
+            try:
+                results.append(BatchResult(item=item, value=future.result()))
+            except Exception as e:
+                results.append(BatchResult(item=item, exception=e))
+        return results
+
+    def shutdown(self, wait: bool = True) -> None:
+        """スレッドプールを終了します"""
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self) -> 'BatchExecutor':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.shutdown(wait=True)
+
+
+def map_batch(
+    fn: Callable[[Any], Any],
+    items: Iterable[Any],
+    max_workers: int = 10
+) -> List[BatchResult]:
+    """各要素に関数を並列に適用し、投入順に結果を返します
+
+    Args:
+        fn: 各要素に適用する関数
+        items: 要素のイテラブル
+        max_workers: 同時に実行する呼び出しの最大数
+
+    Returns:
+        BatchResultのリスト (例外は要素ごとに格納されます)
+    """
+    with BatchExecutor(max_workers=max_workers) as batch:
+        for item in items:
+            batch.submit(fn, item)
+    return batch.results()
@@ -0,0 +1,3 @@
+"""
+Re:lation APIクライアントライブラリのベンチマーク
+"""
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+HTTP/1.1のコネクションプールとHTTP/2の多重化を比較するベンチマーク
+
+各レスポンスを一定時間 (ネットワークの往復時間の代わり) 遅らせて返すローカルサーバーに
+同時にリクエストを送信し、所要時間とサーバーが受け付けたTCP接続の数を表示します。
+HTTP/2のサーバーには h2 を使った平文のスタンドインサーバーを使います。
+ローカルではTLSのハンドシェイクは発生しないため、実環境での差は接続数の差に
+ハンドシェイクと輻輳ウィンドウの立ち上がりの時間を掛けた分だけ大きくなります。
+
+使い方:
+    python -m relation_client.benchmarks.http2_multiplexing [リクエスト数] [同時実行数]
+"""
+
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from relation_client import AsyncRelationClient, RelationClient  # noqa: E402
+from relation_client.tests.local_h2_server import LocalH2Server  # noqa: E402
+from relation_client.tests.local_server import LocalAPIServer  # noqa: E402
+from relation_client.transport import HttpxTransport, RequestsTransport  # noqa: E402
+
+DELAY = 0.02
+
+
+def handler(request):
+    return 200, {}, {'ticket_id': 1, 'title': '件名', 'status_cd': 'open'}
+
+
+def serve(kind: str, delay: float, urls, stop, results) -> None:
+    """子プロセスでスタンドインサーバーを起動し、停止時に受け付けた接続数を返します"""
+    server = LocalH2Server(delay=delay) if kind == 'h2' else LocalAPIServer(delay=delay)
+    server.route('GET', '/api/v2/tickets/1', handler)
+    with server:
+        urls.put(server.base_url)
+        stop.wait()
+        results.put(server.connections)
+
+
+class StandInServer:
+    """スタンドインサーバーを別プロセスで起動するコンテキストマネージャー
+
+    クライアントとサーバーがGILを奪い合って計測が歪まないよう、サーバーは子プロセスで動かします。
+    """
+
+    def __init__(self, kind: str, delay: float = DELAY):
+        self.kind = kind
+        self.delay = delay
+        self.connections = 0
+
+    def __enter__(self) -> 'StandInServer':
+        self._urls, self._results = multiprocessing.Queue(), multiprocessing.Queue()
+        self._stop = multiprocessing.Event()
+        self._process = multiprocessing.Process(
+            target=serve, args=(self.kind, self.delay, self._urls, self._stop, self._results), daemon=True
+        )
+        self._process.start()
+        self.base_url = self._urls.get(timeout=10)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._stop.set()
+        self.connections = self._results.get(timeout=10)
+        self._process.join()
+
+
+def run_sync(base_url: str, transport, count: int, workers: int) -> float:
+    client = RelationClient('token', 'bench', base_url=base_url, transport=transport,
+                            pool_maxsize=workers)
+    started = time.perf_counter()
+    results = client.map(lambda _: client.get('tickets/1'), range(count), max_workers=workers)
+    elapsed = time.perf_counter() - started
+    assert all(result.ok for result in results)
+    transport.close()
+    return elapsed
+
+
+def run_async(base_url: str, count: int, workers: int, http2: bool) -> float:
+    async def run():
+        async with AsyncRelationClient('token', 'bench', base_url=base_url,
+                                       max_connections=workers, http1=not http2, http2=http2) as client:
+            # 待機中のリクエストを大量にプールへ積むとhttpx側の割り当て処理が重くなるため、
+            # 同時実行数はセマフォで workers 件に抑える
+            semaphore = asyncio.Semaphore(workers)
+
+            async def fetch():
+                async with semaphore:
+                    return await client.get('tickets/1')
+
+            started = time.perf_counter()
+            await asyncio.gather(*(fetch() for _ in range(count)))
+            return time.perf_counter() - started
+    return asyncio.run(run())
+
+
+def report(label: str, elapsed: float, connections: int, count: int) -> None:
+    print(f'{label:<28} {elapsed * 1000:8.1f} ms  {count / elapsed:8.0f} req/s  接続数 {connections:4d}')
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    print(f'{count}件のGETリクエスト、同時実行数 {workers}、応答遅延 {DELAY * 1000:.0f} ms')
+
+    cases = [
+        ('同期 HTTP/1.1 (requests)', 'h1',
+         lambda url: run_sync(url, RequestsTransport(pool_maxsize=workers), count, workers)),
+        ('同期 HTTP/2 (httpx)', 'h2',
+         lambda url: run_sync(url, HttpxTransport(http1=False, http2=True), count, workers)),
+        ('非同期 HTTP/1.1 (httpx)', 'h1', lambda url: run_async(url, count, workers, http2=False)),
+        ('非同期 HTTP/2 (httpx)', 'h2', lambda url: run_async(url, count, workers, http2=True)),
+    ]
+    for label, kind, run in cases:
+        with StandInServer(kind) as server:
+            elapsed = run(server.base_url)
+        report(label, elapsed, server.connections, count)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+"""
+JSONコーデックごとのデコード・エンコードの所要時間を計測するマイクロベンチマーク
+
+チケット検索の1ページ分 (50件) と、HTML本文のメッセージを多数含む長いスレッドの
+チケット詳細を模したレスポンスを用意し、次の方法でデコードした場合の1回あたりの
+所要時間を表示します。
+
+- requests の ``response.json()`` と同じ方法 (本文を文字列に変換してから標準ライブラリでデコード)
+- StdlibJSONCodec (本文のバイト列を標準ライブラリでデコード)
+- OrjsonCodec (本文のバイト列を orjson でデコード。インストールされている場合のみ)
+
+参考として、デコードした値から Ticket モデルを生成する時間と、チケット更新の
+リクエストボディのエンコード時間も表示します。
+
+使い方:
+    python -m relation_client.benchmarks.json_codecs [繰り返し回数]
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from relation_client.codec import OrjsonCodec, StdlibJSONCodec, orjson  # noqa: E402
+from relation_client.models import Ticket  # noqa: E402
+
+HTML_BODY = (
+    '<div><p>いつもお世話になっております。</p>'
+    '<p>先日ご注文いただいた商品の配送状況について、下記のとおりご連絡いたします。</p>'
+    '<table><tr><td>注文番号</td><td>A-2024-0001</td></tr>'
+    '<tr><td>配送予定日</td><td>2024年4月1日</td></tr></table>'
+    '<p>ご不明な点がございましたら、お気軽にお問い合わせください。</p></div>'
+) * 8
+
+
+def message(message_id: int) -> dict:
+    return {
+        'message_id': message_id,
+        'from': 'support@example.com',
+        'to': 'taro.yamada@example.com',
+        'cc': None,
+        'bcc': None,
+        'title': f'Re: 配送状況のお問い合わせ ({message_id})',
+        'body': HTML_BODY,
+        'method_cd': 'mail',
+        'action_cd': 'sent' if message_id % 2 else 'received',
+        'is_html': True,
+        'sent_at': '2024-03-01T10:15:00+09:00',
+        'created_at': '2024-03-01T10:15:00+09:00',
+        'last_updated_at': '2024-03-01T10:20:00+09:00',
+        'comments': [{'commenter': 'yamada', 'comment_type': 'comment', 'comment': '確認しました',
+                      'commented_at': '2024-03-01T11:00:00+09:00'}],
+        'attachments': [{'attachment_id': message_id, 'file_name': '納品書.pdf'}],
+    }
+
+
+def ticket(ticket_id: int, messages: int) -> dict:
+    return {
+        'ticket_id': ticket_id,
+        'title': '配送状況のお問い合わせ',
+        'status_cd': 'ongoing',
+        'color_cd': 'blue',
+        'assignee': 'yamada',
+        'created_at': '2024-03-01T09:00:00+09:00',
+        'last_updated_at': '2024-03-02T18:30:00+09:00',
+        'case_category_ids': [1, 5],
+        'label_ids': [3, 7, 12],
+        'pending_reason_id': None,
+        'messages': [message(ticket_id * 100 + i) for i in range(messages)],
+    }
+
+
+PAYLOADS = {
+    'チケット検索 (50件)': json.dumps([ticket(i, 1) for i in range(50)], ensure_ascii=False).encode('utf-8'),
+    'チケット詳細 (40通)': json.dumps(ticket(1, 40), ensure_ascii=False).encode('utf-8'),
+}
+UPDATE_BODY = {'status_cd': 'closed', 'assignee': 'yamada', 'label_ids': [3, 7], 'title': '配送状況のお問い合わせ'}
+
+
+def requests_style_loads(content: bytes):
+    """requests の response.json() と同じく、文字列に変換してからデコードします"""
+    return json.loads(content.decode('utf-8'))
+
+
+def measure(call, count: int) -> float:
+    """1回あたりの所要時間 (マイクロ秒) を返します (他の処理の影響を除くため5回計測した最小値)"""
+    call()
+    best = float('inf')
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(count):
+            call()
+        best = min(best, (time.perf_counter() - started) / count * 1e6)
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    decoders = [('requests (response.json())', requests_style_loads), ('StdlibJSONCodec', StdlibJSONCodec().loads)]
+    encoders = [('StdlibJSONCodec', StdlibJSONCodec().dumps)]
+    if orjson is not None:
+        decoders.append(('OrjsonCodec', OrjsonCodec().loads))
+        encoders.append(('OrjsonCodec', OrjsonCodec().dumps))
+    else:
+        print('orjson がインストールされていないため、OrjsonCodec は計測しません')
+
+    for name, body in PAYLOADS.items():
+        print(f'{name}: {len(body) / 1024:.0f} KiB')
+        baseline = None
+        for label, loads in decoders:
+            elapsed = measure(lambda: loads(body), count)
+            baseline = baseline or elapsed
+            print(f'  {label:<28} {elapsed:10.1f} µs  ({baseline / elapsed:4.1f}倍)')
+        data = json.loads(body)
+        items = data if isinstance(data, list) else [data]
+        elapsed = measure(lambda: [Ticket.from_dict(item) for item in items], count)
+        print(f'  {"(参考) モデルの生成":<26} {elapsed:10.1f} µs')
+
+    print('チケット更新のリクエストボディ')
+    for label, dumps in encoders:
+        print(f'  {label:<28} {measure(lambda: dumps(UPDATE_BODY), count * 50):10.2f} µs')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""
+ミドルウェアのチェーンによる1リクエストあたりのオーバーヘッドを計測するマイクロベンチマーク
+
+ネットワークを使わずに固定のレスポンスを返すトランスポートを使い、RelationClient.get() の
+1回あたりの所要時間を、何もしないミドルウェアの数を変えて表示します。
+ミドルウェアがない場合との差が、チェーンを通ることによるPython側の処理時間です。
+参考として、トランスポートを直接呼び出した場合の所要時間も表示します。
+
+使い方:
+    python -m relation_client.benchmarks.middleware_overhead [リクエスト数]
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from relation_client import RelationClient  # noqa: E402
+from relation_client.transport import Transport, Urllib3Response  # noqa: E402
+
+BODY = json.dumps([{'ticket_id': i, 'title': f'件名{i}', 'status_cd': 'open'} for i in range(20)],
+                  ensure_ascii=False).encode('utf-8')
+
+
+class CannedTransport(Transport):
+    """送信せずに固定のレスポンスを返すトランスポート"""
+
+    def request(self, method, url, headers, params=None, data=None, json=None, timeout=None):
+        return Urllib3Response(200, {}, BODY)
+
+
+def passthrough(request, call_next):
+    return call_next(request)
+
+
+def measure(call, count: int) -> float:
+    """1回あたりの平均所要時間 (マイクロ秒) を返します (他の処理の影響を除くため15回計測した最小値)"""
+    for _ in range(200):
+        call()
+    best = float('inf')
+    for _ in range(15):
+        started = time.perf_counter()
+        for _ in range(count):
+            call()
+        best = min(best, (time.perf_counter() - started) / count * 1e6)
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    transport = CannedTransport()
+    print(f'{count}件のGETリクエスト (レスポンス {len(BODY)} バイト、ネットワークなし)')
+
+    bare = measure(lambda: transport.request('GET', 'http://bench/tickets', {}).json(), count)
+    print(f'{"トランスポートのみ":<24} {bare:8.2f} µs/リクエスト')
+
+    baseline = None
+    for layers in (0, 1, 5):
+        client = RelationClient('token', 'bench', base_url='http://bench/api/v2', transport=transport,
+                                middleware=[passthrough] * layers)
+        elapsed = measure(lambda: client.get('tickets'), count)
+        if baseline is None:
+            baseline = elapsed
+        print(f'{f"ミドルウェア {layers} 個":<24} {elapsed:8.2f} µs/リクエスト  '
+              f'(差 {elapsed - baseline:+6.2f} µs)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""
+トランスポートごとの1リクエストあたりのオーバーヘッドを計測するマイクロベンチマーク
+
+固定のレスポンスを即座に返すローカルのHTTPサーバーに対してGETリクエストを繰り返し送信し、
+RelationClient.get() 1回あたりの所要時間をトランスポートごとに表示します。
+サーバー側の処理はほぼ一定のため、差分がクライアント側のPythonの処理時間になります。
+
+使い方:
+    python -m relation_client.benchmarks.transport_overhead [リクエスト数]
+"""
+
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from relation_client import RelationClient  # noqa: E402
+from relation_client.transport import RequestsTransport, Urllib3Transport  # noqa: E402
+
+BODY = json.dumps([{'ticket_id': i, 'title': f'件名{i}', 'status_cd': 'open'} for i in range(20)],
+                  ensure_ascii=False).encode('utf-8')
+RESPONSE = (
+    b'HTTP/1.1 200 OK\r\n'
+    b'Content-Type: application/json\r\n'
+    b'Content-Length: ' + str(len(BODY)).encode() + b'\r\n'
+    b'\r\n' + BODY
+)
+
+
+def serve(listener: socket.socket) -> None:
+    """リクエストヘッダーを読み終えるたびに固定のレスポンスを返します (keep-alive)"""
+    while True:
+        try:
+            conn, _ = listener.accept()
+        except OSError:
+            return
+        threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+
+def handle(conn: socket.socket) -> None:
+    buffer = b''
+    with conn:
+        while True:
+            chunk = conn.recv(65536)
+            if not chunk:
+                return
+            buffer += chunk
+            while b'\r\n\r\n' in buffer:
+                _, buffer = buffer.split(b'\r\n\r\n', 1)
+                conn.sendall(RESPONSE)
+
+
+def measure(client: RelationClient, count: int) -> float:
+    """1リクエストあたりの平均所要時間 (マイクロ秒) を返します"""
+    for _ in range(50):
+        client.get('tickets')
+    started = time.perf_counter()
+    for _ in range(count):
+        client.get('tickets')
+    return (time.perf_counter() - started) / count * 1e6
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(16)
+    threading.Thread(target=serve, args=(listener,), daemon=True).start()
+    base_url = 'http://127.0.0.1:%d/api/v2' % listener.getsockname()[1]
+
+    transports = {
+        'requests': RequestsTransport(),
+        'urllib3': Urllib3Transport(),
+    }
+    print(f'{count}件のGETリクエスト (レスポンス {len(BODY)} バイト)')
+    for name, transport in transports.items():
+        client = RelationClient('token', 'bench', base_url=base_url, transport=transport)
+        print(f'{name:>10}: {measure(client, count):8.1f} µs/リクエスト')
+        transport.close()
+    listener.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+"""
+バルクヘッドモジュール
+
+このモジュールは、受信箱 (message_box_id) やアドレス帳 (customer_group_id) ごとに
+同時に実行できるAPI呼び出しの数と待ち行列の長さを制限し、特定の受信箱の大量の処理が
+他の受信箱の呼び出しを妨げないようにするミドルウェアを提供します。
+"""
+
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Tuple
+
+from .exceptions import BulkheadFullError
+from .middleware import APIRequest, Handler
+
+# パーティションの種類
+PARTITION_MESSAGE_BOX = 'message_box_id'
+PARTITION_CUSTOMER_GROUP = 'customer_group_id'
+
+# キャンセルトークンを確認しながら待つ場合の再確認の間隔 (秒)
+CANCELLATION_POLL_INTERVAL = 0.05
+
+_MESSAGE_BOX_PATH = re.compile(r'^/?(\d+)/')
+_CUSTOMER_GROUP_PATH = re.compile(r'^/?customer_groups/(\d+)/')
+
+# パーティションのキー: (パーティションの種類, ID)
+PartitionKey = Tuple[str, int]
+
+
+def partition_key(path: str) -> Optional[PartitionKey]:
+    """APIパスから受信箱またはアドレス帳のパーティションのキーを取り出します
+
+    Args:
+        path: APIパス (例: ``12/tickets/search``、``customer_groups/3/customers/search``)
+
+    Returns:
+        (パーティションの種類, ID) のタプル (どちらにも属さないパスの場合は None)
+    """
+    match = _MESSAGE_BOX_PATH.match(path)
+    if match:
+        return PARTITION_MESSAGE_BOX, int(match.group(1))
+    match = _CUSTOMER_GROUP_PATH.match(path)
+    if match:
+        return PARTITION_CUSTOMER_GROUP, int(match.group(1))
+    return None
+
+
+@dataclass
+class BulkheadStats:
+    """パーティション1つ分のバルクヘッドの統計情報
+
+    ``in_flight`` は実行中の呼び出し数、``queued`` は空きを待っている呼び出し数、
+    ``peak_queued`` はこれまでの待ち行列の最大の長さです。``admitted`` は実行を許可した数、
+    ``rejected`` は待ち行列が一杯だったか、待ち時間が ``queue_timeout`` を超えたため拒否した数です。
+    """
+    key: PartitionKey
+    max_concurrent: int
+    in_flight: int = 0
+    queued: int = 0
+    peak_queued: int = 0
+    admitted: int = 0
+    rejected: int = 0
+
+
+class _Compartment:
+    """パーティション1つ分の状態"""
+
+    def __init__(self, key: PartitionKey, max_concurrent: int, lock: threading.Lock):
+        self.stats = BulkheadStats(key=key, max_concurrent=max_concurrent)
+        self.available = threading.Condition(lock)
+
+
+class Bulkhead:
+    """受信箱・アドレス帳ごとに同時実行数と待ち行列を制限するミドルウェア
+
+    ``message_box_id`` を含むパス (チケット・ラベル・テンプレート・メールなど) は受信箱ごとに、
+    ``customer_groups/{customer_group_id}/`` で始まるパス (顧客・バッジ) はアドレス帳ごとに
+    同時に実行できる呼び出しを ``max_concurrent`` 件までに制限します。上限に達している場合は
+    空きが出るまで待ち、待ち行列が ``max_queue`` 件を超える場合や ``queue_timeout`` 秒以上
+    待った場合は BulkheadFullError を送出します。どちらにも属さない呼び出しは制限しません。
+
+    実行枠はリトライの待機中も保持されるため、リトライを繰り返している受信箱の呼び出しが
+    他の受信箱の枠を使うことはありません。パスにテナントは含まれないため、インスタンスは
+    クライアントごとに作成してください。スレッドセーフです。
+
+    Example:
+        client = RelationClient(
+            token, subdomain,
+            bulkhead=Bulkhead(max_concurrent=4, max_queue=20, message_box_limits={12: 1})
+        )
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 4,
+        max_queue: Optional[int] = None,
+        queue_timeout: Optional[float] = None,
+        message_box_limits: Optional[Mapping[int, int]] = None,
+        customer_group_limits: Optional[Mapping[int, int]] = None,
+        partition_by: Iterable[str] = (PARTITION_MESSAGE_BOX, PARTITION_CUSTOMER_GROUP),
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """初期化
+
+        Args:
+            max_concurrent: パーティションごとの同時実行数の上限
+            max_queue: パーティションごとの待ち行列の上限 (None の場合は制限しない。
+                0 の場合は待たずに拒否する)
+            queue_timeout: 空きを待つ最大秒数 (None の場合は空くまで待つ)
+            message_box_limits: 受信箱IDごとに同時実行数の上限を個別に指定する辞書
+            customer_group_limits: アドレス帳IDごとに同時実行数の上限を個別に指定する辞書
+            partition_by: 制限の対象にするパーティションの種類
+            clock: 単調増加する時刻を返す関数
+
+        Raises:
+            ValueError: 上限に1未満の値が指定された場合
+        """
+        limits = {
+            **{(PARTITION_MESSAGE_BOX, key): value for key, value in (message_box_limits or {}).items()},
+            **{(PARTITION_CUSTOMER_GROUP, key): value for key, value in (customer_group_limits or {}).items()},
+        }
+        if max_concurrent < 1 or any(value < 1 for value in limits.values()):
+            raise ValueError("同時実行数の上限は1以上を指定してください")
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.limits: Dict[PartitionKey, int] = limits
+        self.partition_by = frozenset(partition_by)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._compartments: Dict[PartitionKey, _Compartment] = {}
+
+    def stats(self) -> Dict[PartitionKey, BulkheadStats]:
+        """パーティションごとの統計情報 (一度でも呼び出されたパーティションのみ)"""
+        with self._lock:
+            return {key: BulkheadStats(**vars(c.stats)) for key, c in self._compartments.items()}
+
+    def reset_after_fork(self) -> None:
+        """fork後の子プロセスで呼び出し、ロックを作り直して全てのパーティションの状態を破棄します
+
+        子プロセスには親プロセスで実行中・待機中だった呼び出しのスレッドが存在せず、
+        それらの実行枠は返却されないためです。
+        """
+        self._lock = threading.Lock()
+        self._compartments = {}
+
+    def __call__(self, request: APIRequest, call_next: Handler) -> Any:
+        key = partition_key(request.path)
+        if key is None or key[0] not in self.partition_by:
+            return call_next(request)
+
+        compartment = self._enter(key, request)
+        try:
+            return call_next(request)
+        finally:
+            with self._lock:
+                compartment.stats.in_flight -= 1
+                compartment.available.notify()
+
+    def _enter(self, key: PartitionKey, request: APIRequest) -> _Compartment:
+        """パーティションの実行枠を確保します (空きがなければ待機する)"""
+        with self._lock:
+            compartment = self._compartments.get(key)
+            if compartment is None:
+                max_concurrent = self.limits.get(key, self.max_concurrent)
+                compartment = self._compartments[key] = _Compartment(key, max_concurrent, self._lock)
+            stats = compartment.stats
+
+            if stats.in_flight >= stats.max_concurrent or stats.queued:
+                if self.max_queue is not None and stats.queued >= self.max_queue:
+                    stats.rejected += 1
+                    raise BulkheadFullError(f"{key[0]}={key[1]} の待ち行列が一杯です ({stats.queued}件)")
+                self._wait(compartment, request)
+
+            stats.in_flight += 1
+            stats.admitted += 1
+            return compartment
+
+    def _wait(self, compartment: _Compartment, request: APIRequest) -> None:
+        """実行枠が空くまで待機します (ロック取得済みで呼び出すこと)"""
+        stats = compartment.stats
+        give_up_at = None if self.queue_timeout is None else self._clock() + self.queue_timeout
+        stats.queued += 1
+        stats.peak_queued = max(stats.peak_queued, stats.queued)
+        try:
+            while stats.in_flight >= stats.max_concurrent:
+                if request.token is not None:
+                    request.token.check()
+                if request.deadline is not None:
+                    request.deadline.check()
+                timeout = None
+                if give_up_at is not None:
+                    timeout = give_up_at - self._clock()
+                    if timeout <= 0:
+                        stats.rejected += 1
+                        raise BulkheadFullError(
+                            f"{stats.key[0]}={stats.key[1]} の実行枠を"
+                            f" {self.queue_timeout} 秒待っても確保できませんでした"
+                        )
+                if request.deadline is not None:
+                    timeout = _min_timeout(timeout, request.deadline.remaining())
+                if request.token is not None:
+                    timeout = _min_timeout(timeout, CANCELLATION_POLL_INTERVAL)
+                compartment.available.wait(timeout)
+        except BaseException:
+            # 受け取った通知を使わずに抜ける場合は、次の待機者に譲る
+            compartment.available.notify()
+            raise
+        finally:
+            stats.queued -= 1
+
+
+def _min_timeout(timeout: Optional[float], other: float) -> float:
+    return other if timeout is None else min(timeout, other)
@@ -0,0 +1,165 @@
+"""
+サーキットブレーカーモジュール
+
+このモジュールは、メンテナンスなどでAPIが503や接続エラーを返し続けている間、
+無駄なリクエストを送らずに即座に失敗させるサーキットブレーカーを提供します。
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from .constants import HTTP_SERVICE_UNAVAILABLE
+from .exceptions import CircuitOpenError
+
+# サーキットブレーカーの状態
+STATE_CLOSED = 'closed'  # 通常どおりリクエストを送信
+STATE_OPEN = 'open'  # リクエストを送信せずに即座に失敗
+STATE_HALF_OPEN = 'half_open'  # 1件だけ試行リクエストを送信
+
+
+@dataclass
+class CircuitBreakerStatus:
+    """サーキットブレーカーの状態 (ヘルスチェック用)"""
+    state: str
+    consecutive_failures: int
+    open_until: Optional[float] = None
+
+    @property
+    def healthy(self) -> bool:
+        """リクエストを通常どおり送信できる状態かどうか"""
+        return self.state == STATE_CLOSED
+
+
+class CircuitBreaker:
+    """503と接続エラーを監視するサーキットブレーカー
+
+    ``failure_threshold`` 回連続で失敗するとブレーカーが開き、``recovery_timeout`` 秒の間
+    (503にRetry-Afterが付いていればその時刻まで) すべてのリクエストを
+    CircuitOpenError で即座に失敗させます。待機時間が過ぎると半開状態になり、
+    1件だけ試行リクエストを送信します。成功すれば閉じ、失敗すれば再び開きます。
+
+    1つのインスタンスをクライアントの全スレッド・全コルーチンで共有するため、
+    メンテナンス中の待機は全体で1回にまとめられます。スレッドセーフです。
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """初期化
+
+        Args:
+            failure_threshold: ブレーカーを開くまでの連続失敗回数
+            recovery_timeout: ブレーカーを開いてから試行リクエストを送るまでの秒数
+            clock: 単調増加する時刻を返す関数
+        """
+        if failure_threshold <= 0 or recovery_timeout < 0:
+            raise ValueError("failure_threshold は1以上、recovery_timeout は0以上を指定してください")
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._open_until: Optional[float] = None
+        self._probe_started: Optional[float] = None
+
+    def _current_state(self, now: float) -> str:
+        """時刻を考慮した現在の状態を返します (ロック取得済みで呼び出すこと)"""
+        if self._state == STATE_OPEN and now >= self._open_until:
+            self._state = STATE_HALF_OPEN
+            self._probe_started = None
+        return self._state
+
+    @property
+    def state(self) -> str:
+        """現在の状態 (closed / open / half_open)"""
+        with self._lock:
+            return self._current_state(self._clock())
+
+    @property
+    def status(self) -> CircuitBreakerStatus:
+        """ヘルスチェック用の状態"""
+        with self._lock:
+            state = self._current_state(self._clock())
+            return CircuitBreakerStatus(
+                state=state,
+                consecutive_failures=self._failures,
+                open_until=self._open_until if state == STATE_OPEN else None
+            )
+
+    def before_request(self) -> None:
+        """リクエストを送信してよいか確認します
+
+        Raises:
+            CircuitOpenError: ブレーカーが開いている場合、または半開状態で
+                他の試行リクエストが送信中の場合
+        """
+        with self._lock:
+            now = self._clock()
+            state = self._current_state(now)
+            if state == STATE_CLOSED:
+                return
+            if state == STATE_HALF_OPEN:
+                # 試行リクエストが戻らないまま recovery_timeout を過ぎた場合は次の試行を許可する
+                if self._probe_started is None or now - self._probe_started >= self.recovery_timeout:
+                    self._probe_started = now
+                    return
+            retry_in = max(0.0, (self._open_until or now) - now)
+        raise CircuitOpenError(f"サーキットブレーカーが開いています (再試行まで {retry_in:.1f} 秒)")
+
+    def record_success(self) -> None:
+        """リクエストの成功 (503以外のレスポンス) を記録します"""
+        with self._lock:
+            self._state = STATE_CLOSED
+            self._failures = 0
+            self._open_until = None
+            self._probe_started = None
+
+    def record_failure(self, retry_after: Optional[float] = None) -> None:
+        """リクエストの失敗 (503または接続エラー) を記録します
+
+        Args:
+            retry_after: 503に付いていたRetry-Afterの秒数
+        """
+        with self._lock:
+            now = self._clock()
+            self._failures += 1
+            state = self._current_state(now)
+            if state == STATE_OPEN:
+                # 開く前に送信されていたリクエストの失敗では待機時間を延ばさない
+                return
+            if state == STATE_HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = STATE_OPEN
+                self._open_until = now + max(self.recovery_timeout, retry_after or 0.0)
+                self._probe_started = None
+
+    def record_response(self, status_code: int, retry_after: Optional[float] = None) -> None:
+        """レスポンスのステータスコードに応じて成功または失敗を記録します
+
+        Args:
+            status_code: レスポンスのステータスコード
+            retry_after: Retry-Afterヘッダーから得た待機秒数
+        """
+        if status_code == HTTP_SERVICE_UNAVAILABLE:
+            self.record_failure(retry_after)
+        else:
+            self.record_success()
+
+    @property
+    def is_open(self) -> bool:
+        """ブレーカーが開いている (リクエストを即座に失敗させる) かどうか"""
+        return self.state == STATE_OPEN
+
+    def reset(self) -> None:
+        """ブレーカーを閉じた状態に戻します"""
+        self.record_success()
+
+    def reset_after_fork(self) -> None:
+        """fork後の子プロセスで呼び出し、ロックと親プロセスの試行リクエストの記録を作り直します"""
+        self._lock = threading.Lock()
+        self._probe_started = None
@@ -4,23 +4,38 @@ Re:lation APIクライアント
 このモジュールは、Re:lation APIとの通信を処理するメインクライアントクラスを提供します。
 """
 
+import functools
 import json
+import threading
 import time
-from typing import Dict, Any, Optional, Union, List, Type, TypeVar
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Any, Callable, Iterable, Optional, Sequence, Tuple, Union, List, Type, TypeVar
 
 import requests
 
-from .constants import (
-    API_VERSION, BASE_URL_FORMAT,
-    RATE_LIMIT_LIMIT, RATE_LIMIT_REMAINING, RATE_LIMIT_RESET,
-    HTTP_BAD_REQUEST, HTTP_UNAUTHORIZED, HTTP_FORBIDDEN, HTTP_NOT_FOUND,
-    HTTP_UNSUPPORTED_MEDIA_TYPE, HTTP_TOO_MANY_REQUESTS, HTTP_SERVER_ERROR,
-    HTTP_SERVICE_UNAVAILABLE
+from .constants import API_VERSION, BASE_URL_FORMAT, HTTP_TOO_MANY_REQUESTS
+from .exceptions import APIError, CircuitOpenError, DeadlineExceededError
+from .batch import BatchExecutor, BatchResult, map_batch
+from .rate_limit import RateLimitGovernor, RateLimitStatus, SharedRateLimiter
+from .circuit_breaker import CircuitBreaker
+from .hedging import HedgePolicy
+from .priority import PriorityScheduler, current_priority, priority_scope, validate_priority
+from .bulkhead import Bulkhead, BulkheadStats, PartitionKey
+from .singleflight import SingleflightMiddleware, SingleflightStats
+from .streaming import ItemStream
+from .codec import JSONCodec, default_codec
+from .fork import register_after_fork
+from .transport import DEFAULT_IDLE_TIMEOUT, RequestsTransport, Transport
+from .concurrency import AdaptiveConcurrencyLimiter, ConcurrencyStatus
+from .deadline import (
+    CancellationToken, Deadline, current_deadline, current_token, deadline_scope, earliest,
+    interruptible_sleep, to_deadline
 )
-from .exceptions import (
-    AuthenticationError, PermissionError, ResourceNotFoundError,
-    RateLimitError, InvalidRequestError, APIError, ServiceUnavailableError
+from .middleware import (  # noqa: F401 (RETRYABLE_STATUS_CODES などは client からも参照できるよう再公開)
+    RETRYABLE_STATUS_CODES, APIRequest, ErrorMappingMiddleware, Middleware, RetryMiddleware,
+    build_chain, error_from_response, extract_error_message
 )
+from .retry import ExponentialBackoff, RetryBudget, RetryPolicy, parse_retry_after
 from .resources.customers import CustomerResource
 from .resources.customer_groups import CustomerGroupResource
 from .resources.tickets import TicketResource
@@ -37,11 +52,44 @@ from .resources.templates import TemplateResource
 from .resources.attachments import AttachmentResource
 
 
+def build_base_url(subdomain: str, api_version: str, base_url: Optional[str] = None) -> str:
+    """APIのベースURLを組み立てます
+
+    Args:
+        subdomain: ご利用のサブドメイン
+        api_version: APIバージョン
+        base_url: 明示的に指定されたベースURL (指定時はこちらを優先)
+
+    Returns:
+        末尾に / を含まないベースURL
+    """
+    if base_url:
+        return base_url.rstrip('/')
+    return BASE_URL_FORMAT.format(subdomain=subdomain, api_version=api_version)
+
+
+def default_retry_policy(max_retries: int, retry_delay: float) -> RetryPolicy:
+    """デフォルトのリトライポリシーを生成します
+
+    retry_delay を基準とした指数バックオフ (フルジッター、上限30秒) に、
+    直近10秒間のリクエストの20%までに再送を制限するリトライ予算を組み合わせます。
+    """
+    return ExponentialBackoff(
+        max_retries=max_retries,
+        base_delay=retry_delay,
+        max_delay=max(30.0, retry_delay),
+        budget=RetryBudget()
+    )
+
+
 class RelationClient:
     """Re:lation APIクライアント
 
     このクラスは、Re:lation APIと通信するための基本クライアントを提供します。
     各エンドポイントへのアクセスは、リソースクラス経由で行います。
+
+    クライアントはスレッドセーフです。1つのインスタンスを複数スレッドで共有すると、
+    コネクションプールとレートリミッターも共有されます。
     """
 
     def __init__(
@@ -51,7 +99,23 @@ class RelationClient:
         api_version: str = API_VERSION,
         timeout: int = 30,
         max_retries: int = 3,
-        retry_delay: int = 1
+        retry_delay: int = 1,
+        base_url: Optional[str] = None,
+        rate_limit_margin: int = 0,
+        rate_limiter: Union[RateLimitGovernor, SharedRateLimiter, None] = None,
+        pool_maxsize: int = 10,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        hedge_policy: Optional[HedgePolicy] = None,
+        concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        session: Optional[requests.Session] = None,
+        transport: Optional[Transport] = None,
+        connection_idle_timeout: Optional[float] = DEFAULT_IDLE_TIMEOUT,
+        middleware: Optional[Iterable[Middleware]] = None,
+        coalesce_requests: bool = False,
+        scheduler: Optional[PriorityScheduler] = None,
+        bulkhead: Optional[Bulkhead] = None,
+        json_codec: Optional[JSONCodec] = None
     ):
         """RelationClientを初期化します
 
@@ -61,7 +125,34 @@ class RelationClient:
             api_version: APIバージョン (デフォルト: v2)
             timeout: リクエストタイムアウト秒数
             max_retries: リトライ最大回数
-            retry_delay: リトライ間の待機秒数
+            retry_delay: リトライ間の待機秒数 (指数バックオフの基準値)
+            base_url: APIのベースURL (省略時はサブドメインから生成。テスト用のスタブサーバーなどに利用)
+            rate_limit_margin: レートリミットの残りリクエスト数のうち、使い切らずに残しておく件数
+            rate_limiter: 利用するレートリミッター (複数プロセスで予算を共有する場合は
+                SharedRateLimiterを指定。省略時はRateLimitGovernorを生成)
+            pool_maxsize: コネクションプールに保持する最大接続数 (同時に実行できるリクエスト数の目安)
+            retry_policy: リトライポリシー (省略時は max_retries と retry_delay から
+                指数バックオフのポリシーを生成)
+            circuit_breaker: サーキットブレーカー (省略時は無効)
+            hedge_policy: GETリクエストのヘッジポリシー (省略時は無効)
+            concurrency_limiter: 同時実行数を自動調整するリミッター (省略時は無効。
+                指定した場合、batch() と map() の既定の並列数は max_limit になります)
+            session: 共有するrequests.Session (省略時はクライアント専用のSessionを生成。
+                指定した場合、pool_maxsize はSession側の設定が優先されます)
+            transport: HTTPリクエストの送信に使うトランスポート (省略時は requests を使う
+                RequestsTransport。指定した場合、session と pool_maxsize は使われません)
+            connection_idle_timeout: この秒数以上使われていないkeep-alive接続は再利用せずに
+                張り直す (None の場合は張り直さない。session・transport を指定した場合は使われません)
+            middleware: request() の処理に重ねるミドルウェアのリスト (先頭が最も外側)。
+                各ミドルウェアは ``middleware(request, call_next)`` の形で呼び出され、
+                リトライ後の結果 (レスポンスの辞書または例外) を受け取ります
+            coalesce_requests: True の場合、同時に実行された同じ内容のGETリクエストを
+                1件だけ送信し、結果を共有する (省略時は無効)
+            scheduler: 優先度に応じてレートリミットの枠を割り当てるスケジューラー (省略時は無効。
+                同じテナントのクライアント間で共有できます)
+            bulkhead: 受信箱・アドレス帳ごとに同時実行数と待ち行列を制限するバルクヘッド (省略時は無効)
+            json_codec: レスポンスのデコードに使うJSONコーデック (省略時は orjson が
+                インストールされていれば OrjsonCodec、なければ StdlibJSONCodec)
         """
         self.access_token = access_token
         self.subdomain = subdomain
@@ -69,12 +160,42 @@ class RelationClient:
         self.timeout = timeout
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.pool_maxsize = pool_maxsize
         
-        self._session = requests.Session()
-        self._base_url = BASE_URL_FORMAT.format(
-            subdomain=self.subdomain,
-            api_version=self.api_version
-        )
+        # Sessionはスレッド間で共有する。接続数の上限を超えた場合は空きを待つ
+        self._owns_transport = transport is None and session is None
+        if transport is None:
+            transport = RequestsTransport(
+                session, pool_maxsize=pool_maxsize, idle_timeout=connection_idle_timeout
+            )
+        self._transport = transport
+        self._session = getattr(transport, 'session', None)
+        # ヘッダーはリクエストごとに組み立てず、初期化時に1度だけ生成する
+        self._headers = {
+            'Authorization': f'Bearer {self.access_token}',
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+        }
+        self._base_url = build_base_url(self.subdomain, self.api_version, base_url)
+        if rate_limiter is None:
+            rate_limiter = RateLimitGovernor(safety_margin=rate_limit_margin)
+        self.rate_limiter = rate_limiter
+        if retry_policy is None:
+            retry_policy = default_retry_policy(max_retries, retry_delay)
+        self.retry_policy = retry_policy
+        self.max_retries = retry_policy.max_retries
+        self.circuit_breaker = circuit_breaker
+        self.hedge_policy = hedge_policy
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+        self._hedge_executor_lock = threading.Lock()
+        self.concurrency_limiter = concurrency_limiter
+        self.scheduler = scheduler
+        self.bulkhead = bulkhead
+        self._middleware: List[Middleware] = list(middleware or [])
+        self._singleflight = SingleflightMiddleware() if coalesce_requests else None
+        self.json_codec = json_codec or default_codec()
+        self._build_chain()
+        register_after_fork(self)
         
         # リソースの初期化
         self.customers = CustomerResource(self)
@@ -99,15 +220,25 @@ class RelationClient:
         params: Optional[Dict[str, Any]] = None,
         data: Optional[Dict[str, Any]] = None,
         json_data: Optional[Dict[str, Any]] = None,
+        deadline: Union[Deadline, float, None] = None,
+        priority: Optional[str] = None,
     ) -> Dict[str, Any]:
         """APIリクエストを実行します
 
+        リクエストはミドルウェア → リトライ → エラー変換 → 送信の順に処理されます。
+        デッドラインはリトライとその待機時間を含む呼び出し全体に適用され、各試行の
+        タイムアウトは ``timeout`` と残り時間の短い方になります。``deadline()`` の
+        ブロック内で呼び出した場合は、そのデッドラインとキャンセルトークンも適用されます。
+
         Args:
             method: HTTPメソッド (GET, POST, PUT, DELETE)
             path: APIパス (先頭の / は不要)
             params: クエリパラメータ
             data: リクエストボディ (form-data)
             json_data: リクエストボディ (JSON)
+            deadline: この呼び出しのデッドライン (秒数または Deadline)
+            priority: この呼び出しの優先度 (PRIORITY_INTERACTIVE または PRIORITY_BATCH。
+                省略時は ``priority()`` のブロックの優先度。scheduler を指定した場合に使われます)
 
         Returns:
             レスポンスの辞書表現
@@ -120,104 +251,493 @@ class RelationClient:
             InvalidRequestError: 無効なリクエストエラー (400, 415)
             APIError: APIエラー (500)
             ServiceUnavailableError: サービス利用不可エラー (503)
+            APIConnectionError: 接続エラー・タイムアウト (APIError のサブクラス)
+            DeadlineExceededError: デッドラインを過ぎた場合
+            OperationCancelledError: キャンセルトークンでキャンセルされた場合
         """
-        url = f"{self._base_url}/{path.lstrip('/')}"
-        headers = {
-            'Authorization': f'Bearer {self.access_token}',
-            'Content-Type': 'application/json',
-            'Accept': 'application/json',
-        }
-        
-        retry_count = 0
-        while retry_count <= self.max_retries:
+        deadline = earliest(current_deadline(), to_deadline(deadline))
+        if priority is None:
+            priority = current_priority()
+        else:
+            validate_priority(priority)
+        return self._handler(
+            APIRequest(method, path, params, data, json_data, deadline, current_token(), priority)
+        )
+
+    def stream(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        json_data: Optional[Dict[str, Any]] = None,
+        item_path: Sequence[str] = (),
+        deadline: Union[Deadline, float, None] = None,
+        priority: Optional[str] = None,
+    ) -> ItemStream:
+        """APIリクエストを実行し、レスポンスのJSON配列の要素を受信しながら1件ずつ返します
+
+        本文全体を読み込まずに、要素のJSONを受信し終えるたびにデコードして返すため、
+        メモリに保持するのは要素1件分と受信途中のデータだけです。ミドルウェア・リトライ・
+        エラー変換は request() と同じく適用され、レスポンスヘッダーを受け取った時点で
+        返ります (デッドラインはそこまでに適用され、本文の受信中は ``timeout`` が適用されます)。
+        途中で反復をやめる場合は ``close()`` を呼ぶか、with文で使ってください。
+
+        Args:
+            method: HTTPメソッド (GET, POST, PUT, DELETE)
+            path: APIパス (先頭の / は不要)
+            params: クエリパラメータ
+            data: リクエストボディ (form-data)
+            json_data: リクエストボディ (JSON)
+            item_path: 配列までのオブジェクトのキー (省略時はレスポンス全体が配列。
+                例: チケット詳細のメッセージは ``('messages',)``)
+            deadline: この呼び出しのデッドライン (秒数または Deadline)
+            priority: この呼び出しの優先度
+
+        Returns:
+            配列の要素 (辞書) を返すイテレーター
+
+        Raises:
+            request() と同じ例外を送出します。受信中の接続エラーは反復中に
+            APIConnectionError として送出されます。
+        """
+        deadline = earliest(current_deadline(), to_deadline(deadline))
+        if priority is None:
+            priority = current_priority()
+        else:
+            validate_priority(priority)
+        return self._handler(
+            APIRequest(
+                method, path, params, data, json_data, deadline, current_token(), priority,
+                stream=True, stream_path=tuple(item_path)
+            )
+        )
+
+    def _attempt(self, request: APIRequest) -> requests.Response:
+        """リクエストを1回送信し、レスポンスを返します (ミドルウェアのチェーンの末端)
+
+        サーキットブレーカー・レートリミッター・同時実行数のリミッターはここで適用します。
+        """
+        deadline, token = request.deadline, request.token
+        self._check_deadline(deadline, token)
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.before_request()
+        if self.scheduler is not None:
+            self.scheduler.acquire(self.rate_limiter, request.priority, deadline, token)
+        elif deadline is None and token is None:
+            self.rate_limiter.acquire()
+        else:
+            self._sleep(self.rate_limiter.reserve(), deadline, token)
+        timeout = self.timeout if deadline is None else min(self.timeout, deadline.remaining())
+        send = functools.partial(
+            self._transport.open_stream if request.stream else self._transport.request,
+            method=request.method,
+            url=f"{self._base_url}/{request.path.lstrip('/')}",
+            headers=self._headers,
+            params=request.params,
+            data=request.data,
+            json=request.json_data,
+            timeout=timeout
+        )
+        try:
+            response = self._send(send, request.method, deadline, hedge=not request.stream)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if deadline is not None and deadline.expired:
+                # 残り時間で打ち切ったタイムアウトはサーバーの障害として数えない
+                raise DeadlineExceededError(f"デッドラインを過ぎたため処理を中止しました: {str(e)}")
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record_failure()
+            raise
+        self.rate_limiter.update(response.headers, response.status_code)
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record_response(
+                response.status_code, parse_retry_after(response.headers.get('Retry-After'))
+            )
+        return response
+
+    def add_middleware(self, middleware: Middleware) -> None:
+        """ミドルウェアを追加します
+
+        後から追加したものほど内側 (組み込みのリトライに近い側) で実行されます。
+
+        Args:
+            middleware: ``middleware(request, call_next)`` の形で呼び出せるオブジェクト
+        """
+        self._middleware.append(middleware)
+        self._build_chain()
+
+    @property
+    def middleware(self) -> List[Middleware]:
+        """追加されているミドルウェア (外側から順に)"""
+        return list(self._middleware)
+
+    def _build_chain(self) -> None:
+        """ミドルウェア・リクエスト集約・バルクヘッド・リトライ・エラー変換・送信を1つの関数にまとめます"""
+        layers = list(self._middleware)
+        if self._singleflight is not None:
+            layers.append(self._singleflight)
+        if self.bulkhead is not None:
+            layers.append(self.bulkhead)
+        layers += [RetryMiddleware(self), ErrorMappingMiddleware(self.json_codec)]
+        self._handler = build_chain(layers, self._attempt)
+
+    def _check_deadline(self, deadline: Optional[Deadline], token: Optional[CancellationToken]) -> None:
+        """キャンセルされているか、デッドラインを過ぎていれば例外を送出します"""
+        if token is not None:
+            token.check()
+        if deadline is not None:
+            deadline.check()
+
+    def _sleep(self, seconds: float, deadline: Optional[Deadline], token: Optional[CancellationToken]) -> None:
+        """デッドラインとキャンセルトークンを考慮して待機します
+
+        待機がデッドラインを越える場合は待たずに DeadlineExceededError を送出し、
+        待機中にキャンセルされた場合はすぐに OperationCancelledError を送出します。
+        """
+        if deadline is None and token is None:
+            time.sleep(seconds)
+            return
+        interruptible_sleep(seconds, deadline, token)
+
+    def deadline(
+        self,
+        seconds: Union[Deadline, float, None] = None,
+        token: Optional[CancellationToken] = None
+    ):
+        """ブロック内の全ての呼び出しにデッドラインとキャンセルトークンを適用します
+
+        ページングや batch() で行われる呼び出しにも適用されます。
+        ``relation_client.deadline.deadline_scope()`` と同じです。
+
+        Args:
+            seconds: 期限までの秒数 (または Deadline)
+            token: キャンセルトークン
+
+        Example:
+            token = CancellationToken()
+            with client.deadline(10, token=token):
+                tickets = client.tickets.search(message_box_id=1)
+        """
+        return deadline_scope(seconds, token)
+
+    def priority(self, priority: str):
+        """ブロック内の全ての呼び出しの優先度を指定します
+
+        ページングや batch() で行われる呼び出しにも適用されます。
+        ``relation_client.priority.priority_scope()`` と同じです。
+
+        Args:
+            priority: PRIORITY_INTERACTIVE または PRIORITY_BATCH
+
+        Example:
+            with client.priority(PRIORITY_BATCH):
+                for ticket in client.tickets.search(message_box_id=1):
+                    ...
+        """
+        return priority_scope(priority)
+
+    def _send(
+        self,
+        send: Callable[[], requests.Response],
+        method: str,
+        deadline: Optional[Deadline] = None,
+        hedge: bool = True
+    ) -> requests.Response:
+        """リクエストを送信します
+
+        同時実行数のリミッターが設定されている場合は実行枠を確保してから送信し、
+        結果をリミッターに伝えます。GETリクエストは hedge が True の場合、
+        ヘッジポリシーに従って送信します。
+        """
+        if self.hedge_policy is not None and method == 'GET' and hedge:
+            send = functools.partial(self._send_hedged, send)
+        limiter = self.concurrency_limiter
+        if limiter is None:
+            return send()
+
+        try:
+            permit = limiter.acquire(timeout=None if deadline is None else deadline.remaining())
+        except TimeoutError:
+            raise DeadlineExceededError("同時実行数の空きを待つ間にデッドラインを過ぎました")
+        started = time.monotonic()
+        try:
+            response = send()
+        except BaseException:
+            limiter.release(permit, failed=True)
+            raise
+        limiter.release(permit, time.monotonic() - started, response.status_code)
+        return response
+
+    def _send_hedged(self, send: Callable[[], requests.Response]) -> requests.Response:
+        """GETリクエストをヘッジ付きで送信します
+
+        応答がヘッジポリシーの待機時間内に返らず、サーキットブレーカーが送信を許可し、
+        レートリミッターの枠と同時実行数のリミッターの実行枠 (最初のリクエストとは別の枠) を
+        待たずに確保できる場合は同じリクエストをもう1件送信し、先に成功した応答を返します。
+        採用されなかった応答もレートリミットの状態の更新には使われます。
+        """
+        policy = self.hedge_policy
+        executor = self._get_hedge_executor()
+
+        def timed_send() -> requests.Response:
+            started = time.monotonic()
+            response = send()
+            policy.record_latency(time.monotonic() - started)
+            return response
+
+        primary = executor.submit(timed_send)
+        done, _ = wait([primary], timeout=policy.delay())
+        if done:
+            policy.record_outcome(hedged=False)
+            return primary.result()
+        allowed, permit = self._try_acquire_hedge()
+        if not allowed:
+            policy.record_outcome(hedged=False, skipped=True)
+            return primary.result()
+
+        def hedged_send() -> requests.Response:
+            # ヘッジは最初のリクエストとは別の実行枠で送信し、結果をリミッターに伝える
+            if permit is None:
+                return timed_send()
+            started = time.monotonic()
             try:
-                response = self._session.request(
-                    method=method,
-                    url=url,
-                    headers=headers,
-                    params=params,
-                    data=data,
-                    json=json_data,
-                    timeout=self.timeout
+                response = timed_send()
+            except BaseException:
+                self.concurrency_limiter.release(permit, failed=True)
+                raise
+            self.concurrency_limiter.release(permit, time.monotonic() - started, response.status_code)
+            return response
+
+        hedge = executor.submit(hedged_send)
+        pending = {primary, hedge}
+        first_error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.add_done_callback(self._update_rate_limit_from_future)
+                    policy.record_outcome(hedged=True, hedge_won=future is hedge)
+                    return future.result()
+                first_error = first_error or future.exception()
+        policy.record_outcome(hedged=True)
+        raise first_error
+
+    def _try_acquire_hedge(self) -> Tuple[bool, Optional[int]]:
+        """ヘッジを送信できる場合に限り、ヘッジ用の枠を待たずに確保します
+
+        サーキットブレーカーが送信を許可し、レートリミッターの枠と同時実行数のリミッターの
+        実行枠を待たずに確保できる場合に限り送信します。
+
+        Returns:
+            (送信できるかどうか, 同時実行数のリミッターの実行枠 (リミッターが未設定の場合は None))
+        """
+        if self.circuit_breaker is not None:
+            try:
+                self.circuit_breaker.before_request()
+            except CircuitOpenError:
+                return False, None
+        if not self.rate_limiter.try_acquire():
+            return False, None
+        if self.concurrency_limiter is None:
+            return True, None
+        permit = self.concurrency_limiter.try_acquire()
+        return permit is not None, permit
+
+    def _update_rate_limit_from_future(self, future: Future) -> None:
+        """採用されなかったヘッジの応答でレートリミットの状態を更新します"""
+        if future.exception() is None:
+            response = future.result()
+            self.rate_limiter.update(response.headers, response.status_code)
+
+    def _get_hedge_executor(self) -> ThreadPoolExecutor:
+        """ヘッジ用のスレッドプールを取得します (初回呼び出し時に生成)"""
+        with self._hedge_executor_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(
+                    max_workers=self.pool_maxsize * 2, thread_name_prefix='relation-hedge'
                 )
-                
-                # レスポンスを処理
-                if response.status_code < 400:
-                    # 成功レスポンス
-                    if not response.content:
-                        return {}
-                    try:
-                        return response.json()
-                    except ValueError:
-                        return {"data": response.text}
-                
-                # エラーレスポンスの処理
-                error_message = self._extract_error_message(response)
-                
-                if response.status_code == HTTP_UNAUTHORIZED:
-                    raise AuthenticationError(error_message, response)
-                elif response.status_code == HTTP_FORBIDDEN:
-                    raise PermissionError(error_message, response)
-                elif response.status_code == HTTP_NOT_FOUND:
-                    raise ResourceNotFoundError(error_message, response)
-                elif response.status_code == HTTP_TOO_MANY_REQUESTS:
-                    # レートリミットエラー時はリトライ
-                    retry_after = int(response.headers.get('Retry-After', self.retry_delay))
-                    if retry_count < self.max_retries:
-                        time.sleep(retry_after)
-                        retry_count += 1
-                        continue
-                    raise RateLimitError(error_message, response)
-                elif response.status_code in (HTTP_BAD_REQUEST, HTTP_UNSUPPORTED_MEDIA_TYPE):
-                    raise InvalidRequestError(error_message, response)
-                elif response.status_code == HTTP_SERVER_ERROR:
-                    raise APIError(error_message, response)
-                elif response.status_code == HTTP_SERVICE_UNAVAILABLE:
-                    # メンテナンス時はリトライ
-                    if retry_count < self.max_retries:
-                        time.sleep(self.retry_delay)
-                        retry_count += 1
-                        continue
-                    raise ServiceUnavailableError(error_message, response)
-                else:
-                    raise APIError(f"予期しないステータスコード: {response.status_code}", response)
-                
-            except (requests.ConnectionError, requests.Timeout) as e:
-                # 接続エラーやタイムアウトのリトライ
-                if retry_count < self.max_retries:
-                    time.sleep(self.retry_delay)
-                    retry_count += 1
-                    continue
-                raise APIError(f"接続エラー: {str(e)}")
-                
-        # ここに到達することはないはず
-        raise APIError("予期しないエラー: 最大リトライ回数を超えました")
-    
+            return self._hedge_executor
+
+    @property
+    def rate_limit_status(self) -> RateLimitStatus:
+        """X-RateLimit-* ヘッダーから取得した最新のレートリミットの状態"""
+        return self.rate_limiter.status
+
+    @property
+    def concurrency_status(self) -> Optional[ConcurrencyStatus]:
+        """同時実行数のリミッターの状態 (リミッターが未設定の場合は None)"""
+        if self.concurrency_limiter is None:
+            return None
+        return self.concurrency_limiter.status
+
+    @property
+    def coalescing_stats(self) -> Optional[SingleflightStats]:
+        """リクエスト集約の統計情報 (coalesce_requests が無効の場合は None)"""
+        if self._singleflight is None:
+            return None
+        return self._singleflight.stats
+
+    @property
+    def bulkhead_stats(self) -> Optional[Dict[PartitionKey, BulkheadStats]]:
+        """受信箱・アドレス帳ごとのバルクヘッドの統計情報 (bulkhead が未設定の場合は None)"""
+        if self.bulkhead is None:
+            return None
+        return self.bulkhead.stats()
+
+    def _can_retry(self, retry_count: int) -> bool:
+        """リトライしてよいかどうかを判定します (ブレーカーが開いた場合は即座に失敗させる)"""
+        if self.circuit_breaker is not None and self.circuit_breaker.is_open:
+            return False
+        return self.retry_policy.allow_retry(retry_count)
+
+    def _retry_wait(self, response: requests.Response, retry_count: int) -> float:
+        """リトライ前の待機秒数を返します"""
+        retry_after = None
+        if response.status_code == HTTP_TOO_MANY_REQUESTS:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        return self.retry_policy.wait_time(retry_count, retry_after)
+
     def _extract_error_message(self, response: requests.Response) -> str:
         """レスポンスからエラーメッセージを抽出"""
-        try:
-            error_data = response.json()
-            if isinstance(error_data, dict):
-                if 'error' in error_data:
-                    return error_data['error']
-                elif 'message' in error_data:
-                    return error_data['message']
-            return str(error_data)
-        except (ValueError, KeyError):
-            return response.text or f"HTTPエラー {response.status_code}"
+        return extract_error_message(response)
             
-    def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def batch(self, max_workers: Optional[int] = None) -> BatchExecutor:
+        """API呼び出しを並列実行するバッチエグゼキューターを作成します
+
+        Args:
+            max_workers: 同時に実行する呼び出しの最大数 (省略時は pool_maxsize。
+                同時実行数のリミッターが設定されている場合はその max_limit)
+
+        Returns:
+            BatchExecutor (with文で利用してください)
+        """
+        return BatchExecutor(max_workers=max_workers or self._default_workers())
+
+    def map(
+        self,
+        fn: Callable[[Any], Any],
+        items: Iterable[Any],
+        max_workers: Optional[int] = None
+    ) -> List[BatchResult]:
+        """各要素に関数を並列に適用し、投入順に結果を返します
+
+        Args:
+            fn: 各要素に適用する関数 (例: lambda tid: client.tickets.get(1, tid))
+            items: 要素のイテラブル
+            max_workers: 同時に実行する呼び出しの最大数 (省略時は pool_maxsize。
+                同時実行数のリミッターが設定されている場合はその max_limit)
+
+        Returns:
+            BatchResultのリスト (例外は要素ごとに格納されます)
+        """
+        return map_batch(fn, items, max_workers=max_workers or self._default_workers())
+
+    def warmup(self, connections: Optional[int] = None) -> int:
+        """APIサーバーへの接続を事前に確立します
+
+        起動直後やアイドル後の最初のリクエストでDNS解決・TCP・TLSの接続待ちが
+        発生しないよう、コネクションプールに接続を張っておきます。既に接続済みの
+        接続はそのまま使い、切断されたものやアイドル時間を超えたものは張り直します。
+        定期的に呼び出すと、アイドル中も接続を温かい状態に保てます。
+
+        Args:
+            connections: 用意する接続数 (省略時は pool_maxsize)
+
+        Returns:
+            新たに接続した数
+
+        Raises:
+            APIError: 接続に失敗した場合
+        """
+        count = connections or self.pool_maxsize
+        try:
+            return self._transport.warmup(self._base_url, count)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise APIError(f"接続エラー: {str(e)}")
+
+    def close(self) -> None:
+        """コネクションプールとヘッジ用のスレッドプールを閉じます
+
+        共有のSessionやトランスポートを指定して生成した場合、それらは閉じません。
+        """
+        with self._hedge_executor_lock:
+            if self._hedge_executor is not None:
+                self._hedge_executor.shutdown(wait=False)
+                self._hedge_executor = None
+        if self._owns_transport:
+            self._transport.close()
+
+    def reset_after_fork(self) -> None:
+        """fork後の子プロセスで、親プロセスと共有している接続・ロック・実行中の状態を作り直します
+
+        生成したクライアントは登録され、fork後の子プロセスで自動的に呼び出されるため、
+        通常は直接呼び出す必要はありません。トランスポートのコネクションプール、ヘッジ用の
+        スレッドプール、レートリミッター・リトライ予算・サーキットブレーカーなどのロックと
+        実行中の件数を作り直します。レートリミットの状態や学習済みの上限は引き継ぎます。
+        """
+        self._hedge_executor = None
+        self._hedge_executor_lock = threading.Lock()
+        reset = getattr(self._transport, 'reset_after_fork', None)
+        if reset is not None:
+            reset()
+        components = [
+            self.rate_limiter, self.retry_policy, self.circuit_breaker, self.hedge_policy,
+            self.concurrency_limiter, self.scheduler, self.bulkhead, self._singleflight,
+            *self._middleware
+        ]
+        for component in components:
+            reset = getattr(component, 'reset_after_fork', None)
+            if reset is not None:
+                reset()
+
+    def __enter__(self) -> 'RelationClient':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def _default_workers(self) -> int:
+        """batch() と map() の既定の並列数を返します"""
+        if self.concurrency_limiter is not None:
+            return self.concurrency_limiter.max_limit
+        return self.pool_maxsize
+
+    def get(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        deadline: Union[Deadline, float, None] = None,
+        priority: Optional[str] = None
+    ) -> Dict[str, Any]:
         """GETリクエストを実行"""
-        return self.request('GET', path, params=params)
+        return self.request('GET', path, params=params, deadline=deadline, priority=priority)
         
-    def post(self, path: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def post(
+        self,
+        path: str,
+        data: Optional[Dict[str, Any]] = None,
+        deadline: Union[Deadline, float, None] = None,
+        priority: Optional[str] = None
+    ) -> Dict[str, Any]:
         """POSTリクエストを実行"""
-        return self.request('POST', path, json_data=data)
+        return self.request('POST', path, json_data=data, deadline=deadline, priority=priority)
         
-    def put(self, path: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def put(
+        self,
+        path: str,
+        data: Optional[Dict[str, Any]] = None,
+        deadline: Union[Deadline, float, None] = None,
+        priority: Optional[str] = None
+    ) -> Dict[str, Any]:
         """PUTリクエストを実行"""
-        return self.request('PUT', path, json_data=data)
+        return self.request('PUT', path, json_data=data, deadline=deadline, priority=priority)
         
-    def delete(self, path: str) -> Dict[str, Any]:
+    def delete(
+        self,
+        path: str,
+        deadline: Union[Deadline, float, None] = None,
+        priority: Optional[str] = None
+    ) -> Dict[str, Any]:
         """DELETEリクエストを実行"""
-        return self.request('DELETE', path) 
\ No newline at end of file
+        return self.request('DELETE', path, deadline=deadline, priority=priority) 
\ No newline at end of file
@@ -0,0 +1,202 @@
+"""
+同時実行数制御モジュール
+
+このモジュールは、応答のレイテンシとエラーに応じて同時実行中のリクエスト数の上限を
+自動で調整するAIMD (加算増加・乗算減少) 方式のリミッターを提供します。
+"""
+
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+# 上限を下げるきっかけになるステータスコード
+OVERLOAD_STATUS_CODES = (429, 503)
+
+
+@dataclass
+class ConcurrencyStatus:
+    """同時実行数の制御状態
+
+    ``limit`` は現在の同時実行数の上限、``in_flight`` は実行中のリクエスト数です。
+    ``baseline_latency`` は直近の最小レイテンシ、``smoothed_latency`` は
+    レイテンシの指数移動平均です (記録がない場合は None)。
+    """
+    limit: int
+    in_flight: int
+    min_limit: int
+    max_limit: int
+    baseline_latency: Optional[float] = None
+    smoothed_latency: Optional[float] = None
+    increases: int = 0
+    decreases: int = 0
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD方式で同時実行数の上限を調整するリミッター
+
+    上限の半分以上を使っている状態で健全な応答が返るたびに、上限を1往復
+    (上限と同じ件数の応答) あたり ``increase`` ずつ増やします。429・503・接続エラーが
+    返った場合や、レイテンシの移動平均が直近の最小レイテンシの ``latency_tolerance`` 倍を
+    超えた場合は、上限を ``decrease_factor`` 倍に減らします。同じ時期に送信されたリクエストの
+    失敗で何度も減らさないよう、減少は直前の減少より後に開始したリクエストの
+    結果でのみ行います。スレッドセーフです。
+
+    Example:
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=32)
+        client = RelationClient(token, subdomain, concurrency_limiter=limiter)
+        results = client.map(fetch, ticket_ids)
+        print(limiter.status.limit)
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        increase: float = 1.0,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 2.0,
+        smoothing: float = 0.2,
+        window: int = 100
+    ):
+        """初期化
+
+        Args:
+            initial_limit: 同時実行数の初期上限
+            min_limit: 同時実行数の上限の下限
+            max_limit: 同時実行数の上限の上限
+            increase: 健全な状態で1往復あたりに増やす上限の値
+            decrease_factor: 過負荷を検知したときに上限に掛ける係数 (0より大きく1未満)
+            latency_tolerance: 直近の最小レイテンシに対して許容するレイテンシの倍率
+            smoothing: レイテンシの指数移動平均の係数 (0より大きく1以下)
+            window: 最小レイテンシの計算に使う直近の記録件数
+        """
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("1 <= min_limit <= initial_limit <= max_limit となるように指定してください")
+        if not 0 < decrease_factor < 1:
+            raise ValueError("decrease_factor は0より大きく1未満を指定してください")
+        if increase <= 0 or latency_tolerance <= 1 or not 0 < smoothing <= 1:
+            raise ValueError("increase は正の値、latency_tolerance は1より大きい値、"
+                             "smoothing は0より大きく1以下を指定してください")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.smoothing = smoothing
+        self._condition = threading.Condition()
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._latencies: deque = deque(maxlen=window)
+        self._smoothed: Optional[float] = None
+        self._generation = 0
+        self._increases = 0
+        self._decreases = 0
+
+    @property
+    def limit(self) -> int:
+        """現在の同時実行数の上限"""
+        with self._condition:
+            return int(self._limit)
+
+    @property
+    def status(self) -> ConcurrencyStatus:
+        """現在の制御状態 (メトリクスとして利用できます)"""
+        with self._condition:
+            return ConcurrencyStatus(
+                limit=int(self._limit),
+                in_flight=self._in_flight,
+                min_limit=self.min_limit,
+                max_limit=self.max_limit,
+                baseline_latency=min(self._latencies) if self._latencies else None,
+                smoothed_latency=self._smoothed,
+                increases=self._increases,
+                decreases=self._decreases
+            )
+
+    def try_acquire(self) -> Optional[int]:
+        """待たずに実行できる場合に限り、実行枠を1件確保します
+
+        Returns:
+            確保した実行枠 (release() に渡す値。上限に達している場合は None)
+        """
+        with self._condition:
+            if self._in_flight >= int(self._limit):
+                return None
+            self._in_flight += 1
+            return self._generation
+
+    def acquire(self, timeout: Optional[float] = None) -> int:
+        """実行枠が空くまで待ってから、実行枠を1件確保します
+
+        Args:
+            timeout: 最大待機秒数 (省略時は無制限)
+
+        Returns:
+            確保した実行枠 (release() に渡す値)
+
+        Raises:
+            TimeoutError: timeout 秒以内に実行枠が空かなかった場合
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._in_flight < int(self._limit), timeout):
+                raise TimeoutError("同時実行数の上限に達しているため実行枠を確保できませんでした")
+            self._in_flight += 1
+            return self._generation
+
+    def release(
+        self,
+        permit: int,
+        latency: Optional[float] = None,
+        status_code: Optional[int] = None,
+        failed: bool = False
+    ) -> None:
+        """実行枠を返却し、結果に応じて上限を調整します
+
+        Args:
+            permit: acquire() または try_acquire() が返した実行枠
+            latency: リクエストのレイテンシ (秒)
+            status_code: レスポンスのステータスコード
+            failed: 接続エラーなどでレスポンスが得られなかったかどうか
+        """
+        with self._condition:
+            # 上限の半分以上を使っている間だけ増やし、使っていない上限が膨らまないようにする
+            saturated = self._in_flight * 2 >= int(self._limit)
+            self._in_flight -= 1
+            overloaded = failed or status_code in OVERLOAD_STATUS_CODES
+            if latency is not None and not overloaded:
+                overloaded = self._record_latency(latency)
+            if overloaded:
+                if permit == self._generation:
+                    self._decrease()
+            elif saturated:
+                self._limit = min(float(self.max_limit), self._limit + self.increase / int(self._limit))
+                self._increases += 1
+            self._condition.notify_all()
+
+    def reset_after_fork(self) -> None:
+        """fork後の子プロセスで呼び出し、ロックを作り直して実行中の件数を0に戻します
+
+        子プロセスには親プロセスで実行中だったリクエストのスレッドが存在せず、
+        それらの実行枠は返却されないためです。調整済みの上限とレイテンシの記録は引き継ぎます。
+        """
+        self._condition = threading.Condition()
+        self._in_flight = 0
+
+    def _record_latency(self, latency: float) -> bool:
+        """レイテンシを記録し、レイテンシが悪化しているかどうかを返します"""
+        self._latencies.append(latency)
+        if self._smoothed is None:
+            self._smoothed = latency
+        else:
+            self._smoothed += self.smoothing * (latency - self._smoothed)
+        return self._smoothed > min(self._latencies) * self.latency_tolerance
+
+    def _decrease(self) -> None:
+        """上限を乗算的に減らします (ロック取得済みで呼び出すこと)"""
+        self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+        self._generation += 1
+        self._decreases += 1
+        # 減少前の遅い応答の影響を引きずらないよう移動平均をやり直す
+        self._smoothed = None
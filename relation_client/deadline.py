@@ -0,0 +1,194 @@
+"""
+デッドライン・キャンセルモジュール
+
+このモジュールは、リトライや待機を含む一連のAPI呼び出し全体に期限を設けるデッドラインと、
+残りの処理を途中で打ち切るためのキャンセルトークンを提供します。
+デッドラインとトークンはコンテキスト変数で受け渡されるため、``with`` ブロック内の全ての
+呼び出し (ページングやバッチ実行の中で行われる呼び出しを含む) に適用されます。
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Union
+
+from .exceptions import DeadlineExceededError, OperationCancelledError
+
+
+class Deadline:
+    """API呼び出しの期限
+
+    単調増加する時計を基準に、期限までの残り秒数を計算します。
+    """
+
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic):
+        """初期化
+
+        Args:
+            seconds: 現在から期限までの秒数
+            clock: 単調増加する時刻を返す関数
+        """
+        self._clock = clock
+        self.expires_at = clock() + seconds
+
+    def remaining(self) -> float:
+        """期限までの残り秒数 (期限を過ぎている場合は0)"""
+        return max(0.0, self.expires_at - self._clock())
+
+    @property
+    def expired(self) -> bool:
+        """期限を過ぎたかどうか"""
+        return self._clock() >= self.expires_at
+
+    def check(self) -> None:
+        """期限を過ぎていれば DeadlineExceededError を送出します"""
+        if self.expired:
+            raise DeadlineExceededError("デッドラインを過ぎたため処理を中止しました")
+
+    def __repr__(self) -> str:
+        return f'Deadline(remaining={self.remaining():.3f})'
+
+
+class CancellationToken:
+    """処理のキャンセルを伝えるトークン
+
+    別のスレッドから ``cancel()`` を呼び出すと、このトークンを使っている呼び出しは
+    次のリクエストの送信前、またはリトライの待機中に ``OperationCancelledError`` で終了します。
+    スレッドセーフです。
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    def cancel(self) -> None:
+        """キャンセルを要求します"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    @property
+    def cancelled(self) -> bool:
+        """キャンセルが要求されたかどうか"""
+        return self._event.is_set()
+
+    def check(self) -> None:
+        """キャンセルが要求されていれば OperationCancelledError を送出します"""
+        if self._event.is_set():
+            raise OperationCancelledError("キャンセルが要求されたため処理を中止しました")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """キャンセルが要求されるまで最大 timeout 秒待機します
+
+        Returns:
+            キャンセルが要求された場合は True
+        """
+        return self._event.wait(timeout)
+
+    def add_callback(self, callback: Callable[[], None]) -> None:
+        """キャンセル時に呼び出す関数を登録します (既にキャンセル済みの場合は即座に呼び出す)"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback: Callable[[], None]) -> None:
+        """登録した関数を解除します"""
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+_current_deadline: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar(
+    'relation_client_deadline', default=None
+)
+_current_token: contextvars.ContextVar[Optional[CancellationToken]] = contextvars.ContextVar(
+    'relation_client_cancellation_token', default=None
+)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """現在のコンテキストのデッドライン (設定されていない場合は None)"""
+    return _current_deadline.get()
+
+
+def current_token() -> Optional[CancellationToken]:
+    """現在のコンテキストのキャンセルトークン (設定されていない場合は None)"""
+    return _current_token.get()
+
+
+def earliest(*deadlines: Optional[Deadline]) -> Optional[Deadline]:
+    """最も早く期限を迎えるデッドラインを返します (全て None の場合は None)"""
+    candidates = [d for d in deadlines if d is not None]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda d: d.expires_at)
+
+
+def to_deadline(value: Union[Deadline, float, None]) -> Optional[Deadline]:
+    """秒数またはデッドラインを Deadline に変換します"""
+    if value is None or isinstance(value, Deadline):
+        return value
+    return Deadline(value)
+
+
+def interruptible_sleep(
+    seconds: float,
+    deadline: Optional[Deadline] = None,
+    token: Optional[CancellationToken] = None
+) -> None:
+    """デッドラインとキャンセルトークンを考慮して待機します
+
+    待機がデッドラインを越える場合は待たずに DeadlineExceededError を送出し、
+    待機中にキャンセルされた場合はすぐに OperationCancelledError を送出します。
+
+    Args:
+        seconds: 待機秒数
+        deadline: デッドライン
+        token: キャンセルトークン
+    """
+    if seconds <= 0:
+        return
+    if deadline is not None and seconds >= deadline.remaining():
+        raise DeadlineExceededError(
+            f"待機時間 ({seconds:.3f}秒) がデッドラインまでの残り時間を超えるため処理を中止しました"
+        )
+    if token is None:
+        time.sleep(seconds)
+    elif token.wait(seconds):
+        token.check()
+
+
+@contextmanager
+def deadline_scope(
+    seconds: Union[Deadline, float, None] = None,
+    token: Optional[CancellationToken] = None
+) -> Iterator[Optional[Deadline]]:
+    """ブロック内の全てのAPI呼び出しにデッドラインとキャンセルトークンを適用します
+
+    外側のブロックで既にデッドラインが設定されている場合は、早い方の期限が使われます。
+    BatchExecutor に投入した呼び出しにもコンテキストとして引き継がれます。
+
+    Args:
+        seconds: 期限までの秒数 (または Deadline)。None の場合は外側のデッドラインを引き継ぐ
+        token: キャンセルトークン (None の場合は外側のトークンを引き継ぐ)
+
+    Yields:
+        ブロック内で有効なデッドライン
+    """
+    effective = earliest(_current_deadline.get(), to_deadline(seconds))
+    deadline_reset = _current_deadline.set(effective)
+    token_reset = _current_token.set(token) if token is not None else None
+    try:
+        yield effective
+    finally:
+        if token_reset is not None:
+            _current_token.reset(token_reset)
+        _current_deadline.reset(deadline_reset)
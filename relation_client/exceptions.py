@@ -44,6 +44,31 @@ class APIError(RelationError):
     pass
 
 
+class APIConnectionError(APIError):
+    """接続エラー・タイムアウトにより、リトライしてもレスポンスを受け取れなかったエラー"""
+    pass
+
+
 class ServiceUnavailableError(RelationError):
     """サービス利用不可エラー (HTTP 503)"""
-    pass 
\ No newline at end of file
+    pass
+
+
+class CircuitOpenError(ServiceUnavailableError):
+    """サーキットブレーカーが開いているためリクエストを送信しなかったエラー"""
+    pass
+
+
+class DeadlineExceededError(RelationError):
+    """デッドラインを過ぎたため、リトライや待機を含む処理を中止したエラー"""
+    pass
+
+
+class OperationCancelledError(RelationError):
+    """キャンセルトークンによって処理を中止したエラー"""
+    pass
+
+
+class BulkheadFullError(RelationError):
+    """受信箱・アドレス帳ごとの同時実行数の上限に達し、待ち行列も一杯だったため実行しなかったエラー"""
+    pass
@@ -0,0 +1,36 @@
+"""
+fork対応モジュール
+
+このモジュールは、プロセスのfork後に子プロセスで、親プロセスから引き継いだ
+クライアントの接続とロックを作り直すための仕組みを提供します。
+"""
+
+import os
+import weakref
+from typing import Any
+
+# fork後に reset_after_fork() を呼び出すオブジェクト (破棄されたものは自動的に外れる)
+_instances: 'weakref.WeakSet[Any]' = weakref.WeakSet()
+
+
+def register_after_fork(obj: Any) -> None:
+    """fork後の子プロセスで ``obj.reset_after_fork()`` が呼び出されるよう登録します
+
+    ``os.fork()``・``multiprocessing`` のforkコンテキスト・preforkサーバー (gunicorn など) の
+    いずれでforkした場合も、子プロセスで他の処理より先に呼び出されます。登録は弱参照のため、
+    オブジェクトの破棄を妨げません。fork に対応していないプラットフォームでは何もしません。
+
+    Args:
+        obj: ``reset_after_fork()`` メソッドを持つオブジェクト
+    """
+    _instances.add(obj)
+
+
+def _reset_in_child() -> None:
+    """子プロセスで登録済みの全てのオブジェクトを作り直します"""
+    for obj in list(_instances):
+        obj.reset_after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_in_child)
@@ -0,0 +1,104 @@
+"""
+ヘッジリクエストモジュール
+
+このモジュールは、冪等なGETリクエストの応答が一定時間内に返らない場合に
+同じリクエストをもう1件送信し、先に返った応答を採用するためのポリシーを提供します。
+まれに発生する遅い応答によるテールレイテンシを抑えることが目的です。
+"""
+
+import math
+import threading
+from collections import deque
+from typing import Optional
+
+
+class HedgePolicy:
+    """ヘッジリクエストのポリシー
+
+    直近のGETリクエストのレイテンシを記録し、その ``percentile`` パーセンタイル値を
+    ヘッジを送信するまでの待機時間として使います。待機時間は ``min_delay`` 〜
+    ``max_delay`` の範囲に収められ、記録が ``min_samples`` 件に満たない間は
+    ``max_delay`` を使います。
+
+    ヘッジはレートリミッターの枠を待たずに確保できる場合にのみ送信されるため、
+    ヘッジによって429が発生することはありません。スレッドセーフです。
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        min_delay: float = 0.05,
+        max_delay: float = 2.0,
+        window: int = 200,
+        min_samples: int = 20
+    ):
+        """初期化
+
+        Args:
+            percentile: ヘッジまでの待機時間に使うレイテンシのパーセンタイル (0〜100)
+            min_delay: 待機時間の下限 (秒)
+            max_delay: 待機時間の上限 (秒)
+            window: 記録しておく直近のレイテンシの件数
+            min_samples: パーセンタイル値を使い始めるまでに必要な記録件数
+        """
+        if not 0 < percentile <= 100:
+            raise ValueError("percentile は0より大きく100以下を指定してください")
+        if min_delay < 0 or max_delay < min_delay:
+            raise ValueError("min_delay は0以上、max_delay は min_delay 以上を指定してください")
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self._latencies: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+        # 統計情報
+        self.requests = 0
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self.hedges_skipped = 0
+
+    def record_latency(self, seconds: float) -> None:
+        """GETリクエストのレイテンシを記録します"""
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def delay(self) -> float:
+        """ヘッジを送信するまでの待機秒数を返します"""
+        with self._lock:
+            enough = len(self._latencies) >= self.min_samples
+        latency = self.latency_percentile if enough else None
+        if latency is None:
+            return self.max_delay
+        return min(self.max_delay, max(self.min_delay, latency))
+
+    def record_outcome(self, hedged: bool, hedge_won: bool = False, skipped: bool = False) -> None:
+        """ヘッジの実施結果を統計情報に記録します
+
+        Args:
+            hedged: ヘッジを送信したかどうか
+            hedge_won: ヘッジ側の応答が採用されたかどうか
+            skipped: レートリミットの枠がなくヘッジを見送ったかどうか
+        """
+        with self._lock:
+            self.requests += 1
+            if hedged:
+                self.hedges_sent += 1
+            if hedge_won:
+                self.hedges_won += 1
+            if skipped:
+                self.hedges_skipped += 1
+
+    def reset_after_fork(self) -> None:
+        """fork後の子プロセスで呼び出し、ロックを作り直します"""
+        self._lock = threading.Lock()
+
+    @property
+    def latency_percentile(self) -> Optional[float]:
+        """記録されているレイテンシの ``percentile`` パーセンタイル値 (記録がない場合は None)"""
+        with self._lock:
+            if not self._latencies:
+                return None
+            ordered = sorted(self._latencies)
+        index = max(0, math.ceil(len(ordered) * self.percentile / 100.0) - 1)
+        return ordered[index]
@@ -0,0 +1,200 @@
+"""
+リクエストミドルウェアモジュール
+
+このモジュールは、RelationClient.request() の処理を組み立てるミドルウェアのチェーンと、
+組み込みのリトライ・エラー変換のミドルウェアを提供します。
+"""
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Sequence, Tuple
+
+import requests
+
+from .constants import (
+    HTTP_BAD_REQUEST, HTTP_UNAUTHORIZED, HTTP_FORBIDDEN, HTTP_NOT_FOUND,
+    HTTP_UNSUPPORTED_MEDIA_TYPE, HTTP_TOO_MANY_REQUESTS, HTTP_SERVER_ERROR,
+    HTTP_SERVICE_UNAVAILABLE
+)
+from .codec import JSONCodec, decode_response, default_codec
+from .deadline import CancellationToken, Deadline
+from .streaming import ItemStream
+from .exceptions import (
+    RelationError, AuthenticationError, PermissionError, ResourceNotFoundError,
+    RateLimitError, InvalidRequestError, APIError, APIConnectionError, ServiceUnavailableError,
+    CircuitOpenError
+)
+
+if TYPE_CHECKING:
+    from .client import RelationClient
+
+
+# リトライ対象のHTTPステータスコード
+RETRYABLE_STATUS_CODES = (HTTP_TOO_MANY_REQUESTS, HTTP_SERVICE_UNAVAILABLE)
+
+
+@dataclass
+class APIRequest:
+    """ミドルウェアに渡されるAPIリクエスト
+
+    ``deadline`` と ``token`` には、呼び出し時の引数と ``client.deadline()`` のブロックから
+    決まったデッドラインとキャンセルトークンが、``priority`` には優先度が入ります。
+    ``stream`` が True の場合、結果は ``stream_path`` の配列の要素を受信しながら返す
+    ItemStream になります。内容を変えて次に渡す場合は ``dataclasses.replace()`` で複製してください。
+    """
+    method: str
+    path: str
+    params: Optional[Dict[str, Any]] = None
+    data: Optional[Dict[str, Any]] = None
+    json_data: Optional[Dict[str, Any]] = None
+    deadline: Optional[Deadline] = None
+    token: Optional[CancellationToken] = None
+    priority: Optional[str] = None
+    stream: bool = False
+    stream_path: Tuple[str, ...] = ()
+
+
+# 次の処理を呼び出す関数 (APIRequest を受け取り、結果を返す)
+Handler = Callable[[APIRequest], Any]
+# ミドルウェア (APIRequest と次の処理を受け取り、結果を返すか例外を送出する)
+Middleware = Callable[[APIRequest, Handler], Any]
+
+
+def build_chain(middleware: Sequence[Middleware], handler: Handler) -> Handler:
+    """ミドルウェアを先頭から順に外側になるよう重ね、1つの関数にまとめます
+
+    チェーンはミドルウェアの追加時に1度だけ組み立てるため、リクエストごとの処理は
+    ミドルウェアの呼び出しそのものだけです。ミドルウェアがない場合は handler をそのまま返します。
+
+    Args:
+        middleware: ミドルウェアのリスト (先頭が最も外側)
+        handler: チェーンの末端で実際の処理を行う関数
+
+    Returns:
+        APIRequest を受け取って結果を返す関数
+    """
+    for layer in reversed(middleware):
+        handler = _bind(layer, handler)
+    return handler
+
+
+def _bind(layer: Middleware, call_next: Handler) -> Handler:
+    def handle(request: APIRequest) -> Any:
+        return layer(request, call_next)
+    return handle
+
+
+def extract_error_message(response: Any) -> str:
+    """レスポンスからエラーメッセージを抽出
+
+    requests と httpx のどちらのレスポンスオブジェクトも受け付けます。
+    """
+    try:
+        error_data = response.json()
+        if isinstance(error_data, dict):
+            if 'error' in error_data:
+                return error_data['error']
+            elif 'message' in error_data:
+                return error_data['message']
+        return str(error_data)
+    except (ValueError, KeyError):
+        return response.text or f"HTTPエラー {response.status_code}"
+
+
+def error_from_response(response: Any) -> RelationError:
+    """エラーレスポンスを対応する例外オブジェクトに変換します
+
+    Args:
+        response: ステータスコードが400以上のレスポンス
+
+    Returns:
+        ステータスコードに対応する例外オブジェクト
+    """
+    error_message = extract_error_message(response)
+    status_code = response.status_code
+
+    if status_code == HTTP_UNAUTHORIZED:
+        return AuthenticationError(error_message, response)
+    elif status_code == HTTP_FORBIDDEN:
+        return PermissionError(error_message, response)
+    elif status_code == HTTP_NOT_FOUND:
+        return ResourceNotFoundError(error_message, response)
+    elif status_code == HTTP_TOO_MANY_REQUESTS:
+        return RateLimitError(error_message, response)
+    elif status_code in (HTTP_BAD_REQUEST, HTTP_UNSUPPORTED_MEDIA_TYPE):
+        return InvalidRequestError(error_message, response)
+    elif status_code == HTTP_SERVER_ERROR:
+        return APIError(error_message, response)
+    elif status_code == HTTP_SERVICE_UNAVAILABLE:
+        return ServiceUnavailableError(error_message, response)
+    return APIError(f"予期しないステータスコード: {status_code}", response)
+
+
+class ErrorMappingMiddleware:
+    """レスポンスを辞書に変換し、エラーレスポンスと接続エラーを例外に変換するミドルウェア
+
+    成功レスポンスは本文のJSON (本文が空の場合は空の辞書、JSONでない場合は
+    ``{"data": 本文}``) を返します。ストリーミングのリクエストの場合は、本文を受信しながら
+    配列の要素を返す ItemStream を返します。400以上のステータスコードは対応する例外に、
+    接続エラーとタイムアウトは APIConnectionError に変換します。
+    """
+
+    def __init__(self, codec: Optional[JSONCodec] = None):
+        """初期化
+
+        Args:
+            codec: レスポンスのデコードに使うJSONコーデック (省略時は default_codec())
+        """
+        self.codec = codec or default_codec()
+
+    def __call__(self, request: APIRequest, call_next: Handler) -> Any:
+        try:
+            response = call_next(request)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise APIConnectionError(f"接続エラー: {str(e)}")
+
+        if response.status_code < 400:
+            if request.stream:
+                return ItemStream(response, self.codec, request.stream_path)
+            if not response.content:
+                return {}
+            try:
+                return decode_response(response, self.codec)
+            except ValueError:
+                return {"data": response.text}
+        raise error_from_response(response)
+
+
+class RetryMiddleware:
+    """429・503・接続エラーをクライアントのリトライポリシーに従ってリトライするミドルウェア
+
+    待機時間はリトライポリシー (429の場合は ``Retry-After`` も考慮) で決まり、
+    デッドラインとキャンセルトークンに従って待機します。サーキットブレーカーが
+    開いている場合はリトライしません。
+    """
+
+    def __init__(self, client: 'RelationClient'):
+        """初期化
+
+        Args:
+            client: リトライポリシー・サーキットブレーカーを参照するクライアント
+        """
+        self.client = client
+
+    def __call__(self, request: APIRequest, call_next: Handler) -> Any:
+        client = self.client
+        client.retry_policy.record_request()
+        retry_count = 0
+        while True:
+            try:
+                return call_next(request)
+            except (RateLimitError, ServiceUnavailableError, APIConnectionError) as e:
+                if isinstance(e, CircuitOpenError) or not client._can_retry(retry_count):
+                    raise
+                if e.response is not None:
+                    if e.response.status_code not in RETRYABLE_STATUS_CODES:
+                        raise
+                    wait = client._retry_wait(e.response, retry_count)
+                else:
+                    wait = client.retry_policy.wait_time(retry_count)
+                client._sleep(wait, request.deadline, request.token)
+                retry_count += 1
@@ -0,0 +1,473 @@
+"""
+ローカルミラーモジュール
+
+このモジュールは、チケット・メッセージ・コメント・添付ファイルをローカルのSQLiteに
+保存し、差分同期で最新の状態に保ちながら、APIを呼び出さずに検索できるミラーを提供します。
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .models import Message, Ticket
+from .scan import TimeLike, parse_time
+from .sync import SyncState, SyncStats, TicketSyncEngine, WatermarkStore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    message_box_id INTEGER NOT NULL,
+    ticket_id INTEGER NOT NULL,
+    status_cd TEXT,
+    assignee TEXT,
+    color_cd TEXT,
+    created_at TEXT,
+    last_updated_at TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (message_box_id, ticket_id)
+);
+CREATE INDEX IF NOT EXISTS tickets_status_cd ON tickets (message_box_id, status_cd);
+CREATE INDEX IF NOT EXISTS tickets_assignee ON tickets (message_box_id, assignee);
+CREATE INDEX IF NOT EXISTS tickets_last_updated_at ON tickets (message_box_id, last_updated_at);
+
+CREATE TABLE IF NOT EXISTS ticket_labels (
+    message_box_id INTEGER NOT NULL,
+    ticket_id INTEGER NOT NULL,
+    label_id INTEGER NOT NULL,
+    PRIMARY KEY (message_box_id, ticket_id, label_id)
+);
+CREATE INDEX IF NOT EXISTS ticket_labels_label_id ON ticket_labels (message_box_id, label_id);
+
+CREATE TABLE IF NOT EXISTS messages (
+    message_box_id INTEGER NOT NULL,
+    ticket_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    method_cd TEXT,
+    action_cd TEXT,
+    sent_at TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (message_box_id, message_id)
+);
+CREATE INDEX IF NOT EXISTS messages_ticket_id ON messages (message_box_id, ticket_id, position);
+CREATE INDEX IF NOT EXISTS messages_method_cd ON messages (message_box_id, method_cd);
+
+CREATE TABLE IF NOT EXISTS comments (
+    message_box_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    commenter TEXT,
+    commented_at TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (message_box_id, message_id, position)
+);
+
+CREATE TABLE IF NOT EXISTS attachments (
+    message_box_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    attachment_id INTEGER,
+    file_name TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (message_box_id, message_id, position)
+);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+# 一度にまとめて読み込むチケット数 (SQLiteのパラメータ数の上限より十分小さくする)
+_CHUNK_SIZE = 500
+
+
+def _timestamp(value: Optional[TimeLike]) -> Optional[str]:
+    """日時を比較・並べ替えできる文字列 (タイムゾーン付きはUTC) に変換します"""
+    if value is None:
+        return None
+    value = parse_time(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.isoformat()
+
+
+def _dumps(value: Dict[str, Any]) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+class TicketMirror(WatermarkStore):
+    """チケットとメッセージのローカルミラー (SQLite)
+
+    チケットはAPIのレスポンスのJSONをそのまま保存し、読み出し時に既存のモデルクラス
+    (Ticket・Message・Comment・Attachment) に変換して返します。ステータス・担当者・
+    ラベル・チャネル・最終更新日時には索引を作成するため、大量のチケットでも
+    ローカルディスクの速度で検索できます。
+
+    ``sync()`` は TicketSyncEngine で変更されたチケットだけを取得して反映します。
+    ミラー自身がウォーターマークのストアを兼ね、チケットの反映と同期の進捗の保存を
+    同じトランザクションでコミットするため、同期が中断されてもミラーと進捗が食い違いません。
+
+    1つのミラーは複数のスレッドから利用できます (内部でロックします)。
+
+    Example:
+        with TicketMirror('tickets.db') as mirror:
+            mirror.sync(client, 123)
+            tickets = mirror.query(123, status_cds=['open'], label_ids=[5])
+    """
+
+    def __init__(self, path: str = ':memory:'):
+        """初期化
+
+        Args:
+            path: SQLiteのデータベースファイルのパス (省略時はメモリ上)
+        """
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.RLock()
+        with self._lock:
+            if path != ':memory:':
+                self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.executescript(_SCHEMA)
+            self._connection.commit()
+
+    def close(self) -> None:
+        """データベースを閉じます"""
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self) -> 'TicketMirror':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    # --- 書き込み ---
+
+    def upsert(self, message_box_id: int, tickets: Iterable[Ticket]) -> int:
+        """チケットを保存します (同じ ticket_id のチケットは置き換え)
+
+        メッセージを含むチケット (チケット詳細など) はメッセージ・コメント・添付ファイルも
+        置き換えます。メッセージを含まないチケット (検索結果など) は、保存済みの
+        メッセージをそのまま残します。
+
+        Args:
+            message_box_id: 受信箱ID
+            tickets: 保存するチケット
+
+        Returns:
+            保存したチケット数
+        """
+        with self._lock, self._connection:
+            saved = 0
+            for ticket in tickets:
+                self._upsert(message_box_id, ticket)
+                saved += 1
+            return saved
+
+    def delete_tickets(self, message_box_id: int, ticket_ids: Iterable[int]) -> None:
+        """チケットをメッセージ・コメント・添付ファイルと合わせて削除します
+
+        Args:
+            message_box_id: 受信箱ID
+            ticket_ids: 削除するチケットIDのリスト
+        """
+        with self._lock, self._connection:
+            for ticket_id in ticket_ids:
+                self._delete_messages(message_box_id, ticket_id)
+                self._connection.execute(
+                    'DELETE FROM ticket_labels WHERE message_box_id = ? AND ticket_id = ?', (message_box_id, ticket_id)
+                )
+                self._connection.execute(
+                    'DELETE FROM tickets WHERE message_box_id = ? AND ticket_id = ?', (message_box_id, ticket_id)
+                )
+
+    def _upsert(self, message_box_id: int, ticket: Ticket) -> None:
+        """チケットを保存します (トランザクションは呼び出し元で管理)"""
+        data = dict(ticket._raw_data)
+        messages = data.pop('messages', None)
+        self._connection.execute(
+            'INSERT OR REPLACE INTO tickets (message_box_id, ticket_id, status_cd, assignee, color_cd,'
+            ' created_at, last_updated_at, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (message_box_id, ticket.ticket_id, ticket.status_cd, ticket.assignee, ticket.color_cd,
+             _timestamp(ticket.created_at), _timestamp(ticket.last_updated_at), _dumps(data))
+        )
+        self._connection.execute(
+            'DELETE FROM ticket_labels WHERE message_box_id = ? AND ticket_id = ?', (message_box_id, ticket.ticket_id)
+        )
+        self._connection.executemany(
+            'INSERT OR IGNORE INTO ticket_labels (message_box_id, ticket_id, label_id) VALUES (?, ?, ?)',
+            [(message_box_id, ticket.ticket_id, label_id) for label_id in ticket.label_ids or []]
+        )
+        if messages is None:
+            return
+
+        self._delete_messages(message_box_id, ticket.ticket_id)
+        for position, message in enumerate(ticket.messages):
+            message_data = dict(message._raw_data)
+            comments = message_data.pop('comments', None) or []
+            attachments = message_data.pop('attachments', None) or []
+            # 別のチケットから移動 (統合) されたメッセージは、移動元のチケットに保存した
+            # コメント・添付ファイルが残っているため、メッセージIDで削除してから保存する
+            for table in ('comments', 'attachments'):
+                self._connection.execute(
+                    f'DELETE FROM {table} WHERE message_box_id = ? AND message_id = ?',
+                    (message_box_id, message.message_id)
+                )
+            self._connection.execute(
+                'INSERT OR REPLACE INTO messages (message_box_id, ticket_id, message_id, position, method_cd,'
+                ' action_cd, sent_at, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (message_box_id, ticket.ticket_id, message.message_id, position, message.method_cd,
+                 message.action_cd, _timestamp(message.sent_at), _dumps(message_data))
+            )
+            self._connection.executemany(
+                'INSERT INTO comments (message_box_id, message_id, position, commenter, commented_at, data)'
+                ' VALUES (?, ?, ?, ?, ?, ?)',
+                [(message_box_id, message.message_id, i, comment.commenter, _timestamp(comment.commented_at),
+                  _dumps(raw)) for i, (comment, raw) in enumerate(zip(message.comments, comments))]
+            )
+            self._connection.executemany(
+                'INSERT INTO attachments (message_box_id, message_id, position, attachment_id, file_name, data)'
+                ' VALUES (?, ?, ?, ?, ?, ?)',
+                [(message_box_id, message.message_id, i, attachment.attachment_id, attachment.file_name,
+                  _dumps(raw)) for i, (attachment, raw) in enumerate(zip(message.attachments, attachments))]
+            )
+
+    def _delete_messages(self, message_box_id: int, ticket_id: int) -> None:
+        """チケットのメッセージ・コメント・添付ファイルを削除します"""
+        for table in ('comments', 'attachments'):
+            self._connection.execute(
+                f'DELETE FROM {table} WHERE message_box_id = ? AND message_id IN'
+                ' (SELECT message_id FROM messages WHERE message_box_id = ? AND ticket_id = ?)',
+                (message_box_id, message_box_id, ticket_id)
+            )
+        self._connection.execute(
+            'DELETE FROM messages WHERE message_box_id = ? AND ticket_id = ?', (message_box_id, ticket_id)
+        )
+
+    # --- 読み出し ---
+
+    def get(self, message_box_id: int, ticket_id: int, include_messages: bool = True) -> Optional[Ticket]:
+        """チケットを取得します
+
+        Args:
+            message_box_id: 受信箱ID
+            ticket_id: チケットID
+            include_messages: メッセージ (コメント・添付ファイルを含む) も読み込むかどうか
+
+        Returns:
+            チケット (保存されていない場合は None)
+        """
+        tickets = self._load(
+            message_box_id, 'SELECT ticket_id, data FROM tickets WHERE message_box_id = ? AND ticket_id = ?',
+            [message_box_id, ticket_id], include_messages
+        )
+        return tickets[0] if tickets else None
+
+    def query(
+        self,
+        message_box_id: int,
+        status_cds: Optional[Sequence[str]] = None,
+        assignee: Optional[str] = None,
+        label_ids: Optional[Sequence[int]] = None,
+        method_cds: Optional[Sequence[str]] = None,
+        updated_since: Optional[TimeLike] = None,
+        updated_until: Optional[TimeLike] = None,
+        include_messages: bool = False,
+        descending: bool = True,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Ticket]:
+        """保存したチケットを検索します
+
+        条件はすべて AND で組み合わせます。リストで指定する条件は、いずれかの値に一致する
+        チケットを返します (``method_cds`` はいずれかのメッセージのチャネルが一致するチケット)。
+
+        Args:
+            message_box_id: 受信箱ID
+            status_cds: ステータスコードのリスト
+            assignee: 担当者のメンション名
+            label_ids: ラベルIDのリスト
+            method_cds: チャネルコードのリスト
+            updated_since: 最終更新日時の開始 (この日時を含む)
+            updated_until: 最終更新日時の終了 (この日時を含まない)
+            include_messages: メッセージ (コメント・添付ファイルを含む) も読み込むかどうか
+            descending: 最終更新日時の新しい順に返すかどうか (False の場合は古い順)
+            limit: 返す件数の上限
+            offset: 読み飛ばす件数
+
+        Returns:
+            チケットのリスト
+        """
+        where, params = self._where(message_box_id, status_cds, assignee, label_ids, method_cds,
+                                    updated_since, updated_until)
+        order = 'DESC' if descending else 'ASC'
+        sql = f'SELECT ticket_id, data FROM tickets WHERE {where} ORDER BY last_updated_at {order}, ticket_id {order}'
+        if limit is not None or offset:
+            sql += ' LIMIT ? OFFSET ?'
+            params += [limit if limit is not None else -1, offset]
+        return self._load(message_box_id, sql, params, include_messages)
+
+    def count(
+        self,
+        message_box_id: int,
+        status_cds: Optional[Sequence[str]] = None,
+        assignee: Optional[str] = None,
+        label_ids: Optional[Sequence[int]] = None,
+        method_cds: Optional[Sequence[str]] = None,
+        updated_since: Optional[TimeLike] = None,
+        updated_until: Optional[TimeLike] = None
+    ) -> int:
+        """query() と同じ条件に一致するチケット数を返します"""
+        where, params = self._where(message_box_id, status_cds, assignee, label_ids, method_cds,
+                                    updated_since, updated_until)
+        with self._lock:
+            return self._connection.execute(f'SELECT COUNT(*) FROM tickets WHERE {where}', params).fetchone()[0]
+
+    def messages(self, message_box_id: int, ticket_id: int) -> List[Message]:
+        """チケットのメッセージ (コメント・添付ファイルを含む) を返します"""
+        with self._lock:
+            messages = self._load_messages(message_box_id, [ticket_id])
+        return [Message.from_dict(data) for data in messages.get(ticket_id, [])]
+
+    def _where(
+        self,
+        message_box_id: int,
+        status_cds: Optional[Sequence[str]],
+        assignee: Optional[str],
+        label_ids: Optional[Sequence[int]],
+        method_cds: Optional[Sequence[str]],
+        updated_since: Optional[TimeLike],
+        updated_until: Optional[TimeLike]
+    ) -> Tuple[str, List[Any]]:
+        """検索条件のWHERE句とパラメータを組み立てます"""
+        clauses = ['message_box_id = ?']
+        params: List[Any] = [message_box_id]
+        if status_cds:
+            clauses.append(f'status_cd IN ({", ".join("?" * len(status_cds))})')
+            params.extend(status_cds)
+        if assignee is not None:
+            clauses.append('assignee = ?')
+            params.append(assignee)
+        if label_ids:
+            clauses.append(
+                'ticket_id IN (SELECT ticket_id FROM ticket_labels WHERE message_box_id = ?'
+                f' AND label_id IN ({", ".join("?" * len(label_ids))}))'
+            )
+            params.extend([message_box_id, *label_ids])
+        if method_cds:
+            clauses.append(
+                'ticket_id IN (SELECT ticket_id FROM messages WHERE message_box_id = ?'
+                f' AND method_cd IN ({", ".join("?" * len(method_cds))}))'
+            )
+            params.extend([message_box_id, *method_cds])
+        if updated_since is not None:
+            clauses.append('last_updated_at >= ?')
+            params.append(_timestamp(updated_since))
+        if updated_until is not None:
+            clauses.append('last_updated_at < ?')
+            params.append(_timestamp(updated_until))
+        return ' AND '.join(clauses), params
+
+    def _load(self, message_box_id: int, sql: str, params: List[Any], include_messages: bool) -> List[Ticket]:
+        """チケットを読み込み、モデルに変換します"""
+        with self._lock:
+            rows = self._connection.execute(sql, params).fetchall()
+            messages = self._load_messages(message_box_id, [row[0] for row in rows]) if include_messages else {}
+        tickets = []
+        for ticket_id, data in rows:
+            data = json.loads(data)
+            if include_messages:
+                data['messages'] = messages.get(ticket_id, [])
+            tickets.append(Ticket.from_dict(data))
+        return tickets
+
+    def _load_messages(self, message_box_id: int, ticket_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """チケットごとのメッセージの辞書 (コメント・添付ファイルを含む) を読み込みます"""
+        result: Dict[int, List[Dict[str, Any]]] = {}
+        for start in range(0, len(ticket_ids), _CHUNK_SIZE):
+            chunk = ticket_ids[start:start + _CHUNK_SIZE]
+            placeholders = ', '.join('?' * len(chunk))
+            rows = self._connection.execute(
+                f'SELECT ticket_id, message_id, data FROM messages WHERE message_box_id = ?'
+                f' AND ticket_id IN ({placeholders}) ORDER BY ticket_id, position',
+                [message_box_id, *chunk]
+            ).fetchall()
+            by_message: Dict[int, Dict[str, Any]] = {}
+            for ticket_id, message_id, data in rows:
+                message = json.loads(data)
+                message['comments'] = []
+                message['attachments'] = []
+                by_message[message_id] = message
+                result.setdefault(ticket_id, []).append(message)
+            for table, key in (('comments', 'comments'), ('attachments', 'attachments')):
+                children = self._connection.execute(
+                    f'SELECT {table}.message_id, {table}.data FROM {table} JOIN messages'
+                    f' ON messages.message_box_id = {table}.message_box_id AND messages.message_id = {table}.message_id'
+                    f' WHERE messages.message_box_id = ? AND messages.ticket_id IN ({placeholders})'
+                    f' ORDER BY {table}.message_id, {table}.position',
+                    [message_box_id, *chunk]
+                ).fetchall()
+                for message_id, data in children:
+                    by_message[message_id][key].append(json.loads(data))
+        return result
+
+    # --- 同期 ---
+
+    def load(self, key: str) -> Optional[SyncState]:
+        """WatermarkStore: 保存した同期の状態を返します"""
+        with self._lock:
+            row = self._connection.execute('SELECT data FROM sync_state WHERE key = ?', (key,)).fetchone()
+        return SyncState.from_dict(json.loads(row[0])) if row else None
+
+    def delete(self, key: str) -> None:
+        """WatermarkStore: 同期の状態を削除します (保存したチケットは削除しません)"""
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM sync_state WHERE key = ?', (key,))
+
+    def save(self, key: str, state: SyncState) -> None:
+        """WatermarkStore: 同期の状態を保存し、それまでに反映したチケットと合わせてコミットします"""
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO sync_state (key, data) VALUES (?, ?)', (key, _dumps(state.to_dict()))
+            )
+
+    def sync(
+        self,
+        client: Any,
+        message_box_id: int,
+        fetch_messages: bool = True,
+        engine: Optional[TicketSyncEngine] = None,
+        **filters: Any
+    ) -> SyncStats:
+        """前回の同期以降に変更されたチケットを取得して、ミラーに反映します
+
+        検索結果にメッセージが含まれない場合、``fetch_messages`` が True なら変更された
+        チケットごとに詳細を取得してメッセージも反映します (APIの呼び出し回数は変更された
+        チケットの数に比例します)。
+
+        Args:
+            client: RelationClientインスタンス
+            message_box_id: 受信箱ID
+            fetch_messages: 変更されたチケットのメッセージも取得するかどうか
+            engine: 利用する同期エンジン (省略時は既定の設定。チケットの反映と進捗の保存を
+                同じトランザクションにするため、store にはこのミラーを指定してください)
+            **filters: TicketSyncEngine.sync() の引数 (initial_since・full・status_cds など)
+
+        Returns:
+            同期の統計情報
+        """
+        engine = engine or TicketSyncEngine(client, self)
+        try:
+            for ticket in engine.sync(message_box_id, **filters):
+                if fetch_messages and 'messages' not in ticket._raw_data:
+                    ticket = client.tickets.get(message_box_id, ticket.ticket_id)
+                with self._lock:
+                    # コミットは同期エンジンが進捗を保存する (save() を呼び出す) ときに行う
+                    self._upsert(message_box_id, ticket)
+        except BaseException:
+            with self._lock:
+                self._connection.rollback()
+            raise
+        return engine.stats
@@ -0,0 +1,127 @@
+"""
+ページネーションモジュール
+
+このモジュールは、ページ単位で結果を返す一覧・検索APIを、ページを意識せずに
+1件ずつ反復するためのジェネレーターを提供します。後続のページを並列に先読みし、
+往復の待ち時間を隠すこともできます。
+"""
+
+import contextvars
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import closing
+from typing import Callable, Deque, Iterator, List, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+def paginate(
+    fetch_page: Callable[[int, int], List[T]],
+    per_page: int,
+    page: int = 1,
+    limit: Optional[int] = None,
+    stop_when: Optional[Callable[[T], bool]] = None,
+    prefetch: int = 0
+) -> Iterator[T]:
+    """ページを順に取得しながら、結果を1件ずつ返します
+
+    既定では、次のページは前のページの結果をすべて返し終えてから取得します。そのため、
+    メモリに保持するのは1ページ分だけで、途中で反復をやめると以降のページは取得しません。
+    取得した件数が ``per_page`` より少ないページ (空のページを含む) を最後のページとみなします。
+
+    ``prefetch`` に1以上を指定すると、呼び出し元がページNの結果を処理している間に
+    ページN+1〜N+prefetch をスレッドで並列に取得します。結果は常にページ順に返し、
+    取得済みで未処理のページは最大 prefetch 件だけ保持します。最後のページに達した場合や
+    途中で反復をやめた場合は、まだ開始していない取得を取り消します (実行中の取得は
+    完了を待たずに結果を破棄します)。そのため、最後のページの後に最大 prefetch 件の
+    空のページを余分に取得することがあります。呼び出し元のコンテキスト変数
+    (デッドライン・優先度など) は各取得に引き継がれます。
+
+    Args:
+        fetch_page: ページ番号と1ページあたりの件数を受け取り、そのページの結果を返す関数
+        per_page: 1ページあたりの件数
+        page: 最初に取得するページ番号
+        limit: 返す件数の上限 (省略時は上限なし)。per_page より小さい場合は
+            1ページあたりの件数を limit に減らして取得します
+        stop_when: 結果を受け取り、True を返すとそこで反復を終える関数。
+            True を返した結果は返しません
+        prefetch: 並列に先読みするページ数 (省略時は先読みせず1ページずつ取得)
+
+    Yields:
+        各ページの結果
+
+    Raises:
+        ValueError: per_page・page が1未満、または limit・prefetch が負の場合
+    """
+    if per_page < 1:
+        raise ValueError("per_page は1以上を指定してください")
+    if page < 1:
+        raise ValueError("page は1以上を指定してください")
+    if prefetch < 0:
+        raise ValueError("prefetch は0以上を指定してください")
+    last_page = None
+    if limit is not None:
+        if limit < 0:
+            raise ValueError("limit は0以上を指定してください")
+        if limit == 0:
+            return
+        per_page = min(per_page, limit)
+        # limit 件を返すのに必要なページより先は取得しない
+        last_page = page + (limit - 1) // per_page
+
+    if prefetch:
+        pages = _fetch_ahead(fetch_page, per_page, page, last_page, prefetch)
+    else:
+        pages = _fetch_in_order(fetch_page, per_page, page, last_page)
+
+    remaining = limit
+    with closing(pages):
+        for items in pages:
+            for item in items:
+                if stop_when is not None and stop_when(item):
+                    return
+                yield item
+                if remaining is not None:
+                    remaining -= 1
+                    if remaining == 0:
+                        return
+            if len(items) < per_page:
+                return
+
+
+def _fetch_in_order(
+    fetch_page: Callable[[int, int], List[T]],
+    per_page: int,
+    page: int,
+    last_page: Optional[int]
+) -> Iterator[List[T]]:
+    """ページを1つずつ順に取得して返します"""
+    while last_page is None or page <= last_page:
+        yield fetch_page(page, per_page)
+        page += 1
+
+
+def _fetch_ahead(
+    fetch_page: Callable[[int, int], List[T]],
+    per_page: int,
+    page: int,
+    last_page: Optional[int],
+    depth: int
+) -> Iterator[List[T]]:
+    """後続の depth ページを並列に先読みしながら、ページ順に返します"""
+    executor = ThreadPoolExecutor(max_workers=depth + 1, thread_name_prefix='relation-prefetch')
+    pending: Deque[Future] = deque()
+    try:
+        while True:
+            # 返すページと、その後続の depth ページの取得を開始しておく
+            while len(pending) <= depth and (last_page is None or page <= last_page):
+                context = contextvars.copy_context()
+                pending.append(executor.submit(context.run, fetch_page, page, per_page))
+                page += 1
+            if not pending:
+                return
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
@@ -0,0 +1,292 @@
+"""
+マルチテナント・クライアントプールモジュール
+
+このモジュールは、複数のRe:lationテナント (サブドメイン) 向けのクライアントを
+1つのコネクションプールを共有したまま払い出すためのクラスを提供します。
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+import requests
+from urllib3.connectionpool import port_by_scheme
+
+from .client import RelationClient
+from .rate_limit import RateLimitGovernor, SharedRateLimiter
+from .fork import register_after_fork
+from .transport import DEFAULT_IDLE_TIMEOUT, KeepAliveHTTPAdapter, reset_session_after_fork
+
+
+@dataclass
+class ClientPoolStats:
+    """クライアントプールの統計情報
+
+    ``tenants`` は保持しているテナント数、``hits`` と ``misses`` はクライアントの
+    再利用と新規生成の回数、``evictions`` は破棄したテナント数です。
+    """
+    tenants: int
+    max_tenants: int
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+def _pool_host(base_url: str) -> Tuple[str, str, Optional[int]]:
+    """ベースURLから、コネクションプールのキーと同じ (スキーム, ホスト, ポート) を返します"""
+    parsed = urlparse(base_url)
+    scheme = parsed.scheme.lower()
+    return scheme, (parsed.hostname or '').lower(), parsed.port or port_by_scheme.get(scheme)
+
+
+@dataclass
+class _TenantEntry:
+    """プールが保持するテナント1件分の情報"""
+    access_token: str
+    client: RelationClient
+    last_used: float
+
+
+class RelationClientPool:
+    """複数テナント向けのクライアントを払い出すプール
+
+    全てのクライアントは1つの ``requests.Session`` を共有するため、テナントごとに
+    Sessionを持つ場合と比べて、待機中のTLS接続やハンドシェイクを減らせます。
+    Sessionはホスト (サブドメイン) ごとのコネクションプールを最大 ``max_tenants`` 個まで
+    保持し、使われていないものから閉じます。
+
+    レートリミッター・リトライ予算・サーキットブレーカーなどの状態はテナントごとの
+    クライアントが個別に持ちます。保持するテナントが ``max_tenants`` を超えた場合や
+    ``idle_timeout`` 秒以上使われていない場合は、最も長く使われていないテナントから
+    破棄します (LRU)。テナントを破棄すると、そのホストのコネクションプールと接続も閉じるため、
+    メモリと接続数は、総テナント数ではなく利用中のテナント数に比例します。
+    スレッドセーフです。
+
+    Example:
+        pool = RelationClientPool(max_tenants=50, idle_timeout=600)
+        client = pool.client('tenant-a', token_a)
+        client.tickets.search(message_box_id=1)
+    """
+
+    def __init__(
+        self,
+        max_tenants: int = 100,
+        idle_timeout: Optional[float] = None,
+        pool_maxsize: int = 10,
+        connection_idle_timeout: Optional[float] = DEFAULT_IDLE_TIMEOUT,
+        rate_limiter_factory: Optional[
+            Callable[[str], Union[RateLimitGovernor, SharedRateLimiter]]
+        ] = None,
+        clock: Callable[[], float] = time.monotonic,
+        **client_options: Any
+    ):
+        """初期化
+
+        Args:
+            max_tenants: 同時に保持するテナント数の上限
+            idle_timeout: この秒数以上使われていないテナントを破棄する (省略時は破棄しない)
+            pool_maxsize: テナントごとのコネクションプールに保持する最大接続数
+            connection_idle_timeout: この秒数以上使われていないkeep-alive接続は再利用せずに
+                張り直す (None の場合は張り直さない)
+            rate_limiter_factory: サブドメインを受け取り、そのテナント用のレートリミッターを
+                返す関数 (省略時はテナントごとにRateLimitGovernorを生成)
+            clock: 単調増加する時刻を返す関数
+            **client_options: 各RelationClientに渡すその他のオプション (timeout など)。
+                リトライポリシーやレートリミッターのインスタンスを渡すと全テナントで
+                共有されるため、テナントごとに分ける場合は渡さないでください
+
+        Raises:
+            ValueError: max_tenants が1未満の場合、または client_options に
+                session・access_token・subdomain が含まれる場合
+        """
+        if max_tenants < 1:
+            raise ValueError("max_tenants は1以上を指定してください")
+        reserved = {'session', 'access_token', 'subdomain', 'rate_limiter'} & set(client_options)
+        if reserved:
+            raise ValueError(f"client_options に指定できないオプションです: {', '.join(sorted(reserved))}")
+        self.max_tenants = max_tenants
+        self.idle_timeout = idle_timeout
+        self.pool_maxsize = pool_maxsize
+        self.rate_limiter_factory = rate_limiter_factory
+        self.client_options = client_options
+        self._clock = clock
+
+        # ホストごとのコネクションプールを max_tenants 個まで保持し、超えた分はLRUで閉じる
+        self._session = requests.Session()
+        adapter = KeepAliveHTTPAdapter(
+            idle_timeout=connection_idle_timeout,
+            pool_connections=max_tenants,
+            pool_maxsize=pool_maxsize,
+            pool_block=True
+        )
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        self._adapter = adapter
+
+        self._lock = threading.Lock()
+        self._tenants: 'OrderedDict[str, _TenantEntry]' = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        register_after_fork(self)
+
+    def client(self, subdomain: str, access_token: str) -> RelationClient:
+        """テナントのクライアントを取得します
+
+        同じサブドメインのクライアントが既にあれば再利用し、なければ生成します。
+        アクセストークンが変わった場合はクライアントを作り直します。
+
+        Args:
+            subdomain: テナントのサブドメイン
+            access_token: テナントのAPIアクセストークン
+
+        Returns:
+            共有のSessionを使うRelationClient
+        """
+        with self._lock:
+            now = self._clock()
+            self._evict_idle_locked(now)
+            entry = self._tenants.get(subdomain)
+            if entry is not None and entry.access_token == access_token:
+                entry.last_used = now
+                self._tenants.move_to_end(subdomain)
+                self._hits += 1
+                return entry.client
+
+            self._misses += 1
+            entry = _TenantEntry(
+                access_token=access_token,
+                client=self._create_client(subdomain, access_token),
+                last_used=now
+            )
+            self._tenants[subdomain] = entry
+            self._tenants.move_to_end(subdomain)
+            while len(self._tenants) > self.max_tenants:
+                self._evict_locked(next(iter(self._tenants)))
+            return entry.client
+
+    def _create_client(self, subdomain: str, access_token: str) -> RelationClient:
+        """テナントのクライアントを生成します"""
+        rate_limiter = None
+        if self.rate_limiter_factory is not None:
+            rate_limiter = self.rate_limiter_factory(subdomain)
+        return RelationClient(
+            access_token,
+            subdomain,
+            pool_maxsize=self.pool_maxsize,
+            rate_limiter=rate_limiter,
+            session=self._session,
+            **self.client_options
+        )
+
+    def evict(self, subdomain: str) -> bool:
+        """テナントのクライアントを破棄します
+
+        Args:
+            subdomain: テナントのサブドメイン
+
+        Returns:
+            破棄した場合は True (保持していなかった場合は False)
+        """
+        with self._lock:
+            if subdomain not in self._tenants:
+                return False
+            self._evict_locked(subdomain)
+            return True
+
+    def evict_idle(self) -> int:
+        """idle_timeout 秒以上使われていないテナントを破棄します
+
+        Returns:
+            破棄したテナント数
+        """
+        with self._lock:
+            return self._evict_idle_locked(self._clock())
+
+    def _evict_idle_locked(self, now: float) -> int:
+        """使われていないテナントを破棄します (ロック取得済みで呼び出すこと)"""
+        if self.idle_timeout is None:
+            return 0
+        evicted = 0
+        # 先頭ほど長く使われていないので、期限内のテナントが現れた時点で打ち切る
+        while self._tenants:
+            subdomain, entry = next(iter(self._tenants.items()))
+            if now - entry.last_used < self.idle_timeout:
+                break
+            self._evict_locked(subdomain)
+            evicted += 1
+        return evicted
+
+    def _evict_locked(self, subdomain: str) -> None:
+        """テナントを破棄します (ロック取得済みで呼び出すこと)"""
+        entry = self._tenants.pop(subdomain)
+        entry.client.close()
+        self._close_host_pool_locked(entry.client._base_url)
+        self._evictions += 1
+
+    def _close_host_pool_locked(self, base_url: str) -> None:
+        """破棄したテナントのホストのコネクションプールを閉じます (ロック取得済みで呼び出すこと)
+
+        共有のSessionは、LRUで押し出されるまでホストごとのコネクションプールと接続を保持するため、
+        テナントの破棄に合わせて閉じます。同じホストを使うテナントが残っている場合は閉じません。
+        """
+        host = _pool_host(base_url)
+        if any(_pool_host(entry.client._base_url) == host for entry in self._tenants.values()):
+            return
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            if (key.key_scheme, key.key_host, key.key_port) == host:
+                host_pool = pools.pop(key, None)
+                if host_pool is not None:
+                    host_pool.close()
+
+    @property
+    def tenants(self) -> List[str]:
+        """保持しているテナントのサブドメイン (最も長く使われていないものから順に)"""
+        with self._lock:
+            return list(self._tenants)
+
+    @property
+    def stats(self) -> ClientPoolStats:
+        """プールの統計情報"""
+        with self._lock:
+            return ClientPoolStats(
+                tenants=len(self._tenants),
+                max_tenants=self.max_tenants,
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._tenants)
+
+    def __contains__(self, subdomain: str) -> bool:
+        with self._lock:
+            return subdomain in self._tenants
+
+    def close(self) -> None:
+        """全てのテナントを破棄し、共有のコネクションプールを閉じます"""
+        with self._lock:
+            for subdomain in list(self._tenants):
+                self._evict_locked(subdomain)
+        self._session.close()
+
+    def reset_after_fork(self) -> None:
+        """fork後の子プロセスで、ロックと共有のコネクションプールを作り直します
+
+        プールは登録され、fork後の子プロセスで自動的に呼び出されます。
+        各テナントのクライアントも個別に作り直されます。
+        """
+        self._lock = threading.Lock()
+        reset_session_after_fork(self._session)
+
+    def __enter__(self) -> 'RelationClientPool':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
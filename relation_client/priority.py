@@ -0,0 +1,205 @@
+"""
+優先度付きスケジューラーモジュール
+
+このモジュールは、対話的な処理 (画面からの呼び出しなど) とバッチ処理 (夜間のエクスポートなど) が
+同じテナントのレートリミットを共有する場合に、対話的なリクエストを優先して送信するための
+スケジューラーと、呼び出しの優先度を指定するためのコンテキストを提供します。
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional, Union
+
+from .deadline import CancellationToken, Deadline, interruptible_sleep
+from .rate_limit import RateLimitGovernor, SharedRateLimiter
+
+# 優先度クラス
+PRIORITY_INTERACTIVE = 'interactive'
+PRIORITY_BATCH = 'batch'
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_BATCH)
+
+_current_priority: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    'relation_client_priority', default=None
+)
+
+
+def current_priority() -> Optional[str]:
+    """現在のコンテキストの優先度 (設定されていない場合は None)"""
+    return _current_priority.get()
+
+
+def validate_priority(priority: Optional[str]) -> Optional[str]:
+    """優先度が正しい値か確認します
+
+    Raises:
+        ValueError: PRIORITY_INTERACTIVE・PRIORITY_BATCH・None 以外の場合
+    """
+    if priority is not None and priority not in PRIORITIES:
+        raise ValueError(f"優先度には {', '.join(PRIORITIES)} のいずれかを指定してください: {priority}")
+    return priority
+
+
+@contextmanager
+def priority_scope(priority: str) -> Iterator[str]:
+    """ブロック内の全てのAPI呼び出しの優先度を指定します
+
+    BatchExecutor に投入した呼び出しにもコンテキストとして引き継がれます。
+
+    Args:
+        priority: PRIORITY_INTERACTIVE または PRIORITY_BATCH
+    """
+    reset = _current_priority.set(validate_priority(priority))
+    try:
+        yield priority
+    finally:
+        _current_priority.reset(reset)
+
+
+@dataclass
+class SchedulerStats:
+    """スケジューラーの統計情報
+
+    ``interactive`` と ``batch`` は送信を許可したリクエスト数、``promoted`` は待ち時間が
+    ``max_batch_wait`` を超えたため優先度を上げて送信したバッチのリクエスト数です。
+    ``interactive_waiting`` と ``batch_waiting`` は現在送信を待っているリクエスト数です。
+    """
+    interactive: int = 0
+    batch: int = 0
+    promoted: int = 0
+    interactive_waiting: int = 0
+    batch_waiting: int = 0
+
+
+class PriorityScheduler:
+    """優先度に応じてレートリミットの枠を割り当てるスケジューラー
+
+    対話的なリクエストは通常どおりレートリミッターの次の枠を予約します。バッチのリクエストは
+    対話的なリクエストが待っていない間に限り、待たずに送信できる枠がある場合だけ送信し、
+    上限に対して ``headroom`` の割合の枠は対話的なリクエストのために残します。
+    これにより、エクスポートがテナントの上限を使い切っていても、対話的なリクエストは
+    バッチの後ろに並ばずに送信されます。
+
+    バッチのリクエストが ``max_batch_wait`` 秒以上待った場合は、優先度を上げて
+    通常どおり次の枠を予約します (飢餓の防止)。スレッドセーフです。
+
+    優先度を指定しない呼び出しは対話的なリクエストとして扱います。
+    """
+
+    def __init__(
+        self,
+        headroom: float = 0.2,
+        max_batch_wait: float = 30.0,
+        poll_interval: float = 0.05,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """初期化
+
+        Args:
+            headroom: バッチのリクエストに使わせずに残しておく枠の割合 (上限に対する比率)
+            max_batch_wait: バッチのリクエストがこの秒数以上待った場合は優先度を上げる
+            poll_interval: バッチのリクエストが枠の空きを再確認する間隔 (秒)
+            clock: 単調増加する時刻を返す関数
+        """
+        if not 0 <= headroom < 1:
+            raise ValueError("headroom は0以上1未満を指定してください")
+        self.headroom = headroom
+        self.max_batch_wait = max_batch_wait
+        self.poll_interval = poll_interval
+        self._clock = clock
+        self._condition = threading.Condition()
+        self._stats = SchedulerStats()
+
+    @property
+    def stats(self) -> SchedulerStats:
+        """スケジューラーの統計情報"""
+        with self._condition:
+            return SchedulerStats(**vars(self._stats))
+
+    def reset_after_fork(self) -> None:
+        """fork後の子プロセスで呼び出し、ロックを作り直して待機中の件数を0に戻します"""
+        self._condition = threading.Condition()
+        self._stats.interactive_waiting = 0
+        self._stats.batch_waiting = 0
+
+    def acquire(
+        self,
+        rate_limiter: Union[RateLimitGovernor, SharedRateLimiter],
+        priority: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+        token: Optional[CancellationToken] = None
+    ) -> None:
+        """優先度に応じて待機してから、リクエスト1件分のレートリミットの枠を確保します
+
+        Args:
+            rate_limiter: 枠を確保するレートリミッター
+            priority: リクエストの優先度 (None の場合は対話的なリクエストとして扱う)
+            deadline: デッドライン
+            token: キャンセルトークン
+
+        Raises:
+            DeadlineExceededError: 枠を確保する前にデッドラインを過ぎた場合
+            OperationCancelledError: 枠を確保する前にキャンセルされた場合
+        """
+        if priority == PRIORITY_BATCH and self._acquire_batch(rate_limiter, deadline, token):
+            return
+        self._acquire_interactive(rate_limiter, priority == PRIORITY_BATCH, deadline, token)
+
+    def _acquire_interactive(
+        self,
+        rate_limiter: Union[RateLimitGovernor, SharedRateLimiter],
+        promoted: bool,
+        deadline: Optional[Deadline],
+        token: Optional[CancellationToken]
+    ) -> None:
+        """レートリミッターの次の枠を予約して待機します"""
+        with self._condition:
+            self._stats.interactive_waiting += 1
+        sent = False
+        try:
+            interruptible_sleep(rate_limiter.reserve(), deadline, token)
+            sent = True
+        finally:
+            with self._condition:
+                self._stats.interactive_waiting -= 1
+                if sent and promoted:
+                    self._stats.promoted += 1
+                    self._stats.batch += 1
+                elif sent:
+                    self._stats.interactive += 1
+                self._condition.notify_all()
+
+    def _acquire_batch(
+        self,
+        rate_limiter: Union[RateLimitGovernor, SharedRateLimiter],
+        deadline: Optional[Deadline],
+        token: Optional[CancellationToken]
+    ) -> bool:
+        """対話的なリクエストが待っていない間に、待たずに送信できる枠を確保します
+
+        Returns:
+            枠を確保できた場合は True (max_batch_wait 秒待っても確保できなかった場合は False)
+        """
+        promote_at = self._clock() + self.max_batch_wait
+        with self._condition:
+            self._stats.batch_waiting += 1
+            try:
+                while True:
+                    if token is not None:
+                        token.check()
+                    if deadline is not None:
+                        deadline.check()
+                    if self._stats.interactive_waiting == 0 and rate_limiter.try_acquire(self.headroom):
+                        self._stats.batch += 1
+                        return True
+                    now = self._clock()
+                    if now >= promote_at:
+                        return False
+                    timeout = min(self.poll_interval, promote_at - now)
+                    if deadline is not None:
+                        timeout = min(timeout, deadline.remaining())
+                    self._condition.wait(timeout)
+            finally:
+                self._stats.batch_waiting -= 1
@@ -0,0 +1,140 @@
+"""
+マルチプロセス実行モジュール
+
+このモジュールは、チケットの検索期間やアドレス帳などで分割した処理を複数のプロセスで
+並列に実行するランナーを提供します。レスポンスのJSONのデコードやモデルの生成は
+GILのため1プロセス内では1コアしか使えませんが、プロセスに分けることで複数のコアで行えます。
+"""
+
+import multiprocessing
+import pickle
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Iterable, List, Optional, Tuple, Union
+
+from .batch import BatchResult
+from .client import RelationClient
+from .exceptions import RelationError
+
+# ワーカープロセスごとのクライアント (initializer で生成)
+_worker_client: Optional[RelationClient] = None
+
+
+def _initialize_worker(client_factory: Callable[[], RelationClient]) -> None:
+    """ワーカープロセスの起動時にクライアントを生成します"""
+    global _worker_client
+    _worker_client = client_factory()
+
+
+def _run_partition(
+    fn: Callable[[RelationClient, Any], Any],
+    partition: Any
+) -> Tuple[Any, Optional[BaseException]]:
+    """ワーカープロセスで1つのパーティションを処理します"""
+    try:
+        return fn(_worker_client, partition), None
+    except Exception as e:
+        return None, _portable_exception(e)
+
+
+def _portable_exception(error: Exception) -> Exception:
+    """親プロセスへ送れるよう、pickleできない例外を変換します
+
+    RelationError のレスポンスがpickleできない場合はレスポンスを外し、
+    それでもpickleできない例外は型名とメッセージを持つ RelationError に置き換えます。
+    """
+    for attempt in range(2):
+        try:
+            pickle.dumps(error)
+            return error
+        except Exception:
+            if attempt == 0 and isinstance(error, RelationError):
+                error.response = None
+    return RelationError(f"{type(error).__name__}: {error}")
+
+
+class ProcessPoolRunner:
+    """分割した処理を複数のプロセスで並列に実行するランナー
+
+    各ワーカープロセスは起動時に ``client_factory()`` でクライアントを1つ生成し、
+    そのプロセスに割り当てられた全てのパーティションの処理で使い回します。
+    ``fn(client, partition)`` の戻り値は pickle して親プロセスに返すため、集計結果や件数など
+    小さな値を返すか、ワーカー側でファイルやデータベースに書き出すと効率的です。
+
+    ``fn`` と ``partitions`` の要素はpickleできる必要があります (モジュールのトップレベルで
+    定義した関数など)。``client_factory`` も、forkを使わない場合 (spawn・forkserver) は
+    pickleできる必要があります (``functools.partial(RelationClient, token, subdomain)`` など)。
+    レートリミットを全プロセスで守るには、``client_factory`` で SharedRateLimiter を指定してください。
+
+    Example:
+        factory = functools.partial(
+            RelationClient, token, subdomain, rate_limiter=SharedRateLimiter(subdomain)
+        )
+        with ProcessPoolRunner(factory, processes=4) as runner:
+            results = runner.map(export_window, windows)
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], RelationClient],
+        processes: Optional[int] = None,
+        mp_context: Union[str, multiprocessing.context.BaseContext, None] = None
+    ):
+        """初期化
+
+        Args:
+            client_factory: ワーカープロセスでクライアントを生成する関数
+            processes: ワーカープロセス数 (省略時はCPUコア数)
+            mp_context: プロセスの起動方法 ('fork'・'spawn'・'forkserver' またはコンテキスト。
+                省略時は multiprocessing の既定)
+
+        Raises:
+            ValueError: processes が1未満の場合
+        """
+        if processes is not None and processes <= 0:
+            raise ValueError("processes は1以上を指定してください")
+        if isinstance(mp_context, str):
+            mp_context = multiprocessing.get_context(mp_context)
+        self._executor = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=mp_context,
+            initializer=_initialize_worker,
+            initargs=(client_factory,)
+        )
+
+    def map(
+        self,
+        fn: Callable[[RelationClient, Any], Any],
+        partitions: Iterable[Any]
+    ) -> List[BatchResult]:
+        """各パーティションをワーカープロセスで処理し、投入順に結果を返します
+
+        Args:
+            fn: ワーカープロセスのクライアントとパーティションを受け取って処理する関数
+            partitions: パーティションのイテラブル (例: 検索期間のタプル、アドレス帳ID)
+
+        Returns:
+            BatchResultのリスト (例外はパーティションごとに格納されます)
+        """
+        submitted: List[Tuple[Any, Future]] = [
+            (partition, self._executor.submit(_run_partition, fn, partition)) for partition in partitions
+        ]
+        results = []
+        for partition, future in submitted:
+            try:
+                value, error = future.result()
+            except Exception as e:
+                # pickleできない戻り値やワーカープロセスの異常終了
+                results.append(BatchResult(item=partition, exception=e))
+                continue
+            results.append(BatchResult(item=partition, value=value, exception=error))
+        return results
+
+    def shutdown(self, wait: bool = True) -> None:
+        """ワーカープロセスを終了します"""
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self) -> 'ProcessPoolRunner':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.shutdown(wait=True)
@@ -0,0 +1,432 @@
+"""
+レートリミット制御モジュール
+
+このモジュールは、レスポンスの X-RateLimit-* ヘッダーから残りリクエスト数と
+リセット時刻を追跡し、レートリミットに達しないように送信ペースを調整するクラスと、
+同一ホスト上の複数プロセスで1つの予算を共有するレートリミッターを提供します。
+"""
+
+import hashlib
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, IO, Mapping, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+from .constants import RATE_LIMIT_LIMIT, RATE_LIMIT_REMAINING, RATE_LIMIT_RESET, HTTP_TOO_MANY_REQUESTS
+from .retry import parse_retry_after
+
+# X-RateLimit-Reset がこの値未満の場合は「リセットまでの秒数」として扱う
+_EPOCH_THRESHOLD = 1000000000
+
+
+def _lock_file(f: IO) -> None:
+    """ファイルの排他ロックを取得します (取得できるまでブロック)"""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    else:  # pragma: no cover - Windows
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def _unlock_file(f: IO) -> None:
+    """ファイルの排他ロックを解放します"""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:  # pragma: no cover - Windows
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _parse_number(value: Any) -> Optional[float]:
+    """ヘッダー値を数値に変換します (変換できない場合は None)"""
+    if value is None:
+        return None
+    try:
+        return float(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class RateLimitStatus:
+    """レートリミットの状態"""
+    limit: Optional[int] = None
+    remaining: Optional[int] = None
+    reset_at: Optional[float] = None
+    updated_at: Optional[float] = None
+
+    @property
+    def reset_in(self) -> Optional[float]:
+        """リセットまでの秒数"""
+        if self.reset_at is None:
+            return None
+        return max(0.0, self.reset_at - time.time())
+
+
+class RateLimitGovernor:
+    """X-RateLimit-* ヘッダーに基づいて送信ペースを調整するガバナー
+
+    レスポンスごとに残りリクエスト数とリセット時刻を記録し、リセットまでの残り時間に
+    残りリクエスト数を均等に割り当てるように送信間隔を空けます。これにより429を
+    受け取ってから待機するのではなく、事前にペースを落としてレートリミットを回避します。
+
+    スレッドセーフです。ヘッダーを一度も受け取っていない間は待機しません。
+    """
+
+    def __init__(
+        self,
+        safety_margin: int = 0,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        """初期化
+
+        Args:
+            safety_margin: 使い切らずに残しておくリクエスト数
+            clock: 現在時刻 (UNIX時刻) を返す関数
+            sleep: 待機に使う関数
+        """
+        if safety_margin < 0:
+            raise ValueError("safety_margin は0以上を指定してください")
+        self.safety_margin = safety_margin
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+        self._limit: Optional[int] = None
+        self._remaining: Optional[int] = None
+        self._reset_at: Optional[float] = None
+        self._updated_at: Optional[float] = None
+        self._next_slot = 0.0
+        # レートリミットの期間の長さ (受け取ったリセットまでの秒数の最大値)
+        self._window: Optional[float] = None
+
+    @property
+    def status(self) -> RateLimitStatus:
+        """現在のレートリミットの状態"""
+        with self._lock:
+            return RateLimitStatus(
+                limit=self._limit,
+                remaining=self._remaining,
+                reset_at=self._reset_at,
+                updated_at=self._updated_at
+            )
+
+    def reserve(self) -> float:
+        """リクエスト1件分の枠を予約し、送信までに待つべき秒数を返します
+
+        Returns:
+            待機秒数 (待つ必要がない場合は0)
+        """
+        with self._lock:
+            return self._reserve_locked(self._clock(), allow_wait=True)
+
+    def try_acquire(self, headroom: float = 0.0) -> bool:
+        """待たずに送信できる場合に限り、リクエスト1件分の枠を確保します
+
+        Args:
+            headroom: 使わずに残しておく枠の割合 (上限に対する比率)。残りリクエスト数が
+                この割合を下回っている場合は確保しない
+
+        Returns:
+            枠を確保できた場合は True (待つ必要がある場合は何もせず False)
+        """
+        with self._lock:
+            return self._reserve_locked(self._clock(), allow_wait=False, headroom=headroom) is not None
+
+    def _reserve_locked(self, now: float, allow_wait: bool, headroom: float = 0.0) -> Optional[float]:
+        """枠を予約して待機秒数を返します (ロック取得済みで呼び出すこと)
+
+        allow_wait が False で待機が必要な場合は、予約せずに None を返します。
+        """
+        if self._remaining is None or self._reset_at is None:
+            return 0.0
+
+        if now >= self._reset_at:
+            # リセット時刻を過ぎたので、新しい期間の枠で予約する
+            self._start_window_locked(self._reset_at, now)
+            if self._reset_at is None:
+                # 期間の長さがわからないため、次のレスポンスまでは上限まで利用可能とみなす
+                if self._remaining is not None:
+                    self._remaining -= 1
+                return 0.0
+
+        available = self._remaining - self.safety_margin
+        if headroom and self._limit is not None and available <= headroom * self._limit:
+            return None
+        if available <= 0:
+            if not allow_wait:
+                return None
+            if self._limit is None or not self._window:
+                # リセット後の上限や期間の長さがわからないため、後続の呼び出しも含めて
+                # リセット時刻まで待機する
+                return self._reset_at - now
+            # 枠が残っていないので、リセット後の期間の枠を予約する
+            # (後続の呼び出しはリセット後の期間に均等に割り当てる)
+            self._start_window_locked(self._reset_at, self._reset_at)
+            available = max(1, self._remaining - self.safety_margin)
+
+        # リセットまでの残り時間に残りリクエストを均等に割り当てる
+        start = max(now, self._next_slot)
+        if start > now and not allow_wait:
+            return None
+        interval = max(0.0, self._reset_at - start) / available
+        self._next_slot = start + interval
+        self._remaining -= 1
+        return start - now
+
+    def _start_window_locked(self, reset_at: float, now: float) -> None:
+        """リセット時刻 reset_at に始まる期間の枠で状態を置き換えます (ロック取得済みで呼び出すこと)
+
+        期間の長さは、これまでに受け取ったリセットまでの秒数の最大値とみなします。
+        上限または期間の長さがわからない場合は、リセット時刻を None にします。
+        """
+        self._remaining = self._limit
+        if self._limit is None or not self._window:
+            self._reset_at = None
+            self._next_slot = now
+            return
+        # reset_at から期間の長さごとに区切り、now を含む期間を新しい期間とする
+        start = reset_at + math.floor((now - reset_at) / self._window) * self._window
+        self._reset_at = start + self._window
+        self._next_slot = max(start, now)
+
+    def acquire(self) -> None:
+        """必要に応じて待機してから、リクエスト1件分の枠を確保します"""
+        wait = self.reserve()
+        if wait > 0:
+            self._sleep(wait)
+
+    def update(self, headers: Mapping[str, Any], status_code: Optional[int] = None) -> None:
+        """レスポンスヘッダーからレートリミットの状態を更新します
+
+        Args:
+            headers: レスポンスヘッダー
+            status_code: レスポンスのステータスコード
+        """
+        limit = _parse_number(headers.get(RATE_LIMIT_LIMIT))
+        remaining = _parse_number(headers.get(RATE_LIMIT_REMAINING))
+        reset = _parse_number(headers.get(RATE_LIMIT_RESET))
+        retry_after = None
+        if status_code == HTTP_TOO_MANY_REQUESTS:
+            retry_after = parse_retry_after(headers.get('Retry-After'), now=self._clock())
+
+        if limit is None and remaining is None and reset is None and status_code != HTTP_TOO_MANY_REQUESTS:
+            return
+
+        with self._lock:
+            now = self._clock()
+            if limit is not None:
+                self._limit = int(limit)
+            if remaining is not None:
+                self._remaining = int(remaining)
+            if reset is not None:
+                self._reset_at = reset if reset >= _EPOCH_THRESHOLD else now + reset
+                self._window = max(self._window or 0.0, self._reset_at - now)
+            if status_code == HTTP_TOO_MANY_REQUESTS:
+                # 上限に達しているので、リセットまで送信しない
+                self._remaining = 0
+                if retry_after is not None:
+                    self._reset_at = max(self._reset_at or now, now + retry_after)
+                elif self._reset_at is None:
+                    self._reset_at = now
+            self._updated_at = now
+
+    def reset_after_fork(self) -> None:
+        """fork後の子プロセスで呼び出し、ロックを作り直します
+
+        親プロセスの他のスレッドがロックを保持したままforkした場合でも、
+        子プロセスでロックの解放待ちにならないようにします。レートリミットの状態は引き継ぎます。
+        """
+        self._lock = threading.Lock()
+
+
+class SharedRateLimiter:
+    """同一ホスト上の複数プロセスで共有するトークンバケット方式のレートリミッター
+
+    バケットの状態は一時ディレクトリ上の小さなファイルに保存し、ファイルロックで
+    排他制御します。同じ ``tenant_key`` を指定したクライアントは、プロセスが異なっても
+    1つの予算からリクエスト枠を取り合うため、合計の送信レートが上限を超えません。
+    外部サービスは不要です。
+
+    429を受け取った場合やサーバーから通知された残りリクエスト数が安全マージン以下に
+    なった場合は、リセット時刻まで全プロセスの送信を止めます。
+
+    RateLimitGovernorと同じインターフェースを持つため、RelationClientの
+    ``rate_limiter`` にそのまま指定できます。
+    """
+
+    def __init__(
+        self,
+        tenant_key: str,
+        max_requests: int = 60,
+        period: float = 60.0,
+        burst: Optional[int] = None,
+        safety_margin: int = 0,
+        directory: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        """初期化
+
+        Args:
+            tenant_key: 予算を共有するためのキー (例: サブドメイン)
+            max_requests: period 秒あたりの最大リクエスト数
+            period: レートの計測期間 (秒)
+            burst: 一度に送信できる最大リクエスト数 (省略時は max_requests)
+            safety_margin: サーバーから通知された残りリクエスト数のうち、使い切らずに残しておく件数
+            directory: 状態ファイルを置くディレクトリ (省略時は一時ディレクトリ)
+            clock: 現在時刻 (UNIX時刻) を返す関数
+            sleep: 待機に使う関数
+        """
+        if max_requests <= 0 or period <= 0:
+            raise ValueError("max_requests と period は正の値を指定してください")
+        self.tenant_key = tenant_key
+        self.rate = max_requests / period
+        self.capacity = float(burst if burst is not None else max_requests)
+        self.safety_margin = safety_margin
+        self._clock = clock
+        self._sleep = sleep
+
+        digest = hashlib.sha256(tenant_key.encode('utf-8')).hexdigest()[:16]
+        self.path = os.path.join(directory or tempfile.gettempdir(), f'relation_client_ratelimit_{digest}.json')
+
+    @contextmanager
+    def _locked_state(self) -> Iterator[Dict[str, Any]]:
+        """ファイルロックを取得し、状態の辞書を読み書きします"""
+        with open(self.path, 'a+') as f:
+            _lock_file(f)
+            try:
+                f.seek(0)
+                content = f.read()
+                try:
+                    state = json.loads(content) if content else {}
+                except ValueError:
+                    state = {}
+                yield state
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+            finally:
+                _unlock_file(f)
+
+    def _refill(self, state: Dict[str, Any], now: float) -> None:
+        """経過時間に応じてトークンを補充します"""
+        tokens = state.get('tokens', self.capacity)
+        last = state.get('updated_at', now)
+        state['tokens'] = min(self.capacity, tokens + max(0.0, now - last) * self.rate)
+        state['updated_at'] = now
+
+    @property
+    def status(self) -> RateLimitStatus:
+        """サーバーから通知された最新のレートリミットの状態"""
+        with self._locked_state() as state:
+            return RateLimitStatus(
+                limit=state.get('limit'),
+                remaining=state.get('remaining'),
+                reset_at=state.get('reset_at'),
+                updated_at=state.get('server_updated_at')
+            )
+
+    def reserve(self) -> float:
+        """リクエスト1件分のトークンを予約し、送信までに待つべき秒数を返します
+
+        トークンが足りない場合も予約は行い (残量がマイナスになる)、補充されるまでの
+        秒数を返します。これにより待機中のプロセス同士で順番が保たれます。
+
+        Returns:
+            待機秒数 (待つ必要がない場合は0)
+        """
+        with self._locked_state() as state:
+            now = self._clock()
+            blocked_until = state.get('blocked_until', 0.0)
+            if blocked_until > now:
+                # ブロック解除時点のトークン量から予約する
+                state.setdefault('tokens', 0.0)
+                state['updated_at'] = max(state.get('updated_at', now), blocked_until)
+                now_for_bucket = state['updated_at']
+            else:
+                self._refill(state, now)
+                now_for_bucket = now
+            state['tokens'] -= 1
+            wait = 0.0 if state['tokens'] >= 0 else -state['tokens'] / self.rate
+            return max(0.0, now_for_bucket - now) + wait
+
+    def try_acquire(self, headroom: float = 0.0) -> bool:
+        """待たずに送信できる場合に限り、リクエスト1件分のトークンを確保します
+
+        Args:
+            headroom: 使わずに残しておくトークンの割合 (バケット容量に対する比率)
+
+        Returns:
+            トークンを確保できた場合は True (待つ必要がある場合は何もせず False)
+        """
+        with self._locked_state() as state:
+            now = self._clock()
+            if state.get('blocked_until', 0.0) > now:
+                return False
+            self._refill(state, now)
+            if state['tokens'] < 1 + headroom * self.capacity:
+                return False
+            state['tokens'] -= 1
+            return True
+
+    def acquire(self) -> None:
+        """必要に応じて待機してから、リクエスト1件分の枠を確保します"""
+        wait = self.reserve()
+        if wait > 0:
+            self._sleep(wait)
+
+    def update(self, headers: Mapping[str, Any], status_code: Optional[int] = None) -> None:
+        """レスポンスヘッダーから共有状態を更新します
+
+        Args:
+            headers: レスポンスヘッダー
+            status_code: レスポンスのステータスコード
+        """
+        limit = _parse_number(headers.get(RATE_LIMIT_LIMIT))
+        remaining = _parse_number(headers.get(RATE_LIMIT_REMAINING))
+        reset = _parse_number(headers.get(RATE_LIMIT_RESET))
+        retry_after = None
+        if status_code == HTTP_TOO_MANY_REQUESTS:
+            retry_after = parse_retry_after(headers.get('Retry-After'), now=self._clock())
+
+        if limit is None and remaining is None and reset is None and status_code != HTTP_TOO_MANY_REQUESTS:
+            return
+
+        with self._locked_state() as state:
+            now = self._clock()
+            reset_at = None
+            if reset is not None:
+                reset_at = reset if reset >= _EPOCH_THRESHOLD else now + reset
+            if limit is not None:
+                state['limit'] = int(limit)
+            if remaining is not None:
+                state['remaining'] = int(remaining)
+            if reset_at is not None:
+                state['reset_at'] = reset_at
+            state['server_updated_at'] = now
+
+            # 上限に達している (または安全マージンを割った) 場合は全プロセスを止める
+            block_until = None
+            if status_code == HTTP_TOO_MANY_REQUESTS:
+                block_until = now + (retry_after if retry_after is not None else 1.0)
+                if reset_at is not None:
+                    block_until = max(block_until, reset_at)
+            elif remaining is not None and reset_at is not None and remaining <= self.safety_margin:
+                block_until = reset_at
+            if block_until is not None and block_until > state.get('blocked_until', 0.0):
+                state['blocked_until'] = block_until
+                state['tokens'] = min(state.get('tokens', self.capacity), 0.0)
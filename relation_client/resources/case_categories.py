@@ -3,14 +3,18 @@
 
 このモジュールは、Re:lation APIのチケット分類に関連するリソースクラスを提供します。
 """
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Callable, Iterator
 
 from ..models import CaseCategory
+from ..pagination import paginate
 
 
 class CaseCategoryResource:
     """チケット分類リソースクラス"""
 
+    # 一覧の1ページあたりの最大件数
+    MAX_PER_PAGE = 100
+
     def __init__(self, client):
         """初期化
 
@@ -39,6 +43,34 @@ class CaseCategoryResource:
         response = self.client.get(f'{message_box_id}/case_categories', params=params)
         return [CaseCategory.from_dict(item) for item in response]
 
+    def iter_list(
+        self,
+        message_box_id: int,
+        limit: Optional[int] = None,
+        stop_when: Optional[Callable[[CaseCategory], bool]] = None,
+        per_page: int = MAX_PER_PAGE,
+        prefetch: int = 0
+    ) -> Iterator[CaseCategory]:
+        """チケット分類一覧のすべてのページを取得し、1件ずつ返します
+
+        件数が per_page より少ないページで終了します。既定では次のページを前のページを
+        返し終えてから取得し、prefetch を指定すると後続のページを並列に先読みします。
+
+        Args:
+            message_box_id: 受信箱ID
+            limit: 返す件数の上限（省略時は上限なし）
+            stop_when: チケット分類を受け取り、True を返すとそこで終了する関数
+            per_page: 1ページあたりの件数（省略時は最大の100）
+            prefetch: 並列に先読みするページ数（省略時は先読みしない）
+
+        Yields:
+            CaseCategory: チケット分類オブジェクト
+        """
+        yield from paginate(
+            lambda page, size: self.list(message_box_id, per_page=size, page=page),
+            per_page, limit=limit, stop_when=stop_when, prefetch=prefetch
+        )
+
     def create(self, message_box_id: int, name: str, parent_id: Optional[int] = None) -> Dict[str, int]:
         """チケット分類を登録
 
@@ -82,4 +114,4 @@ class CaseCategoryResource:
             data['archived'] = archived
 
         path = f'{message_box_id}/case_categories/{case_category_id}'
-        self.client.put(path, data=data) 
\ No newline at end of file
+        self.client.put(path, data=data) 
@@ -4,9 +4,10 @@
 このモジュールは、Re:lation APIのコンタクト (customer) リソースに対応するクラスを提供します。
 """
 
-from typing import Dict, Any, List, Optional, Union, cast
+from typing import Dict, Any, Callable, Iterator, List, Optional, Union, cast
 
 from ..models import Customer
+from ..pagination import paginate
 
 
 class CustomerResource:
@@ -15,6 +16,9 @@ class CustomerResource:
     このクラスは、コンタクト (customer) リソースに関連するすべてのAPIメソッドを提供します。
     """
 
+    # 顧客検索の1ページあたりの最大件数
+    MAX_PER_PAGE = 50
+
     def __init__(self, client):
         """CustomerResourceを初期化します
 
@@ -87,6 +91,38 @@ class CustomerResource:
 
         return customers
 
+    def iter_search(
+        self,
+        customer_group_id: int,
+        limit: Optional[int] = None,
+        stop_when: Optional[Callable[[Customer], bool]] = None,
+        per_page: int = MAX_PER_PAGE,
+        prefetch: int = 0,
+        **filters: Any
+    ) -> Iterator[Customer]:
+        """顧客を検索し、すべてのページの結果を1件ずつ返します
+
+        1ページ目から順にページを取得し、件数が per_page より少ないページで終了します。
+        既定 (prefetch=0) では次のページを前のページを返し終えてから取得するため、アドレス帳の顧客数に
+        関わらずメモリに保持するのは1ページ分だけです。prefetch を指定すると、後続のページを
+        スレッドで並列に先読みします (結果はページ順に返し、保持するのは最大 prefetch ページ分増えます)。
+
+        Args:
+            customer_group_id: アドレス帳ID
+            limit: 返す件数の上限 (省略時は上限なし)
+            stop_when: 顧客を受け取り、True を返すとそこで終了する関数
+            per_page: 1ページあたりの件数 (省略時は最大の50)
+            prefetch: 並列に先読みするページ数 (省略時は先読みしない)
+            **filters: search() と同じ検索条件 (emails、badge_ids など。page は指定できません)
+
+        Yields:
+            Customer オブジェクト
+        """
+        yield from paginate(
+            lambda page, size: self.search(customer_group_id, per_page=size, page=page, **filters),
+            per_page, limit=limit, stop_when=stop_when, prefetch=prefetch
+        )
+
     def create(
         self,
         customer_group_id: int,
@@ -3,14 +3,18 @@
 
 このモジュールは、Re:lation APIのラベルリソースへのアクセスを提供します。
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Iterator
 
 from ..models import Label
+from ..pagination import paginate
 
 
 class LabelResource:
     """ラベルリソースクラス"""
 
+    # 一覧の1ページあたりの最大件数
+    MAX_PER_PAGE = 100
+
     def __init__(self, client):
         """初期化
 
@@ -45,6 +49,34 @@ class LabelResource:
             return [Label.from_dict(label_data) for label_data in response]
         return []
     
+    def iter_list(
+        self,
+        message_box_id: int,
+        limit: Optional[int] = None,
+        stop_when: Optional[Callable[[Label], bool]] = None,
+        per_page: int = MAX_PER_PAGE,
+        prefetch: int = 0
+    ) -> Iterator[Label]:
+        """ラベル一覧のすべてのページを取得し、1件ずつ返します
+
+        件数が per_page より少ないページで終了します。既定では次のページを前のページを
+        返し終えてから取得し、prefetch を指定すると後続のページを並列に先読みします。
+
+        Args:
+            message_box_id: 受信箱ID
+            limit: 返す件数の上限（省略時は上限なし）
+            stop_when: ラベルを受け取り、True を返すとそこで終了する関数
+            per_page: 1ページあたりの件数（省略時は最大の100）
+            prefetch: 並列に先読みするページ数（省略時は先読みしない）
+
+        Yields:
+            Label: ラベルオブジェクト
+        """
+        yield from paginate(
+            lambda page, size: self.list(message_box_id, per_page=size, page=page),
+            per_page, limit=limit, stop_when=stop_when, prefetch=prefetch
+        )
+
     def create(self, message_box_id: int, name: str, color: str, parent_id: Optional[int] = None) -> Dict[str, int]:
         """ラベルを登録
 
@@ -89,4 +121,4 @@ class LabelResource:
             data['parent_id'] = parent_id
         
         # APIリクエスト
-        self.client.put(f'{message_box_id}/labels/{label_id}', data=data) 
\ No newline at end of file
+        self.client.put(f'{message_box_id}/labels/{label_id}', data=data) 
@@ -3,14 +3,18 @@
 
 このモジュールは、Re:lation APIの送信メール設定リソースへのアクセスを提供します。
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Iterator
 
 from ..models import MailAccount
+from ..pagination import paginate
 
 
 class MailAccountResource:
     """送信メール設定リソースクラス"""
 
+    # 一覧の1ページあたりの最大件数
+    MAX_PER_PAGE = 100
+
     def __init__(self, client):
         """初期化
 
@@ -43,4 +47,32 @@ class MailAccountResource:
         # レスポンスを送信メール設定オブジェクトのリストに変換
         if isinstance(response, list):
             return [MailAccount.from_dict(mail_account_data) for mail_account_data in response]
-        return [] 
\ No newline at end of file
+        return []
+
+    def iter_list(
+        self,
+        message_box_id: int,
+        limit: Optional[int] = None,
+        stop_when: Optional[Callable[[MailAccount], bool]] = None,
+        per_page: int = MAX_PER_PAGE,
+        prefetch: int = 0
+    ) -> Iterator[MailAccount]:
+        """メールアカウント一覧のすべてのページを取得し、1件ずつ返します
+
+        件数が per_page より少ないページで終了します。既定では次のページを前のページを
+        返し終えてから取得し、prefetch を指定すると後続のページを並列に先読みします。
+
+        Args:
+            message_box_id: 受信箱ID
+            limit: 返す件数の上限（省略時は上限なし）
+            stop_when: メールアカウントを受け取り、True を返すとそこで終了する関数
+            per_page: 1ページあたりの件数（省略時は最大の100）
+            prefetch: 並列に先読みするページ数（省略時は先読みしない）
+
+        Yields:
+            MailAccount: メールアカウントオブジェクト
+        """
+        yield from paginate(
+            lambda page, size: self.list(message_box_id, per_page=size, page=page),
+            per_page, limit=limit, stop_when=stop_when, prefetch=prefetch
+        )
@@ -3,14 +3,18 @@
 
 このモジュールは、Re:lation APIのテンプレートリソースへのアクセスを提供します。
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Iterator
 
 from ..models import Template
+from ..pagination import paginate
 
 
 class TemplateResource:
     """テンプレートリソースクラス"""
 
+    # 一覧の1ページあたりの最大件数
+    MAX_PER_PAGE = 30
+
     def __init__(self, client):
         """初期化
 
@@ -45,6 +49,34 @@ class TemplateResource:
             return [Template.from_dict(template_data) for template_data in response]
         return []
 
+    def iter_list(
+        self,
+        message_box_id: int,
+        limit: Optional[int] = None,
+        stop_when: Optional[Callable[[Template], bool]] = None,
+        per_page: int = MAX_PER_PAGE,
+        prefetch: int = 0
+    ) -> Iterator[Template]:
+        """テンプレート一覧のすべてのページを取得し、1件ずつ返します
+
+        件数が per_page より少ないページで終了します。既定では次のページを前のページを
+        返し終えてから取得し、prefetch を指定すると後続のページを並列に先読みします。
+
+        Args:
+            message_box_id: 受信箱ID
+            limit: 返す件数の上限（省略時は上限なし）
+            stop_when: テンプレートを受け取り、True を返すとそこで終了する関数
+            per_page: 1ページあたりの件数（省略時は最大の30）
+            prefetch: 並列に先読みするページ数（省略時は先読みしない）
+
+        Yields:
+            Template: テンプレートオブジェクト
+        """
+        yield from paginate(
+            lambda page, size: self.list(message_box_id, per_page=size, page=page),
+            per_page, limit=limit, stop_when=stop_when, prefetch=prefetch
+        )
+
     def search(self, message_box_id: int, template_category_name: Optional[str] = None) -> List[Template]:
         """テンプレートを検索
 
@@ -66,4 +98,4 @@ class TemplateResource:
         # レスポンスをテンプレートオブジェクトのリストに変換
         if isinstance(response, list):
             return [Template.from_dict(template_data) for template_data in response]
-        return [] 
\ No newline at end of file
+        return [] 
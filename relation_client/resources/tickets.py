@@ -3,9 +3,10 @@
 
 このモジュールは、Re:lation APIのチケット関連操作を処理するリソースクラスを提供します。
 """
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Callable, Iterator, Optional, Union
 
 from ..models import Ticket, Message
+from ..pagination import paginate
 from ..constants import (
     STATUS_OPEN, STATUS_ONGOING, STATUS_CLOSED, STATUS_UNWANTED, STATUS_TRASH, STATUS_SPAM,
     METHOD_RECORD, ICON_RECEIVED_PHONE
@@ -17,6 +18,9 @@ class TicketResource:
     
     このクラスは、チケット関連のAPIエンドポイントへのアクセスを提供します。
     """
+
+    # チケット検索の1ページあたりの最大件数
+    MAX_PER_PAGE = 50
     
     def __init__(self, client):
         """初期化
@@ -71,7 +75,94 @@ class TicketResource:
             チケットのリスト
         """
         path = f"{message_box_id}/tickets/search"
+        data = self._search_data(
+            ticket_ids=ticket_ids, label_ids=label_ids, status_cds=status_cds, color_cds=color_cds,
+            assignee=assignee, message_ids=message_ids, has_attachments=has_attachments,
+            method_cds=method_cds, action_cds=action_cds, since=since, until=until, date=date,
+            within=within, pending_reason_ids=pending_reason_ids, per_page=per_page, page=page
+        )
+            
+        # API呼び出し
+        response = self.client.post(path, data=data)
+        
+        # レスポンスをTicketオブジェクトのリストに変換
+        return [Ticket.from_dict(ticket_data) for ticket_data in response]
+
+    def iter_search(
+        self,
+        message_box_id: int,
+        limit: Optional[int] = None,
+        stop_when: Optional[Callable[[Ticket], bool]] = None,
+        per_page: int = MAX_PER_PAGE,
+        prefetch: int = 0,
+        **filters: Any
+    ) -> Iterator[Ticket]:
+        """チケットを検索し、すべてのページの結果を1件ずつ返します
+
+        1ページ目から順にページを取得し、件数が per_page より少ないページで終了します。
+        既定 (prefetch=0) では次のページを前のページを返し終えてから取得するため、受信箱のチケット数に
+        関わらずメモリに保持するのは1ページ分だけです。prefetch を指定すると、後続のページを
+        スレッドで並列に先読みします (結果はページ順に返し、保持するのは最大 prefetch ページ分増えます)。
+
+        Args:
+            message_box_id: 受信箱ID
+            limit: 返す件数の上限 (省略時は上限なし)
+            stop_when: チケットを受け取り、True を返すとそこで終了する関数
+                (例: 更新日時が一定より古いチケットで終了する)
+            per_page: 1ページあたりの件数 (省略時は最大の50)
+            prefetch: 並列に先読みするページ数 (省略時は先読みしない)
+            **filters: search() と同じ検索条件 (status_cds、since など。page は指定できません)
+
+        Yields:
+            チケット
+
+        Example:
+            for ticket in client.tickets.iter_search(123, status_cds=['open'], limit=500):
+                ...
+        """
+        yield from paginate(
+            lambda page, size: self.search(message_box_id, per_page=size, page=page, **filters),
+            per_page, limit=limit, stop_when=stop_when, prefetch=prefetch
+        )
+    
+    def get(self, message_box_id: int, ticket_id: int) -> Ticket:
+        """チケットを取得します。
+        
+        Args:
+            message_box_id: 受信箱ID
+            ticket_id: チケットID
+            
+        Returns:
+            チケット
+        """
+        path = f"{message_box_id}/tickets/{ticket_id}"
+        
+        # API呼び出し
+        response = self.client.get(path)
         
+        # レスポンスをTicketオブジェクトに変換
+        return Ticket.from_dict(response)
+    
+    def _search_data(
+        self,
+        ticket_ids: Optional[List[int]] = None,
+        label_ids: Optional[List[int]] = None,
+        status_cds: Optional[List[str]] = None,
+        color_cds: Optional[List[str]] = None,
+        assignee: Optional[str] = None,
+        message_ids: Optional[List[int]] = None,
+        has_attachments: Optional[bool] = None,
+        method_cds: Optional[List[str]] = None,
+        action_cds: Optional[List[str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        date: Optional[str] = None,
+        within: Optional[str] = None,
+        pending_reason_ids: Optional[List[int]] = None,
+        per_page: int = 50,
+        page: int = 1
+    ) -> Dict[str, Any]:
+        """チケット検索のリクエストボディを構築します (引数は search() と同じ)"""
         # リクエストパラメータを構築
         data = {}
         if ticket_ids:
@@ -106,31 +197,49 @@ class TicketResource:
             data["per_page"] = per_page
         if page:
             data["page"] = page
-            
-        # API呼び出し
-        response = self.client.post(path, data=data)
-        
-        # レスポンスをTicketオブジェクトのリストに変換
-        return [Ticket.from_dict(ticket_data) for ticket_data in response]
-    
-    def get(self, message_box_id: int, ticket_id: int) -> Ticket:
-        """チケットを取得します。
-        
+        return data
+
+    def stream_search(self, message_box_id: int, **filters: Any) -> Iterator[Ticket]:
+        """チケットを検索し、レスポンスを受信しながら1件ずつ返します
+
+        search() と同じ検索を行いますが、ページ全体を読み込まずに、チケットのJSONを
+        受信し終えるたびにTicketオブジェクトに変換して返します。メッセージの多いチケットや
+        HTML本文の長いチケットを含むページでも、メモリに保持するのはチケット1件分だけです。
+        リクエストは最初の1件を取り出した時点で送信されます。途中で反復をやめる場合は
+        ``close()`` を呼ぶと接続を解放します。
+
         Args:
             message_box_id: 受信箱ID
-            ticket_id: チケットID
-            
-        Returns:
+            **filters: search() と同じ検索条件 (status_cds、since、per_page、page など)
+
+        Yields:
             チケット
         """
+        path = f"{message_box_id}/tickets/search"
+        with self.client.stream('POST', path, json_data=self._search_data(**filters)) as items:
+            for ticket_data in items:
+                yield Ticket.from_dict(ticket_data)
+
+    def stream_messages(self, message_box_id: int, ticket_id: int) -> Iterator[Message]:
+        """チケットのメッセージを、レスポンスを受信しながら1件ずつ返します
+
+        get() と同じチケットを取得しますが、``messages`` 以外の項目は読み飛ばし、
+        メッセージのJSONを受信し終えるたびにMessageオブジェクトに変換して返します。
+        長いスレッドでも、メモリに保持するのはメッセージ1件分だけです。
+        リクエストは最初の1件を取り出した時点で送信されます。
+
+        Args:
+            message_box_id: 受信箱ID
+            ticket_id: チケットID
+
+        Yields:
+            メッセージ
+        """
         path = f"{message_box_id}/tickets/{ticket_id}"
-        
-        # API呼び出し
-        response = self.client.get(path)
-        
-        # レスポンスをTicketオブジェクトに変換
-        return Ticket.from_dict(response)
-    
+        with self.client.stream('GET', path, item_path=('messages',)) as items:
+            for message_data in items:
+                yield Message.from_dict(message_data)
+
     def update(
         self, 
         message_box_id: int, 
@@ -3,14 +3,18 @@
 
 このモジュールは、Re:lation APIのユーザーに関連するリソースクラスを提供します。
 """
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Callable, Iterator
 
 from ..models import User
+from ..pagination import paginate
 
 
 class UserResource:
     """ユーザーリソースクラス"""
 
+    # 一覧の1ページあたりの最大件数
+    MAX_PER_PAGE = 100
+
     def __init__(self, client):
         """初期化
 
@@ -36,4 +40,30 @@ class UserResource:
             params['page'] = page
 
         response = self.client.get('users', params=params)
-        return [User.from_dict(item) for item in response] 
\ No newline at end of file
+        return [User.from_dict(item) for item in response]
+
+    def iter_list(
+        self,
+        limit: Optional[int] = None,
+        stop_when: Optional[Callable[[User], bool]] = None,
+        per_page: int = MAX_PER_PAGE,
+        prefetch: int = 0
+    ) -> Iterator[User]:
+        """ユーザー一覧のすべてのページを取得し、1件ずつ返します
+
+        件数が per_page より少ないページで終了します。既定では次のページを前のページを
+        返し終えてから取得し、prefetch を指定すると後続のページを並列に先読みします。
+
+        Args:
+            limit: 返す件数の上限（省略時は上限なし）
+            stop_when: ユーザーを受け取り、True を返すとそこで終了する関数
+            per_page: 1ページあたりの件数（省略時は最大の100）
+            prefetch: 並列に先読みするページ数（省略時は先読みしない）
+
+        Yields:
+            User: ユーザーオブジェクト
+        """
+        yield from paginate(
+            lambda page, size: self.list(per_page=size, page=page),
+            per_page, limit=limit, stop_when=stop_when, prefetch=prefetch
+        )
@@ -0,0 +1,229 @@
+"""
+リトライポリシーモジュール
+
+このモジュールは、429・503・接続エラー時のリトライ間隔を決めるポリシーと、
+リトライによって負荷が増幅しすぎないように制限するリトライ予算を提供します。
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Optional
+
+
+def parse_retry_after(value: Any, now: Optional[float] = None) -> Optional[float]:
+    """Retry-Afterヘッダーの値を待機秒数に変換します
+
+    秒数 (例: ``120``) とHTTP日付 (例: ``Wed, 21 Oct 2015 07:28:00 GMT``) の
+    どちらの形式にも対応します。
+
+    Args:
+        value: Retry-Afterヘッダーの値
+        now: 現在時刻 (UNIX時刻。省略時は time.time())
+
+    Returns:
+        待機秒数 (解釈できない場合は None)
+    """
+    if value is None:
+        return None
+    if not isinstance(value, (str, bytes, int, float)):
+        return None
+    if isinstance(value, bytes):
+        value = value.decode('latin-1')
+    text = str(value).strip()
+    try:
+        return max(0.0, float(text))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(text)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if retry_at is None:
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    current = now if now is not None else time.time()
+    return max(0.0, retry_at.timestamp() - current)
+
+
+class RetryBudget:
+    """リトライ予算
+
+    直近 ``window`` 秒間のリクエスト数に対して、リトライの割合が ``ratio`` を超えないように
+    制限します。少量のリクエストでもリトライできるよう、``min_retries`` 件までは
+    割合に関係なくリトライを許可します。スレッドセーフです。
+    """
+
+    def __init__(
+        self,
+        ratio: float = 0.2,
+        min_retries: int = 10,
+        window: float = 10.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """初期化
+
+        Args:
+            ratio: 通常のリクエスト数に対するリトライの最大割合
+            min_retries: 割合に関係なく window 秒間に許可するリトライ数
+            window: 計測期間 (秒)
+            clock: 単調増加する時刻を返す関数
+        """
+        if ratio < 0 or min_retries < 0 or window <= 0:
+            raise ValueError("ratio と min_retries は0以上、window は正の値を指定してください")
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._requests: deque = deque()
+        self._retries: deque = deque()
+
+    def _expire(self, now: float) -> None:
+        """計測期間を過ぎた記録を削除します"""
+        threshold = now - self.window
+        while self._requests and self._requests[0] <= threshold:
+            self._requests.popleft()
+        while self._retries and self._retries[0] <= threshold:
+            self._retries.popleft()
+
+    def record_request(self) -> None:
+        """通常のリクエストを1件記録します"""
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            self._requests.append(now)
+
+    def try_spend(self) -> bool:
+        """リトライを1件分消費します
+
+        Returns:
+            予算が残っていてリトライできる場合は True
+        """
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            allowed = self.min_retries + self.ratio * len(self._requests)
+            if len(self._retries) >= allowed:
+                return False
+            self._retries.append(now)
+            return True
+
+    def reset_after_fork(self) -> None:
+        """fork後の子プロセスで呼び出し、ロックを作り直します"""
+        self._lock = threading.Lock()
+
+
+class RetryPolicy:
+    """固定間隔でリトライするポリシー
+
+    Retry-Afterが指定されている場合はその秒数だけ待機します。
+    """
+
+    def __init__(self, max_retries: int = 3, delay: float = 1.0, budget: Optional[RetryBudget] = None):
+        """初期化
+
+        Args:
+            max_retries: リトライ最大回数
+            delay: リトライ間の待機秒数
+            budget: リトライ予算 (省略時は制限なし)
+        """
+        self.max_retries = max_retries
+        self.delay = delay
+        self.budget = budget
+
+    def record_request(self) -> None:
+        """通常のリクエストを1件記録します (リトライ予算の計算に使用)"""
+        if self.budget is not None:
+            self.budget.record_request()
+
+    def reset_after_fork(self) -> None:
+        """fork後の子プロセスで呼び出し、リトライ予算のロックを作り直します"""
+        if self.budget is not None:
+            self.budget.reset_after_fork()
+
+    def allow_retry(self, attempt: int) -> bool:
+        """リトライしてよいかどうかを判定します
+
+        Args:
+            attempt: これまでのリトライ回数 (初回の失敗時は0)
+
+        Returns:
+            リトライしてよい場合は True
+        """
+        if attempt >= self.max_retries:
+            return False
+        if self.budget is not None and not self.budget.try_spend():
+            return False
+        return True
+
+    def backoff(self, attempt: int) -> float:
+        """Retry-Afterがない場合の待機秒数を返します"""
+        return self.delay
+
+    def wait_time(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """リトライ前の待機秒数を返します
+
+        Args:
+            attempt: これまでのリトライ回数 (初回の失敗時は0)
+            retry_after: Retry-Afterヘッダーから得た待機秒数
+
+        Returns:
+            待機秒数
+        """
+        if retry_after is not None:
+            return retry_after
+        return self.backoff(attempt)
+
+
+class ExponentialBackoff(RetryPolicy):
+    """指数バックオフとフルジッターでリトライするポリシー
+
+    待機秒数は ``0`` 〜 ``min(max_delay, base_delay * 2 ** attempt)`` の一様乱数です。
+    多数のワーカーが同時に失敗しても再送のタイミングが分散されます。
+    Retry-Afterが指定されている場合は、その秒数に ``0`` 〜 ``base_delay`` のジッターを加えます。
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        jitter: bool = True,
+        budget: Optional[RetryBudget] = None,
+        random_func: Callable[[float, float], float] = random.uniform
+    ):
+        """初期化
+
+        Args:
+            max_retries: リトライ最大回数
+            base_delay: 1回目のリトライの待機秒数の上限
+            max_delay: 待機秒数の上限
+            jitter: フルジッターを適用するかどうか
+            budget: リトライ予算 (省略時は制限なし)
+            random_func: 乱数を返す関数 (テスト用)
+        """
+        super().__init__(max_retries=max_retries, delay=base_delay, budget=budget)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self._random = random_func
+
+    def backoff(self, attempt: int) -> float:
+        """Retry-Afterがない場合の待機秒数を返します"""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        if not self.jitter:
+            return ceiling
+        return self._random(0, ceiling)
+
+    def wait_time(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """リトライ前の待機秒数を返します"""
+        if retry_after is None:
+            return self.backoff(attempt)
+        if not self.jitter:
+            return retry_after
+        return retry_after + self._random(0, self.base_delay)
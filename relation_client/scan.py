@@ -0,0 +1,302 @@
+"""
+分割スキャンモジュール
+
+このモジュールは、1つの受信箱のチケット検索を期間 (since/until) とステータス・チャネル・
+担当者で独立したシャードに分割し、並列に取得するスキャナーを提供します。
+1つの検索結果を深いページまでたどる代わりに、件数の多い期間は自動的に分割します。
+"""
+
+import contextvars
+import itertools
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .models import Ticket
+
+TimeLike = Union[datetime, str]
+
+
+@dataclass
+class ScanShard:
+    """スキャンの分割単位 (期間と、その期間に適用する検索条件)
+
+    ``filters`` は TicketResource.search() にそのまま渡す検索条件です
+    (例: ``{'status_cds': ['open'], 'assignee': 'yamada'}``)。
+    """
+    since: datetime
+    until: datetime
+    filters: Dict[str, Any] = field(default_factory=dict)
+
+    def split(self) -> Optional[Tuple['ScanShard', 'ScanShard']]:
+        """期間を秒単位で二等分したシャードを返します (これ以上分割できない場合は None)"""
+        middle = (self.since + (self.until - self.since) / 2).replace(microsecond=0)
+        if not self.since < middle < self.until:
+            return None
+        return replace(self, until=middle), replace(self, since=middle)
+
+    def search_params(self) -> Dict[str, Any]:
+        """TicketResource.search() に渡す検索条件を返します"""
+        return dict(self.filters, since=self.since.isoformat(), until=self.until.isoformat())
+
+
+@dataclass
+class ScanStats:
+    """スキャンの統計情報
+
+    ``shards`` は実行したシャード数 (分割で生じたものを含む)、``splits`` はページ数が
+    ``max_pages`` に達したため分割したシャード数、``pages`` は取得したページ数です。
+    ``refetched`` は分割したシャードで取得済みのページのうち、分割後のシャードで
+    取得し直すことになったページ数です (``pages`` に含まれます)。
+    ``tickets`` は返したチケット数、``duplicates`` は複数のシャードに含まれていたため
+    読み捨てたチケット数です。
+    """
+    shards: int = 0
+    splits: int = 0
+    pages: int = 0
+    refetched: int = 0
+    tickets: int = 0
+    duplicates: int = 0
+
+
+def parse_time(value: TimeLike) -> datetime:
+    """datetime または ISO 8601形式の文字列を datetime に変換します"""
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+class TicketScanner:
+    """受信箱のチケットを、分割した検索条件ごとに並列に取得するスキャナー
+
+    期間を ``windows`` 個に等分し、さらに ``status_cds``・``method_cds``・``assignees`` に
+    指定した値ごとにシャードを作り、スレッドプールで並列に検索します。1つのシャードの
+    ページ数が ``max_pages`` に達しても続きがある場合は、そのシャードの期間を二等分して
+    それぞれを検索し直します (``min_window`` より短い期間は分割せず、最後のページまで
+    たどります)。検索結果の並び順と件数はわからないため、分割したシャードで取得済みの
+    ``max_pages`` ページ分は分割後のシャードで取得し直すことになります
+    (``stats.refetched`` で確認できます)。件数の多い期間が事前にわかる場合は、
+    ``windows`` を大きくして最初から細かく分割すると、取得し直すページを減らせます。
+
+    since/until はメッセージの送信日時で絞り込むため、複数のメッセージを持つチケットは
+    複数の期間に含まれることがあります。同じ ticket_id のチケットは最初の1件だけを返します。
+    返す順序は検索結果の順序と一致しません。
+
+    Example:
+        scanner = TicketScanner(client, max_workers=8)
+        for ticket in scanner.scan(123, since='2024-01-01T00:00:00+09:00',
+                                   until='2024-04-01T00:00:00+09:00', windows=12,
+                                   status_cds=['open', 'ongoing', 'closed']):
+            export(ticket)
+        print(scanner.stats)
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        max_workers: int = 4,
+        max_pages: int = 20,
+        per_page: int = 50,
+        min_window: timedelta = timedelta(minutes=1)
+    ):
+        """初期化
+
+        Args:
+            client: RelationClientインスタンス
+            max_workers: 並列に実行するシャードの最大数
+            max_pages: 1つのシャードでたどるページ数の上限 (超える場合は期間を分割)
+            per_page: 1ページあたりの件数 (チケット検索の最大は50)
+            min_window: これより短い期間は分割しない
+
+        Raises:
+            ValueError: max_workers・max_pages・per_page が1未満の場合
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers は1以上を指定してください")
+        if max_pages < 1:
+            raise ValueError("max_pages は1以上を指定してください")
+        if per_page < 1:
+            raise ValueError("per_page は1以上を指定してください")
+        self.client = client
+        self.max_workers = max_workers
+        self.max_pages = max_pages
+        self.per_page = per_page
+        self.min_window = min_window
+        self.stats = ScanStats()
+
+    def plan(
+        self,
+        since: TimeLike,
+        until: TimeLike,
+        windows: int = 1,
+        status_cds: Optional[Sequence[str]] = None,
+        method_cds: Optional[Sequence[str]] = None,
+        assignees: Optional[Sequence[str]] = None,
+        **filters: Any
+    ) -> List[ScanShard]:
+        """最初に実行するシャードの一覧を作成します
+
+        期間の分割数とステータス・チャネル・担当者の値の組み合わせごとに1つのシャードを作ります。
+        作成したシャードは ``scan_shards()`` に渡して実行するほか、ProcessPoolRunner などで
+        プロセスに分配することもできます。
+
+        Args:
+            since: 期間の開始 (メッセージの送信日時)
+            until: 期間の終了 (メッセージの送信日時)
+            windows: 期間を等分する数
+            status_cds: ステータスコードのリスト (値ごとにシャードを分割)
+            method_cds: チャネルコードのリスト (値ごとにシャードを分割)
+            assignees: 担当者のメンション名のリスト (値ごとにシャードを分割)
+            **filters: すべてのシャードに適用する search() の検索条件 (label_ids など)
+
+        Returns:
+            シャードのリスト
+
+        Raises:
+            ValueError: until が since より後でない場合、または windows が1未満の場合
+        """
+        start, end = parse_time(since), parse_time(until)
+        if end <= start:
+            raise ValueError("until は since より後の日時を指定してください")
+        if windows < 1:
+            raise ValueError("windows は1以上を指定してください")
+        for name in ('per_page', 'page', 'since', 'until', 'date', 'within', 'assignee'):
+            if name in filters:
+                raise ValueError(f"{name} はスキャンの検索条件に指定できません")
+
+        # 期間の境界は秒単位に切り捨てる (期間が短く同じ境界になる場合はまとめる)
+        step = (end - start) / windows
+        bounds = sorted({start, end} | {(start + step * i).replace(microsecond=0) for i in range(1, windows)})
+        bounds = [bound for bound in bounds if start <= bound <= end]
+        dimensions = [
+            [('status_cds', [value]) for value in status_cds] if status_cds else [None],
+            [('method_cds', [value]) for value in method_cds] if method_cds else [None],
+            [('assignee', value) for value in assignees] if assignees else [None],
+        ]
+        shards = []
+        for combination in itertools.product(*dimensions):
+            shard_filters = dict(filters)
+            shard_filters.update(item for item in combination if item is not None)
+            for i in range(len(bounds) - 1):
+                shards.append(ScanShard(bounds[i], bounds[i + 1], dict(shard_filters)))
+        return shards
+
+    def scan(self, message_box_id: int, since: TimeLike, until: TimeLike, **options: Any) -> Iterator[Ticket]:
+        """期間内のチケットを分割して並列に取得し、1件ずつ返します
+
+        Args:
+            message_box_id: 受信箱ID
+            since: 期間の開始 (メッセージの送信日時)
+            until: 期間の終了 (メッセージの送信日時)
+            **options: plan() の引数 (windows・status_cds・method_cds・assignees・検索条件)
+
+        Yields:
+            チケット (ticket_id ごとに1件)
+
+        Raises:
+            ValueError: 引数が不正な場合
+            RelationError: いずれかのシャードの検索が失敗した場合 (残りのシャードは中止)
+        """
+        yield from self.scan_shards(message_box_id, self.plan(since, until, **options))
+
+    def scan_shards(self, message_box_id: int, shards: Sequence[ScanShard]) -> Iterator[Ticket]:
+        """シャードを並列に実行し、取得したチケットを1件ずつ返します
+
+        途中で反復をやめると、まだ取得していないページとシャードは実行しません
+        (実行中の検索は完了を待たずに結果を破棄します)。呼び出し元のコンテキスト変数
+        (デッドライン・優先度など) は各シャードに引き継がれます。
+
+        Args:
+            message_box_id: 受信箱ID
+            shards: 実行するシャード (plan() の戻り値など)
+
+        Yields:
+            チケット (ticket_id ごとに1件)
+        """
+        self.stats = stats = ScanStats()
+        if not shards:
+            return
+        # 取得したページを受け渡すキュー (呼び出し元の処理が遅い場合はシャードの実行を止める)
+        results: 'queue.Queue[Tuple[str, Any]]' = queue.Queue(maxsize=self.max_workers * 2)
+        stopped = threading.Event()
+        lock = threading.Lock()
+        outstanding = 0
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='relation-scan')
+
+        def put(message: Tuple[str, Any]) -> None:
+            while not stopped.is_set():
+                try:
+                    results.put(message, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+
+        def submit(shards: Sequence[ScanShard]) -> None:
+            nonlocal outstanding
+            # 先に実行するシャードの数をすべて数えておく (数える前に他のシャードが終了して
+            # 実行中のシャードが0件と判断されないようにするため)
+            with lock:
+                outstanding += len(shards)
+                stats.shards += len(shards)
+            for shard in shards:
+                try:
+                    executor.submit(contextvars.copy_context().run, run, shard)
+                except RuntimeError:
+                    # スキャンの終了後 (executor の停止後) に分割したシャードは実行しない
+                    pass
+
+        def run(shard: ScanShard) -> None:
+            nonlocal outstanding
+            try:
+                params = shard.search_params()
+                for page in itertools.count(1):
+                    if stopped.is_set():
+                        return
+                    tickets = self.client.tickets.search(
+                        message_box_id, per_page=self.per_page, page=page, **params
+                    )
+                    put(('page', tickets))
+                    if len(tickets) < self.per_page:
+                        return
+                    if page >= self.max_pages and shard.until - shard.since > self.min_window:
+                        halves = shard.split()
+                        if halves is not None:
+                            put(('split', page))
+                            submit(halves)
+                            return
+            except BaseException as e:
+                put(('error', e))
+            finally:
+                with lock:
+                    outstanding -= 1
+                    finished = outstanding == 0
+                if finished:
+                    put(('done', None))
+
+        seen = set()
+        try:
+            submit(shards)
+            while True:
+                kind, value = results.get()
+                if kind == 'done':
+                    return
+                if kind == 'error':
+                    raise value
+                if kind == 'split':
+                    stats.splits += 1
+                    stats.refetched += value
+                    continue
+                stats.pages += 1
+                for ticket in value:
+                    if ticket.ticket_id in seen:
+                        stats.duplicates += 1
+                        continue
+                    seen.add(ticket.ticket_id)
+                    stats.tickets += 1
+                    yield ticket
+        finally:
+            stopped.set()
+            executor.shutdown(wait=False)
@@ -0,0 +1,152 @@
+"""
+リクエスト集約 (singleflight) モジュール
+
+このモジュールは、同じ内容のGETリクエストが同時に実行された場合に、
+1件だけを送信して結果を全ての呼び出し元で共有するミドルウェアを提供します。
+"""
+
+import copy
+import json
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional
+
+from .bulkhead import CANCELLATION_POLL_INTERVAL
+from .exceptions import DeadlineExceededError, OperationCancelledError
+from .middleware import APIRequest, Handler
+
+
+@dataclass
+class SingleflightStats:
+    """リクエスト集約の統計情報
+
+    ``requests`` は集約の対象になった呼び出しの数、``coalesced`` はそのうち他の呼び出しの
+    結果を共有して送信を省略した数、``in_flight`` は現在送信中のリクエストの数です。
+    """
+    requests: int = 0
+    coalesced: int = 0
+    in_flight: int = 0
+
+
+class _InFlightCall:
+    """送信中のリクエスト1件分の結果を待ち合わせるための情報"""
+
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        # 待っている呼び出しに渡す結果の複製 (送信した呼び出し元が結果を変更しても影響しない)
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleflightMiddleware:
+    """同時に実行された同じ内容のリクエストを1件にまとめるミドルウェア
+
+    同じメソッド・パス・クエリパラメータのリクエストが送信中の場合、後から来た呼び出しは
+    送信せずにその結果を待ち、同じレスポンス (またはリトライを終えた後の同じ例外) を受け取ります。
+    結果は呼び出し元ごとに複製して返すため、受け取った辞書を変更しても他に影響しません。
+
+    デッドライン切れやキャンセルは呼び出し元ごとの事情のため共有せず、待っていた側は
+    自分で送信し直します。待っている側のデッドラインとキャンセルは待機中にも適用されます。
+    結果を共有できないストリーミングのリクエストは集約しません。
+
+    キーにテナントは含まれないため、インスタンスはクライアントごとに作成してください
+    (RelationClient の ``coalesce_requests=True`` はクライアントごとに作成します)。スレッドセーフです。
+    """
+
+    def __init__(self, methods: Iterable[str] = ('GET',)):
+        """初期化
+
+        Args:
+            methods: 集約の対象にするHTTPメソッド (冪等なメソッドのみを指定すること)
+        """
+        self.methods = frozenset(method.upper() for method in methods)
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _InFlightCall] = {}
+        self._requests = 0
+        self._coalesced = 0
+
+    @property
+    def stats(self) -> SingleflightStats:
+        """集約の統計情報"""
+        with self._lock:
+            return SingleflightStats(
+                requests=self._requests,
+                coalesced=self._coalesced,
+                in_flight=len(self._calls)
+            )
+
+    def reset_after_fork(self) -> None:
+        """fork後の子プロセスで呼び出し、ロックを作り直して親プロセスの実行中の呼び出しを破棄します
+
+        親プロセスの呼び出しの結果は子プロセスには届かないため、集約せずに送信し直します。
+        """
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def __call__(self, request: APIRequest, call_next: Handler) -> Any:
+        if request.method not in self.methods or request.stream:
+            return call_next(request)
+
+        key = self._key(request)
+        with self._lock:
+            self._requests += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _InFlightCall()
+            else:
+                self._coalesced += 1
+                call.waiters += 1
+
+        if leader:
+            try:
+                result = call_next(request)
+            except BaseException as e:
+                call.error = e
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+                raise
+            with self._lock:
+                del self._calls[key]
+                waiters = call.waiters
+            try:
+                if waiters:
+                    # 待っている呼び出しが結果を受け取る前に複製を取っておき、
+                    # 送信した呼び出し元を含めて、全ての呼び出し元にその複製を返す
+                    call.result = copy.deepcopy(result)
+                    result = copy.deepcopy(call.result)
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                call.done.set()
+            return result
+
+        while True:
+            if request.token is not None:
+                request.token.check()
+            timeout = None if request.deadline is None else request.deadline.remaining()
+            if request.token is not None:
+                # キャンセルに気付けるように、短い間隔で待機する
+                timeout = CANCELLATION_POLL_INTERVAL if timeout is None else min(timeout, CANCELLATION_POLL_INTERVAL)
+            if call.done.wait(timeout):
+                break
+            if request.deadline is not None and request.deadline.expired:
+                raise DeadlineExceededError("同じ内容のリクエストの完了を待つ間にデッドラインを過ぎました")
+        if call.error is not None:
+            if isinstance(call.error, (DeadlineExceededError, OperationCancelledError)):
+                return call_next(request)
+            raise call.error
+        return copy.deepcopy(call.result)
+
+    @staticmethod
+    def _key(request: APIRequest) -> str:
+        """リクエストの同一性を判定するキーを返します"""
+        return json.dumps(
+            [request.method, request.path.lstrip('/'), request.params],
+            sort_keys=True, default=str, ensure_ascii=False
+        )
@@ -0,0 +1,260 @@
+"""
+ストリーミングJSON解析モジュール
+
+このモジュールは、レスポンスの本文を受信しながらJSON配列の要素を1件ずつ取り出す
+パーサーを提供します。本文全体を読み込んでから解析する場合と異なり、メモリに保持するのは
+解析中の要素1件分と受信途中のデータだけです。
+"""
+
+import re
+from typing import Any, Iterable, Iterator, Optional, Sequence
+
+import requests
+
+from .codec import JSONCodec, default_codec
+from .exceptions import APIConnectionError
+
+# レスポンスの本文を読み込む単位 (バイト)
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(rb'[ \t\r\n]*')
+# 文字列の外側で値の区切りになる文字
+_STRUCTURAL = re.compile(rb'["{}\[\]]')
+# 開始の " の直後から終了の " まで (エスケープされた " を含む)
+_STRING_TAIL = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+# 数値・true・false・null の終わり
+_SCALAR_END = re.compile(rb'[,\]} \t\r\n]')
+
+_OPEN = frozenset(b'[{')
+_QUOTE = ord('"')
+
+
+class _StreamBuffer:
+    """受信済みのデータと解析位置を保持するバッファー"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self.data = bytearray()
+        self.pos = 0
+
+    def fill(self) -> None:
+        """次のチャンクを読み込みます
+
+        Raises:
+            ValueError: データが途中で終わっている場合
+        """
+        for chunk in self._chunks:
+            if chunk:
+                self.data += chunk
+                return
+        raise ValueError("JSONが途中で終わっています")
+
+    def compact(self) -> None:
+        """解析済みのデータを破棄します"""
+        del self.data[:self.pos]
+        self.pos = 0
+
+    def peek(self) -> int:
+        """空白を読み飛ばし、次の文字を返します (位置は進めない)"""
+        while True:
+            self.pos = _WHITESPACE.match(self.data, self.pos).end()
+            if self.pos < len(self.data):
+                return self.data[self.pos]
+            self.fill()
+
+    def expect(self, chars: bytes) -> int:
+        """空白を読み飛ばし、chars のいずれかの文字を読み込んで返します"""
+        char = self.peek()
+        if char not in chars:
+            raise ValueError(
+                f"JSONを解析できません: 位置 {self.pos} で {chr(char)!r} ではなく"
+                f" {' / '.join(repr(chr(c)) for c in chars)} が必要です"
+            )
+        self.pos += 1
+        return char
+
+    def read_value(self) -> bytearray:
+        """次のJSONの値1つ分のデータを読み込んで返します (必要な分だけ受信する)"""
+        first = self.peek()
+        start = self.pos
+        if first not in _OPEN and first != _QUOTE:
+            while True:
+                match = _SCALAR_END.search(self.data, start)
+                if match is not None:
+                    self.pos = match.start()
+                    return self.data[start:self.pos]
+                self.fill()
+
+        pos, depth = start, 0
+        while True:
+            match = _STRUCTURAL.search(self.data, pos)
+            if match is None:
+                pos = len(self.data)
+                self.fill()
+                continue
+            char = self.data[match.start()]
+            if char == _QUOTE:
+                tail = _STRING_TAIL.match(self.data, match.end())
+                if tail is None:
+                    # 文字列の途中までしか受信していない
+                    pos = match.start()
+                    self.fill()
+                    continue
+                pos = tail.end()
+            elif char in _OPEN:
+                depth += 1
+                pos = match.end()
+            else:
+                depth -= 1
+                pos = match.end()
+            if depth == 0:
+                self.pos = pos
+                return self.data[start:pos]
+
+
+def iter_json_array(
+    chunks: Iterable[bytes],
+    codec: Optional[JSONCodec] = None,
+    path: Sequence[str] = ()
+) -> Iterator[Any]:
+    """チャンクに分かれたJSONを受信しながら、配列の要素を1件ずつデコードして返します
+
+    ``path`` を指定すると、オブジェクトのキーをたどった先の配列の要素を返します
+    (例: チケット詳細の ``('messages',)``)。それ以外のキーの値は読み飛ばします。
+    たどった先が ``null`` またはキーが存在しない場合は何も返しません。
+    配列の終わりより後のデータは読み込みません。
+
+    Args:
+        chunks: JSONのバイト列のチャンクのイテラブル
+        codec: 要素のデコードに使うJSONコーデック (省略時は default_codec())
+        path: 配列までのオブジェクトのキー (省略時は全体が配列)
+
+    Yields:
+        デコードした配列の要素
+
+    Raises:
+        ValueError: JSONとして解釈できない場合、またはデータが途中で終わっている場合
+    """
+    codec = codec or default_codec()
+    buffer = _StreamBuffer(chunks)
+    for key in path:
+        if not _seek_key(buffer, key, codec):
+            return
+    if buffer.peek() == ord('n'):
+        buffer.read_value()
+        return
+
+    buffer.expect(b'[')
+    if buffer.peek() == ord(']'):
+        return
+    while True:
+        item = codec.loads(buffer.read_value())
+        buffer.compact()
+        yield item
+        if buffer.expect(b',]') == ord(']'):
+            return
+
+
+def _seek_key(buffer: _StreamBuffer, key: str, codec: JSONCodec) -> bool:
+    """オブジェクトを読み進め、key の値の直前まで移動します
+
+    Returns:
+        key が見つかった場合は True (オブジェクトの終わりに達した場合や null の場合は False)
+    """
+    if buffer.peek() == ord('n'):
+        buffer.read_value()
+        return False
+    buffer.expect(b'{')
+    if buffer.peek() == ord('}'):
+        return False
+    while True:
+        name = codec.loads(buffer.read_value())
+        buffer.expect(b':')
+        if name == key:
+            return True
+        buffer.read_value()
+        buffer.compact()
+        if buffer.expect(b',}') == ord('}'):
+            return False
+
+
+class ItemStream:
+    """レスポンスの本文を受信しながら、JSON配列の要素を1件ずつ返すイテレーター
+
+    ``iter_content()`` を持つレスポンス (requests・Urllib3Transport のストリーミング
+    レスポンス) は本文を少しずつ受信し、持たないレスポンスは ``content`` を解析します。
+    最後まで読み終えるとレスポンスを閉じて接続をコネクションプールに戻します。
+    途中で反復をやめる場合は ``close()`` を呼ぶか、with文で使ってください。
+    受信中の接続エラーとタイムアウトは APIConnectionError として送出します。
+
+    Example:
+        with client.stream('POST', '1/tickets/search', json_data={'per_page': 50}) as items:
+            for item in items:
+                ...
+    """
+
+    def __init__(
+        self,
+        response: Any,
+        codec: Optional[JSONCodec] = None,
+        path: Sequence[str] = (),
+        chunk_size: int = STREAM_CHUNK_SIZE
+    ):
+        """初期化
+
+        Args:
+            response: ステータスコードが400未満のレスポンス
+            codec: 要素のデコードに使うJSONコーデック (省略時は default_codec())
+            path: 配列までのオブジェクトのキー (省略時は本文全体が配列)
+            chunk_size: 1回に受信するバイト数
+        """
+        self.response = response
+        if hasattr(response, 'iter_content'):
+            self._chunks = iter(response.iter_content(chunk_size))
+        else:
+            self._chunks = iter([response.content])
+        self._items = iter_json_array(self._chunks, codec, path)
+        self._closed = False
+
+    def __iter__(self) -> 'ItemStream':
+        return self
+
+    def __next__(self) -> Any:
+        if self._closed:
+            raise StopIteration
+        try:
+            return next(self._items)
+        except StopIteration:
+            # 配列より後の残りを読み切り、接続を再利用できるようにする
+            self._drain()
+            self.close()
+            raise
+        except requests.RequestException as e:
+            self.close()
+            raise APIConnectionError(f"受信中の接続エラー: {str(e)}")
+        except BaseException:
+            self.close()
+            raise
+
+    def _drain(self) -> None:
+        try:
+            for _ in self._chunks:
+                pass
+        except requests.RequestException:
+            pass
+
+    def close(self) -> None:
+        """受信をやめてレスポンスを閉じます"""
+        if self._closed:
+            return
+        self._closed = True
+        self._items.close()
+        close = getattr(self.response, 'close', None)
+        if close is not None:
+            close()
+
+    def __enter__(self) -> 'ItemStream':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -0,0 +1,374 @@
+"""
+差分同期モジュール
+
+このモジュールは、受信箱ごとに保存したウォーターマーク (前回までに同期したチケットの
+最終更新日時) より後に変更されたチケットだけを取得する同期エンジンと、
+ウォーターマークを保存するストアを提供します。
+"""
+
+import json
+import os
+import re
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from itertools import count
+from typing import Any, Dict, Iterator, Optional
+
+from .models import Ticket
+from .scan import TimeLike, parse_time
+
+
+@dataclass
+class SyncState:
+    """1つの受信箱の同期の状態
+
+    ``watermark`` は同期し終えたチケットの最終更新日時の最大値、``recent`` は
+    ウォーターマークの直前の重なりの期間に同期したチケットの ``ticket_id`` と最終更新日時です
+    (次回の同期で同じチケットを重複して返さないために使います)。
+    ``run_*`` は実行中の同期の進捗で、同期が中断された場合に続きから再開するために使います
+    (``run_recent`` は実行中の同期で返したチケットのうち、新しいウォーターマークの
+    重なりの期間に入りうるものです)。``last_full_sync`` は ``since`` を指定せずに受信箱の
+    すべてのチケットを確認した同期 (全件の照合) を最後に終えた日時です。
+    """
+    watermark: Optional[datetime] = None
+    recent: Dict[int, str] = field(default_factory=dict)
+    run_since: Optional[datetime] = None
+    run_page: int = 0
+    run_max_updated_at: Optional[datetime] = None
+    run_recent: Dict[int, str] = field(default_factory=dict)
+    last_full_sync: Optional[datetime] = None
+
+    @property
+    def running(self) -> bool:
+        """中断された (または実行中の) 同期があるかどうか"""
+        return self.run_page > 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSONに変換できる辞書を返します"""
+        return {
+            'watermark': self.watermark.isoformat() if self.watermark else None,
+            'recent': {str(ticket_id): updated_at for ticket_id, updated_at in self.recent.items()},
+            'run_since': self.run_since.isoformat() if self.run_since else None,
+            'run_page': self.run_page,
+            'run_max_updated_at': self.run_max_updated_at.isoformat() if self.run_max_updated_at else None,
+            'run_recent': {str(ticket_id): updated_at for ticket_id, updated_at in self.run_recent.items()},
+            'last_full_sync': self.last_full_sync.isoformat() if self.last_full_sync else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SyncState':
+        """to_dict() の戻り値から復元します"""
+        return cls(
+            watermark=parse_time(data['watermark']) if data.get('watermark') else None,
+            recent={int(ticket_id): updated_at for ticket_id, updated_at in (data.get('recent') or {}).items()},
+            run_since=parse_time(data['run_since']) if data.get('run_since') else None,
+            run_page=data.get('run_page') or 0,
+            run_max_updated_at=(
+                parse_time(data['run_max_updated_at']) if data.get('run_max_updated_at') else None
+            ),
+            run_recent={
+                int(ticket_id): updated_at for ticket_id, updated_at in (data.get('run_recent') or {}).items()
+            },
+            last_full_sync=parse_time(data['last_full_sync']) if data.get('last_full_sync') else None,
+        )
+
+
+class WatermarkStore:
+    """同期の状態を保存するストアの基底クラス
+
+    ``load()`` と ``save()`` を実装すると、データベースなど任意の保存先を使えます。
+    """
+
+    def load(self, key: str) -> Optional[SyncState]:
+        """保存した状態を返します (保存されていない場合は None)"""
+        raise NotImplementedError
+
+    def save(self, key: str, state: SyncState) -> None:
+        """状態を保存します"""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        """保存した状態を削除します"""
+        raise NotImplementedError
+
+
+class MemoryWatermarkStore(WatermarkStore):
+    """状態をメモリに保存するストア (テストや1プロセス内での利用向け)"""
+
+    def __init__(self):
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, key: str) -> Optional[SyncState]:
+        with self._lock:
+            data = self._states.get(key)
+        return SyncState.from_dict(data) if data is not None else None
+
+    def save(self, key: str, state: SyncState) -> None:
+        with self._lock:
+            self._states[key] = state.to_dict()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._states.pop(key, None)
+
+
+class FileWatermarkStore(WatermarkStore):
+    """状態をキーごとのJSONファイルに保存するストア
+
+    一時ファイルに書き込んでから置き換えるため、書き込み中にプロセスが終了しても
+    ファイルが壊れることはありません (直前に保存した状態が残ります)。
+    """
+
+    def __init__(self, directory: str):
+        """初期化
+
+        Args:
+            directory: 状態ファイルを置くディレクトリ (存在しない場合は作成)
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        """キーに対応する状態ファイルのパスを返します"""
+        return os.path.join(self.directory, 'relation_sync_' + re.sub(r'[^A-Za-z0-9_.-]', '_', key) + '.json')
+
+    def load(self, key: str) -> Optional[SyncState]:
+        try:
+            with open(self.path(key), encoding='utf-8') as f:
+                return SyncState.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+
+    def save(self, key: str, state: SyncState) -> None:
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(state.to_dict(), f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path(key))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def delete(self, key: str) -> None:
+        try:
+            os.unlink(self.path(key))
+        except FileNotFoundError:
+            pass
+
+
+@dataclass
+class SyncStats:
+    """1回の同期の統計情報
+
+    ``pages`` は取得したページ数、``fetched`` は取得したチケット数、``changed`` は返した
+    チケット数、``skipped`` は前回または今回の同期で同期済みのため返さなかったチケット数です。
+    ``resumed`` は中断された同期の続きから再開したかどうか、``full`` は ``since`` を指定せずに
+    すべてのチケットを照合したかどうかです。
+    """
+    pages: int = 0
+    fetched: int = 0
+    changed: int = 0
+    skipped: int = 0
+    resumed: bool = False
+    full: bool = False
+
+
+class TicketSyncEngine:
+    """前回の同期以降に変更されたチケットだけを取得する差分同期エンジン
+
+    受信箱ごとに、同期し終えたチケットの最終更新日時の最大値をウォーターマークとして
+    ストアに保存します。次回の同期では ``since`` に「ウォーターマーク − overlap」を指定して
+    検索し、最終更新日時がそれより前のチケットと、前回の重なりの期間に同じ最終更新日時で
+    同期済みのチケットを読み捨てます。1回の同期の中で同じ ``ticket_id`` のチケットは
+    1件だけ返します。
+
+    ``overlap`` は、メッセージの送信日時 (``since`` の絞り込み対象) とチケットの
+    最終更新日時のずれや、サーバー間の時刻のずれを吸収するための重なりの期間です。
+
+    ``since`` はメッセージの送信日時で絞り込むため、新しいメッセージを伴わない変更
+    (ステータス・担当者・ラベルの変更など) は ``overlap`` の長さにかかわらず検出できません。
+    このような変更は、``sync(..., full=True)`` または ``full_sync_interval`` による全件の照合で
+    反映します。全件の照合では ``since`` を指定せずに受信箱のすべてのチケットを検索し、
+    最終更新日時がウォーターマークの重なりの期間より後のチケット (同期済みのものを除く) だけを
+    返します (取得するページ数は受信箱の大きさに比例します)。
+
+    ページを処理し終えるたびに進捗を保存するため、同期がプロセスの異常終了などで
+    中断された場合は、次の ``sync()`` で続きのページから再開します (処理し終えていない
+    ページのチケットは再度返すため、受け取る側は同じチケットを複数回受け取っても
+    問題がないように実装してください)。ウォーターマークは最後のページまで処理し終えた
+    時点で更新します。
+
+    Example:
+        engine = TicketSyncEngine(client, FileWatermarkStore('/var/lib/relation-sync'))
+        for ticket in engine.sync(123):
+            warehouse.upsert(ticket)
+        print(engine.stats)
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        store: WatermarkStore,
+        overlap: timedelta = timedelta(minutes=10),
+        per_page: int = 50,
+        name: str = 'tickets',
+        full_sync_interval: Optional[timedelta] = None
+    ):
+        """初期化
+
+        Args:
+            client: RelationClientインスタンス
+            store: 同期の状態を保存するストア
+            overlap: ウォーターマークより前に遡って検索する期間
+            per_page: 1ページあたりの件数 (チケット検索の最大は50)
+            name: 状態を保存するキーの接頭辞 (同じ受信箱を異なる条件で同期する場合に分ける)
+            full_sync_interval: 前回の全件の照合からこの期間が過ぎた同期を、全件の照合にする
+                (省略時は sync() に full=True を指定した場合だけ照合する)
+
+        Raises:
+            ValueError: per_page が1未満、または overlap が負の場合
+        """
+        if per_page < 1:
+            raise ValueError("per_page は1以上を指定してください")
+        if overlap < timedelta(0):
+            raise ValueError("overlap は0以上を指定してください")
+        self.client = client
+        self.store = store
+        self.overlap = overlap
+        self.per_page = per_page
+        self.name = name
+        self.full_sync_interval = full_sync_interval
+        self.stats = SyncStats()
+
+    def key(self, message_box_id: int) -> str:
+        """受信箱の状態を保存するキーを返します"""
+        return f'{self.name}-{message_box_id}'
+
+    def state(self, message_box_id: int) -> SyncState:
+        """受信箱の現在の同期の状態を返します"""
+        return self.store.load(self.key(message_box_id)) or SyncState()
+
+    def reset(self, message_box_id: int) -> None:
+        """受信箱の同期の状態を削除します (次回の sync() は最初からの同期になります)"""
+        self.store.delete(self.key(message_box_id))
+
+    def sync(
+        self,
+        message_box_id: int,
+        initial_since: Optional[TimeLike] = None,
+        full: bool = False,
+        **filters: Any
+    ) -> Iterator[Ticket]:
+        """前回の同期以降に変更されたチケットを1件ずつ返します
+
+        Args:
+            message_box_id: 受信箱ID
+            initial_since: 初回 (ウォーターマークがない場合) の同期の開始日時
+                (省略時は受信箱のすべてのチケット)
+            full: since を指定せずにすべてのチケットを照合し、メッセージを伴わない変更も反映する
+                (中断された同期がある場合は、その同期の続きを優先します)
+            **filters: search() の検索条件 (status_cds など。since・per_page・page は指定できません)
+
+        Yields:
+            変更されたチケット
+
+        Raises:
+            ValueError: 指定できない検索条件を指定した場合
+        """
+        for name in ('since', 'per_page', 'page'):
+            if name in filters:
+                raise ValueError(f"{name} は同期の検索条件に指定できません")
+        key = self.key(message_box_id)
+        state = self.store.load(key) or SyncState()
+        self.stats = stats = SyncStats(resumed=state.running)
+        started_at = datetime.now(timezone.utc)
+
+        if not state.running:
+            if state.watermark is not None and (full or self._full_sync_due(state)):
+                # 全件の照合 (メッセージを伴わない変更は since では絞り込めないため)
+                state.run_since = None
+            elif state.watermark is not None:
+                state.run_since = state.watermark - self.overlap
+            elif initial_since is not None:
+                state.run_since = parse_time(initial_since)
+            else:
+                state.run_since = None
+        floor = state.watermark - self.overlap if state.watermark is not None else None
+        if state.run_since is not None:
+            filters['since'] = state.run_since.isoformat()
+        else:
+            stats.full = True
+
+        seen = set()
+        for page in count(state.run_page + 1):
+            tickets = self.client.tickets.search(message_box_id, per_page=self.per_page, page=page, **filters)
+            stats.pages += 1
+            stats.fetched += len(tickets)
+            for ticket in tickets:
+                updated_at = ticket.last_updated_at
+                stamp = updated_at.isoformat() if updated_at is not None else None
+                if (
+                    ticket.ticket_id in seen
+                    or (floor is not None and updated_at is not None and updated_at < floor)
+                    or (stamp is not None and stamp in (state.recent.get(ticket.ticket_id),
+                                                        state.run_recent.get(ticket.ticket_id)))
+                ):
+                    stats.skipped += 1
+                    continue
+                seen.add(ticket.ticket_id)
+                stats.changed += 1
+                yield ticket
+                if updated_at is not None:
+                    if state.run_max_updated_at is None or updated_at > state.run_max_updated_at:
+                        state.run_max_updated_at = updated_at
+                    state.run_recent[ticket.ticket_id] = stamp
+
+            if len(tickets) < self.per_page:
+                break
+            # このページのチケットをすべて返し終えたため、進捗を保存する
+            state.run_page = page
+            state.run_recent = self._within_overlap(state.run_recent, state.run_max_updated_at)
+            self.store.save(key, state)
+
+        if stats.full:
+            state.last_full_sync = started_at
+        self._commit(key, state)
+
+    def _full_sync_due(self, state: SyncState) -> bool:
+        """定期的な全件の照合を行う時期かどうかを返します"""
+        if self.full_sync_interval is None:
+            return False
+        return (
+            state.last_full_sync is None
+            or datetime.now(timezone.utc) - state.last_full_sync >= self.full_sync_interval
+        )
+
+    def _within_overlap(self, recent: Dict[int, str], watermark: Optional[datetime]) -> Dict[int, str]:
+        """最終更新日時が「watermark − overlap」以降のチケットだけを残します
+
+        実行中のウォーターマークの候補は増える一方のため、途中で取り除いたチケットが
+        最終的な重なりの期間に入ることはありません。
+        """
+        if watermark is None:
+            return {}
+        floor = watermark - self.overlap
+        return {ticket_id: stamp for ticket_id, stamp in recent.items() if parse_time(stamp) >= floor}
+
+    def _commit(self, key: str, state: SyncState) -> None:
+        """ウォーターマークを更新し、実行中の同期の進捗を消去して保存します"""
+        if state.run_max_updated_at is not None and (
+            state.watermark is None or state.run_max_updated_at > state.watermark
+        ):
+            state.watermark = state.run_max_updated_at
+        state.recent = self._within_overlap(state.recent, state.watermark)
+        state.recent.update(self._within_overlap(state.run_recent, state.watermark))
+        state.run_since = None
+        state.run_page = 0
+        state.run_max_updated_at = None
+        state.run_recent = {}
+        self.store.save(key, state)
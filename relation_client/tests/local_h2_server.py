@@ -0,0 +1,157 @@
+"""
+テスト用のHTTP/2ローカルスタブサーバー
+
+h2 パッケージを使い、平文のHTTP/2 (prior knowledge) で応答するサーバーを
+スレッド上のイベントループで起動します。受け付けたTCP接続の数を記録するため、
+1本の接続に多重化されているかどうかを確認できます。
+"""
+
+import asyncio
+import json
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import h2.config
+import h2.connection
+import h2.events
+
+# ハンドラーの戻り値: (ステータスコード, ヘッダー, ボディ)
+HandlerResult = Tuple[int, Dict[str, str], Any]
+
+
+class LocalH2Server:
+    """ローカルで起動するHTTP/2のAPIスタブサーバー
+
+    ``route()`` の使い方は LocalAPIServer と同じです。``delay`` を指定すると、
+    各レスポンスをその秒数だけ遅らせて返します (ネットワークの往復時間の代わり)。
+
+    Example:
+        with LocalH2Server(delay=0.01) as server:
+            server.route('GET', '/api/v2/users', lambda req: (200, {}, []))
+            transport = HttpxTransport(http1=False, http2=True)
+            client = RelationClient('token', 'test', base_url=server.base_url, transport=transport)
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.routes: Dict[Tuple[str, str], Callable[[Dict[str, Any]], HandlerResult]] = {}
+        self.requests: List[Dict[str, Any]] = []
+        self.connections = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._port: Optional[int] = None
+
+    @property
+    def url(self) -> str:
+        """サーバーのURL (例: http://127.0.0.1:12345)"""
+        return f'http://127.0.0.1:{self._port}'
+
+    @property
+    def base_url(self) -> str:
+        """クライアントに渡すAPIベースURL"""
+        return f'{self.url}/api/v2'
+
+    def route(self, method: str, path: str, handler: Callable[[Dict[str, Any]], HandlerResult]) -> None:
+        """ルートを登録します"""
+        self.routes[(method, path)] = handler
+
+    def start(self) -> 'LocalH2Server':
+        """サーバーを起動します"""
+        started = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle_connection, '127.0.0.1', 0)
+            )
+            self._port = self._server.sockets[0].getsockname()[1]
+            started.set()
+            self._loop.run_forever()
+            self._server.close()
+            self._loop.run_until_complete(self._server.wait_closed())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def stop(self) -> None:
+        """サーバーを停止します"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = None
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        conn = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False))
+        conn.initiate_connection()
+        writer.write(conn.data_to_send())
+        streams: Dict[int, Dict[str, Any]] = {}
+        try:
+            while True:
+                data = await reader.read(65535)
+                if not data:
+                    break
+                for event in conn.receive_data(data):
+                    if isinstance(event, h2.events.RequestReceived):
+                        headers = {_text(k): _text(v) for k, v in event.headers}
+                        streams[event.stream_id] = {'headers': headers, 'body': b''}
+                    elif isinstance(event, h2.events.DataReceived):
+                        streams[event.stream_id]['body'] += event.data
+                        conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                    elif isinstance(event, h2.events.StreamEnded):
+                        stream = streams.pop(event.stream_id)
+                        asyncio.ensure_future(self._respond(conn, writer, event.stream_id, stream))
+                writer.write(conn.data_to_send())
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, conn, writer, stream_id: int, stream: Dict[str, Any]) -> None:
+        headers = stream['headers']
+        parts = urlsplit(headers[':path'])
+        request = {
+            'method': headers[':method'],
+            'path': parts.path,
+            'query': parse_qs(parts.query),
+            'headers': headers,
+            'json': json.loads(stream['body']) if stream['body'] else None,
+        }
+        self.requests.append(request)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+
+        handler = self.routes.get((request['method'], parts.path))
+        if handler is None:
+            status, extra_headers, body = 404, {}, {'error': 'Not Found'}
+        else:
+            status, extra_headers, body = handler(request)
+        payload = body if isinstance(body, bytes) else json.dumps(body).encode('utf-8')
+        response_headers = [
+            (':status', str(status)),
+            ('content-type', 'application/json'),
+            ('content-length', str(len(payload))),
+        ] + [(key.lower(), value) for key, value in extra_headers.items()]
+        conn.send_headers(stream_id, response_headers)
+        # フロー制御のウィンドウ (既定64KB) を超える本文には対応しない
+        frame_size = conn.max_outbound_frame_size
+        for offset in range(0, len(payload), frame_size):
+            conn.send_data(stream_id, payload[offset:offset + frame_size])
+        conn.end_stream(stream_id)
+        writer.write(conn.data_to_send())
+
+    def __enter__(self) -> 'LocalH2Server':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+
+def _text(value: Any) -> str:
+    return value.decode('utf-8') if isinstance(value, bytes) else value
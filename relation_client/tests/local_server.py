@@ -0,0 +1,133 @@
+"""
+テスト用のローカルHTTPスタブサーバー
+
+Re:lation APIの代わりに応答するHTTPサーバーをスレッドで起動します。
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+# ハンドラーの戻り値: (ステータスコード, ヘッダー, ボディ)
+HandlerResult = Tuple[int, Dict[str, str], Any]
+
+
+class LocalAPIServer:
+    """ローカルで起動するAPIスタブサーバー
+
+    ``routes`` には ``(メソッド, パス)`` をキーとして、リクエスト情報の辞書を受け取り
+    ``(ステータスコード, ヘッダー, ボディ)`` を返す関数を登録します。
+    ボディが bytes 以外の場合はJSONとしてエンコードされます。
+    ``delay`` を指定すると、各レスポンスをその秒数だけ遅らせて返します。
+
+    Example:
+        with LocalAPIServer() as server:
+            server.route('GET', '/api/v2/users', lambda req: (200, {}, []))
+            client = RelationClient('token', 'test', base_url=server.base_url)
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.routes: Dict[Tuple[str, str], Callable[[Dict[str, Any]], HandlerResult]] = {}
+        self.requests: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """サーバーのURL (例: http://127.0.0.1:12345)"""
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def base_url(self) -> str:
+        """クライアントに渡すAPIベースURL"""
+        return f'{self.url}/api/v2'
+
+    @property
+    def connections(self) -> int:
+        """リクエストを受け付けたTCP接続の数"""
+        with self._lock:
+            return len({request['client_address'] for request in self.requests})
+
+    def route(self, method: str, path: str, handler: Callable[[Dict[str, Any]], HandlerResult]) -> None:
+        """ルートを登録します"""
+        self.routes[(method, path)] = handler
+
+    def start(self) -> 'LocalAPIServer':
+        """サーバーを起動します"""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # ヘッダーと本文をまとめて送信し、Nagleアルゴリズムと遅延ACKによる待ちを避ける
+            wbufsize = 65536
+
+            def log_message(self, format, *args):
+                pass
+
+            def _handle(self):
+                if server.delay:
+                    time.sleep(server.delay)
+                parts = urlsplit(self.path)
+                length = int(self.headers.get('Content-Length') or 0)
+                raw_body = self.rfile.read(length) if length else b''
+                request = {
+                    'method': self.command,
+                    'path': parts.path,
+                    'query': parse_qs(parts.query),
+                    'headers': dict(self.headers),
+                    'json': json.loads(raw_body) if raw_body else None,
+                    'client_address': self.client_address,
+                }
+                with server._lock:
+                    server.requests.append(request)
+
+                handler = server.routes.get((self.command, parts.path))
+                if handler is None:
+                    status, headers, body = 404, {}, {'error': 'Not Found'}
+                else:
+                    status, headers, body = handler(request)
+
+                if isinstance(body, bytes):
+                    payload = body
+                else:
+                    payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = _handle
+            do_POST = _handle
+            do_PUT = _handle
+            do_DELETE = _handle
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+            request_queue_size = 128
+
+        self._server = Server(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """サーバーを停止します"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> 'LocalAPIServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
@@ -0,0 +1,137 @@
+"""
+AsyncRelationClientのテスト
+
+ローカルのスタブHTTPサーバーに対して非同期クライアントを動作させます。
+"""
+
+import asyncio
+import unittest
+
+from relation_client import AsyncRelationClient
+from relation_client.models import Ticket, Customer
+from relation_client.exceptions import (
+    AuthenticationError, ResourceNotFoundError, RateLimitError, ServiceUnavailableError
+)
+from relation_client.tests.local_server import LocalAPIServer
+
+
+class TestAsyncRelationClient(unittest.TestCase):
+    """AsyncRelationClientのテストクラス"""
+
+    def setUp(self):
+        """テスト前の準備"""
+        self.server = LocalAPIServer().start()
+        self.client = AsyncRelationClient(
+            access_token='test_token',
+            subdomain='test',
+            base_url=self.server.base_url,
+            retry_delay=0
+        )
+
+    def tearDown(self):
+        """テスト後の後片付け"""
+        self.server.stop()
+
+    def run_async(self, coro):
+        """コルーチンを実行し、終了後にクライアントを閉じる"""
+        async def runner():
+            try:
+                return await coro
+            finally:
+                await self.client.aclose()
+        return asyncio.run(runner())
+
+    def test_init(self):
+        """初期化が正しく行われることを確認"""
+        client = AsyncRelationClient(access_token='test_token', subdomain='test')
+        self.assertEqual(client._base_url, 'https://test.relationapp.jp/api/v2')
+        self.assertEqual(client.access_token, 'test_token')
+
+    def test_get_success(self):
+        """GETリクエストが成功し、認証ヘッダーが送信されることを確認"""
+        self.server.route('GET', '/api/v2/test_path', lambda req: (200, {}, {'data': 'test'}))
+
+        result = self.run_async(self.client.get('test_path', params={'page': 2}))
+
+        self.assertEqual(result, {'data': 'test'})
+        request = self.server.requests[0]
+        self.assertEqual(request['headers']['Authorization'], 'Bearer test_token')
+        self.assertEqual(request['query'], {'page': ['2']})
+
+    def test_resource_search(self):
+        """リソースメソッドがモデルを返すことを確認"""
+        self.server.route('POST', '/api/v2/123/tickets/search', lambda req: (200, {}, [
+            {'ticket_id': 1, 'status_cd': 'open', 'title': 'お問い合わせ'},
+            {'ticket_id': 2, 'status_cd': 'closed', 'title': '商品について'},
+        ]))
+
+        result = self.run_async(self.client.tickets.search(message_box_id=123, status_cds=['open']))
+
+        self.assertEqual(len(result), 2)
+        self.assertIsInstance(result[0], Ticket)
+        self.assertEqual(result[1].ticket_id, 2)
+        self.assertEqual(self.server.requests[0]['json']['status_cds'], ['open'])
+
+    def test_resource_get_by_email(self):
+        """パスパラメータを含むリソースメソッドが動作することを確認"""
+        self.server.route(
+            'GET', '/api/v2/customer_groups/1/customers/email/taro@example.com',
+            lambda req: (200, {}, {'customer_id': 10, 'last_name': '山田'})
+        )
+
+        result = self.run_async(self.client.customers.get_by_email(1, 'taro@example.com'))
+
+        self.assertIsInstance(result, Customer)
+        self.assertEqual(result.customer_id, 10)
+
+    def test_concurrent_requests(self):
+        """多数のリクエストを同時に処理できることを確認"""
+        self.server.route('GET', '/api/v2/users', lambda req: (200, {}, [{'user_id': 1}]))
+
+        async def fetch_all():
+            return await asyncio.gather(*[self.client.users.list() for _ in range(50)])
+
+        results = self.run_async(fetch_all())
+
+        self.assertEqual(len(results), 50)
+        self.assertEqual(len(self.server.requests), 50)
+
+    def test_error_mapping(self):
+        """エラーレスポンスが同期版と同じ例外に変換されることを確認"""
+        self.server.route('GET', '/api/v2/unauthorized', lambda req: (401, {}, {'error': 'Unauthorized'}))
+
+        with self.assertRaises(AuthenticationError) as cm:
+            self.run_async(self.client.get('unauthorized'))
+        self.assertEqual(cm.exception.message, 'Unauthorized')
+
+        with self.assertRaises(ResourceNotFoundError):
+            self.run_async(self.client.get('missing'))
+
+    def test_retry_on_rate_limit(self):
+        """429レスポンスの後にリトライされることを確認"""
+        responses = [
+            (429, {'Retry-After': '0'}, {'error': 'Too Many Requests'}),
+            (200, {}, {'data': 'ok'}),
+        ]
+        self.server.route('GET', '/api/v2/limited', lambda req: responses.pop(0))
+
+        result = self.run_async(self.client.get('limited'))
+
+        self.assertEqual(result, {'data': 'ok'})
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_retry_exhausted(self):
+        """リトライ回数を超えた場合に例外が投げられることを確認"""
+        self.server.route('GET', '/api/v2/maintenance', lambda req: (503, {}, {'error': 'Maintenance'}))
+        self.server.route('GET', '/api/v2/limited', lambda req: (429, {'Retry-After': '0'}, {}))
+
+        with self.assertRaises(ServiceUnavailableError):
+            self.run_async(self.client.get('maintenance'))
+        self.assertEqual(len(self.server.requests), self.client.max_retries + 1)
+
+        with self.assertRaises(RateLimitError):
+            self.run_async(self.client.get('limited'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+"""
+バッチ実行のテスト
+"""
+
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from relation_client import RelationClient
+from relation_client.batch import BatchExecutor
+from relation_client.exceptions import ResourceNotFoundError
+from relation_client.tests.local_server import LocalAPIServer
+
+
+class TestBatchExecutor(unittest.TestCase):
+    """BatchExecutorのテストクラス"""
+
+    def test_results_in_submission_order(self):
+        """完了順に関わらず投入順に結果が返ることを確認"""
+        def work(n):
+            time.sleep(0.01 * (5 - n))
+            return n * 10
+
+        with BatchExecutor(max_workers=5) as batch:
+            for n in range(5):
+                batch.submit(work, n)
+        results = batch.results()
+
+        self.assertEqual([r.value for r in results], [0, 10, 20, 30, 40])
+        self.assertEqual([r.item for r in results], [0, 1, 2, 3, 4])
+
+    def test_exception_captured_per_item(self):
+        """例外が要素ごとに格納され、他の要素は実行されることを確認"""
+        def work(n):
+            if n == 1:
+                raise ValueError('bad item')
+            return n
+
+        with BatchExecutor(max_workers=2) as batch:
+            for n in range(3):
+                batch.submit(work, n)
+        results = batch.results()
+
+        self.assertTrue(results[0].ok)
+        self.assertFalse(results[1].ok)
+        self.assertIsInstance(results[1].exception, ValueError)
+        self.assertEqual(results[2].get(), 2)
+        with self.assertRaises(ValueError):
+            results[1].get()
+
+    def test_max_workers(self):
+        """同時実行数がmax_workersを超えないことを確認"""
+        lock = threading.Lock()
+        state = {'current': 0, 'peak': 0}
+
+        def work(n):
+            with lock:
+                state['current'] += 1
+                state['peak'] = max(state['peak'], state['current'])
+            time.sleep(0.01)
+            with lock:
+                state['current'] -= 1
+
+        with BatchExecutor(max_workers=3) as batch:
+            for n in range(12):
+                batch.submit(work, n)
+        batch.results()
+
+        self.assertLessEqual(state['peak'], 3)
+
+
+class TestClientBatch(unittest.TestCase):
+    """RelationClientのバッチ実行のテストクラス"""
+
+    def test_pool_maxsize(self):
+        """コネクションプールの最大接続数が設定されることを確認"""
+        client = RelationClient(access_token='test_token', subdomain='test', pool_maxsize=32)
+        adapter = client._session.get_adapter('https://test.relationapp.jp/api/v2')
+        self.assertEqual(adapter._pool_maxsize, 32)
+        self.assertTrue(adapter._pool_block)
+
+    def test_map_shares_one_client(self):
+        """1つのクライアントを複数スレッドで共有して並列にチケットを取得できることを確認"""
+        with LocalAPIServer() as server:
+            for ticket_id in range(1, 21):
+                server.route(
+                    'GET', f'/api/v2/1/tickets/{ticket_id}',
+                    lambda req, ticket_id=ticket_id: (200, {}, {'ticket_id': ticket_id})
+                )
+            client = RelationClient(
+                access_token='test_token', subdomain='test', base_url=server.base_url, pool_maxsize=4
+            )
+
+            results = client.map(lambda ticket_id: client.tickets.get(1, ticket_id), range(1, 22))
+
+        self.assertEqual(len(results), 21)
+        self.assertEqual([r.value.ticket_id for r in results[:20]], list(range(1, 21)))
+        self.assertIsInstance(results[20].exception, ResourceNotFoundError)
+
+    @patch('relation_client.client.map_batch')
+    def test_map_default_workers(self, mock_map_batch):
+        """max_workersの省略時はpool_maxsizeが使われることを確認"""
+        client = RelationClient(access_token='test_token', subdomain='test', pool_maxsize=6)
+        client.map(print, [1])
+        self.assertEqual(mock_map_batch.call_args[1]['max_workers'], 6)
+        with client.batch() as batch:
+            self.assertEqual(batch.max_workers, 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+バルクヘッドのテスト
+"""
+
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from relation_client import RelationClient
+from relation_client.bulkhead import (
+    PARTITION_CUSTOMER_GROUP, PARTITION_MESSAGE_BOX, Bulkhead, partition_key
+)
+from relation_client.exceptions import BulkheadFullError
+from relation_client.middleware import APIRequest
+from relation_client.tests.local_server import LocalAPIServer
+
+
+def slow_handler(request):
+    time.sleep(0.2)
+    return 200, {}, {'ticket_id': 1}
+
+
+class TestPartitionKey(unittest.TestCase):
+    """partition_key のテストクラス"""
+
+    def test_partition_key(self):
+        """パスから受信箱・アドレス帳のIDを取り出すことを確認"""
+        self.assertEqual(partition_key('12/tickets/search'), (PARTITION_MESSAGE_BOX, 12))
+        self.assertEqual(partition_key('/3/labels'), (PARTITION_MESSAGE_BOX, 3))
+        self.assertEqual(
+            partition_key('customer_groups/7/customers/search'), (PARTITION_CUSTOMER_GROUP, 7)
+        )
+        self.assertIsNone(partition_key('customer_groups'))
+        self.assertIsNone(partition_key('message_boxes/12'))
+        self.assertIsNone(partition_key('users'))
+
+
+class TestBulkhead(unittest.TestCase):
+    """Bulkhead のテストクラス"""
+
+    def hold(self, bulkhead, path, release):
+        """release がセットされるまで実行枠を保持する呼び出しをスレッドで開始します"""
+        entered = threading.Event()
+
+        def call_next(request):
+            entered.set()
+            release.wait()
+            return {}
+
+        thread = threading.Thread(target=bulkhead, args=(APIRequest('GET', path), call_next))
+        thread.start()
+        entered.wait()
+        return thread
+
+    def test_rejects_when_queue_is_full(self):
+        """実行枠と待ち行列が一杯の場合は拒否し、他の受信箱は影響を受けないことを確認"""
+        bulkhead = Bulkhead(max_concurrent=1, max_queue=0)
+        release = threading.Event()
+        thread = self.hold(bulkhead, '1/tickets/search', release)
+
+        with self.assertRaises(BulkheadFullError):
+            bulkhead(APIRequest('GET', '1/tickets/5'), lambda request: {})
+        self.assertEqual(bulkhead(APIRequest('GET', '2/tickets/5'), lambda request: 'ok'), 'ok')
+        release.set()
+        thread.join()
+
+        stats = bulkhead.stats()[(PARTITION_MESSAGE_BOX, 1)]
+        self.assertEqual((stats.admitted, stats.rejected, stats.in_flight), (1, 1, 0))
+
+    def test_waits_for_free_slot(self):
+        """実行枠が空くまで待ってから実行することを確認"""
+        bulkhead = Bulkhead(max_concurrent=1)
+        release = threading.Event()
+        thread = self.hold(bulkhead, '1/labels', release)
+        threading.Timer(0.1, release.set).start()
+
+        started = time.monotonic()
+        bulkhead(APIRequest('GET', '1/labels'), lambda request: {})
+        thread.join()
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.09)
+        stats = bulkhead.stats()[(PARTITION_MESSAGE_BOX, 1)]
+        self.assertEqual((stats.admitted, stats.peak_queued, stats.queued), (2, 1, 0))
+
+    def test_queue_timeout(self):
+        """queue_timeout 秒待っても空かない場合は拒否することを確認"""
+        bulkhead = Bulkhead(max_concurrent=1, queue_timeout=0.05)
+        release = threading.Event()
+        thread = self.hold(bulkhead, 'customer_groups/3/customers/search', release)
+
+        with self.assertRaises(BulkheadFullError):
+            bulkhead(APIRequest('GET', 'customer_groups/3/customers/email/a'), lambda request: {})
+        release.set()
+        thread.join()
+        self.assertEqual(bulkhead.stats()[(PARTITION_CUSTOMER_GROUP, 3)].rejected, 1)
+
+    def test_per_partition_limits_and_unpartitioned_paths(self):
+        """個別の上限が使われ、パーティションに属さない呼び出しは制限しないことを確認"""
+        bulkhead = Bulkhead(max_concurrent=4, message_box_limits={5: 1}, customer_group_limits={3: 2})
+        bulkhead(APIRequest('GET', '5/templates'), lambda request: {})
+        bulkhead(APIRequest('GET', 'customer_groups/3/badges'), lambda request: {})
+        bulkhead(APIRequest('GET', 'users'), lambda request: {})
+
+        stats = bulkhead.stats()
+        self.assertEqual(stats[(PARTITION_MESSAGE_BOX, 5)].max_concurrent, 1)
+        self.assertEqual(stats[(PARTITION_CUSTOMER_GROUP, 3)].max_concurrent, 2)
+        self.assertEqual(len(stats), 2)
+
+    def test_invalid_limit(self):
+        """上限に1未満を指定すると ValueError になることを確認"""
+        with self.assertRaises(ValueError):
+            Bulkhead(max_concurrent=0)
+        with self.assertRaises(ValueError):
+            Bulkhead(message_box_limits={1: 0})
+
+
+class TestClientBulkhead(unittest.TestCase):
+    """RelationClient のバルクヘッドのテストクラス"""
+
+    def test_noisy_inbox_does_not_block_others(self):
+        """1つの受信箱の呼び出しが上限を超えても、他の受信箱の呼び出しは待たされないことを確認"""
+        with LocalAPIServer() as server:
+            server.route('GET', '/api/v2/1/tickets/1', slow_handler)
+            server.route('GET', '/api/v2/2/tickets/1', slow_handler)
+            client = RelationClient('token', 'test', base_url=server.base_url, pool_maxsize=10,
+                                    bulkhead=Bulkhead(max_concurrent=2))
+            with ThreadPoolExecutor(8) as executor:
+                noisy = [executor.submit(client.get, '1/tickets/1') for _ in range(6)]
+                time.sleep(0.05)
+                started = time.monotonic()
+                client.get('2/tickets/1')
+                quiet_elapsed = time.monotonic() - started
+                for future in noisy:
+                    future.result()
+            client.close()
+
+        self.assertLess(quiet_elapsed, 0.35)
+        stats = client.bulkhead_stats[(PARTITION_MESSAGE_BOX, 1)]
+        self.assertEqual(stats.admitted, 6)
+        self.assertEqual(stats.peak_queued, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+"""
+CircuitBreakerのテスト
+"""
+
+import unittest
+from unittest.mock import patch, MagicMock
+
+import requests
+
+from relation_client import RelationClient
+from relation_client.circuit_breaker import (
+    CircuitBreaker, STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN
+)
+from relation_client.exceptions import APIError, CircuitOpenError, ServiceUnavailableError
+from relation_client.retry import RetryPolicy
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """CircuitBreakerのテストクラス"""
+
+    def setUp(self):
+        """テスト前の準備"""
+        self.now = 0.0
+        self.breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=10.0, clock=lambda: self.now)
+
+    def open_breaker(self):
+        for _ in range(3):
+            self.breaker.before_request()
+            self.breaker.record_failure()
+
+    def test_opens_after_consecutive_failures(self):
+        """連続失敗回数が閾値に達すると開くことを確認"""
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, STATE_CLOSED)
+
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, STATE_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_request()
+
+    def test_success_resets_failures(self):
+        """成功すると連続失敗回数がリセットされることを確認"""
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_response(200)
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, STATE_CLOSED)
+        self.assertEqual(self.breaker.status.consecutive_failures, 1)
+
+    def test_half_open_single_probe(self):
+        """待機時間が過ぎると1件だけ試行リクエストが許可されることを確認"""
+        self.open_breaker()
+        self.now = 10.0
+
+        self.assertEqual(self.breaker.state, STATE_HALF_OPEN)
+        self.breaker.before_request()
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_request()
+
+        self.breaker.record_response(200)
+        self.assertEqual(self.breaker.state, STATE_CLOSED)
+        self.breaker.before_request()
+
+    def test_probe_failure_reopens(self):
+        """試行リクエストが失敗すると再び開くことを確認"""
+        self.open_breaker()
+        self.now = 10.0
+        self.breaker.before_request()
+
+        self.breaker.record_response(503)
+
+        self.assertEqual(self.breaker.state, STATE_OPEN)
+        self.assertEqual(self.breaker.status.open_until, 20.0)
+
+    def test_retry_after_extends_pause(self):
+        """Retry-Afterが長い場合はその時刻まで開いたままになることを確認"""
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_response(503, retry_after=60.0)
+
+        self.now = 30.0
+        self.assertEqual(self.breaker.state, STATE_OPEN)
+        self.now = 60.0
+        self.assertEqual(self.breaker.state, STATE_HALF_OPEN)
+
+    def test_status(self):
+        """ヘルスチェック用の状態を取得できることを確認"""
+        self.assertTrue(self.breaker.status.healthy)
+        self.open_breaker()
+        status = self.breaker.status
+        self.assertFalse(status.healthy)
+        self.assertEqual(status.state, STATE_OPEN)
+        self.assertEqual(status.consecutive_failures, 3)
+
+
+class TestClientCircuitBreaker(unittest.TestCase):
+    """RelationClientとサーキットブレーカーの連携のテストクラス"""
+
+    def setUp(self):
+        """テスト前の準備"""
+        self.breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=30.0)
+        self.client = RelationClient(
+            access_token='test_token',
+            subdomain='test',
+            retry_policy=RetryPolicy(max_retries=5, delay=0),
+            circuit_breaker=self.breaker
+        )
+
+    @patch('requests.Session.request')
+    def test_fail_fast_while_open(self, mock_request):
+        """ブレーカーが開くとリトライを打ち切り、以降の呼び出しは即座に失敗することを確認"""
+        mock_response = MagicMock()
+        mock_response.status_code = 503
+        mock_response.headers = {}
+        mock_response.json.return_value = {'error': 'Maintenance'}
+        mock_request.return_value = mock_response
+
+        with self.assertRaises(ServiceUnavailableError):
+            self.client.get('test_path')
+        self.assertEqual(mock_request.call_count, 2)
+
+        with self.assertRaises(CircuitOpenError):
+            self.client.get('test_path')
+        self.assertEqual(mock_request.call_count, 2)
+
+    @patch('requests.Session.request')
+    def test_connection_errors_open_breaker(self, mock_request):
+        """接続エラーでもブレーカーが開くことを確認"""
+        mock_request.side_effect = requests.ConnectionError('connection refused')
+
+        with self.assertRaises(APIError):
+            self.client.get('test_path')
+
+        self.assertEqual(self.client.circuit_breaker.state, STATE_OPEN)
+
+
+if __name__ == '__main__':
+    unittest.main()
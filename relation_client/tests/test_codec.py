@@ -0,0 +1,114 @@
+"""
+JSONコーデックのテスト
+"""
+
+import asyncio
+import unittest
+from unittest.mock import MagicMock
+
+from relation_client import AsyncRelationClient, RelationClient
+from relation_client.codec import (
+    OrjsonCodec, StdlibJSONCodec, decode_response, default_codec, orjson
+)
+from relation_client.tests.local_server import LocalAPIServer
+from relation_client.transport import Urllib3Transport
+
+
+class RecordingCodec(StdlibJSONCodec):
+    """エンコード・デコードした値の型を記録するコーデック"""
+
+    def __init__(self):
+        self.loaded = []
+        self.dumped = []
+
+    def dumps(self, value):
+        self.dumped.append(value)
+        return super().dumps(value)
+
+    def loads(self, data):
+        self.loaded.append(type(data))
+        return super().loads(data)
+
+
+def echo_handler(request):
+    return 200, {}, {'received': request['json']}
+
+
+class TestCodecs(unittest.TestCase):
+    """コーデックのテストクラス"""
+
+    def check_round_trip(self, codec):
+        value = {'title': '件名', 'label_ids': [1, 2], 'is_html': True, 'body': None}
+        encoded = codec.dumps(value)
+        self.assertIsInstance(encoded, bytes)
+        self.assertIn('件名'.encode('utf-8'), encoded)
+        self.assertEqual(codec.loads(encoded), value)
+        self.assertEqual(codec.loads(memoryview(encoded)), value)
+        self.assertEqual(codec.loads(encoded.decode('utf-8')), value)
+        with self.assertRaises(ValueError):
+            codec.loads(b'<html>')
+
+    def test_stdlib_codec(self):
+        """標準ライブラリのコーデックでエンコード・デコードできることを確認"""
+        self.check_round_trip(StdlibJSONCodec())
+
+    @unittest.skipIf(orjson is None, 'orjson がインストールされていません')
+    def test_orjson_codec(self):
+        """orjson のコーデックでエンコード・デコードでき、既定のコーデックになることを確認"""
+        self.check_round_trip(OrjsonCodec())
+        self.assertIsInstance(default_codec(), OrjsonCodec)
+
+    def test_decode_response(self):
+        """本文のバイト列を直接デコードし、バイト列を持たないレスポンスは json() を使うことを確認"""
+        codec = RecordingCodec()
+        response = MagicMock()
+        response.content = b'{"ticket_id": 1}'
+        self.assertEqual(decode_response(response, codec), {'ticket_id': 1})
+        self.assertEqual(codec.loaded, [bytes])
+
+        response = MagicMock()
+        response.json.return_value = {'ticket_id': 2}
+        self.assertEqual(decode_response(response, codec), {'ticket_id': 2})
+
+
+class TestClientCodec(unittest.TestCase):
+    """クライアントのコーデック指定のテストクラス"""
+
+    def setUp(self):
+        self.server = LocalAPIServer().start()
+        self.server.route('POST', '/api/v2/1/tickets', echo_handler)
+        self.server.route('GET', '/api/v2/html', lambda request: (200, {}, b'<html>'))
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_client_uses_codec(self):
+        """レスポンスのデコードとトランスポートのエンコードにコーデックが使われることを確認"""
+        codec = RecordingCodec()
+        transport = Urllib3Transport(json_codec=codec)
+        client = RelationClient('token', 'test', base_url=self.server.base_url,
+                                transport=transport, json_codec=codec)
+
+        self.assertEqual(client.post('1/tickets', {'title': '件名'}), {'received': {'title': '件名'}})
+        self.assertEqual(client.get('html'), {'data': '<html>'})
+        self.assertEqual(codec.dumped, [{'title': '件名'}])
+        self.assertEqual(codec.loaded, [bytes, bytes])
+        client.close()
+        transport.close()
+
+    def test_async_client_uses_codec(self):
+        """非同期クライアントでもコーデックが使われることを確認"""
+        codec = RecordingCodec()
+
+        async def run():
+            async with AsyncRelationClient('token', 'test', base_url=self.server.base_url,
+                                           json_codec=codec) as client:
+                return await client.post('1/tickets', {'title': '件名'})
+
+        self.assertEqual(asyncio.run(run()), {'received': {'title': '件名'}})
+        self.assertEqual(codec.dumped, [{'title': '件名'}])
+        self.assertEqual(codec.loaded, [bytes])
+
+
+if __name__ == '__main__':
+    unittest.main()
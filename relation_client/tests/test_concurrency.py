@@ -0,0 +1,179 @@
+"""
+AdaptiveConcurrencyLimiterのテスト
+"""
+
+import asyncio
+import threading
+import time
+import unittest
+
+from relation_client import AsyncRelationClient, RelationClient
+from relation_client.concurrency import AdaptiveConcurrencyLimiter
+from relation_client.retry import RetryPolicy
+from relation_client.tests.local_server import LocalAPIServer
+
+
+class TestAdaptiveConcurrencyLimiter(unittest.TestCase):
+    """AdaptiveConcurrencyLimiterのテストクラス"""
+
+    def test_increases_additively_when_saturated(self):
+        """上限まで使っている状態で成功が続くと、1往復ごとに上限が1増えることを確認"""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=10)
+        permits = [limiter.acquire(), limiter.acquire()]
+        for permit in permits:
+            limiter.release(permit, latency=0.1, status_code=200)
+        self.assertEqual(limiter.limit, 3)
+
+        permits = [limiter.acquire() for _ in range(3)]
+        for permit in permits:
+            limiter.release(permit, latency=0.1, status_code=200)
+        self.assertEqual(limiter.limit, 3)
+        self.assertEqual(limiter.status.increases, 4)
+
+    def test_does_not_increase_when_not_saturated(self):
+        """上限の半分未満しか使っていない間は上限を増やさないことを確認"""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4)
+        for _ in range(20):
+            limiter.release(limiter.acquire(), latency=0.1, status_code=200)
+
+        self.assertEqual(limiter.limit, 4)
+
+    def test_decreases_multiplicatively_on_overload(self):
+        """429・503・接続エラーで上限が半分になることを確認"""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=16)
+        limiter.release(limiter.acquire(), latency=0.1, status_code=429)
+        self.assertEqual(limiter.limit, 8)
+        limiter.release(limiter.acquire(), latency=0.1, status_code=503)
+        self.assertEqual(limiter.limit, 4)
+        limiter.release(limiter.acquire(), failed=True)
+        self.assertEqual(limiter.limit, 2)
+        self.assertEqual(limiter.status.decreases, 3)
+
+    def test_decreases_once_per_generation(self):
+        """同時期に送信したリクエストの失敗では1回しか減らさないことを確認"""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8)
+        permits = [limiter.acquire() for _ in range(4)]
+        for permit in permits:
+            limiter.release(permit, latency=0.1, status_code=429)
+
+        self.assertEqual(limiter.limit, 4)
+
+    def test_decreases_on_latency_inflation(self):
+        """レイテンシが最小値の許容倍率を超えると上限を減らすことを確認"""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, latency_tolerance=2.0, smoothing=1.0)
+        limiter.release(limiter.acquire(), latency=0.1, status_code=200)
+        limiter.release(limiter.acquire(), latency=0.15, status_code=200)
+        self.assertEqual(limiter.limit, 8)
+
+        limiter.release(limiter.acquire(), latency=0.5, status_code=200)
+
+        self.assertEqual(limiter.limit, 4)
+        self.assertAlmostEqual(limiter.status.baseline_latency, 0.1)
+
+    def test_limit_is_clamped(self):
+        """上限が min_limit 〜 max_limit に収められることを確認"""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, min_limit=2, max_limit=2)
+        limiter.release(limiter.acquire(), failed=True)
+        self.assertEqual(limiter.limit, 2)
+        for _ in range(5):
+            permits = [limiter.acquire(), limiter.acquire()]
+            for permit in permits:
+                limiter.release(permit, latency=0.1, status_code=200)
+        self.assertEqual(limiter.limit, 2)
+
+    def test_acquire_waits_for_release(self):
+        """上限に達している場合は実行枠が空くまで待つことを確認"""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+        permit = limiter.acquire()
+        self.assertIsNone(limiter.try_acquire())
+        with self.assertRaises(TimeoutError):
+            limiter.acquire(timeout=0.01)
+
+        threading.Timer(0.05, limiter.release, args=(permit,)).start()
+        limiter.acquire(timeout=2)
+        self.assertEqual(limiter.status.in_flight, 1)
+
+    def test_invalid_arguments(self):
+        """不正な引数で ValueError になることを確認"""
+        with self.assertRaises(ValueError):
+            AdaptiveConcurrencyLimiter(initial_limit=0)
+        with self.assertRaises(ValueError):
+            AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=4)
+        with self.assertRaises(ValueError):
+            AdaptiveConcurrencyLimiter(decrease_factor=1.0)
+
+
+class TestClientConcurrency(unittest.TestCase):
+    """クライアントと同時実行数のリミッターの連携のテストクラス"""
+
+    def setUp(self):
+        """テスト前の準備"""
+        self.server = LocalAPIServer().start()
+        self.addCleanup(self.server.stop)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+        def slow(request):
+            with self.lock:
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+            time.sleep(0.02)
+            with self.lock:
+                self.active -= 1
+            return 200, {}, {'ok': True}
+
+        self.server.route('GET', '/api/v2/slow', slow)
+        self.server.route('GET', '/api/v2/busy', lambda req: (429, {'Retry-After': '0'}, {}))
+
+    def test_client_respects_limit(self):
+        """クライアントの同時実行数が上限を超えないことを確認"""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=3, max_limit=3)
+        client = RelationClient('token', 'test', base_url=self.server.base_url,
+                                concurrency_limiter=limiter)
+
+        results = client.map(lambda _: client.get('slow'), range(12))
+
+        self.assertTrue(all(result.ok for result in results))
+        self.assertLessEqual(self.peak, 3)
+        self.assertEqual(client.concurrency_status.in_flight, 0)
+
+    def test_client_decreases_limit_on_429(self):
+        """429を受けるとクライアント経由でも上限が下がることを確認"""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8)
+        client = RelationClient('token', 'test', base_url=self.server.base_url,
+                                concurrency_limiter=limiter, retry_policy=RetryPolicy(max_retries=0))
+
+        with self.assertRaises(Exception):
+            client.get('busy')
+
+        self.assertEqual(client.concurrency_status.limit, 4)
+
+    def test_batch_uses_max_limit_by_default(self):
+        """リミッター設定時は batch() の既定の並列数が max_limit になることを確認"""
+        limiter = AdaptiveConcurrencyLimiter(max_limit=32)
+        client = RelationClient('token', 'test', base_url=self.server.base_url,
+                                concurrency_limiter=limiter)
+
+        with client.batch() as batch:
+            self.assertEqual(batch.max_workers, 32)
+        self.assertIsNone(RelationClient('token', 'test').concurrency_status)
+
+    def test_async_client_respects_limit(self):
+        """非同期クライアントの同時実行数が上限を超えないことを確認"""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=2)
+
+        async def run():
+            async with AsyncRelationClient('token', 'test', base_url=self.server.base_url,
+                                           concurrency_limiter=limiter) as client:
+                return await asyncio.gather(*(client.get('slow') for _ in range(8)))
+
+        results = asyncio.run(run())
+
+        self.assertEqual(len(results), 8)
+        self.assertLessEqual(self.peak, 2)
+        self.assertEqual(limiter.status.in_flight, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+"""
+デッドラインとキャンセルトークンのテスト
+"""
+
+import asyncio
+import threading
+import time
+import unittest
+
+from relation_client import AsyncRelationClient, RelationClient
+from relation_client.deadline import CancellationToken, Deadline, current_deadline, deadline_scope
+from relation_client.exceptions import DeadlineExceededError, OperationCancelledError
+from relation_client.tests.local_server import LocalAPIServer
+
+
+def slow_handler(request):
+    time.sleep(0.5)
+    return 200, {}, {'user_id': 1}
+
+
+def throttled_handler(request):
+    return 429, {'Retry-After': '2'}, {'error': 'Too Many Requests'}
+
+
+class TestDeadline(unittest.TestCase):
+    """Deadline と deadline_scope のテストクラス"""
+
+    def test_remaining_and_expired(self):
+        """残り秒数と期限切れを時計に従って判定することを確認"""
+        now = [100.0]
+        deadline = Deadline(5, clock=lambda: now[0])
+        self.assertEqual(deadline.remaining(), 5)
+        now[0] = 103.0
+        self.assertEqual(deadline.remaining(), 2)
+        self.assertFalse(deadline.expired)
+        now[0] = 106.0
+        self.assertEqual(deadline.remaining(), 0)
+        self.assertTrue(deadline.expired)
+        with self.assertRaises(DeadlineExceededError):
+            deadline.check()
+
+    def test_nested_scope_uses_earliest_deadline(self):
+        """入れ子のブロックでは早い方の期限が使われ、抜けると元に戻ることを確認"""
+        self.assertIsNone(current_deadline())
+        with deadline_scope(1) as outer:
+            with deadline_scope(10) as inner:
+                self.assertIs(inner, outer)
+            with deadline_scope(0.5) as inner:
+                self.assertIs(current_deadline(), inner)
+                self.assertLess(inner.remaining(), outer.remaining())
+            self.assertIs(current_deadline(), outer)
+        self.assertIsNone(current_deadline())
+
+    def test_token_callbacks(self):
+        """キャンセル時に登録した関数が1回だけ呼ばれることを確認"""
+        token = CancellationToken()
+        calls = []
+        token.add_callback(lambda: calls.append('a'))
+        removed = lambda: calls.append('b')  # noqa: E731
+        token.add_callback(removed)
+        token.remove_callback(removed)
+        token.cancel()
+        token.cancel()
+        token.add_callback(lambda: calls.append('c'))
+
+        self.assertEqual(calls, ['a', 'c'])
+        self.assertTrue(token.cancelled)
+        with self.assertRaises(OperationCancelledError):
+            token.check()
+
+
+class TestClientDeadline(unittest.TestCase):
+    """RelationClient のデッドラインとキャンセルのテストクラス"""
+
+    def setUp(self):
+        self.server = LocalAPIServer().start()
+        self.server.route('GET', '/api/v2/slow', slow_handler)
+        self.server.route('GET', '/api/v2/throttled', throttled_handler)
+        self.server.route('GET', '/api/v2/users', lambda request: (200, {}, [{'user_id': 1}]))
+        self.client = RelationClient('token', 'test', base_url=self.server.base_url, timeout=30)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+    def test_attempt_timeout_is_capped_by_deadline(self):
+        """各試行のタイムアウトがデッドラインまでの残り時間で打ち切られることを確認"""
+        started = time.monotonic()
+        with self.assertRaises(DeadlineExceededError):
+            self.client.get('slow', deadline=0.2)
+
+        self.assertLess(time.monotonic() - started, 0.45)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_retry_wait_beyond_deadline_fails_fast(self):
+        """リトライの待機がデッドラインを越える場合は待たずに失敗することを確認"""
+        started = time.monotonic()
+        with self.assertRaises(DeadlineExceededError):
+            with self.client.deadline(1):
+                self.client.get('throttled')
+
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_cancel_interrupts_retry_wait(self):
+        """リトライの待機中にキャンセルするとすぐに中止することを確認"""
+        token = CancellationToken()
+        threading.Timer(0.1, token.cancel).start()
+        started = time.monotonic()
+        with self.assertRaises(OperationCancelledError):
+            with self.client.deadline(token=token):
+                self.client.get('throttled')
+
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_cancelled_token_stops_remaining_calls(self):
+        """キャンセル済みのトークンではリクエストを送信しないことを確認"""
+        token = CancellationToken()
+        with self.client.deadline(token=token):
+            self.assertEqual(self.client.get('users'), [{'user_id': 1}])
+            token.cancel()
+            with self.assertRaises(OperationCancelledError):
+                self.client.get('users')
+
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_deadline_propagates_to_batch(self):
+        """batch() で実行する呼び出しにもデッドラインが引き継がれることを確認"""
+        with self.client.deadline(0.2):
+            results = self.client.map(lambda _: self.client.get('slow'), range(2), max_workers=2)
+
+        for result in results:
+            self.assertIsInstance(result.exception, DeadlineExceededError)
+
+    def test_no_deadline_outside_scope(self):
+        """ブロックの外ではデッドラインが適用されないことを確認"""
+        with self.client.deadline(0.01):
+            pass
+        time.sleep(0.02)
+        self.assertEqual(self.client.get('users'), [{'user_id': 1}])
+
+
+class TestAsyncClientDeadline(unittest.TestCase):
+    """AsyncRelationClient のデッドラインとキャンセルのテストクラス"""
+
+    def setUp(self):
+        self.server = LocalAPIServer().start()
+        self.server.route('GET', '/api/v2/slow', slow_handler)
+        self.server.route('GET', '/api/v2/throttled', throttled_handler)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def run_client(self, body):
+        async def run():
+            async with AsyncRelationClient('token', 'test', base_url=self.server.base_url) as client:
+                return await body(client)
+        return asyncio.run(run())
+
+    def test_deadline_interrupts_in_flight_request(self):
+        """送信中のリクエストがデッドラインで中断されることを確認"""
+        async def body(client):
+            with client.deadline(0.2):
+                await client.get('slow')
+
+        started = time.monotonic()
+        with self.assertRaises(DeadlineExceededError):
+            self.run_client(body)
+        self.assertLess(time.monotonic() - started, 0.45)
+
+    def test_cancel_from_another_thread(self):
+        """別スレッドからのキャンセルでリトライの待機を中断することを確認"""
+        token = CancellationToken()
+
+        async def body(client):
+            threading.Timer(0.1, token.cancel).start()
+            with client.deadline(token=token):
+                await client.get('throttled')
+
+        started = time.monotonic()
+        with self.assertRaises(OperationCancelledError):
+            self.run_client(body)
+        self.assertLess(time.monotonic() - started, 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
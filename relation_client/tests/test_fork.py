@@ -0,0 +1,164 @@
+"""
+fork対応とマルチプロセス実行のテスト
+"""
+
+import functools
+import os
+import signal
+import threading
+import traceback
+import unittest
+
+from relation_client import RelationClient
+from relation_client.bulkhead import Bulkhead
+from relation_client.concurrency import AdaptiveConcurrencyLimiter
+from relation_client.exceptions import ResourceNotFoundError
+from relation_client.middleware import APIRequest
+from relation_client.process_pool import ProcessPoolRunner
+from relation_client.tests.local_server import LocalAPIServer
+from relation_client.transport import HttpxTransport, Urllib3Transport
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+
+def run_in_child(fn):
+    """fn をforkした子プロセスで実行し、成功した場合は True を返します (5秒で打ち切り)"""
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            signal.alarm(5)
+            fn()
+            code = 0
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    return os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+
+
+def count_labels(client, message_box_id):
+    """受信箱のラベル数を返します (ProcessPoolRunner のワーカーで実行)"""
+    return len(client.get(f'{message_box_id}/labels'))
+
+
+def labels_handler(request):
+    message_box_id = request['path'].split('/')[3]
+    if message_box_id == '404':
+        return 404, {}, {'error': 'not found'}
+    return 200, {}, [{'label_id': i} for i in range(int(message_box_id))]
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), 'fork が利用できない環境です')
+class TestForkSafety(unittest.TestCase):
+    """fork後の子プロセスでの作り直しのテストクラス"""
+
+    def setUp(self):
+        self.server = LocalAPIServer().start()
+        self.server.route('GET', '/api/v2/users', lambda request: (200, {}, []))
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_child_does_not_share_parent_connections(self):
+        """子プロセスは親プロセスの接続を使わず、親プロセスの接続はそのまま使えることを確認"""
+        client = RelationClient('token', 'test', base_url=self.server.base_url)
+        client.get('users')
+
+        def child():
+            client.get('users')
+            client.get('users')
+
+        self.assertTrue(run_in_child(child))
+        self.assertEqual(self.server.connections, 2)
+        client.get('users')
+        self.assertEqual(self.server.connections, 2)
+        client.close()
+
+    def test_locks_held_at_fork_are_replaced(self):
+        """fork時に他のスレッドが保持していたロックで子プロセスが止まらないことを確認"""
+        limiter = AdaptiveConcurrencyLimiter()
+        client = RelationClient('token', 'test', base_url=self.server.base_url,
+                                concurrency_limiter=limiter, bulkhead=Bulkhead(),
+                                coalesce_requests=True)
+        locks = [client.rate_limiter._lock, client.retry_policy.budget._lock, limiter._condition]
+        held = threading.Event()
+        release = threading.Event()
+
+        def hold_locks():
+            for lock in locks:
+                lock.acquire()
+            held.set()
+            release.wait()
+            for lock in locks:
+                lock.release()
+
+        thread = threading.Thread(target=hold_locks)
+        thread.start()
+        held.wait()
+        try:
+            self.assertTrue(run_in_child(lambda: client.get('users')))
+        finally:
+            release.set()
+            thread.join()
+        client.close()
+
+    def test_component_state_is_reset(self):
+        """実行中の件数とバルクヘッドの状態が作り直されることを確認"""
+        limiter = AdaptiveConcurrencyLimiter()
+        limiter.acquire()
+        bulkhead = Bulkhead()
+        bulkhead(APIRequest('GET', '1/labels'), lambda request: {})
+
+        limiter.reset_after_fork()
+        bulkhead.reset_after_fork()
+
+        self.assertEqual(limiter.status.in_flight, 0)
+        self.assertEqual(bulkhead.stats(), {})
+
+    def test_transports_are_rebuilt(self):
+        """トランスポートのコネクションプールが作り直されることを確認"""
+        transport = Urllib3Transport(pool_maxsize=3)
+        pool = transport.pool
+        transport.reset_after_fork()
+        self.assertIsNot(transport.pool, pool)
+        self.assertEqual(transport.pool.connection_pool_kw['maxsize'], 3)
+
+        if httpx is not None:
+            transport = HttpxTransport(http2=False)
+            client = RelationClient('token', 'test', base_url=self.server.base_url, transport=transport)
+            client.get('users')
+            self.assertTrue(run_in_child(lambda: client.get('users')))
+            transport.close()
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), 'fork が利用できない環境です')
+class TestProcessPoolRunner(unittest.TestCase):
+    """ProcessPoolRunner のテストクラス"""
+
+    def test_map_partitions(self):
+        """パーティションごとの結果と例外が投入順に返ることを確認"""
+        with LocalAPIServer() as server:
+            for message_box_id in (1, 2, 3, 404):
+                server.route('GET', f'/api/v2/{message_box_id}/labels', labels_handler)
+            factory = functools.partial(RelationClient, 'token', 'test', base_url=server.base_url)
+            with ProcessPoolRunner(factory, processes=2, mp_context='fork') as runner:
+                results = runner.map(count_labels, [3, 404, 1, 2])
+
+        self.assertEqual([result.item for result in results], [3, 404, 1, 2])
+        self.assertEqual([result.value for result in results], [3, None, 1, 2])
+        self.assertIsInstance(results[1].exception, ResourceNotFoundError)
+        self.assertEqual(results[1].exception.message, 'not found')
+
+    def test_invalid_processes(self):
+        """processes に1未満を指定すると ValueError になることを確認"""
+        with self.assertRaises(ValueError):
+            ProcessPoolRunner(RelationClient, processes=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+"""
+ヘッジリクエストのテスト
+"""
+
+import threading
+import unittest
+
+from relation_client import RelationClient
+from relation_client.circuit_breaker import CircuitBreaker
+from relation_client.concurrency import AdaptiveConcurrencyLimiter
+from relation_client.hedging import HedgePolicy
+from relation_client.rate_limit import RateLimitGovernor
+from relation_client.tests.local_server import LocalAPIServer
+
+
+class TestHedgePolicy(unittest.TestCase):
+    """HedgePolicyのテストクラス"""
+
+    def test_delay_uses_max_delay_until_min_samples(self):
+        """記録が少ない間は max_delay を使うことを確認"""
+        policy = HedgePolicy(max_delay=1.5, min_samples=5)
+        for _ in range(4):
+            policy.record_latency(0.1)
+
+        self.assertEqual(policy.delay(), 1.5)
+
+    def test_delay_uses_percentile(self):
+        """記録されたレイテンシのパーセンタイル値を使うことを確認"""
+        policy = HedgePolicy(percentile=90, min_delay=0.0, max_delay=10.0, min_samples=1)
+        for i in range(1, 11):
+            policy.record_latency(i / 10)
+
+        self.assertAlmostEqual(policy.delay(), 0.9)
+        self.assertAlmostEqual(policy.latency_percentile, 0.9)
+
+    def test_delay_is_clamped(self):
+        """待機時間が min_delay 〜 max_delay に収められることを確認"""
+        policy = HedgePolicy(min_delay=0.2, max_delay=0.5, min_samples=1)
+        policy.record_latency(0.01)
+        self.assertEqual(policy.delay(), 0.2)
+
+        policy = HedgePolicy(min_delay=0.2, max_delay=0.5, min_samples=1)
+        policy.record_latency(3.0)
+        self.assertEqual(policy.delay(), 0.5)
+
+    def test_invalid_arguments(self):
+        """不正な引数で ValueError になることを確認"""
+        with self.assertRaises(ValueError):
+            HedgePolicy(percentile=0)
+        with self.assertRaises(ValueError):
+            HedgePolicy(min_delay=1.0, max_delay=0.5)
+
+
+class TestHedgedRequests(unittest.TestCase):
+    """RelationClientのヘッジリクエストのテストクラス"""
+
+    def setUp(self):
+        """テスト前の準備"""
+        self.server = LocalAPIServer().start()
+        self.addCleanup(self.server.stop)
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        self.calls = 0
+        self.lock = threading.Lock()
+
+        def slow_first(request):
+            with self.lock:
+                self.calls += 1
+                call = self.calls
+            if call == 1:
+                self.release.wait(5)
+                return 200, {}, {'from': 'primary'}
+            return 200, {}, {'from': 'hedge'}
+
+        self.server.route('GET', '/api/v2/slow', slow_first)
+        self.server.route('POST', '/api/v2/slow', slow_first)
+
+    def make_client(self, rate_limiter=None, **options):
+        policy = HedgePolicy(min_delay=0.05, max_delay=0.05)
+        client = RelationClient(
+            'token', 'test', base_url=self.server.base_url,
+            hedge_policy=policy, rate_limiter=rate_limiter, **options
+        )
+        return client, policy
+
+    def test_hedge_wins_when_primary_is_slow(self):
+        """最初の応答が遅い場合にヘッジ側の応答が採用されることを確認"""
+        client, policy = self.make_client()
+
+        result = client.get('slow')
+
+        self.assertEqual(result, {'from': 'hedge'})
+        self.assertEqual(policy.hedges_sent, 1)
+        self.assertEqual(policy.hedges_won, 1)
+
+    def test_hedge_skipped_without_rate_limit_headroom(self):
+        """レートリミットの枠がない場合はヘッジを送らないことを確認"""
+        governor = RateLimitGovernor()
+        client, policy = self.make_client(rate_limiter=governor)
+        # 残り1件の枠は最初のリクエストが使うため、ヘッジの枠は残らない
+        governor.update({'X-RateLimit-Limit': '60', 'X-RateLimit-Remaining': '1',
+                         'X-RateLimit-Reset': '60'})
+        threading.Timer(0.3, self.release.set).start()
+
+        result = client.get('slow')
+
+        self.assertEqual(result, {'from': 'primary'})
+        self.assertEqual(policy.hedges_sent, 0)
+        self.assertEqual(policy.hedges_skipped, 1)
+        self.assertEqual(self.calls, 1)
+
+    def test_hedge_uses_its_own_concurrency_permit(self):
+        """ヘッジは最初のリクエストとは別の実行枠を使い、送信後に返却することを確認"""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, min_limit=1, max_limit=2)
+        client, policy = self.make_client(concurrency_limiter=limiter)
+
+        self.assertEqual(client.get('slow'), {'from': 'hedge'})
+        self.assertEqual(policy.hedges_sent, 1)
+        self.release.set()
+        client._hedge_executor.shutdown(wait=True)
+        self.assertEqual(limiter.status.in_flight, 0)
+
+    def test_hedge_skipped_without_concurrency_permit(self):
+        """同時実行数のリミッターに空きがない場合はヘッジを送らないことを確認"""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1, min_limit=1, max_limit=1)
+        client, policy = self.make_client(concurrency_limiter=limiter)
+        threading.Timer(0.3, self.release.set).start()
+
+        result = client.get('slow')
+
+        self.assertEqual(result, {'from': 'primary'})
+        self.assertEqual(policy.hedges_skipped, 1)
+        self.assertEqual(self.calls, 1)
+
+    def test_hedge_skipped_when_circuit_is_open(self):
+        """最初のリクエストの送信後にサーキットブレーカーが開いた場合はヘッジを送らないことを確認"""
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+        client, policy = self.make_client(circuit_breaker=breaker)
+        threading.Timer(0.01, breaker.record_failure).start()
+        threading.Timer(0.3, self.release.set).start()
+
+        result = client.get('slow')
+
+        self.assertEqual(result, {'from': 'primary'})
+        self.assertEqual(policy.hedges_skipped, 1)
+        self.assertEqual(self.calls, 1)
+
+    def test_post_is_not_hedged(self):
+        """GET以外のリクエストはヘッジされないことを確認"""
+        client, policy = self.make_client()
+        threading.Timer(0.2, self.release.set).start()
+
+        result = client.post('slow', {})
+
+        self.assertEqual(result, {'from': 'primary'})
+        self.assertEqual(policy.requests, 0)
+        self.assertEqual(self.calls, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
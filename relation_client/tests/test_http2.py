@@ -0,0 +1,61 @@
+"""
+HTTP/2トランスポートのテスト
+"""
+
+import asyncio
+import unittest
+
+from relation_client import AsyncRelationClient, RelationClient
+from relation_client.exceptions import ResourceNotFoundError
+from relation_client.tests.local_h2_server import LocalH2Server
+from relation_client.transport import HttpxTransport
+
+
+class TestHttp2(unittest.TestCase):
+    """HTTP/2で1本の接続に多重化されることのテストクラス"""
+
+    def setUp(self):
+        """テスト前の準備"""
+        self.server = LocalH2Server(delay=0.05).start()
+        self.addCleanup(self.server.stop)
+        self.server.route(
+            'GET', '/api/v2/tickets',
+            lambda req: (200, {'X-RateLimit-Remaining': '100'}, {'page': req['query'].get('page')})
+        )
+
+    def test_sync_client_multiplexes_parallel_requests(self):
+        """同期クライアントの並列リクエストが1本の接続を共有することを確認"""
+        transport = HttpxTransport(http1=False, http2=True)
+        self.addCleanup(transport.close)
+        client = RelationClient('token', 'test', base_url=self.server.base_url, transport=transport)
+
+        results = client.map(lambda page: client.get('tickets', params={'page': page}), range(10))
+
+        self.assertEqual([result.get() for result in results], [{'page': [str(i)]} for i in range(10)])
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(self.server.requests[0]['headers']['authorization'], 'Bearer token')
+
+    def test_sync_client_error_response(self):
+        """HTTP/2でもエラーレスポンスが対応する例外になることを確認"""
+        transport = HttpxTransport(http1=False, http2=True)
+        self.addCleanup(transport.close)
+        client = RelationClient('token', 'test', base_url=self.server.base_url, transport=transport)
+
+        with self.assertRaises(ResourceNotFoundError):
+            client.get('unknown')
+
+    def test_async_client_multiplexes_concurrent_requests(self):
+        """非同期クライアントの同時リクエストが1本の接続を共有することを確認"""
+        async def run():
+            async with AsyncRelationClient('token', 'test', base_url=self.server.base_url,
+                                           http1=False, http2=True) as client:
+                return await asyncio.gather(*(client.get('tickets', params={'page': i}) for i in range(20)))
+
+        results = asyncio.run(run())
+
+        self.assertEqual(len(results), 20)
+        self.assertEqual(self.server.connections, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
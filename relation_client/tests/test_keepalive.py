@@ -0,0 +1,123 @@
+"""
+接続の事前確立とkeep-alive接続の張り直しのテスト
+"""
+
+import time
+import unittest
+
+from relation_client import RelationClient
+from relation_client.exceptions import APIError
+from relation_client.tests.local_server import LocalAPIServer
+from relation_client.transport import Urllib3Transport
+
+
+def connected(pool) -> int:
+    """コネクションプールに保持されている接続済みの接続数を返します"""
+    return sum(1 for conn in list(pool.pool.queue) if conn is not None and conn.sock is not None)
+
+
+class TestWarmup(unittest.TestCase):
+    """warmup() のテストクラス"""
+
+    def setUp(self):
+        """テスト前の準備"""
+        self.server = LocalAPIServer().start()
+        self.addCleanup(self.server.stop)
+        self.server.route('GET', '/api/v2/users', lambda req: (200, {}, []))
+
+    def pool_of(self, client):
+        pools = client._session.get_adapter(self.server.base_url).poolmanager.pools
+        keys = list(pools.keys())
+        self.assertEqual(len(keys), 1)
+        return pools[keys[0]]
+
+    def test_warmup_opens_connections(self):
+        """指定した数の接続を事前に確立することを確認"""
+        client = RelationClient('token', 'test', base_url=self.server.base_url, pool_maxsize=4)
+
+        self.assertEqual(client.warmup(3), 3)
+
+        self.assertEqual(connected(self.pool_of(client)), 3)
+        # 既に接続済みの接続は張り直さない
+        self.assertEqual(client.warmup(3), 0)
+
+    def test_warmup_defaults_to_pool_maxsize(self):
+        """接続数を省略すると pool_maxsize 本の接続を確立することを確認"""
+        client = RelationClient('token', 'test', base_url=self.server.base_url, pool_maxsize=2)
+
+        self.assertEqual(client.warmup(), 2)
+
+    def test_warmed_connection_is_reused(self):
+        """事前に確立した接続がリクエストに使われることを確認"""
+        client = RelationClient('token', 'test', base_url=self.server.base_url, pool_maxsize=1)
+        client.warmup()
+        pool = self.pool_of(client)
+        warmed = pool.pool.queue[-1]
+
+        client.get('users')
+
+        self.assertIsNotNone(warmed)
+        self.assertIs(pool.pool.queue[-1], warmed)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_urllib3_transport_warmup(self):
+        """Urllib3Transportでも接続を事前に確立できることを確認"""
+        transport = Urllib3Transport(pool_maxsize=3)
+        client = RelationClient('token', 'test', base_url=self.server.base_url, transport=transport)
+
+        self.assertEqual(client.warmup(3), 3)
+        self.assertEqual(connected(transport.pool.connection_from_url(self.server.base_url)), 3)
+
+    def test_warmup_connection_error(self):
+        """接続に失敗した場合は APIError になることを確認"""
+        base_url = self.server.base_url
+        self.server.stop()
+        client = RelationClient('token', 'test', base_url=base_url)
+
+        with self.assertRaises(APIError):
+            client.warmup(2)
+
+
+class TestIdleConnectionRecycling(unittest.TestCase):
+    """アイドル接続の張り直しのテストクラス"""
+
+    def setUp(self):
+        """テスト前の準備"""
+        self.server = LocalAPIServer().start()
+        self.addCleanup(self.server.stop)
+        self.server.route('GET', '/api/v2/users', lambda req: (200, {}, []))
+
+    def test_idle_connection_is_recycled(self):
+        """アイドル時間を超えた接続は再利用せずに張り直すことを確認"""
+        client = RelationClient('token', 'test', base_url=self.server.base_url,
+                                connection_idle_timeout=0.05)
+        client.get('users')
+        time.sleep(0.1)
+
+        client.get('users')
+
+        self.assertEqual(self.server.connections, 2)
+
+    def test_recent_connection_is_reused(self):
+        """アイドル時間内の接続は再利用することを確認"""
+        client = RelationClient('token', 'test', base_url=self.server.base_url,
+                                connection_idle_timeout=10)
+        client.get('users')
+        client.get('users')
+
+        self.assertEqual(self.server.connections, 1)
+
+    def test_urllib3_transport_recycles_idle_connection(self):
+        """Urllib3Transportでもアイドル接続を張り直すことを確認"""
+        client = RelationClient('token', 'test', base_url=self.server.base_url,
+                                transport=Urllib3Transport(idle_timeout=0.05))
+        client.get('users')
+        time.sleep(0.1)
+
+        client.get('users')
+
+        self.assertEqual(self.server.connections, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
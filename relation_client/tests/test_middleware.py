@@ -0,0 +1,129 @@
+"""
+リクエストミドルウェアのテスト
+"""
+
+import dataclasses
+import unittest
+
+from relation_client import RelationClient
+from relation_client.exceptions import APIConnectionError, APIError, ServiceUnavailableError
+from relation_client.middleware import APIRequest, build_chain
+from relation_client.retry import RetryPolicy
+from relation_client.tests.local_server import LocalAPIServer
+
+
+class TestBuildChain(unittest.TestCase):
+    """build_chain のテストクラス"""
+
+    def test_empty_chain_returns_handler(self):
+        """ミドルウェアがない場合は末端の関数をそのまま返すことを確認"""
+        def handler(request):
+            return 'ok'
+        self.assertIs(build_chain([], handler), handler)
+
+    def test_first_middleware_is_outermost(self):
+        """先頭のミドルウェアが最も外側で実行されることを確認"""
+        calls = []
+
+        def layer(name):
+            def middleware(request, call_next):
+                calls.append(f'{name}:前')
+                result = call_next(request)
+                calls.append(f'{name}:後')
+                return result
+            return middleware
+
+        chain = build_chain([layer('a'), layer('b')], lambda request: calls.append('送信') or 'ok')
+        self.assertEqual(chain(APIRequest('GET', 'users')), 'ok')
+        self.assertEqual(calls, ['a:前', 'b:前', '送信', 'b:後', 'a:後'])
+
+
+class TestClientMiddleware(unittest.TestCase):
+    """RelationClient のミドルウェアのテストクラス"""
+
+    def setUp(self):
+        self.server = LocalAPIServer().start()
+        self.server.route('GET', '/api/v2/users', lambda request: (200, {}, [{'user_id': 1}]))
+        self.server.route('GET', '/api/v2/maintenance', lambda request: (503, {}, {'error': 'メンテナンス中'}))
+
+    def tearDown(self):
+        self.server.stop()
+
+    def create_client(self, **options):
+        client = RelationClient('token', 'test', base_url=self.server.base_url,
+                                retry_policy=RetryPolicy(max_retries=2, delay=0), **options)
+        self.addCleanup(client.close)
+        return client
+
+    def test_middleware_sees_request_and_parsed_response(self):
+        """ミドルウェアがリクエストの内容と変換後のレスポンスを受け取ることを確認"""
+        seen = []
+
+        def record(request, call_next):
+            result = call_next(request)
+            seen.append((request.method, request.path, request.params, result))
+            return result
+
+        client = self.create_client(middleware=[record])
+        client.get('users', params={'page': 1})
+
+        self.assertEqual(seen, [('GET', 'users', {'page': 1}, [{'user_id': 1}])])
+
+    def test_middleware_sees_exception_after_retries(self):
+        """ミドルウェアはリトライを終えた後の例外を1回だけ受け取ることを確認"""
+        errors = []
+
+        def record(request, call_next):
+            try:
+                return call_next(request)
+            except Exception as e:
+                errors.append(e)
+                raise
+
+        client = self.create_client()
+        client.add_middleware(record)
+        with self.assertRaises(ServiceUnavailableError):
+            client.get('maintenance')
+
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_middleware_can_short_circuit(self):
+        """ミドルウェアが結果を返すと送信しないことを確認 (キャッシュなど)"""
+        cache = {}
+
+        def caching(request, call_next):
+            key = (request.method, request.path)
+            if key not in cache:
+                cache[key] = call_next(request)
+            return cache[key]
+
+        client = self.create_client(middleware=[caching])
+        client.get('users')
+        client.get('users')
+
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_middleware_can_rewrite_request(self):
+        """ミドルウェアがリクエストを書き換えて次に渡せることを確認"""
+        def add_page(request, call_next):
+            params = dict(request.params or {}, per_page=100)
+            return call_next(dataclasses.replace(request, params=params))
+
+        client = self.create_client(middleware=[add_page])
+        client.get('users')
+
+        self.assertEqual(self.server.requests[0]['query'], {'per_page': ['100']})
+
+    def test_connection_error_is_mapped(self):
+        """接続エラーが APIError のサブクラスの APIConnectionError に変換されることを確認"""
+        client = RelationClient('token', 'test', base_url='http://127.0.0.1:9/api/v2',
+                                retry_policy=RetryPolicy(max_retries=0, delay=0))
+        self.addCleanup(client.close)
+        with self.assertRaises(APIConnectionError) as context:
+            client.get('users')
+        self.assertIsInstance(context.exception, APIError)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,250 @@
+"""
+ローカルミラーのテスト
+"""
+
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from relation_client import RelationClient
+from relation_client.exceptions import ResourceNotFoundError
+from relation_client.mirror import TicketMirror
+from relation_client.models import Attachment, Comment, Message, Ticket
+from relation_client.sync import TicketSyncEngine
+from relation_client.tests.local_server import LocalAPIServer
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def ticket_data(ticket_id, status_cd='open', assignee='yamada', label_ids=(), method_cd='mail',
+                updated=None, messages=True):
+    """チケット詳細のJSONを作成します"""
+    updated = updated or START + timedelta(hours=ticket_id)
+    data = {
+        'ticket_id': ticket_id,
+        'title': f'件名 {ticket_id}',
+        'status_cd': status_cd,
+        'assignee': assignee,
+        'color_cd': None,
+        'label_ids': list(label_ids),
+        'case_category_ids': [],
+        # 日本時間で返る場合も、UTCに揃えて比較・並べ替えできることを確認するため
+        'last_updated_at': updated.astimezone(timezone(timedelta(hours=9))).isoformat(),
+    }
+    if messages:
+        data['messages'] = [
+            {
+                'message_id': ticket_id * 10 + i,
+                'from': 'taro@example.com',
+                'title': f'メッセージ {i}',
+                'body': '<p>本文</p>',
+                'method_cd': method_cd,
+                'action_cd': 'received',
+                'is_html': True,
+                'sent_at': updated.isoformat(),
+                'comments': [{'commenter': 'yamada', 'comment_type': 'comment', 'comment': f'メモ {i}',
+                              'commented_at': updated.isoformat()}],
+                'attachments': [{'attachment_id': ticket_id * 10 + i, 'file_name': f'添付{i}.pdf'}],
+            }
+            for i in range(2)
+        ]
+    return data
+
+
+class TestTicketMirror(unittest.TestCase):
+    """TicketMirror のテストクラス"""
+
+    def setUp(self):
+        self.mirror = TicketMirror()
+        self.mirror.upsert(1, [
+            Ticket.from_dict(ticket_data(1, 'open', 'yamada', [10, 11], 'mail')),
+            Ticket.from_dict(ticket_data(2, 'open', 'tanaka', [11], 'chat')),
+            Ticket.from_dict(ticket_data(3, 'closed', 'yamada', [], 'mail')),
+            Ticket.from_dict(ticket_data(4, 'ongoing', None, [12], 'tel')),
+        ])
+        self.mirror.upsert(2, [Ticket.from_dict(ticket_data(1, 'open'))])
+
+    def tearDown(self):
+        self.mirror.close()
+
+    def test_round_trip(self):
+        """保存したチケットを、メッセージ・コメント・添付ファイルを含めて同じモデルとして読み出せることを確認"""
+        original = Ticket.from_dict(ticket_data(1, 'open', 'yamada', [10, 11], 'mail'))
+        ticket = self.mirror.get(1, 1)
+
+        self.assertIsInstance(ticket, Ticket)
+        self.assertEqual(ticket, original)
+        self.assertEqual(ticket._raw_data, original._raw_data)
+        self.assertIsInstance(ticket.messages[1], Message)
+        self.assertIsInstance(ticket.messages[1].comments[0], Comment)
+        self.assertIsInstance(ticket.messages[1].attachments[0], Attachment)
+        self.assertEqual(ticket.messages[1].attachments[0].file_name, '添付1.pdf')
+        self.assertEqual(self.mirror.messages(1, 1), original.messages)
+        self.assertIsNone(self.mirror.get(1, 99))
+        self.assertEqual(self.mirror.get(1, 1, include_messages=False).messages, [])
+
+    def test_upsert_without_messages_keeps_messages(self):
+        """メッセージを含まないチケットで更新しても、保存済みのメッセージが残ることを確認"""
+        self.mirror.upsert(1, [Ticket.from_dict(ticket_data(1, 'closed', label_ids=[12], messages=False))])
+
+        ticket = self.mirror.get(1, 1)
+        self.assertEqual(ticket.status_cd, 'closed')
+        self.assertEqual(ticket.label_ids, [12])
+        self.assertEqual(len(ticket.messages), 2)
+        self.assertEqual([t.ticket_id for t in self.mirror.query(1, label_ids=[10])], [])
+
+    def test_message_moved_to_another_ticket(self):
+        """別のチケットに移動したメッセージを、コメント・添付ファイルごと移動先のチケットに保存することを確認"""
+        moved = ticket_data(5)
+        moved['messages'] = ticket_data(1)['messages'][:1]
+        moved['messages'][0]['comments'][0]['comment'] = '移動後のメモ'
+        self.mirror.upsert(1, [Ticket.from_dict(moved)])
+
+        self.assertEqual(self.mirror.get(1, 5).messages[0].comments[0].comment, '移動後のメモ')
+        self.assertEqual(len(self.mirror.get(1, 5).messages[0].attachments), 1)
+        self.assertEqual([m.message_id for m in self.mirror.get(1, 1).messages], [11])
+
+    def test_query(self):
+        """索引付きの条件で検索し、最終更新日時の順に返すことを確認"""
+        def ids(**kwargs):
+            return [t.ticket_id for t in self.mirror.query(1, **kwargs)]
+
+        self.assertEqual(ids(), [4, 3, 2, 1])
+        self.assertEqual(ids(descending=False, limit=2, offset=1), [2, 3])
+        self.assertEqual(ids(status_cds=['open', 'ongoing']), [4, 2, 1])
+        self.assertEqual(ids(assignee='yamada'), [3, 1])
+        self.assertEqual(ids(label_ids=[11, 12]), [4, 2, 1])
+        self.assertEqual(ids(method_cds=['mail']), [3, 1])
+        self.assertEqual(ids(status_cds=['open'], method_cds=['mail']), [1])
+        self.assertEqual(ids(updated_since='2024-01-01T11:00:00+09:00'), [4, 3, 2])
+        self.assertEqual(
+            ids(updated_since=START + timedelta(hours=2), updated_until=START + timedelta(hours=4)), [3, 2]
+        )
+        self.assertEqual(self.mirror.count(1, status_cds=['open']), 2)
+        self.assertEqual(self.mirror.count(2), 1)
+
+        tickets = self.mirror.query(1, status_cds=['open'], include_messages=True)
+        self.assertEqual([len(t.messages) for t in tickets], [2, 2])
+        self.assertEqual(self.mirror.query(1)[0].messages, [])
+
+    def test_query_uses_indexes(self):
+        """ステータス・担当者・ラベル・チャネル・最終更新日時の検索に索引が使われることを確認"""
+        for where, params in (
+            ('status_cd = ?', ['open']),
+            ('assignee = ?', ['yamada']),
+            ('last_updated_at >= ?', ['2024']),
+        ):
+            plan = self.mirror._connection.execute(
+                f'EXPLAIN QUERY PLAN SELECT * FROM tickets WHERE message_box_id = ? AND {where}', [1, *params]
+            ).fetchall()
+            self.assertIn('USING INDEX', str(plan), where)
+        for table, column in (('ticket_labels', 'label_id'), ('messages', 'method_cd')):
+            plan = self.mirror._connection.execute(
+                f'EXPLAIN QUERY PLAN SELECT ticket_id FROM {table} WHERE message_box_id = ? AND {column} = ?', [1, 'x']
+            ).fetchall()
+            self.assertIn('INDEX', str(plan), table)
+
+    def test_delete_tickets(self):
+        """チケットをメッセージ・コメント・添付ファイルと合わせて削除できることを確認"""
+        self.mirror.delete_tickets(1, [1, 2])
+        self.assertEqual([t.ticket_id for t in self.mirror.query(1)], [4, 3])
+        for table in ('messages', 'comments', 'attachments', 'ticket_labels'):
+            count = self.mirror._connection.execute(
+                f'SELECT COUNT(*) FROM {table} WHERE message_box_id = 1'
+            ).fetchone()[0]
+            self.assertEqual(count, 4 if table != 'ticket_labels' else 1, table)
+
+    def test_persisted_to_file(self):
+        """ファイルに保存したミラーを開き直して読み出せることを確認"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'tickets.db')
+            with TicketMirror(path) as mirror:
+                mirror.upsert(1, [Ticket.from_dict(ticket_data(5))])
+            with TicketMirror(path) as mirror:
+                self.assertEqual(mirror.get(1, 5).title, '件名 5')
+
+
+class TestTicketMirrorSync(unittest.TestCase):
+    """TicketMirror.sync のテストクラス"""
+
+    def setUp(self):
+        self.details = {ticket_id: ticket_data(ticket_id) for ticket_id in range(1, 26)}
+        self.missing = set()
+        self.server = LocalAPIServer().start()
+        self.server.route('POST', '/api/v2/1/tickets/search', self.search)
+        for ticket_id in range(1, 26):
+            self.server.route('GET', f'/api/v2/1/tickets/{ticket_id}', self.detail(ticket_id))
+        self.client = RelationClient('token', 'test', base_url=self.server.base_url)
+        self.mirror = TicketMirror()
+
+    def tearDown(self):
+        self.mirror.close()
+        self.client.close()
+        self.server.stop()
+
+    def search(self, request):
+        body = request['json']
+        since = body.get('since')
+        matched = [
+            {k: v for k, v in data.items() if k != 'messages'}
+            for _, data in sorted(self.details.items())
+            if since is None or data['messages'][0]['sent_at'] >= since
+        ]
+        start = (body['page'] - 1) * body['per_page']
+        return 200, {}, matched[start:start + body['per_page']]
+
+    def detail(self, ticket_id):
+        def handler(request):
+            if ticket_id in self.missing:
+                return 404, {}, {'error': 'not found'}
+            return 200, {}, self.details[ticket_id]
+        return handler
+
+    def detail_requests(self):
+        return [r['path'] for r in self.server.requests if r['method'] == 'GET']
+
+    def test_sync_fetches_changed_tickets_with_messages(self):
+        """変更されたチケットだけを、メッセージを含めてミラーに反映することを確認"""
+        stats = self.mirror.sync(self.client, 1)
+        self.assertEqual(stats.changed, 25)
+        self.assertEqual(self.mirror.count(1), 25)
+        self.assertEqual(len(self.mirror.get(1, 7).messages), 2)
+
+        del self.server.requests[:]
+        self.details[7] = ticket_data(7, 'closed', updated=START + timedelta(hours=40))
+        stats = self.mirror.sync(self.client, 1)
+        self.assertEqual(stats.changed, 1)
+        self.assertEqual(self.detail_requests(), ['/api/v2/1/tickets/7'])
+        self.assertEqual(self.mirror.get(1, 7).status_cd, 'closed')
+        self.assertEqual([t.ticket_id for t in self.mirror.query(1, limit=1)], [7])
+
+    def test_sync_without_messages(self):
+        """fetch_messages=False の場合は検索結果だけを反映し、詳細を取得しないことを確認"""
+        self.mirror.sync(self.client, 1, fetch_messages=False)
+        self.assertEqual(self.mirror.count(1), 25)
+        self.assertEqual(self.detail_requests(), [])
+
+    def test_interrupted_sync_is_consistent(self):
+        """同期が失敗した場合、進捗を保存したページまでのチケットだけがミラーに残り、続きから再開できることを確認"""
+        engine = TicketSyncEngine(self.client, self.mirror, per_page=10)
+        self.missing.add(23)
+        with self.assertRaises(ResourceNotFoundError):
+            self.mirror.sync(self.client, 1, engine=engine)
+
+        # 3ページ目の途中で失敗したため、2ページ目までのチケットと進捗だけが保存されている
+        self.assertEqual(self.mirror.count(1), 20)
+        self.assertEqual(self.mirror.load(engine.key(1)).run_page, 2)
+        self.assertIsNone(self.mirror.get(1, 21))
+
+        self.missing.clear()
+        del self.server.requests[:]
+        stats = self.mirror.sync(self.client, 1, engine=engine)
+        self.assertTrue(stats.resumed)
+        self.assertEqual(stats.changed, 5)
+        self.assertEqual(self.mirror.count(1), 25)
+        self.assertFalse(self.mirror.load(engine.key(1)).running)
+        self.assertIsNotNone(self.mirror.load(engine.key(1)).watermark)
+
+if __name__ == '__main__':
+    unittest.main()
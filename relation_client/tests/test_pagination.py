@@ -0,0 +1,282 @@
+"""
+ページネーションのテスト
+"""
+
+import contextvars
+import threading
+import time
+import unittest
+
+from relation_client import RelationClient
+from relation_client.models import Customer, Label, Ticket, User
+from relation_client.pagination import paginate
+from relation_client.tests.local_server import LocalAPIServer
+
+
+class FakePages:
+    """total 件の結果をページ単位で返し、取得したページを記録する関数"""
+
+    def __init__(self, total):
+        self.total = total
+        self.calls = []
+
+    def __call__(self, page, per_page):
+        self.calls.append((page, per_page))
+        start = (page - 1) * per_page
+        return list(range(start, min(start + per_page, self.total)))
+
+
+def paged_handler(total, key):
+    """クエリパラメータまたはリクエストボディの page・per_page に応じて total 件を返すハンドラー"""
+    def handler(request):
+        if request['json']:
+            page, per_page = request['json']['page'], request['json']['per_page']
+        else:
+            page, per_page = int(request['query']['page'][0]), int(request['query']['per_page'][0])
+        start = (page - 1) * per_page
+        return 200, {}, [{key: i} for i in range(start + 1, min(start + per_page, total) + 1)]
+    return handler
+
+
+class TestPaginate(unittest.TestCase):
+    """paginate のテストクラス"""
+
+    def test_stops_on_short_page(self):
+        """件数が per_page より少ないページで終了することを確認"""
+        pages = FakePages(25)
+        self.assertEqual(list(paginate(pages, 10)), list(range(25)))
+        self.assertEqual(pages.calls, [(1, 10), (2, 10), (3, 10)])
+
+    def test_stops_on_empty_page(self):
+        """件数がちょうど per_page の倍数の場合は空のページで終了することを確認"""
+        pages = FakePages(20)
+        self.assertEqual(list(paginate(pages, 10)), list(range(20)))
+        self.assertEqual(pages.calls, [(1, 10), (2, 10), (3, 10)])
+
+    def test_fetches_lazily(self):
+        """次のページは前のページを返し終えるまで取得しないことを確認"""
+        pages = FakePages(100)
+        items = paginate(pages, 10)
+        self.assertEqual(pages.calls, [])
+        for _ in range(10):
+            next(items)
+        self.assertEqual(pages.calls, [(1, 10)])
+        next(items)
+        self.assertEqual(pages.calls, [(1, 10), (2, 10)])
+
+    def test_limit(self):
+        """limit 件で終了し、per_page を limit に減らして取得することを確認"""
+        pages = FakePages(100)
+        self.assertEqual(list(paginate(pages, 10, limit=15)), list(range(15)))
+        self.assertEqual(pages.calls, [(1, 10), (2, 10)])
+
+        pages = FakePages(100)
+        self.assertEqual(list(paginate(pages, 50, limit=3)), [0, 1, 2])
+        self.assertEqual(pages.calls, [(1, 3)])
+
+        pages = FakePages(100)
+        self.assertEqual(list(paginate(pages, 10, limit=0)), [])
+        self.assertEqual(pages.calls, [])
+
+    def test_stop_when(self):
+        """stop_when が True を返した結果を返さずに終了し、以降のページを取得しないことを確認"""
+        pages = FakePages(100)
+        self.assertEqual(list(paginate(pages, 10, stop_when=lambda n: n >= 12)), list(range(12)))
+        self.assertEqual(pages.calls, [(1, 10), (2, 10)])
+
+    def test_start_page(self):
+        """page に指定したページから取得することを確認"""
+        pages = FakePages(25)
+        self.assertEqual(list(paginate(pages, 10, page=3)), [20, 21, 22, 23, 24])
+
+    def test_invalid_arguments(self):
+        """不正な引数は ValueError になることを確認"""
+        for kwargs in ({'per_page': 0}, {'per_page': 10, 'page': 0}, {'per_page': 10, 'limit': -1}):
+            with self.assertRaises(ValueError):
+                list(paginate(FakePages(10), **kwargs))
+
+
+class BlockingPages(FakePages):
+    """block_from 以降のページの取得を released がセットされるまで待たせる FakePages"""
+
+    def __init__(self, total, block_from=2):
+        super().__init__(total)
+        self.block_from = block_from
+        self.released = threading.Event()
+        self.lock = threading.Lock()
+
+    def __call__(self, page, per_page):
+        with self.lock:
+            self.calls.append((page, per_page))
+        if page >= self.block_from:
+            self.released.wait(5)
+        start = (page - 1) * per_page
+        return list(range(start, min(start + per_page, self.total)))
+
+    def started(self):
+        with self.lock:
+            return sorted(page for page, _ in self.calls)
+
+
+class TestPrefetch(unittest.TestCase):
+    """paginate の先読みのテストクラス"""
+
+    def test_ordered_delivery(self):
+        """後のページが先に取得し終えても、ページ順に返すことを確認"""
+        def fetch(page, per_page):
+            time.sleep(0.02 * (6 - page) if page <= 5 else 0)
+            start = (page - 1) * per_page
+            return list(range(start, min(start + per_page, 47)))
+
+        self.assertEqual(list(paginate(fetch, 10, prefetch=4)), list(range(47)))
+
+    def test_fetches_ahead_with_bounded_depth(self):
+        """ページNの処理中にページN+1〜N+kを並列に取得し、それより先は取得しないことを確認"""
+        pages = BlockingPages(1000)
+        items = paginate(pages, 10, prefetch=3)
+        self.assertEqual(next(items), 0)
+
+        deadline = time.monotonic() + 2
+        while pages.started() != [1, 2, 3, 4] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        self.assertEqual(pages.started(), [1, 2, 3, 4])
+
+        pages.released.set()
+        for _ in range(10):
+            next(items)
+        # ページ2の処理を始めると、ページ5の取得を開始する
+        deadline = time.monotonic() + 2
+        while 5 not in pages.started() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(pages.started(), [1, 2, 3, 4, 5])
+        items.close()
+
+    def test_early_stop_does_not_wait_or_fetch_more(self):
+        """途中で終了すると、実行中の取得を待たずに戻り、以降のページを取得しないことを確認"""
+        pages = BlockingPages(1000)
+        items = paginate(pages, 10, prefetch=2, stop_when=lambda n: n == 5)
+
+        started = time.monotonic()
+        self.assertEqual(list(items), [0, 1, 2, 3, 4])
+        self.assertLess(time.monotonic() - started, 1)
+
+        pages.released.set()
+        time.sleep(0.1)
+        self.assertEqual(pages.started(), [1, 2, 3])
+
+    def test_stops_on_short_page(self):
+        """最後のページに達したら終了し、余分な取得は先読みの深さまでであることを確認"""
+        pages = FakePages(25)
+        self.assertEqual(list(paginate(pages, 10, prefetch=2)), list(range(25)))
+        self.assertLessEqual(max(page for page, _ in pages.calls), 5)
+
+        pages = FakePages(1000)
+        self.assertEqual(list(paginate(pages, 10, limit=25, prefetch=8)), list(range(25)))
+        self.assertEqual(sorted(pages.calls), [(1, 10), (2, 10), (3, 10)])
+
+    def test_error_raised_in_order(self):
+        """取得の例外は、それより前のページをすべて返してから送出されることを確認"""
+        def fetch(page, per_page):
+            if page == 2:
+                raise ValueError('page 2')
+            return list(range((page - 1) * per_page, page * per_page))
+
+        received = []
+        with self.assertRaises(ValueError):
+            for item in paginate(fetch, 10, prefetch=3):
+                received.append(item)
+        self.assertEqual(received, list(range(10)))
+
+    def test_context_propagated(self):
+        """呼び出し元のコンテキスト変数が取得に引き継がれることを確認"""
+        var = contextvars.ContextVar('var', default=None)
+        seen = []
+
+        def fetch(page, per_page):
+            seen.append(var.get())
+            return [page] if page < 3 else []
+
+        var.set('caller')
+        self.assertEqual(list(paginate(fetch, 1, prefetch=2)), [1, 2])
+        self.assertEqual(set(seen), {'caller'})
+
+    def test_invalid_prefetch(self):
+        """prefetch が負の場合は ValueError になることを確認"""
+        with self.assertRaises(ValueError):
+            list(paginate(FakePages(10), 10, prefetch=-1))
+
+
+class TestResourcePagination(unittest.TestCase):
+    """リソースの iter_search・iter_list のテストクラス"""
+
+    def setUp(self):
+        self.server = LocalAPIServer().start()
+        self.client = RelationClient('token', 'test', base_url=self.server.base_url)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+    def test_tickets_iter_search(self):
+        """チケット検索を最大件数のページで順に取得し、検索条件を引き継ぐことを確認"""
+        self.server.route('POST', '/api/v2/1/tickets/search', paged_handler(120, 'ticket_id'))
+
+        tickets = list(self.client.tickets.iter_search(1, status_cds=['open']))
+        self.assertEqual(len(tickets), 120)
+        self.assertIsInstance(tickets[0], Ticket)
+        self.assertEqual([r['json'] for r in self.server.requests], [
+            {'status_cds': ['open'], 'per_page': 50, 'page': page} for page in (1, 2, 3)
+        ])
+
+    def test_tickets_iter_search_stop_when(self):
+        """stop_when で終了した場合は以降のページを取得しないことを確認"""
+        self.server.route('POST', '/api/v2/1/tickets/search', paged_handler(500, 'ticket_id'))
+
+        tickets = list(self.client.tickets.iter_search(1, stop_when=lambda t: t.ticket_id > 60))
+        self.assertEqual([t.ticket_id for t in tickets], list(range(1, 61)))
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_customers_iter_search(self):
+        """顧客検索を limit 件で終了することを確認"""
+        self.server.route('GET', '/api/v2/customer_groups/7/customers/search', paged_handler(500, 'customer_id'))
+
+        customers = list(self.client.customers.iter_search(7, limit=75, emails=['@example.com']))
+        self.assertEqual(len(customers), 75)
+        self.assertIsInstance(customers[0], Customer)
+        self.assertEqual(self.server.requests[-1]['query']['page'], ['2'])
+        self.assertEqual(self.server.requests[-1]['query']['emails[]'], ['@example.com'])
+
+    def test_iter_list(self):
+        """一覧の iter_list が最大件数のページで順に取得することを確認"""
+        self.server.route('GET', '/api/v2/users', paged_handler(150, 'user_id'))
+        self.server.route('GET', '/api/v2/1/labels', paged_handler(30, 'label_id'))
+
+        users = list(self.client.users.iter_list())
+        self.assertEqual(len(users), 150)
+        self.assertIsInstance(users[0], User)
+        self.assertEqual([r['query']['per_page'] for r in self.server.requests], [['100'], ['100']])
+
+        labels = list(self.client.labels.iter_list(1))
+        self.assertEqual(len(labels), 30)
+        self.assertIsInstance(labels[0], Label)
+
+    def test_iter_search_prefetch(self):
+        """先読みしてもチケットが検索結果の順に返ることを確認"""
+        self.server.route('POST', '/api/v2/1/tickets/search', paged_handler(420, 'ticket_id'))
+
+        tickets = list(self.client.tickets.iter_search(1, prefetch=4))
+        self.assertEqual([t.ticket_id for t in tickets], list(range(1, 421)))
+
+    def test_max_per_page(self):
+        """各リソースの1ページあたりの最大件数を確認"""
+        expected = {
+            'tickets': 50, 'customers': 50, 'labels': 100, 'case_categories': 100,
+            'templates': 30, 'users': 100, 'badges': 100, 'mail_accounts': 100,
+        }
+        for name, max_per_page in expected.items():
+            self.assertEqual(getattr(self.client, name).MAX_PER_PAGE, max_per_page, name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+RelationClientPoolのテスト
+"""
+
+import unittest
+
+from relation_client import RelationClient, RelationClientPool
+from relation_client.rate_limit import SharedRateLimiter
+from relation_client.tests.local_server import LocalAPIServer
+
+
+class TestRelationClientPool(unittest.TestCase):
+    """RelationClientPoolのテストクラス"""
+
+    def setUp(self):
+        """テスト前の準備"""
+        self.now = 0.0
+        self.pool = RelationClientPool(max_tenants=2, idle_timeout=60, clock=lambda: self.now)
+        self.addCleanup(self.pool.close)
+
+    def test_reuses_client_per_tenant(self):
+        """同じテナントにはクライアントを再利用することを確認"""
+        client_a = self.pool.client('tenant-a', 'token-a')
+
+        self.assertIs(self.pool.client('tenant-a', 'token-a'), client_a)
+        self.assertIsInstance(client_a, RelationClient)
+        self.assertEqual(client_a.subdomain, 'tenant-a')
+        self.assertEqual(self.pool.stats.hits, 1)
+        self.assertEqual(self.pool.stats.misses, 1)
+
+    def test_tenants_share_session_but_not_state(self):
+        """テナント間でSessionを共有し、レートリミッターとリトライ予算は分けることを確認"""
+        client_a = self.pool.client('tenant-a', 'token-a')
+        client_b = self.pool.client('tenant-b', 'token-b')
+
+        self.assertIs(client_a._session, client_b._session)
+        self.assertIsNot(client_a.rate_limiter, client_b.rate_limiter)
+        self.assertIsNot(client_a.retry_policy, client_b.retry_policy)
+
+    def test_token_change_rebuilds_client(self):
+        """アクセストークンが変わるとクライアントを作り直すことを確認"""
+        client = self.pool.client('tenant-a', 'old-token')
+
+        renewed = self.pool.client('tenant-a', 'new-token')
+
+        self.assertIsNot(renewed, client)
+        self.assertEqual(renewed.access_token, 'new-token')
+        self.assertEqual(len(self.pool), 1)
+
+    def test_evicts_least_recently_used(self):
+        """テナント数が上限を超えると最も長く使われていないテナントを破棄することを確認"""
+        self.pool.client('tenant-a', 'token-a')
+        self.pool.client('tenant-b', 'token-b')
+        self.pool.client('tenant-a', 'token-a')
+
+        self.pool.client('tenant-c', 'token-c')
+
+        self.assertEqual(self.pool.tenants, ['tenant-a', 'tenant-c'])
+        self.assertNotIn('tenant-b', self.pool)
+        self.assertEqual(self.pool.stats.evictions, 1)
+
+    def test_evicts_idle_tenants(self):
+        """idle_timeout 秒以上使われていないテナントを破棄することを確認"""
+        self.pool.client('tenant-a', 'token-a')
+        self.now = 30.0
+        self.pool.client('tenant-b', 'token-b')
+        self.now = 70.0
+
+        self.assertEqual(self.pool.evict_idle(), 1)
+        self.assertEqual(self.pool.tenants, ['tenant-b'])
+        self.assertTrue(self.pool.evict('tenant-b'))
+        self.assertFalse(self.pool.evict('tenant-b'))
+
+    def test_rate_limiter_factory(self):
+        """rate_limiter_factory でテナントごとのレートリミッターを指定できることを確認"""
+        pool = RelationClientPool(
+            rate_limiter_factory=lambda subdomain: SharedRateLimiter(f'{subdomain}:token')
+        )
+        self.addCleanup(pool.close)
+
+        client = pool.client('tenant-a', 'token-a')
+
+        self.assertIsInstance(client.rate_limiter, SharedRateLimiter)
+
+    def test_invalid_options(self):
+        """不正な max_tenants や client_options で ValueError になることを確認"""
+        with self.assertRaises(ValueError):
+            RelationClientPool(session=None)
+        with self.assertRaises(ValueError):
+            RelationClientPool(max_tenants=0)
+
+    def test_requests_through_shared_session(self):
+        """払い出したクライアントで実際にリクエストできることを確認"""
+        with LocalAPIServer() as server:
+            server.route('GET', '/api/v2/users', lambda req: (200, {}, [{'user_id': 1}]))
+            with RelationClientPool(base_url=server.base_url) as pool:
+                result_a = pool.client('tenant-a', 'token-a').get('users')
+                result_b = pool.client('tenant-b', 'token-b').get('users')
+
+        self.assertEqual(result_a, [{'user_id': 1}])
+        self.assertEqual(result_b, [{'user_id': 1}])
+        tokens = [request['headers']['Authorization'] for request in server.requests]
+        self.assertEqual(tokens, ['Bearer token-a', 'Bearer token-b'])
+
+    def test_eviction_closes_host_pool(self):
+        """テナントを破棄すると、そのホストのコネクションプールと接続を閉じることを確認"""
+        with LocalAPIServer() as server:
+            server.route('GET', '/api/v2/users', lambda req: (200, {}, []))
+            with RelationClientPool(base_url=server.base_url) as pool:
+                pool.client('tenant-a', 'token-a').get('users')
+                pool.client('tenant-b', 'token-b').get('users')
+                pools = pool._adapter.poolmanager.pools
+                (key,) = pools.keys()
+                host_pool = pools[key]
+                sockets = [conn.sock for conn in list(host_pool.pool.queue) if conn is not None and conn.sock]
+                self.assertEqual(len(sockets), 1)
+
+                # 同じホストを使うテナントが残っている間は閉じない
+                pool.evict('tenant-a')
+                self.assertEqual(pools.keys(), {key})
+
+                pool.evict('tenant-b')
+                self.assertEqual(len(pools), 0)
+                self.assertIsNone(host_pool.pool)
+                self.assertEqual(sockets[0].fileno(), -1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+"""
+優先度付きスケジューラーのテスト
+"""
+
+import threading
+import time
+import unittest
+
+from relation_client import RelationClient
+from relation_client.deadline import Deadline
+from relation_client.exceptions import DeadlineExceededError
+from relation_client.priority import PRIORITY_BATCH, PRIORITY_INTERACTIVE, PriorityScheduler
+from relation_client.rate_limit import RateLimitGovernor
+from relation_client.tests.local_server import LocalAPIServer
+
+
+class StubLimiter:
+    """予約時の待機秒数と、待たずに確保できるかどうかを固定したレートリミッター"""
+
+    def __init__(self, wait=0.0, available=True):
+        self.wait = wait
+        self.available = available
+        self.events = []
+
+    def reserve(self):
+        self.events.append('reserve')
+        return self.wait
+
+    def try_acquire(self, headroom=0.0):
+        if self.available:
+            self.events.append('try_acquire')
+        return self.available
+
+
+class TestRateLimiterHeadroom(unittest.TestCase):
+    """レートリミッターの headroom のテストクラス"""
+
+    def test_governor_keeps_headroom(self):
+        """残りリクエスト数が headroom の割合を下回ると確保しないことを確認"""
+        governor = RateLimitGovernor(clock=lambda: 1000.0)
+        governor.update({'X-RateLimit-Limit': '100', 'X-RateLimit-Remaining': '15', 'X-RateLimit-Reset': '1060'})
+
+        self.assertFalse(governor.try_acquire(headroom=0.2))
+        self.assertTrue(governor.try_acquire())
+
+
+class TestPriorityScheduler(unittest.TestCase):
+    """PriorityScheduler のテストクラス"""
+
+    def test_batch_waits_for_interactive(self):
+        """対話的なリクエストが待っている間、バッチのリクエストは送信を待つことを確認"""
+        scheduler = PriorityScheduler(poll_interval=0.01)
+        limiter = StubLimiter(wait=0.2)
+        order = []
+
+        def interactive():
+            scheduler.acquire(limiter, PRIORITY_INTERACTIVE)
+            order.append('interactive')
+
+        thread = threading.Thread(target=interactive)
+        thread.start()
+        time.sleep(0.05)
+        scheduler.acquire(limiter, PRIORITY_BATCH)
+        order.append('batch')
+        thread.join()
+
+        self.assertEqual(order, ['interactive', 'batch'])
+        self.assertEqual(limiter.events, ['reserve', 'try_acquire'])
+        stats = scheduler.stats
+        self.assertEqual((stats.interactive, stats.batch, stats.promoted), (1, 1, 0))
+
+    def test_batch_is_promoted_after_max_wait(self):
+        """バッチのリクエストが max_batch_wait 秒以上待つと優先度を上げることを確認"""
+        scheduler = PriorityScheduler(max_batch_wait=0.05, poll_interval=0.01)
+        limiter = StubLimiter(available=False)
+        started = time.monotonic()
+        scheduler.acquire(limiter, PRIORITY_BATCH)
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+        self.assertEqual(limiter.events, ['reserve'])
+        self.assertEqual(scheduler.stats.promoted, 1)
+        self.assertEqual(scheduler.stats.batch_waiting, 0)
+
+    def test_batch_wait_respects_deadline(self):
+        """バッチのリクエストの待機にもデッドラインが適用されることを確認"""
+        scheduler = PriorityScheduler(max_batch_wait=10, poll_interval=0.01)
+        with self.assertRaises(DeadlineExceededError):
+            scheduler.acquire(StubLimiter(available=False), PRIORITY_BATCH, deadline=Deadline(0.05))
+
+    def test_invalid_headroom(self):
+        """headroom が範囲外の場合は ValueError になることを確認"""
+        with self.assertRaises(ValueError):
+            PriorityScheduler(headroom=1.0)
+
+
+class TestClientPriority(unittest.TestCase):
+    """RelationClient の優先度指定のテストクラス"""
+
+    def setUp(self):
+        self.server = LocalAPIServer().start()
+        self.server.route('GET', '/api/v2/users', lambda request: (200, {}, []))
+        self.scheduler = PriorityScheduler()
+        self.client = RelationClient('token', 'test', base_url=self.server.base_url, scheduler=self.scheduler)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+    def test_priority_from_argument_and_scope(self):
+        """引数とブロックで指定した優先度がスケジューラーに渡ることを確認"""
+        self.client.get('users')
+        self.client.get('users', priority=PRIORITY_BATCH)
+        with self.client.priority(PRIORITY_BATCH):
+            self.client.get('users')
+            self.client.map(lambda _: self.client.get('users'), range(3))
+
+        stats = self.scheduler.stats
+        self.assertEqual((stats.interactive, stats.batch), (1, 5))
+
+    def test_invalid_priority(self):
+        """不正な優先度は ValueError になることを確認"""
+        with self.assertRaises(ValueError):
+            self.client.get('users', priority='urgent')
+        with self.assertRaises(ValueError):
+            with self.client.priority('urgent'):
+                pass
+
+
+if __name__ == '__main__':
+    unittest.main()
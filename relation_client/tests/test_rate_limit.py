@@ -0,0 +1,145 @@
+"""
+RateLimitGovernorのテスト
+"""
+
+import unittest
+from unittest.mock import patch, MagicMock
+
+from relation_client import RelationClient
+from relation_client.rate_limit import RateLimitGovernor
+
+
+class FakeClock:
+    """テスト用の時計 (sleepで時間が進む)"""
+
+    def __init__(self, now=1700000000.0):
+        self.now = now
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestRateLimitGovernor(unittest.TestCase):
+    """RateLimitGovernorのテストクラス"""
+
+    def setUp(self):
+        """テスト前の準備"""
+        self.clock = FakeClock()
+        self.governor = RateLimitGovernor(clock=self.clock.time, sleep=self.clock.sleep)
+
+    def headers(self, limit, remaining, reset_in):
+        return {
+            'X-RateLimit-Limit': str(limit),
+            'X-RateLimit-Remaining': str(remaining),
+            'X-RateLimit-Reset': str(int(self.clock.now + reset_in)),
+        }
+
+    def test_no_wait_without_headers(self):
+        """ヘッダーを受け取るまでは待機しないことを確認"""
+        for _ in range(10):
+            self.governor.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+        self.assertIsNone(self.governor.status.remaining)
+
+    def test_status(self):
+        """ヘッダーから状態が更新されることを確認"""
+        self.governor.update(self.headers(60, 42, 30))
+
+        status = self.governor.status
+        self.assertEqual(status.limit, 60)
+        self.assertEqual(status.remaining, 42)
+        self.assertEqual(status.reset_at, self.clock.now + 30)
+
+    def test_reset_as_seconds(self):
+        """X-RateLimit-Resetが秒数の場合も扱えることを確認"""
+        self.governor.update({'X-RateLimit-Limit': '60', 'X-RateLimit-Remaining': '10', 'X-RateLimit-Reset': '30'})
+        self.assertEqual(self.governor.status.reset_at, self.clock.now + 30)
+
+    def test_paces_requests(self):
+        """残りリクエストがリセットまでの時間に均等に割り当てられることを確認"""
+        self.governor.update(self.headers(60, 10, 10))
+
+        start = self.clock.now
+        for _ in range(10):
+            self.governor.acquire()
+
+        # 10件を10秒に分散するので、最後のリクエストは9秒後
+        self.assertAlmostEqual(self.clock.now - start, 9.0)
+        self.assertEqual(self.governor.status.remaining, 0)
+
+    def test_waits_for_reset_when_exhausted(self):
+        """残りがない場合はリセット時刻まで待機することを確認"""
+        self.governor.update(self.headers(60, 0, 20))
+
+        self.governor.acquire()
+
+        self.assertEqual(self.clock.sleeps, [20])
+        self.assertEqual(self.governor.status.remaining, 59)
+
+    def test_concurrent_callers_wait_for_reset_when_exhausted(self):
+        """残りがない場合、後続の呼び出しもリセット後の期間に均等に割り当てられることを確認"""
+        self.governor.update(self.headers(10, 10, 60))
+        self.governor.update(self.headers(10, 0, 30))
+
+        waits = [self.governor.reserve() for _ in range(5)]
+
+        # リセット (30秒後) から、10件を60秒の期間に6秒間隔で割り当てる
+        self.assertEqual(waits, [30.0, 36.0, 42.0, 48.0, 54.0])
+        self.assertEqual(self.governor.status.remaining, 5)
+        self.assertEqual(self.governor.status.reset_at, self.clock.now + 90)
+
+    def test_exhausted_without_limit_waits_for_reset(self):
+        """上限がわからない場合は、後続の呼び出しもリセット時刻まで待機することを確認"""
+        self.governor.update({'Retry-After': '15'}, status_code=429)
+
+        self.assertEqual([self.governor.reserve() for _ in range(3)], [15.0, 15.0, 15.0])
+
+    def test_safety_margin(self):
+        """安全マージン分のリクエストが残されることを確認"""
+        governor = RateLimitGovernor(safety_margin=5, clock=self.clock.time, sleep=self.clock.sleep)
+        governor.update(self.headers(60, 5, 20))
+
+        governor.acquire()
+
+        self.assertEqual(self.clock.sleeps, [20])
+
+    def test_too_many_requests(self):
+        """429を受け取った場合はRetry-Afterまで送信しないことを確認"""
+        self.governor.update({'Retry-After': '15'}, status_code=429)
+
+        self.assertEqual(self.governor.status.remaining, 0)
+        self.governor.acquire()
+        self.assertEqual(self.clock.sleeps, [15])
+
+
+class TestClientRateLimit(unittest.TestCase):
+    """RelationClientとレートリミットの連携のテストクラス"""
+
+    @patch('requests.Session.request')
+    def test_rate_limit_status(self, mock_request):
+        """レスポンスヘッダーがrate_limit_statusに反映されることを確認"""
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.headers = {
+            'X-RateLimit-Limit': '60',
+            'X-RateLimit-Remaining': '59',
+            'X-RateLimit-Reset': '1700000060',
+        }
+        mock_response.json.return_value = {}
+        mock_request.return_value = mock_response
+
+        client = RelationClient(access_token='test_token', subdomain='test', rate_limit_margin=2)
+        client.get('test_path')
+
+        self.assertEqual(client.rate_limit_status.limit, 60)
+        self.assertEqual(client.rate_limit_status.remaining, 59)
+        self.assertEqual(client.rate_limiter.safety_margin, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+"""
+リトライポリシーのテスト
+"""
+
+import unittest
+from unittest.mock import patch, MagicMock
+
+import requests
+
+from relation_client import RelationClient
+from relation_client.exceptions import ServiceUnavailableError, APIError
+from relation_client.retry import (
+    ExponentialBackoff, RetryBudget, RetryPolicy, parse_retry_after
+)
+
+
+class TestParseRetryAfter(unittest.TestCase):
+    """parse_retry_afterのテストクラス"""
+
+    def test_seconds(self):
+        """秒数形式を解釈できることを確認"""
+        self.assertEqual(parse_retry_after('120'), 120.0)
+        self.assertEqual(parse_retry_after(5), 5.0)
+
+    def test_http_date(self):
+        """HTTP日付形式を解釈できることを確認"""
+        now = 1445412450.0  # 2015-10-21 07:27:30 GMT
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT', now=now), 30.0)
+
+    def test_past_date(self):
+        """過去の日付は0秒になることを確認"""
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT', now=1445412500.0), 0.0)
+
+    def test_invalid(self):
+        """解釈できない値はNoneになることを確認"""
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertIsNone(parse_retry_after(MagicMock()))
+
+
+class TestExponentialBackoff(unittest.TestCase):
+    """ExponentialBackoffのテストクラス"""
+
+    def test_backoff_without_jitter(self):
+        """ジッターなしでは待機秒数が倍々に増え、上限で止まることを確認"""
+        policy = ExponentialBackoff(max_retries=10, base_delay=1.0, max_delay=5.0, jitter=False)
+        self.assertEqual([policy.wait_time(n) for n in range(5)], [1.0, 2.0, 4.0, 5.0, 5.0])
+
+    def test_full_jitter(self):
+        """フルジッターでは0〜上限の一様乱数になることを確認"""
+        calls = []
+
+        def fake_uniform(low, high):
+            calls.append((low, high))
+            return high / 2
+
+        policy = ExponentialBackoff(base_delay=1.0, max_delay=30.0, random_func=fake_uniform)
+
+        self.assertEqual(policy.wait_time(3), 4.0)
+        self.assertEqual(calls, [(0, 8.0)])
+
+    def test_retry_after(self):
+        """Retry-Afterがある場合はそれに小さなジッターを加えることを確認"""
+        policy = ExponentialBackoff(base_delay=1.0, random_func=lambda low, high: high)
+        self.assertEqual(policy.wait_time(0, retry_after=10.0), 11.0)
+        self.assertEqual(RetryPolicy(delay=1.0).wait_time(0, retry_after=10.0), 10.0)
+
+    def test_max_retries(self):
+        """リトライ最大回数を超えるとリトライしないことを確認"""
+        policy = ExponentialBackoff(max_retries=2)
+        self.assertTrue(policy.allow_retry(0))
+        self.assertTrue(policy.allow_retry(1))
+        self.assertFalse(policy.allow_retry(2))
+
+
+class TestRetryBudget(unittest.TestCase):
+    """RetryBudgetのテストクラス"""
+
+    def setUp(self):
+        """テスト前の準備"""
+        self.now = 0.0
+        self.budget = RetryBudget(ratio=0.1, min_retries=2, window=10.0, clock=lambda: self.now)
+
+    def test_min_retries(self):
+        """リクエストが少なくてもmin_retries件まではリトライできることを確認"""
+        self.assertTrue(self.budget.try_spend())
+        self.assertTrue(self.budget.try_spend())
+        self.assertFalse(self.budget.try_spend())
+
+    def test_ratio(self):
+        """リクエスト数に比例してリトライ予算が増えることを確認"""
+        for _ in range(30):
+            self.budget.record_request()
+        spent = sum(1 for _ in range(10) if self.budget.try_spend())
+        self.assertEqual(spent, 5)  # 2 + 30 × 0.1
+
+    def test_window(self):
+        """計測期間を過ぎると予算が回復することを確認"""
+        self.budget.try_spend()
+        self.budget.try_spend()
+        self.now = 11.0
+        self.assertTrue(self.budget.try_spend())
+
+
+class TestClientRetry(unittest.TestCase):
+    """RelationClientのリトライのテストクラス"""
+
+    def make_response(self, status_code, headers=None):
+        response = MagicMock()
+        response.status_code = status_code
+        response.headers = headers or {}
+        response.json.return_value = {'error': 'error'}
+        return response
+
+    @patch('relation_client.client.time.sleep')
+    @patch('requests.Session.request')
+    def test_retry_after_http_date(self, mock_request, mock_sleep):
+        """HTTP日付形式のRetry-Afterでもリトライできることを確認"""
+        ok = self.make_response(200)
+        ok.json.return_value = {'data': 'ok'}
+        mock_request.side_effect = [
+            self.make_response(429, {'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'}),
+            ok,
+        ]
+        policy = ExponentialBackoff(max_retries=3, base_delay=1.0, jitter=False)
+        client = RelationClient(access_token='test_token', subdomain='test', retry_policy=policy)
+
+        self.assertEqual(client.get('test_path'), {'data': 'ok'})
+        self.assertEqual(mock_sleep.call_args_list[-1][0][0], 0.0)
+
+    @patch('relation_client.client.time.sleep')
+    @patch('requests.Session.request')
+    def test_backoff_on_service_unavailable(self, mock_request, mock_sleep):
+        """503では指数バックオフで待機してからリトライすることを確認"""
+        mock_request.return_value = self.make_response(503)
+        policy = ExponentialBackoff(max_retries=3, base_delay=1.0, jitter=False)
+        client = RelationClient(access_token='test_token', subdomain='test', retry_policy=policy)
+
+        with self.assertRaises(ServiceUnavailableError):
+            client.get('test_path')
+
+        self.assertEqual(mock_request.call_count, 4)
+        self.assertEqual([c[0][0] for c in mock_sleep.call_args_list], [1.0, 2.0, 4.0])
+
+    @patch('relation_client.client.time.sleep')
+    @patch('requests.Session.request')
+    def test_budget_limits_retries(self, mock_request, mock_sleep):
+        """リトライ予算を使い切るとリトライせずに失敗することを確認"""
+        mock_request.side_effect = requests.ConnectionError('connection refused')
+        policy = RetryPolicy(max_retries=3, delay=0, budget=RetryBudget(ratio=0, min_retries=1))
+        client = RelationClient(access_token='test_token', subdomain='test', retry_policy=policy)
+
+        with self.assertRaises(APIError):
+            client.get('test_path')
+        self.assertEqual(mock_request.call_count, 2)
+
+        mock_request.reset_mock()
+        with self.assertRaises(APIError):
+            client.get('test_path')
+        self.assertEqual(mock_request.call_count, 1)
+
+    def test_default_policy(self):
+        """デフォルトではmax_retriesとretry_delayから指数バックオフが生成されることを確認"""
+        client = RelationClient(access_token='test_token', subdomain='test', max_retries=5, retry_delay=2)
+        self.assertIsInstance(client.retry_policy, ExponentialBackoff)
+        self.assertEqual(client.retry_policy.max_retries, 5)
+        self.assertEqual(client.retry_policy.base_delay, 2)
+        self.assertIsNotNone(client.retry_policy.budget)
+
+
+if __name__ == '__main__':
+    unittest.main()
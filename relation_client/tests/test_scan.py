@@ -0,0 +1,219 @@
+"""
+分割スキャンのテスト
+"""
+
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from datetime import datetime, timedelta, timezone
+
+from relation_client import RelationClient
+from relation_client.exceptions import InvalidRequestError
+from relation_client.models import Ticket
+from relation_client.scan import ScanShard, TicketScanner, parse_time
+from relation_client.tests.local_server import LocalAPIServer
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+STATUSES = ['open', 'ongoing', 'closed']
+
+
+def make_inbox(count, spread=timedelta(days=30), second_message_every=7):
+    """チケットID・ステータス・担当者・メッセージの送信日時のリストを作成します"""
+    tickets = []
+    for ticket_id in range(1, count + 1):
+        sent = [START + spread * (ticket_id / (count + 1))]
+        if ticket_id % second_message_every == 0:
+            # 別の期間に含まれる2通目のメッセージ
+            sent.append(sent[0] + spread / 2 if sent[0] + spread / 2 < START + spread else START)
+        tickets.append({
+            'ticket_id': ticket_id,
+            'status_cd': STATUSES[ticket_id % 3],
+            'assignee': 'yamada' if ticket_id % 2 else 'tanaka',
+            'sent': sent,
+        })
+    return tickets
+
+
+class SearchHandler:
+    """since/until・status_cds・assignee で絞り込んでページ単位で返す検索ハンドラー"""
+
+    def __init__(self, tickets):
+        self.tickets = tickets
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+
+    def __call__(self, request):
+        body = request['json']
+        if body.get('status_cds') == ['invalid']:
+            return 400, {}, {'error': 'invalid status'}
+        with self.lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(0.005)
+        since, until = parse_time(body['since']), parse_time(body['until'])
+        matched = [
+            t for t in self.tickets
+            if any(since <= sent < until for sent in t['sent'])
+            and ('status_cds' not in body or t['status_cd'] in body['status_cds'])
+            and ('assignee' not in body or t['assignee'] == body['assignee'])
+        ]
+        start = (body['page'] - 1) * body['per_page']
+        page = matched[start:start + body['per_page']]
+        with self.lock:
+            self.in_flight -= 1
+        return 200, {}, [{'ticket_id': t['ticket_id'], 'status_cd': t['status_cd']} for t in page]
+
+
+class TestPlan(unittest.TestCase):
+    """TicketScanner.plan のテストクラス"""
+
+    def test_windows_and_dimensions(self):
+        """期間の分割数と各次元の値の組み合わせごとにシャードを作ることを確認"""
+        scanner = TicketScanner(client=None)
+        shards = scanner.plan('2024-01-01T00:00:00Z', '2024-01-05T00:00:00Z', windows=4,
+                              status_cds=['open', 'closed'], assignees=['yamada', 'tanaka', 'suzuki'],
+                              label_ids=[1])
+
+        self.assertEqual(len(shards), 4 * 2 * 3)
+        windows = sorted({(s.since, s.until) for s in shards})
+        self.assertEqual(windows[0], (START, START + timedelta(days=1)))
+        self.assertEqual(windows[-1][1], START + timedelta(days=4))
+        self.assertEqual(shards[0].filters, {'label_ids': [1], 'status_cds': ['open'], 'assignee': 'yamada'})
+        self.assertEqual(shards[0].search_params()['since'], '2024-01-01T00:00:00+00:00')
+
+    def test_invalid_arguments(self):
+        """不正な期間・分割数・検索条件は ValueError になることを確認"""
+        scanner = TicketScanner(client=None)
+        with self.assertRaises(ValueError):
+            scanner.plan(START, START)
+        with self.assertRaises(ValueError):
+            scanner.plan(START, START + timedelta(days=1), windows=0)
+        with self.assertRaises(ValueError):
+            scanner.plan(START, START + timedelta(days=1), page=2)
+        with self.assertRaises(ValueError):
+            TicketScanner(client=None, max_workers=0)
+
+    def test_split(self):
+        """シャードの期間を秒単位で二等分し、1秒の期間は分割しないことを確認"""
+        shard = ScanShard(START, START + timedelta(seconds=3), {'status_cds': ['open']})
+        first, second = shard.split()
+        self.assertEqual((first.since, first.until), (START, START + timedelta(seconds=1)))
+        self.assertEqual((second.since, second.until), (START + timedelta(seconds=1), START + timedelta(seconds=3)))
+        self.assertEqual(second.filters, {'status_cds': ['open']})
+        self.assertIsNone(ScanShard(START, START + timedelta(seconds=1)).split())
+
+
+class InstantTickets:
+    """API を呼び出さずに検索結果を返すチケットリソース (最初の期間は即座に空の結果を返す)"""
+
+    def __init__(self, tickets):
+        self.tickets = tickets
+
+    def search(self, message_box_id, per_page, page, since, until, **filters):
+        since, until = parse_time(since), parse_time(until)
+        if since == START:
+            return []
+        time.sleep(0.001)
+        matched = [t for t in self.tickets if any(since <= sent < until for sent in t['sent'])]
+        start = (page - 1) * per_page
+        return [Ticket.from_dict({'ticket_id': t['ticket_id']}) for t in matched[start:start + per_page]]
+
+
+class TestScanShards(unittest.TestCase):
+    """TicketScanner.scan_shards の終了判定のテストクラス"""
+
+    def test_empty_first_shard_does_not_end_scan(self):
+        """最初のシャードが残りのシャードの投入前に終了しても、残りのシャードを取得することを確認"""
+        inbox = make_inbox(49, spread=timedelta(days=7), second_message_every=100)
+        client = SimpleNamespace(tickets=InstantTickets(inbox))
+        scanner = TicketScanner(client, max_workers=4, per_page=10)
+
+        for _ in range(30):
+            tickets = list(scanner.scan(1, START, START + timedelta(days=7), windows=7))
+            self.assertEqual(len(tickets), 42)
+            self.assertEqual(scanner.stats.shards, 7)
+
+
+class TestScan(unittest.TestCase):
+    """TicketScanner.scan のテストクラス"""
+
+    def setUp(self):
+        self.server = LocalAPIServer().start()
+        self.client = RelationClient('token', 'test', base_url=self.server.base_url)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+    def serve(self, tickets):
+        handler = SearchHandler(tickets)
+        self.server.route('POST', '/api/v2/1/tickets/search', handler)
+        return handler
+
+    def test_scan_returns_each_ticket_once(self):
+        """すべてのチケットを1件ずつ返し、複数の期間に含まれるチケットを重複して返さないことを確認"""
+        inbox = make_inbox(400)
+        handler = self.serve(inbox)
+        scanner = TicketScanner(self.client, max_workers=4, per_page=20)
+
+        tickets = list(scanner.scan(1, START, START + timedelta(days=30), windows=6, status_cds=STATUSES))
+
+        self.assertEqual(sorted(t.ticket_id for t in tickets), list(range(1, 401)))
+        self.assertEqual(scanner.stats.shards, 18)
+        self.assertEqual(scanner.stats.tickets, 400)
+        self.assertGreater(scanner.stats.duplicates, 0)
+        self.assertGreater(handler.peak, 1)
+
+    def test_dense_window_is_split(self):
+        """ページ数が max_pages に達した期間は分割し、深いページをたどらないことを確認"""
+        self.serve(make_inbox(500, spread=timedelta(days=2)))
+        scanner = TicketScanner(self.client, max_workers=4, max_pages=3, per_page=20)
+
+        tickets = list(scanner.scan(1, START, START + timedelta(days=2)))
+
+        self.assertEqual(len({t.ticket_id for t in tickets}), 500)
+        self.assertGreater(scanner.stats.splits, 0)
+        self.assertEqual(scanner.stats.refetched, scanner.stats.splits * 3)
+        self.assertEqual(scanner.stats.pages, len(self.server.requests))
+        self.assertLessEqual(max(r['json']['page'] for r in self.server.requests), 3)
+
+    def test_window_shorter_than_min_window_is_paged_through(self):
+        """min_window より短い期間は分割せずに最後のページまでたどることを確認"""
+        self.serve(make_inbox(120, spread=timedelta(seconds=30)))
+        scanner = TicketScanner(self.client, max_pages=2, per_page=10, min_window=timedelta(minutes=1))
+
+        tickets = list(scanner.scan(1, START, START + timedelta(seconds=30)))
+
+        self.assertEqual(len({t.ticket_id for t in tickets}), 120)
+        self.assertEqual(scanner.stats.splits, 0)
+        self.assertEqual(max(r['json']['page'] for r in self.server.requests), 13)
+
+    def test_error_stops_scan(self):
+        """シャードの検索が失敗すると、スキャン全体がその例外で終了することを確認"""
+        self.serve(make_inbox(100))
+        scanner = TicketScanner(self.client, max_workers=2, per_page=10)
+
+        with self.assertRaises(InvalidRequestError):
+            list(scanner.scan(1, START, START + timedelta(days=30), status_cds=['open', 'invalid']))
+
+    def test_early_stop(self):
+        """途中で反復をやめると、以降のページとシャードを取得しないことを確認"""
+        self.serve(make_inbox(1000))
+        scanner = TicketScanner(self.client, max_workers=2, per_page=10)
+
+        tickets = scanner.scan(1, START, START + timedelta(days=30), windows=10)
+        for _ in range(5):
+            next(tickets)
+        tickets.close()
+        time.sleep(0.2)
+        requested = len(self.server.requests)
+        time.sleep(0.2)
+
+        self.assertEqual(len(self.server.requests), requested)
+        self.assertLess(requested, 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+"""
+SharedRateLimiterのテスト
+"""
+
+import multiprocessing
+import shutil
+import tempfile
+import time
+import unittest
+
+from relation_client.rate_limit import SharedRateLimiter
+
+
+def _worker(directory, count, results):
+    """子プロセスでトークンを取得し、取得時刻を記録する"""
+    limiter = SharedRateLimiter('tenant-a', max_requests=40, period=1.0, burst=4, directory=directory)
+    timestamps = []
+    for _ in range(count):
+        limiter.acquire()
+        timestamps.append(time.time())
+    results.put(timestamps)
+
+
+class FakeClock:
+    """テスト用の時計 (sleepで時間が進む)"""
+
+    def __init__(self, now=1700000000.0):
+        self.now = now
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestSharedRateLimiter(unittest.TestCase):
+    """SharedRateLimiterのテストクラス"""
+
+    def setUp(self):
+        """テスト前の準備"""
+        self.directory = tempfile.mkdtemp()
+        self.clock = FakeClock()
+
+    def tearDown(self):
+        """テスト後の後片付け"""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def make_limiter(self, tenant_key='tenant-a', **kwargs):
+        return SharedRateLimiter(
+            tenant_key, directory=self.directory, clock=self.clock.time, sleep=self.clock.sleep, **kwargs
+        )
+
+    def test_burst_then_rate(self):
+        """バースト分を使い切った後は一定レートで待機することを確認"""
+        limiter = self.make_limiter(max_requests=10, period=1.0, burst=2)
+
+        self.assertEqual(limiter.reserve(), 0.0)
+        self.assertEqual(limiter.reserve(), 0.0)
+        self.assertAlmostEqual(limiter.reserve(), 0.1)
+        self.assertAlmostEqual(limiter.reserve(), 0.2)
+
+    def test_shared_between_instances(self):
+        """同じテナントキーのインスタンス同士で予算を共有することを確認"""
+        first = self.make_limiter(max_requests=10, period=1.0, burst=1)
+        second = self.make_limiter(max_requests=10, period=1.0, burst=1)
+        other = self.make_limiter(tenant_key='tenant-b', max_requests=10, period=1.0, burst=1)
+
+        self.assertEqual(first.reserve(), 0.0)
+        self.assertAlmostEqual(second.reserve(), 0.1)
+        self.assertEqual(other.reserve(), 0.0)
+
+    def test_too_many_requests_blocks_all(self):
+        """429を受け取るとRetry-Afterまで全インスタンスが待機することを確認"""
+        first = self.make_limiter(max_requests=10, period=1.0)
+        second = self.make_limiter(max_requests=10, period=1.0)
+
+        first.update({'Retry-After': '5'}, status_code=429)
+
+        self.assertAlmostEqual(second.reserve(), 5.1)
+
+    def test_server_remaining_exhausted(self):
+        """サーバーの残りリクエスト数が安全マージン以下になるとリセットまで待機することを確認"""
+        limiter = self.make_limiter(max_requests=60, period=60.0, safety_margin=2)
+
+        limiter.update({
+            'X-RateLimit-Limit': '60',
+            'X-RateLimit-Remaining': '2',
+            'X-RateLimit-Reset': str(int(self.clock.now + 30)),
+        })
+
+        self.assertEqual(limiter.status.remaining, 2)
+        self.assertGreaterEqual(limiter.reserve(), 30)
+
+    def test_aggregate_rate_across_processes(self):
+        """複数プロセスの合計レートが上限を超えないことを確認"""
+        processes_count, per_process = 4, 12
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=_worker, args=(self.directory, per_process, results))
+            for _ in range(processes_count)
+        ]
+        for process in processes:
+            process.start()
+        timestamps = sorted(t for _ in processes for t in results.get(timeout=30))
+        for process in processes:
+            process.join()
+
+        self.assertEqual(len(timestamps), processes_count * per_process)
+        # 任意の0.5秒の区間で、バースト(4) + レート(40/秒 × 0.5秒) + 誤差1件を超えない
+        window = 0.5
+        for i, start in enumerate(timestamps):
+            in_window = sum(1 for t in timestamps[i:] if t - start <= window)
+            self.assertLessEqual(in_window, 4 + 40 * window + 1)
+        # 全体としてもレートに従って時間がかかっていること
+        self.assertGreaterEqual(timestamps[-1] - timestamps[0], (len(timestamps) - 4) / 40 * 0.9)
+
+
+if __name__ == '__main__':
+    unittest.main()
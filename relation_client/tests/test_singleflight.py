@@ -0,0 +1,174 @@
+"""
+リクエスト集約 (singleflight) のテスト
+"""
+
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from relation_client import RelationClient
+from relation_client.deadline import CancellationToken
+from relation_client.exceptions import OperationCancelledError, ResourceNotFoundError
+from relation_client.middleware import APIRequest
+from relation_client.retry import RetryPolicy
+from relation_client.singleflight import SingleflightMiddleware
+from relation_client.tests.local_server import LocalAPIServer
+
+
+def slow(status, body):
+    def handler(request):
+        time.sleep(0.2)
+        return status, {}, body
+    return handler
+
+
+class TestSingleflightMiddleware(unittest.TestCase):
+    """SingleflightMiddleware のテストクラス"""
+
+    def test_sequential_calls_are_not_coalesced(self):
+        """送信中のリクエストがなければ毎回送信することを確認"""
+        middleware = SingleflightMiddleware()
+        calls = []
+        for _ in range(3):
+            middleware(APIRequest('GET', 'users'), lambda request: calls.append(request) or {})
+
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(middleware.stats.coalesced, 0)
+        self.assertEqual(middleware.stats.in_flight, 0)
+
+    def test_key_ignores_param_order(self):
+        """クエリパラメータの順序が違っても同じリクエストとみなすことを確認"""
+        key = SingleflightMiddleware._key
+        self.assertEqual(
+            key(APIRequest('GET', 'users', params={'a': 1, 'b': 2})),
+            key(APIRequest('GET', '/users', params={'b': 2, 'a': 1}))
+        )
+        self.assertNotEqual(
+            key(APIRequest('GET', 'users', params={'a': 1})),
+            key(APIRequest('GET', 'users', params={'a': 2}))
+        )
+
+    def start_leader(self, middleware, result):
+        """結果を返さずに待機する送信中のリクエストを開始します"""
+        release = threading.Event()
+
+        def call_next(request):
+            release.wait(5)
+            return result
+
+        executor = ThreadPoolExecutor(1)
+        self.addCleanup(executor.shutdown)
+        self.addCleanup(release.set)
+        future = executor.submit(middleware, APIRequest('GET', 'users'), call_next)
+        while middleware.stats.in_flight == 0:
+            time.sleep(0.001)
+        return release, future
+
+    def test_every_caller_gets_independent_copy(self):
+        """送信した呼び出し元を含め、全ての呼び出し元が独立した複製を受け取ることを確認"""
+        middleware = SingleflightMiddleware()
+        original = {'users': [1]}
+        release, leader = self.start_leader(middleware, original)
+
+        with ThreadPoolExecutor(1) as executor:
+            follower = executor.submit(middleware, APIRequest('GET', 'users'), lambda request: None)
+            while middleware.stats.coalesced == 0:
+                time.sleep(0.001)
+            release.set()
+            leader_result = leader.result(5)
+            leader_result['users'].append(2)
+            follower_result = follower.result(5)
+
+        self.assertIsNot(leader_result, original)
+        self.assertEqual(original, {'users': [1]})
+        self.assertEqual(follower_result, {'users': [1]})
+
+    def test_waiting_caller_can_be_cancelled(self):
+        """結果を待っている呼び出しが、送信中のリクエストの完了を待たずにキャンセルできることを確認"""
+        middleware = SingleflightMiddleware()
+        release, leader = self.start_leader(middleware, {})
+        token = CancellationToken()
+        threading.Timer(0.05, token.cancel).start()
+
+        started = time.monotonic()
+        with self.assertRaises(OperationCancelledError):
+            middleware(APIRequest('GET', 'users', token=token), lambda request: None)
+
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertFalse(leader.done())
+
+
+class TestClientCoalescing(unittest.TestCase):
+    """RelationClient のリクエスト集約のテストクラス"""
+
+    def setUp(self):
+        self.server = LocalAPIServer().start()
+        self.server.route('GET', '/api/v2/users', slow(200, [{'user_id': 1}]))
+        self.server.route('GET', '/api/v2/missing', slow(404, {'error': 'Not Found'}))
+        self.server.route('POST', '/api/v2/users', slow(201, {'user_id': 2}))
+        self.client = RelationClient('token', 'test', base_url=self.server.base_url, pool_maxsize=20,
+                                     retry_policy=RetryPolicy(max_retries=0, delay=0),
+                                     coalesce_requests=True)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+    def run_concurrently(self, call, count=10):
+        barrier = threading.Barrier(count)
+
+        def run():
+            barrier.wait()
+            try:
+                return call()
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(count) as executor:
+            return list(executor.map(lambda _: run(), range(count)))
+
+    def test_identical_gets_share_one_request(self):
+        """同時に実行された同じGETは1件だけ送信し、全員が同じ結果を受け取ることを確認"""
+        results = self.run_concurrently(lambda: self.client.get('users'))
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(results, [[{'user_id': 1}]] * 10)
+        self.assertEqual(len({id(result) for result in results}), 10)
+        self.assertEqual(self.client.coalescing_stats.coalesced, 9)
+
+    def test_exception_is_shared(self):
+        """送信したリクエストの例外が全員に伝わることを確認"""
+        results = self.run_concurrently(lambda: self.client.get('missing'))
+
+        self.assertEqual(len(self.server.requests), 1)
+        for result in results:
+            self.assertIsInstance(result, ResourceNotFoundError)
+
+    def test_different_params_are_not_coalesced(self):
+        """クエリパラメータが異なるリクエストはまとめないことを確認"""
+        counter = iter(range(4))
+        lock = threading.Lock()
+
+        def call():
+            with lock:
+                page = next(counter) % 2
+            return self.client.get('users', params={'page': page})
+
+        self.run_concurrently(call, count=4)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_post_is_not_coalesced(self):
+        """POSTリクエストはまとめないことを確認"""
+        self.run_concurrently(lambda: self.client.post('users', {'name': 'a'}), count=3)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_disabled_by_default(self):
+        """coalesce_requests を指定しない場合は無効であることを確認"""
+        client = RelationClient('token', 'test', base_url=self.server.base_url)
+        self.addCleanup(client.close)
+        self.assertIsNone(client.coalescing_stats)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,184 @@
+"""
+ストリーミングJSON解析のテスト
+"""
+
+import json
+import threading
+import unittest
+
+import requests
+
+from relation_client import AsyncRelationClient, RelationClient
+from relation_client.exceptions import APIConnectionError, ResourceNotFoundError
+from relation_client.models import Message, Ticket
+from relation_client.streaming import ItemStream, iter_json_array
+from relation_client.tests.local_server import LocalAPIServer
+from relation_client.transport import Urllib3Transport
+
+TICKET = {
+    'ticket_id': 1,
+    'title': '件名 "引用" \\ バックスラッシュ',
+    'messages': [
+        {'message_id': i, 'body': '<p>本文</p>' * i, 'is_html': True, 'comments': [], 'attachments': []}
+        for i in range(1, 6)
+    ],
+    'label_ids': [1, 2],
+}
+TICKETS = [dict(TICKET, ticket_id=i) for i in range(1, 4)]
+
+
+def split(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class FakeStreamingResponse:
+    """チャンクを1つずつ返し、読み込んだチャンク数を記録するレスポンス"""
+
+    def __init__(self, chunks, error=None):
+        self.status_code = 200
+        self.headers = {}
+        self.chunks = chunks
+        self.error = error
+        self.read = 0
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+        if self.error is not None:
+            raise self.error
+
+    def close(self):
+        self.closed = True
+
+
+class TestIterJSONArray(unittest.TestCase):
+    """iter_json_array のテストクラス"""
+
+    def test_any_chunk_boundary(self):
+        """どの位置でチャンクが分かれても同じ要素が返ることを確認 (マルチバイト文字・エスケープを含む)"""
+        body = json.dumps(TICKETS, ensure_ascii=False, indent=2).encode('utf-8')
+        for size in (1, 2, 3, 5, 17, 4096):
+            self.assertEqual(list(iter_json_array(split(body, size))), TICKETS, size)
+
+    def test_nested_path(self):
+        """キーをたどった先の配列の要素だけが返ることを確認"""
+        body = json.dumps(TICKET, ensure_ascii=False).encode('utf-8')
+        self.assertEqual(list(iter_json_array(split(body, 7), path=('messages',))), TICKET['messages'])
+        self.assertEqual(list(iter_json_array([b'{"messages": null}'], path=('messages',))), [])
+        self.assertEqual(list(iter_json_array([b'{"ticket_id": 1}'], path=('messages',))), [])
+
+    def test_scalars_and_empty(self):
+        """数値・真偽値・null・文字列の要素と空の配列を扱えることを確認"""
+        self.assertEqual(list(iter_json_array([b' [1, -2.5e3 ,true,', b'null,"x"] '])), [1, -2500.0, True, None, 'x'])
+        self.assertEqual(list(iter_json_array([b'[ ]'])), [])
+
+    def test_invalid_json(self):
+        """途中で終わっているJSONや配列でないJSONは ValueError になることを確認"""
+        with self.assertRaises(ValueError):
+            list(iter_json_array([b'[{"ticket_id": 1}, {"ticket']))
+        with self.assertRaises(ValueError):
+            list(iter_json_array([b'{"ticket_id": 1}']))
+        with self.assertRaises(ValueError):
+            list(iter_json_array([b'[1 2]']))
+
+
+class TestItemStream(unittest.TestCase):
+    """ItemStream のテストクラス"""
+
+    def test_yields_before_whole_body_is_received(self):
+        """要素のJSONを受信し終えた時点で、残りを受信する前に返すことを確認"""
+        body = json.dumps(TICKETS, ensure_ascii=False).encode('utf-8')
+        response = FakeStreamingResponse(split(body, 256))
+        stream = ItemStream(response)
+
+        self.assertEqual(next(stream), TICKETS[0])
+        self.assertLess(response.read, len(response.chunks) / 2)
+        self.assertEqual(list(stream), TICKETS[1:])
+        self.assertEqual(response.read, len(response.chunks))
+        self.assertTrue(response.closed)
+
+    def test_close_stops_receiving(self):
+        """途中で close() するとレスポンスを閉じることを確認"""
+        response = FakeStreamingResponse([b'[1,', b'2,', b'3]'])
+        with ItemStream(response) as stream:
+            self.assertEqual(next(stream), 1)
+        self.assertTrue(response.closed)
+        self.assertEqual(list(stream), [])
+
+    def test_connection_error_while_receiving(self):
+        """受信中の接続エラーは APIConnectionError になることを確認"""
+        response = FakeStreamingResponse([b'[1,'], error=requests.ConnectionError('reset'))
+        stream = ItemStream(response)
+        self.assertEqual(next(stream), 1)
+        with self.assertRaises(APIConnectionError):
+            next(stream)
+        self.assertTrue(response.closed)
+
+
+class TestClientStreaming(unittest.TestCase):
+    """RelationClient のストリーミングのテストクラス"""
+
+    def setUp(self):
+        self.server = LocalAPIServer().start()
+        self.server.route('POST', '/api/v2/1/tickets/search', lambda request: (200, {}, TICKETS))
+        self.server.route('GET', '/api/v2/1/tickets/1', lambda request: (200, {}, TICKET))
+        self.server.route('GET', '/api/v2/1/tickets/404', lambda request: (404, {}, {'error': 'not found'}))
+        self.server.route('GET', '/api/v2/users', lambda request: (200, {}, []))
+
+    def tearDown(self):
+        self.server.stop()
+
+    def check_transport(self, client):
+        tickets = list(client.tickets.stream_search(1, status_cds=['open'], per_page=3))
+        self.assertEqual([ticket.ticket_id for ticket in tickets], [1, 2, 3])
+        self.assertIsInstance(tickets[0], Ticket)
+        self.assertEqual(len(tickets[0].messages), 5)
+        self.assertEqual(self.server.requests[-1]['json'], {'status_cds': ['open'], 'per_page': 3, 'page': 1})
+
+        messages = list(client.tickets.stream_messages(1, 1))
+        self.assertIsInstance(messages[0], Message)
+        self.assertEqual([message.message_id for message in messages], [1, 2, 3, 4, 5])
+
+        with self.assertRaises(ResourceNotFoundError):
+            next(client.tickets.stream_messages(1, 404))
+
+    def test_requests_transport(self):
+        """既定のトランスポートで検索結果とメッセージを1件ずつ取得できることを確認"""
+        with RelationClient('token', 'test', base_url=self.server.base_url) as client:
+            self.check_transport(client)
+            # 読み終えた接続はコネクションプールに戻り、再利用される
+            self.assertEqual(self.server.connections, 1)
+
+    def test_urllib3_transport(self):
+        """Urllib3Transport で検索結果とメッセージを1件ずつ取得できることを確認"""
+        transport = Urllib3Transport()
+        with RelationClient('token', 'test', base_url=self.server.base_url, transport=transport) as client:
+            self.check_transport(client)
+            self.assertEqual(self.server.connections, 1)
+        transport.close()
+
+    def test_early_close_releases_connection(self):
+        """途中で反復をやめて close() すると、接続が解放されることを確認"""
+        client = RelationClient('token', 'test', base_url=self.server.base_url, pool_maxsize=1)
+        tickets = client.tickets.stream_search(1)
+        next(tickets)
+        tickets.close()
+
+        done = threading.Event()
+        thread = threading.Thread(target=lambda: (client.get('users'), done.set()), daemon=True)
+        thread.start()
+        thread.join(2)
+        self.assertTrue(done.is_set())
+        client.close()
+
+    def test_not_available_on_async_client(self):
+        """非同期クライアントではストリーミングのメソッドを使えないことを確認"""
+        client = AsyncRelationClient('token', 'test', base_url=self.server.base_url)
+        with self.assertRaises(AttributeError):
+            client.tickets.stream_search
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,196 @@
+"""
+差分同期のテスト
+"""
+
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from relation_client import RelationClient
+from relation_client.scan import parse_time
+from relation_client.sync import (
+    FileWatermarkStore, MemoryWatermarkStore, SyncState, TicketSyncEngine
+)
+from relation_client.tests.local_server import LocalAPIServer
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class Inbox:
+    """チケットの最後のメッセージの送信日時と最終更新日時を保持し、since で絞り込んで返す検索ハンドラー"""
+
+    def __init__(self, count):
+        self.tickets = {
+            ticket_id: {'sent': START + timedelta(hours=ticket_id), 'updated': START + timedelta(hours=ticket_id)}
+            for ticket_id in range(1, count + 1)
+        }
+
+    def touch(self, ticket_id, at, sent=None):
+        """チケットを更新します (sent を省略した場合は更新日時と同じ日時にメッセージを受信)"""
+        self.tickets[ticket_id] = {'sent': sent or at, 'updated': at}
+
+    def __call__(self, request):
+        body = request['json']
+        since = parse_time(body['since']) if 'since' in body else None
+        matched = [
+            {'ticket_id': ticket_id, 'last_updated_at': ticket['updated'].isoformat()}
+            for ticket_id, ticket in sorted(self.tickets.items())
+            if since is None or ticket['sent'] >= since
+        ]
+        start = (body['page'] - 1) * body['per_page']
+        return 200, {}, matched[start:start + body['per_page']]
+
+
+class TestSyncState(unittest.TestCase):
+    """SyncState とストアのテストクラス"""
+
+    def test_round_trip(self):
+        """状態を辞書に変換して復元できることを確認"""
+        state = SyncState(watermark=START, recent={1: START.isoformat()}, run_since=START, run_page=3,
+                          run_max_updated_at=START + timedelta(hours=1), run_recent={2: START.isoformat()},
+                          last_full_sync=START)
+        self.assertEqual(SyncState.from_dict(state.to_dict()), state)
+        self.assertTrue(state.running)
+        self.assertFalse(SyncState().running)
+
+    def test_file_store(self):
+        """ファイルに保存した状態を読み込めて、一時ファイルが残らないことを確認"""
+        with tempfile.TemporaryDirectory() as directory:
+            store = FileWatermarkStore(directory)
+            self.assertIsNone(store.load('tickets-1'))
+
+            store.save('tickets-1', SyncState(watermark=START))
+            store.save('tickets-1', SyncState(watermark=START + timedelta(days=1)))
+            self.assertEqual(FileWatermarkStore(directory).load('tickets-1').watermark, START + timedelta(days=1))
+            self.assertEqual(os.listdir(directory), ['relation_sync_tickets-1.json'])
+
+            store.delete('tickets-1')
+            store.delete('tickets-1')
+            self.assertIsNone(store.load('tickets-1'))
+
+
+class TestTicketSyncEngine(unittest.TestCase):
+    """TicketSyncEngine のテストクラス"""
+
+    def setUp(self):
+        self.inbox = Inbox(95)
+        self.server = LocalAPIServer().start()
+        self.server.route('POST', '/api/v2/1/tickets/search', self.inbox)
+        self.client = RelationClient('token', 'test', base_url=self.server.base_url)
+        self.store = MemoryWatermarkStore()
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+    def engine(self, **kwargs):
+        kwargs.setdefault('overlap', timedelta(minutes=90))
+        return TicketSyncEngine(self.client, self.store, per_page=10, **kwargs)
+
+    def sync_ids(self, engine, **kwargs):
+        return [ticket.ticket_id for ticket in engine.sync(1, **kwargs)]
+
+    def test_initial_and_incremental_sync(self):
+        """初回はすべてのチケットを返し、以降は変更されたチケットだけを返すことを確認"""
+        engine = self.engine()
+        self.assertEqual(self.sync_ids(engine), list(range(1, 96)))
+        self.assertEqual(engine.state(1).watermark, START + timedelta(hours=95))
+        self.assertNotIn('since', self.server.requests[0]['json'])
+
+        # 変更がなければ、重なりの期間のチケットだけを取得して何も返さない
+        del self.server.requests[:]
+        self.assertEqual(self.sync_ids(engine), [])
+        self.assertEqual(engine.stats.fetched, 2)
+        self.assertEqual(engine.stats.skipped, 2)
+        self.assertEqual(self.server.requests[0]['json']['since'], (START + timedelta(hours=93, minutes=30)).isoformat())
+
+        self.inbox.touch(3, START + timedelta(hours=100))
+        self.inbox.touch(40, START + timedelta(hours=101))
+        self.assertEqual(self.sync_ids(engine), [3, 40])
+        self.assertEqual(engine.state(1).watermark, START + timedelta(hours=101))
+
+    def test_overlap_absorbs_clock_skew(self):
+        """メッセージの送信日時がウォーターマークより少し前でも、重なりの期間内なら取得することを確認"""
+        engine = self.engine()
+        list(engine.sync(1))
+
+        # 送信日時は送信元の時計による (ウォーターマークより1時間前)
+        self.inbox.touch(7, START + timedelta(hours=96), sent=START + timedelta(hours=94))
+        self.assertEqual(self.sync_ids(engine), [7])
+
+    def test_full_sync_detects_changes_without_messages(self):
+        """メッセージを伴わない変更は差分の検索では検出できず、全件の照合で反映することを確認"""
+        engine = self.engine()
+        list(engine.sync(1))
+
+        # ステータスの変更など (メッセージの送信日時は変わらない)
+        self.inbox.touch(5, START + timedelta(hours=100), sent=START + timedelta(hours=5))
+        self.assertEqual(self.sync_ids(engine), [])
+        self.assertFalse(engine.stats.full)
+
+        del self.server.requests[:]
+        self.assertEqual(self.sync_ids(engine, full=True), [5])
+        self.assertTrue(engine.stats.full)
+        self.assertNotIn('since', self.server.requests[0]['json'])
+        self.assertEqual(engine.state(1).watermark, START + timedelta(hours=100))
+        self.assertIsNotNone(engine.state(1).last_full_sync)
+        self.assertEqual(self.sync_ids(engine, full=True), [])
+
+    def test_full_sync_interval(self):
+        """前回の全件の照合から full_sync_interval が過ぎた同期を全件の照合にすることを確認"""
+        engine = self.engine(full_sync_interval=timedelta(hours=1))
+        list(engine.sync(1))
+        self.assertTrue(engine.stats.full)
+
+        list(engine.sync(1))
+        self.assertFalse(engine.stats.full)
+
+        state = engine.state(1)
+        state.last_full_sync -= timedelta(hours=2)
+        self.store.save(engine.key(1), state)
+        list(engine.sync(1))
+        self.assertTrue(engine.stats.full)
+
+    def test_initial_since(self):
+        """初回の同期を initial_since 以降に限定できることを確認"""
+        engine = self.engine()
+        self.assertEqual(self.sync_ids(engine, initial_since=START + timedelta(hours=90)), [90, 91, 92, 93, 94, 95])
+
+    def test_resume_after_interruption(self):
+        """中断された同期は、処理し終えたページの次のページから再開することを確認"""
+        engine = self.engine()
+        tickets = engine.sync(1)
+        received = [next(tickets).ticket_id for _ in range(15)]
+        tickets.close()  # 2ページ目の途中でプロセスが終了した場合と同じ
+
+        state = engine.state(1)
+        self.assertTrue(state.running)
+        self.assertEqual(state.run_page, 1)
+        self.assertIsNone(state.watermark)
+
+        del self.server.requests[:]
+        resumed = self.sync_ids(self.engine())
+        self.assertEqual(self.server.requests[0]['json']['page'], 2)
+        self.assertEqual(resumed, list(range(11, 96)))
+        self.assertEqual(sorted(set(received + resumed)), list(range(1, 96)))
+        self.assertFalse(engine.state(1).running)
+        self.assertEqual(engine.state(1).watermark, START + timedelta(hours=95))
+
+    def test_reset(self):
+        """reset() で状態を削除すると、次回は最初から同期することを確認"""
+        engine = self.engine()
+        list(engine.sync(1))
+        engine.reset(1)
+        self.assertEqual(len(self.sync_ids(engine)), 95)
+
+    def test_invalid_filters(self):
+        """同期で指定できない検索条件は ValueError になることを確認"""
+        with self.assertRaises(ValueError):
+            list(self.engine().sync(1, since='2024-01-01T00:00:00Z'))
+        with self.assertRaises(ValueError):
+            TicketSyncEngine(self.client, self.store, overlap=timedelta(minutes=-1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+トランスポートのテスト
+"""
+
+import unittest
+
+import requests
+
+from relation_client import RelationClient
+from relation_client.exceptions import APIError, ResourceNotFoundError
+from relation_client.retry import RetryPolicy
+from relation_client.tests.local_server import LocalAPIServer
+from relation_client.transport import RequestsTransport, Urllib3Response, Urllib3Transport
+
+
+class TestUrllib3Transport(unittest.TestCase):
+    """Urllib3Transportのテストクラス"""
+
+    def setUp(self):
+        """テスト前の準備"""
+        self.server = LocalAPIServer().start()
+        self.addCleanup(self.server.stop)
+        self.server.route('GET', '/api/v2/tickets', lambda req: (200, {'X-Test': '1'}, {'query': req['query']}))
+        self.server.route('POST', '/api/v2/tickets', lambda req: (201, {}, {'received': req['json']}))
+        self.server.route('DELETE', '/api/v2/tickets/1', lambda req: (204, {}, b''))
+        self.transport = Urllib3Transport()
+        self.addCleanup(self.transport.close)
+        self.client = RelationClient('token', 'test', base_url=self.server.base_url, transport=self.transport)
+
+    def test_get_with_params(self):
+        """クエリパラメータ付きのGETリクエストを送信できることを確認"""
+        result = self.client.get('tickets', params={'page': 2, 'status_cds': ['open', 'closed']})
+
+        self.assertEqual(result, {'query': {'page': ['2'], 'status_cds': ['open', 'closed']}})
+        headers = self.server.requests[0]['headers']
+        self.assertEqual(headers['Authorization'], 'Bearer token')
+        self.assertEqual(headers['Accept'], 'application/json')
+
+    def test_post_json(self):
+        """JSONボディのPOSTリクエストを送信できることを確認"""
+        result = self.client.post('tickets', {'title': '件名', 'ids': [1, 2]})
+
+        self.assertEqual(result, {'received': {'title': '件名', 'ids': [1, 2]}})
+
+    def test_empty_response(self):
+        """本文のないレスポンスは空の辞書になることを確認"""
+        self.assertEqual(self.client.delete('tickets/1'), {})
+
+    def test_error_response(self):
+        """エラーレスポンスが対応する例外になることを確認"""
+        with self.assertRaises(ResourceNotFoundError):
+            self.client.get('unknown')
+
+    def test_response_headers_are_case_insensitive(self):
+        """レスポンスヘッダーを大文字小文字を区別せずに参照できることを確認"""
+        response = self.transport.request('GET', f'{self.server.base_url}/tickets', self.client._headers)
+
+        self.assertIsInstance(response, Urllib3Response)
+        self.assertEqual(response.headers.get('x-test'), '1')
+
+    def test_connection_error(self):
+        """接続エラーが requests.ConnectionError として送出され、APIErrorになることを確認"""
+        base_url = self.server.base_url
+        self.server.stop()
+        client = RelationClient('token', 'test', base_url=base_url, transport=Urllib3Transport(),
+                                retry_policy=RetryPolicy(max_retries=0))
+
+        with self.assertRaises(requests.ConnectionError):
+            client._transport.request('GET', f'{base_url}/tickets', {}, timeout=1)
+        with self.assertRaises(APIError):
+            client.get('tickets')
+
+
+class TestRequestsTransport(unittest.TestCase):
+    """RequestsTransportのテストクラス"""
+
+    def test_default_transport(self):
+        """既定では RequestsTransport が使われ、Sessionを共有できることを確認"""
+        client = RelationClient('token', 'test')
+        self.assertIsInstance(client._transport, RequestsTransport)
+
+        session = requests.Session()
+        shared = RelationClient('token', 'test', session=session)
+        self.assertIs(shared._transport.session, session)
+
+
+if __name__ == '__main__':
+    unittest.main()
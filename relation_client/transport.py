@@ -0,0 +1,608 @@
+"""
+HTTPトランスポートモジュール
+
+このモジュールは、RelationClientがHTTPリクエストの送信に使うトランスポートを提供します。
+既定の ``RequestsTransport`` は requests のSessionを使い、``Urllib3Transport`` は
+requests の処理を経由せずに urllib3 のコネクションプールへ直接リクエストを送ります。
+``HttpxTransport`` は httpx を使い、HTTP/2で1本の接続にリクエストを多重化します。
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Mapping, Optional, Type
+from urllib.parse import urlencode
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - httpx はオプション依存
+    httpx = None
+
+from .codec import JSONCodec, default_codec
+
+
+# keep-alive接続を再利用せずに張り直すまでのアイドル秒数の既定値
+# (一般的なロードバランサーのアイドルタイムアウトである60秒より短くしている)
+DEFAULT_IDLE_TIMEOUT = 30.0
+
+
+class _IdleRecyclingPoolMixin:
+    """一定時間使われていないkeep-alive接続を、再利用する前に閉じるコネクションプール
+
+    サーバーやロードバランサーが先に切断した接続を再利用すると、リクエストの途中で
+    ``ConnectionError`` になりリトライを消費するため、``idle_timeout`` 秒以上使われて
+    いない接続は取り出した時点で閉じ、新しい接続を張り直してから送信します。
+    """
+
+    idle_timeout: Optional[float] = None
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout=timeout)
+        last_used = getattr(conn, '_relation_last_used', None)
+        if (self.idle_timeout is not None and last_used is not None
+                and getattr(conn, 'sock', None) is not None
+                and time.monotonic() - last_used > self.idle_timeout):
+            conn.close()
+        return conn
+
+    def _put_conn(self, conn):
+        if conn is not None:
+            conn._relation_last_used = time.monotonic()
+        super()._put_conn(conn)
+
+
+def _idle_recycling_pool_classes(idle_timeout: Optional[float]) -> Dict[str, Type[HTTPConnectionPool]]:
+    """アイドル接続を張り直すコネクションプールのクラスをスキームごとに返します"""
+    attrs = {'idle_timeout': idle_timeout}
+    return {
+        'http': type('IdleRecyclingHTTPConnectionPool', (_IdleRecyclingPoolMixin, HTTPConnectionPool), attrs),
+        'https': type('IdleRecyclingHTTPSConnectionPool', (_IdleRecyclingPoolMixin, HTTPSConnectionPool), attrs),
+    }
+
+
+def warm_connection_pool(pool: HTTPConnectionPool, count: int) -> int:
+    """コネクションプールに接続を事前に張っておきます
+
+    プールから最大 ``count`` 本の接続を取り出し、未接続のもの (新規の接続や、
+    切断・アイドル時間超過で閉じられたもの) を並列に接続してからプールに戻します。
+    他のスレッドが使用中の接続は対象外です。
+
+    Args:
+        pool: urllib3 のコネクションプール
+        count: 用意する接続数
+
+    Returns:
+        新たに接続した数
+
+    Raises:
+        requests.ConnectionError: 接続に失敗した場合 (成功した接続はプールに戻します)
+    """
+    conns = []
+    try:
+        for _ in range(count):
+            try:
+                conns.append(pool._get_conn(timeout=0))
+            except urllib3.exceptions.EmptyPoolError:
+                break
+        cold = [conn for conn in conns if getattr(conn, 'sock', None) is None]
+        if not cold:
+            return 0
+        with ThreadPoolExecutor(max_workers=len(cold), thread_name_prefix='relation-warmup') as executor:
+            errors = [error for error in executor.map(_connect, cold) if error is not None]
+        if errors:
+            raise requests.ConnectionError(f"接続の事前確立に失敗しました: {errors[0]}") from errors[0]
+        return len(cold)
+    finally:
+        for conn in conns:
+            pool._put_conn(conn)
+
+
+def _connect(conn: Any) -> Optional[BaseException]:
+    """接続を確立します (失敗した場合は接続を閉じて例外を返す)"""
+    try:
+        conn.connect()
+        return None
+    except Exception as e:
+        conn.close()
+        return e
+
+
+class KeepAliveHTTPAdapter(HTTPAdapter):
+    """``idle_timeout`` 秒以上使われていないkeep-alive接続を張り直すHTTPAdapter"""
+
+    __attrs__ = HTTPAdapter.__attrs__ + ['idle_timeout']
+
+    def __init__(self, idle_timeout: Optional[float] = DEFAULT_IDLE_TIMEOUT, **kwargs: Any):
+        """初期化
+
+        Args:
+            idle_timeout: 接続を張り直すまでのアイドル秒数 (None の場合は張り直さない)
+            **kwargs: HTTPAdapter に渡す引数 (pool_maxsize など)
+        """
+        self.idle_timeout = idle_timeout
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = _idle_recycling_pool_classes(self.idle_timeout)
+
+
+class Transport:
+    """トランスポートの基底クラス
+
+    ``request()`` は ``status_code``・``headers``・``content``・``text``・``json()`` を持つ
+    レスポンスを返し、接続エラーとタイムアウトはそれぞれ ``requests.ConnectionError`` と
+    ``requests.Timeout`` として送出します。
+    """
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        json: Optional[Any] = None,
+        timeout: Optional[float] = None
+    ) -> Any:
+        """HTTPリクエストを送信します
+
+        Args:
+            method: HTTPメソッド
+            url: リクエストURL
+            headers: リクエストヘッダー
+            params: クエリパラメータ
+            data: リクエストボディ (form-data)
+            json: リクエストボディ (JSON)
+            timeout: タイムアウト秒数
+
+        Returns:
+            レスポンス
+        """
+        raise NotImplementedError
+
+    def open_stream(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        json: Optional[Any] = None,
+        timeout: Optional[float] = None
+    ) -> Any:
+        """本文を受信せずにレスポンスを返します
+
+        返すレスポンスは ``request()`` と同じ属性に加え、本文を少しずつ受信する
+        ``iter_content(chunk_size)`` と、接続を解放する ``close()`` を持ちます。
+        ストリーミングに対応していないトランスポートは ``request()`` で本文ごと受信します。
+
+        Args:
+            request() と同じです。
+
+        Returns:
+            レスポンス
+        """
+        return self.request(method, url, headers, params=params, data=data, json=json, timeout=timeout)
+
+    def warmup(self, url: str, count: int) -> int:
+        """url のホストへの接続を事前に確立します
+
+        Args:
+            url: 接続先のURL
+            count: 用意する接続数
+
+        Returns:
+            新たに接続した数 (事前の接続に対応していないトランスポートは0)
+        """
+        return 0
+
+    def close(self) -> None:
+        """コネクションプールを閉じます"""
+
+    def reset_after_fork(self) -> None:
+        """fork後の子プロセスで呼び出し、親プロセスと共有している接続を手放します
+
+        親プロセスから引き継いだソケットを子プロセスで使うと、同じ接続に両方のプロセスの
+        リクエストとレスポンスが混ざるため、コネクションプールとロックを作り直します。
+        接続は閉じずに破棄するため、親プロセスの接続には影響しません。
+        """
+
+
+class RequestsTransport(Transport):
+    """requests のSessionを使うトランスポート (既定)"""
+
+    def __init__(
+        self,
+        session: Optional[requests.Session] = None,
+        pool_maxsize: int = 10,
+        idle_timeout: Optional[float] = DEFAULT_IDLE_TIMEOUT
+    ):
+        """初期化
+
+        Args:
+            session: 利用するSession (省略時は pool_maxsize の接続を持つSessionを生成)
+            pool_maxsize: コネクションプールに保持する最大接続数
+            idle_timeout: keep-alive接続を張り直すまでのアイドル秒数
+                (None の場合は張り直さない。session を指定した場合は使われません)
+        """
+        if session is None:
+            session = requests.Session()
+            adapter = KeepAliveHTTPAdapter(
+                idle_timeout=idle_timeout, pool_connections=1, pool_maxsize=pool_maxsize, pool_block=True
+            )
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        self.session = session
+
+    def request(self, method, url, headers, params=None, data=None, json=None, timeout=None):
+        """HTTPリクエストを送信します"""
+        return self.session.request(
+            method=method,
+            url=url,
+            headers=headers,
+            params=params,
+            data=data,
+            json=json,
+            timeout=timeout
+        )
+
+    def open_stream(self, method, url, headers, params=None, data=None, json=None, timeout=None):
+        """本文を受信せずにレスポンスを返します"""
+        return self.session.request(
+            method=method,
+            url=url,
+            headers=headers,
+            params=params,
+            data=data,
+            json=json,
+            timeout=timeout,
+            stream=True
+        )
+
+    def warmup(self, url: str, count: int) -> int:
+        """url のホストへの接続を事前に確立します"""
+        adapter = self.session.get_adapter(url)
+        settings = self.session.merge_environment_settings(url, {}, None, None, None)
+        if hasattr(adapter, 'get_connection_with_tls_context'):
+            # 実際のリクエストと同じTLS設定のプールを取得する (requests 2.32以降)
+            pool = adapter.get_connection_with_tls_context(
+                requests.Request('GET', url).prepare(),
+                settings['verify'],
+                proxies=settings['proxies'],
+                cert=settings['cert']
+            )
+        else:
+            pool = adapter.get_connection(url, settings['proxies'])
+        return warm_connection_pool(pool, count)
+
+    def close(self) -> None:
+        """コネクションプールを閉じます"""
+        self.session.close()
+
+    def reset_after_fork(self) -> None:
+        """fork後の子プロセスで呼び出し、Sessionのコネクションプールを作り直します"""
+        reset_session_after_fork(self.session)
+
+
+class Urllib3Response:
+    """Urllib3Transportのレスポンス
+
+    本文はバイト列のまま保持し、``json()`` ではテキストへの変換を挟まずにデコードします。
+    """
+
+    __slots__ = ('status_code', 'headers', 'content', 'codec')
+
+    def __init__(
+        self,
+        status_code: int,
+        headers: Mapping[str, str],
+        content: bytes,
+        codec: Optional[JSONCodec] = None
+    ):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.codec = codec or default_codec()
+
+    @property
+    def text(self) -> str:
+        """本文の文字列"""
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self) -> Any:
+        """本文をJSONとしてデコードします"""
+        return self.codec.loads(self.content)
+
+
+class Urllib3StreamingResponse:
+    """Urllib3Transportのストリーミングレスポンス
+
+    本文は ``iter_content()`` で少しずつ受信します。``content`` を参照した場合は
+    残りを全て受信します。最後まで受信せずに ``close()`` した場合は接続を閉じます。
+    """
+
+    def __init__(self, raw: urllib3.response.HTTPResponse, codec: Optional[JSONCodec] = None):
+        self.status_code = raw.status
+        self.headers = raw.headers
+        self.codec = codec or default_codec()
+        self._raw = raw
+        self._content: Optional[bytes] = None
+        self._consumed = False
+
+    @property
+    def content(self) -> bytes:
+        """本文 (未受信の分を全て受信します)"""
+        if self._content is None:
+            with _translate_urllib3_errors():
+                self._content = self._raw.read()
+            self._consumed = True
+            self.close()
+        return self._content
+
+    @property
+    def text(self) -> str:
+        """本文の文字列"""
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self) -> Any:
+        """本文をJSONとしてデコードします"""
+        return self.codec.loads(self.content)
+
+    def iter_content(self, chunk_size: int) -> Iterator[bytes]:
+        """本文を chunk_size バイトずつ受信して返します"""
+        with _translate_urllib3_errors():
+            yield from self._raw.stream(chunk_size)
+        self._consumed = True
+
+    def close(self) -> None:
+        """接続を解放します (本文を最後まで受信していない場合は接続を閉じる)"""
+        if not self._consumed:
+            self._raw.close()
+        self._raw.release_conn()
+
+
+class Urllib3Transport(Transport):
+    """urllib3 のコネクションプールへ直接リクエストを送るトランスポート
+
+    requests のリクエスト準備処理 (ヘッダーのマージ、フックなど) を経由しないため、
+    1リクエストあたりのPython側の処理が少なくなります。プロキシや環境変数
+    (``HTTPS_PROXY`` など) の設定は参照しません。
+    """
+
+    def __init__(
+        self,
+        pool_maxsize: int = 10,
+        num_pools: int = 10,
+        retries: bool = False,
+        idle_timeout: Optional[float] = DEFAULT_IDLE_TIMEOUT,
+        json_codec: Optional[JSONCodec] = None
+    ):
+        """初期化
+
+        Args:
+            pool_maxsize: ホストごとのコネクションプールに保持する最大接続数
+            num_pools: 保持するホストごとのコネクションプールの数
+            retries: urllib3 自身のリトライを有効にするかどうか
+                (リトライはクライアントのリトライポリシーで行うため、既定は無効)
+            idle_timeout: keep-alive接続を張り直すまでのアイドル秒数 (None の場合は張り直さない)
+            json_codec: リクエストボディのエンコードとレスポンスのデコードに使うJSONコーデック
+                (省略時は default_codec())
+        """
+        self.json_codec = json_codec or default_codec()
+        self.pool_maxsize = pool_maxsize
+        self.num_pools = num_pools
+        self.idle_timeout = idle_timeout
+        self.retries = retries
+        self.pool = self._create_pool()
+
+    def _create_pool(self) -> urllib3.PoolManager:
+        """コネクションプールを生成します"""
+        pool = urllib3.PoolManager(num_pools=self.num_pools, maxsize=self.pool_maxsize, block=True)
+        pool.pool_classes_by_scheme = _idle_recycling_pool_classes(self.idle_timeout)
+        return pool
+
+    def request(self, method, url, headers, params=None, data=None, json=None, timeout=None):
+        """HTTPリクエストを送信します"""
+        response = self._send(method, url, headers, params, data, json, timeout, preload_content=True)
+        return Urllib3Response(response.status, response.headers, response.data, self.json_codec)
+
+    def open_stream(self, method, url, headers, params=None, data=None, json=None, timeout=None):
+        """本文を受信せずにレスポンスを返します"""
+        response = self._send(method, url, headers, params, data, json, timeout, preload_content=False)
+        return Urllib3StreamingResponse(response, self.json_codec)
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        params: Optional[Dict[str, Any]],
+        data: Optional[Dict[str, Any]],
+        json: Optional[Any],
+        timeout: Optional[float],
+        preload_content: bool
+    ) -> urllib3.response.HTTPResponse:
+        """リクエストを送信し、urllib3 のレスポンスを返します"""
+        if params:
+            url = f"{url}?{urlencode(params, doseq=True)}"
+        body = None
+        if json is not None:
+            body = self.json_codec.dumps(json)
+        elif data is not None:
+            body = urlencode(data, doseq=True)
+            headers = {**headers, 'Content-Type': 'application/x-www-form-urlencoded'}
+        with _translate_urllib3_errors():
+            return self.pool.request(
+                method,
+                url,
+                body=body,
+                headers=headers,
+                timeout=timeout,
+                retries=self.retries,
+                redirect=False,
+                preload_content=preload_content
+            )
+
+    def warmup(self, url: str, count: int) -> int:
+        """url のホストへの接続を事前に確立します"""
+        return warm_connection_pool(self.pool.connection_from_url(url), count)
+
+    def close(self) -> None:
+        """コネクションプールを閉じます"""
+        self.pool.clear()
+
+    def reset_after_fork(self) -> None:
+        """fork後の子プロセスで呼び出し、コネクションプールを作り直します"""
+        self.pool = self._create_pool()
+
+
+class HttpxTransport(Transport):
+    """httpx を使い、HTTP/2で1本の接続にリクエストを多重化するトランスポート
+
+    HTTP/2では並列に送信したリクエストが1本のTCP+TLS接続を共有するため、
+    接続ごとのハンドシェイクや輻輳ウィンドウの立ち上がりを待つ必要がありません。
+    HTTP/2を使うかどうかはTLSのALPNでサーバーと合意します。
+
+    httpx の同期クライアントは複数スレッドから同じHTTP/2接続を使うとストリームIDの
+    順序が入れ替わることがあるため、リクエストはバックグラウンドスレッドの
+    イベントループ上の ``httpx.AsyncClient`` で送信し、呼び出し元のスレッドは
+    その完了を待ちます。利用するには ``pip install 'relation-client[http2]'`` が必要です。
+    """
+
+    def __init__(
+        self,
+        http2: bool = True,
+        http1: bool = True,
+        max_connections: int = 10,
+        json_codec: Optional[JSONCodec] = None
+    ):
+        """初期化
+
+        Args:
+            http2: HTTP/2を有効にするかどうか
+            http1: HTTP/1.1を有効にするかどうか (False にすると平文でもHTTP/2を使う)
+            max_connections: 最大接続数
+            json_codec: リクエストボディのエンコードに使うJSONコーデック (省略時は default_codec())
+
+        Raises:
+            ImportError: httpx (HTTP/2を使う場合は h2 も) がインストールされていない場合
+        """
+        if httpx is None:
+            raise ImportError(
+                "HttpxTransportを利用するには httpx が必要です: "
+                "pip install 'relation-client[http2]'"
+            )
+        self.http2 = http2
+        self.http1 = http1
+        self.max_connections = max_connections
+        self.json_codec = json_codec or default_codec()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client: Optional['httpx.AsyncClient'] = None
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """バックグラウンドのイベントループを取得します (初回呼び出し時に起動)"""
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._client = httpx.AsyncClient(
+                    http1=self.http1,
+                    http2=self.http2,
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections
+                    )
+                )
+                self._thread = threading.Thread(
+                    target=loop.run_forever, name='relation-http2', daemon=True
+                )
+                self._thread.start()
+                self._loop = loop
+            return self._loop
+
+    def request(self, method, url, headers, params=None, data=None, json=None, timeout=None):
+        """HTTPリクエストを送信します"""
+        loop = self._get_loop()
+        content = None if json is None else self.json_codec.dumps(json)
+        future = asyncio.run_coroutine_threadsafe(
+            self._client.request(
+                method,
+                url,
+                headers=headers,
+                params=params,
+                data=data,
+                content=content,
+                timeout=timeout
+            ),
+            loop
+        )
+        try:
+            return future.result()
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(str(e)) from e
+
+    def close(self) -> None:
+        """コネクションプールを閉じ、バックグラウンドスレッドを終了します"""
+        with self._lock:
+            loop, self._loop = self._loop, None
+            if loop is None:
+                return
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            self._thread.join()
+            loop.close()
+            self._client = None
+            self._thread = None
+
+    def reset_after_fork(self) -> None:
+        """fork後の子プロセスで呼び出し、イベントループとクライアントを破棄します
+
+        バックグラウンドスレッドは子プロセスに引き継がれないため、次のリクエストで
+        イベントループと ``httpx.AsyncClient`` を作り直します。
+        """
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._client = None
+
+
+@contextmanager
+def _translate_urllib3_errors() -> Iterator[None]:
+    """urllib3 の例外を requests の接続エラー・タイムアウトに変換します"""
+    try:
+        yield
+    except urllib3.exceptions.NewConnectionError as e:
+        # NewConnectionError は TimeoutError のサブクラスのため先に判定する
+        raise requests.ConnectionError(str(e)) from e
+    except urllib3.exceptions.TimeoutError as e:
+        raise requests.Timeout(str(e)) from e
+    except urllib3.exceptions.HTTPError as e:
+        raise requests.ConnectionError(str(e)) from e
+
+
+def reset_session_after_fork(session: requests.Session) -> None:
+    """fork後の子プロセスで呼び出し、Sessionのコネクションプールを作り直します
+
+    マウントされている各アダプターのプール (プロキシ用を含む) を、同じ設定で
+    作り直します。親プロセスの接続は閉じずに破棄します。
+
+    Args:
+        session: 親プロセスから引き継いだSession
+    """
+    for adapter in set(session.adapters.values()):
+        if isinstance(adapter, HTTPAdapter):
+            adapter.init_poolmanager(
+                adapter._pool_connections, adapter._pool_maxsize, block=adapter._pool_block
+            )
+            adapter.proxy_manager = {}
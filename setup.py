@@ -31,18 +31,22 @@ setup(
         'requests>=2.25.0',
         'pytz',
     ],
+    extras_require={
+        'async': ['httpx>=0.23.0'],
+        'http2': ['httpx[http2]>=0.23.0'],
+        'fast': ['orjson>=3.0'],
+    },
     classifiers=[
         'Development Status :: 3 - Alpha',
         'Intended Audience :: Developers',
         'License :: OSI Approved :: MIT License',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.6',
         'Programming Language :: Python :: 3.7',
         'Programming Language :: Python :: 3.8',
         'Programming Language :: Python :: 3.9',
         'Programming Language :: Python :: 3.10',
     ],
-    python_requires='>=3.6',
+    python_requires='>=3.7',
     project_urls={
         'Bug Reports': 'https://github.com/solahsoyalp/relation_client/issues',
         'Source': 'https://github.com/solahsoyalp/relation_client',